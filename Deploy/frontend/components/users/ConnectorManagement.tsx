@@ -3,7 +3,7 @@
 import { useState, useEffect } from 'react';
 import { connectorsApi } from '@/lib/api';
 import { ReportSchedule } from '@/types';
-import { convertLocalTimeToUTC } from '@/lib/utils';
+import { convertLocalTimeToUTC, formatReportSchedule, parseReportSchedule } from '@/lib/utils';
 
 interface Connector {
   connector_id: string;
@@ -112,9 +112,7 @@ export default function ConnectorManagement({ userId, onUpdate }: Props) {
       ) : (
         <div className="space-y-3">
           {connectors.map((connector) => {
-            const schedule = connector.report_schedule 
-              ? JSON.parse(connector.report_schedule) 
-              : { frequency: 'daily', time: '09:00' };
+            const schedule = parseReportSchedule(connector.report_schedule);
             
             return (
               <div key={connector.connector_id} className="border rounded-lg p-4 bg-white relative overflow-hidden">
@@ -184,7 +182,7 @@ export default function ConnectorManagement({ userId, onUpdate }: Props) {
                     </p>
                   )}
                   <p className="text-sm text-gray-600">
-                    <strong>Schedulazione:</strong> {schedule.frequency === 'daily' ? 'Giornaliero' : schedule.frequency === 'weekly' ? 'Settimanale' : 'Mensile'} alle {schedule.time}
+                    <strong>Schedulazione:</strong> {schedule.cron ? formatReportSchedule(schedule) : `${schedule.frequency === 'daily' ? 'Giornaliero' : schedule.frequency === 'weekly' ? 'Settimanale' : 'Mensile'} alle ${schedule.time}`}
                   </p>
                 </div>
               </div>
@@ -221,12 +219,14 @@ function ConnectorModal({ userId, connector, onClose, onSuccess }: ConnectorModa
   });
   const [schedule, setSchedule] = useState<ReportSchedule>(() => {
     if (connector?.report_schedule) {
-      const parsed = JSON.parse(connector.report_schedule);
+      const parsed = parseReportSchedule(connector.report_schedule);
       return {
         frequency: parsed.frequency || 'daily',
         time: parsed.time || '09:00',
         day_of_week: parsed.day_of_week,
         day_of_month: parsed.day_of_month,
+        cron: parsed.cron,
+        timezone: parsed.timezone,
       };
     }
     return { frequency: 'daily', time: '09:00' };
@@ -254,7 +254,10 @@ function ConnectorModal({ userId, connector, onClose, onSuccess }: ConnectorModa
 
       const payload = {
         ...formData,
-        report_schedule: JSON.stringify(scheduleData),
+        // Una schedulazione cron resta invariata, salvo cambio di periodicità nel form
+        report_schedule: schedule.cron
+          ? JSON.stringify({ cron: schedule.cron, ...(schedule.timezone ? { timezone: schedule.timezone } : {}) })
+          : JSON.stringify(scheduleData),
       };
 
       if (connector) {
@@ -338,9 +341,14 @@ function ConnectorModal({ userId, connector, onClose, onSuccess }: ConnectorModa
 
           <div className="mb-4">
             <label className="block text-gray-700 font-medium mb-2">Periodicità Report</label>
+            {schedule.cron && (
+              <p className="text-sm text-gray-600 mb-2">
+                Schedulazione cron attuale: <code>{schedule.cron}</code>{schedule.timezone ? ` (${schedule.timezone})` : ''}. Cambia la periodicità per sostituirla.
+              </p>
+            )}
             <select
               value={schedule.frequency}
-              onChange={(e) => setSchedule({ ...schedule, frequency: e.target.value as any })}
+              onChange={(e) => setSchedule({ ...schedule, frequency: e.target.value as any, cron: undefined, timezone: undefined })}
               className="input"
               disabled={loading}
             >
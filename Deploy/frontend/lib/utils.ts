@@ -53,6 +53,25 @@ export function convertUTCToLocalTime(utcTime: string): string {
   }
 }
 
+/**
+ * Read a stored report_schedule: JSON object, or a bare cron expression of older connectors
+ */
+export function parseReportSchedule(scheduleStr: string | object | null | undefined): ReportSchedule {
+  const fallback: ReportSchedule = { frequency: 'daily', time: '09:00' };
+  if (!scheduleStr || scheduleStr === 'N/A') return fallback;
+  if (typeof scheduleStr === 'object') return { ...fallback, ...(scheduleStr as ReportSchedule) };
+
+  const text = scheduleStr.trim();
+  if (!text.startsWith('{')) {
+    return { ...fallback, cron: text };
+  }
+  try {
+    return { ...fallback, ...JSON.parse(text) };
+  } catch {
+    return fallback;
+  }
+}
+
 /**
  * Parse report schedule from string or object
  */
@@ -68,7 +87,7 @@ export function parseReportScheduleObject(scheduleStr: string | object | null):
       return schedule;
     }
     
-    const schedule: ReportSchedule = JSON.parse(scheduleStr as string);
+    const schedule: ReportSchedule = parseReportSchedule(scheduleStr as string);
     if (schedule.time) {
       schedule.time = convertUTCToLocalTime(schedule.time);
     }
@@ -90,8 +109,12 @@ export function formatReportSchedule(scheduleStr: string | object | null): strin
   try {
     const schedule = typeof scheduleStr === 'object' 
       ? scheduleStr as ReportSchedule
-      : JSON.parse(scheduleStr as string) as ReportSchedule;
+      : parseReportSchedule(scheduleStr as string);
     
+    if (schedule.cron) {
+      return `Cron ${schedule.cron}${schedule.timezone ? ` (${schedule.timezone})` : ''}`;
+    }
+
     const displayTime = schedule.time ? convertUTCToLocalTime(schedule.time) : '09:00';
     
     switch (schedule.frequency) {
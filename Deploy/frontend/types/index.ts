@@ -50,6 +50,8 @@ export interface ReportSchedule {
   time: string;
   day_of_week?: number;
   day_of_month?: number;
+  cron?: string;      // 5-field cron expression (set through the API), instead of frequency/time
+  timezone?: string;  // IANA timezone of the cron expression
 }
 
 export interface CreateResellerInput {
@@ -0,0 +1,236 @@
+"""
+Maya Analytics - XML parser benchmark
+
+Runs detect_report_type(), the parse_*_xml() function of each report type, the full
+parse_xml_report() pipeline and the parse_xml_summary() totals-only mode over the sample
+Setera exports in the repository root, at the original size and scaled up (the records of
+the report are repeated N times). For every run it measures wall time (best and median of --repeat runs), the tracemalloc peak of one
+extra run, and the element/record counts of the input. With --synthetic, exports produced by
+setera_xml_generator.py (one per report type and entity count) are benchmarked as well.
+
+Results are written as JSON so two commits can be compared. The script and the sample exports
+always come from this checkout; --tree loads report_generator from another one, so older commits
+(which do not have this script) can be measured with the same inputs:
+
+    git worktree add /tmp/maya-before <other commit>
+    python Deploy/scripts/benchmark_parsers.py --tree /tmp/maya-before --output before.json
+    python Deploy/scripts/benchmark_parsers.py --output after.json --compare before.json
+
+Trees older than the streaming record engine have no parse_xml_summary() (the mode is skipped)
+and their parsers take the export as text, so it is decoded before every call.
+"""
+import argparse
+import importlib
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# report_generator reads its configuration at import time; the AWS clients are created but never called
+for name, value in (('REGION', 'eu-central-1'), ('AWS_DEFAULT_REGION', 'eu-central-1'),
+                    ('USERS_TABLE', 'benchmark-users'), ('REPORTS_TABLE', 'benchmark-reports'),
+                    ('EMAIL_SENDER_FUNCTION', 'benchmark-email-sender'),
+                    ('FETCH_STATE_TABLE', 'benchmark-fetch-state')):
+    os.environ.setdefault(name, value)
+
+import setera_xml_generator  # noqa: E402
+
+SAMPLE_FILES = ['acd.xml', 'user.xml', 'ivr.xml', 'hunt group.xml', 'rulebased.xml']
+
+GROUPSOBJECTS_SUFFIX = '__groupsobjects'
+
+TYPE_PARSERS = {
+    'acd': 'parse_acd_xml',
+    'user': 'parse_user_xml',
+    'ivr': 'parse_ivr_xml',
+    'huntgroup': 'parse_huntgroup_xml',
+    'rulebased': 'parse_rulebased_xml',
+}
+
+rg = None
+
+def load_report_generator(tree: str):
+    """Import report_generator (and the schedule engine layer, when the tree has it) from a checkout"""
+    global rg
+    sys.path.insert(0, os.path.join(tree, 'Deploy', 'src', 'report-generator'))
+    schedule_engine_dir = os.path.join(tree, 'Deploy', 'src', 'schedule-engine')  # Lambda layer
+    if os.path.isdir(schedule_engine_dir):
+        sys.path.insert(0, schedule_engine_dir)
+    rg = importlib.import_module('report_generator')
+    logging.getLogger().setLevel(logging.WARNING)
+    return rg
+
+def as_parser_input(function):
+    """Wrap function so it gets text on trees whose parsers do not read bytes yet"""
+    if hasattr(rg, 'GROUPSOBJECTS_SUFFIX'):
+        return function
+    return lambda xml_bytes: function(xml_bytes.decode('utf-8'))
+
+def scale_export(xml_bytes: bytes, factor: int) -> bytes:
+    """Repeat the records of the <report> element factor times (same document otherwise)"""
+    if factor <= 1:
+        return xml_bytes
+    start = xml_bytes.index(b'<report>') + len(b'<report>')
+    end = xml_bytes.index(b'</report>', start)
+    return xml_bytes[:start] + xml_bytes[start:end] * factor + xml_bytes[end:]
+
+def count_elements(xml_bytes: bytes) -> dict:
+    """Element and *__groupsobjects record counts of a document"""
+    elements = 0
+    records = 0
+    for _, element in ET.iterparse(io.BytesIO(xml_bytes)):
+        elements += 1
+        if element.tag.endswith(GROUPSOBJECTS_SUFFIX):
+            records += 1
+            element.clear()
+    return {'elements': elements, 'records': records}
+
+def measure(function, xml_bytes: bytes, repeat: int) -> dict:
+    """Wall time over repeat runs, then the tracemalloc peak of one more run"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(xml_bytes)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        function(xml_bytes)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'wall_seconds_min': round(min(timings), 6),
+        'wall_seconds_median': round(statistics.median(timings), 6),
+        'tracemalloc_peak_bytes': peak
+    }
+
+def get_commit(tree: str) -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=tree,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return 'unknown'
+
+def load_samples(samples) -> list:
+    """(name, bytes) of the sample exports in the repository root"""
+    sources = []
+    for sample in samples:
+        with open(os.path.join(REPO_ROOT, sample), 'rb') as f:
+            sources.append((sample, f.read()))
+    return sources
+
+def generate_samples(entity_counts, days: int) -> list:
+    """(name, bytes) of one synthetic export per report type and entity count"""
+    sources = []
+    for report_type in setera_xml_generator.REPORT_TYPES:
+        for entities in entity_counts:
+            config = setera_xml_generator.GeneratorConfig(report_type=report_type, entities=entities, days=days)
+            sources.append((f"synthetic-{report_type}-{entities}", setera_xml_generator.generate_setera_xml(config)))
+    return sources
+
+def run_benchmarks(scales, repeat: int, sources) -> list:
+    results = []
+    for sample, original in sources:
+        report_type = as_parser_input(rg.detect_report_type)(original)
+
+        names = ['detect_report_type']
+        if report_type in TYPE_PARSERS:
+            names.append(TYPE_PARSERS[report_type])
+        names.append('parse_xml_report')
+        if hasattr(rg, 'parse_xml_summary'):
+            names.append('parse_xml_summary')
+        functions = [(name, as_parser_input(getattr(rg, name))) for name in names]
+
+        for scale in scales:
+            xml_bytes = scale_export(original, scale)
+            counts = count_elements(xml_bytes)
+            for name, function in functions:
+                result = {
+                    'sample': sample,
+                    'report_type': report_type,
+                    'scale': scale,
+                    'bytes': len(xml_bytes),
+                    **counts,
+                    'function': name,
+                    **measure(function, xml_bytes, repeat)
+                }
+                results.append(result)
+                print(f"{sample:<24} x{scale:<4} {name:<22} "
+                      f"{result['wall_seconds_median'] * 1000:>10.2f} ms  "
+                      f"{result['tracemalloc_peak_bytes'] / 1024 / 1024:>8.2f} MB peak  "
+                      f"{counts['records']:>7} records")
+    return results
+
+def compare(results: list, baseline_path: str) -> None:
+    """Print the median time and peak memory ratios against a previous results file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(r['sample'], r['scale'], r['function']): r for r in baseline['results']}
+
+    print(f"\nComparison with {baseline_path} ({baseline['meta'].get('commit', 'unknown')}):")
+    for result in results:
+        before = previous.get((result['sample'], result['scale'], result['function']))
+        if not before:
+            continue
+        time_ratio = result['wall_seconds_median'] / before['wall_seconds_median'] if before['wall_seconds_median'] else 0
+        memory_ratio = result['tracemalloc_peak_bytes'] / before['tracemalloc_peak_bytes'] if before['tracemalloc_peak_bytes'] else 0
+        print(f"{result['sample']:<24} x{result['scale']:<4} {result['function']:<22} "
+              f"time x{time_ratio:.2f}  peak x{memory_ratio:.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Setera XML parsers on the sample exports')
+    parser.add_argument('--scales', default='1,10,50', help='Comma-separated record multipliers (default: 1,10,50)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per measurement (default: 5)')
+    parser.add_argument('--samples', default=','.join(SAMPLE_FILES), help='Comma-separated sample files in the repo root')
+    parser.add_argument('--synthetic', help='Comma-separated entity counts of generated exports to benchmark too')
+    parser.add_argument('--synthetic-days', type=int, default=31, help='Days in the generated exports (default: 31)')
+    parser.add_argument('--output', default='benchmark_results.json', help='JSON results file')
+    parser.add_argument('--compare', help='Previous JSON results file to compare against')
+    parser.add_argument('--tree', default=REPO_ROOT,
+                        help='Checkout to load report_generator from, e.g. a git worktree (default: this one)')
+    args = parser.parse_args()
+
+    load_report_generator(os.path.abspath(args.tree))
+
+    scales = [int(scale) for scale in args.scales.split(',') if scale.strip()]
+    samples = [sample.strip() for sample in args.samples.split(',') if sample.strip()]
+    sources = load_samples(samples)
+    if args.synthetic:
+        entity_counts = [int(count) for count in args.synthetic.split(',') if count.strip()]
+        sources += generate_samples(entity_counts, args.synthetic_days)
+    results = run_benchmarks(scales, args.repeat, sources)
+
+    output = {
+        'meta': {
+            'commit': get_commit(os.path.abspath(args.tree)),
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'scales': scales,
+            'synthetic': args.synthetic,
+            'synthetic_days': args.synthetic_days
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == '__main__':
+    main()
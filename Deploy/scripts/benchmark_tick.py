@@ -0,0 +1,257 @@
+"""
+Maya Analytics - schedule tick benchmark
+
+Times a schedule_check tick against the number of due connectors. Every connector has its own
+export (no coalescing) and the external calls are slowed down like in production: each export
+download waits --fetch-latency seconds and each Bedrock call --bedrock-latency seconds. The
+tables, the email sender and the exports are the stand-ins of replay_tick.py. Connectors can share
+an export (--connectors-per-export) and the report pipeline can get other stage limits
+(--stage-limits, REPORT_*_CONCURRENCY otherwise). --export-entities replaces the small sample
+export with a synthetic ACD export of that many queues (setera_xml_generator.py), so that
+parsing is CPU-bound: the pipeline's stages run on threads, and only their waits overlap. Modes:
+
+    serial     jobs run in the tick on a LocalReportQueue with one worker (the old serial loop)
+    local-N    jobs run in the tick on a LocalReportQueue with N worker threads
+    sqs        jobs go to a stand-in SQS client: the tick only dispatches them. Each job is then
+               run as its own worker invocation, and the completion time with
+               --sqs-concurrency parallel workers is estimated from the job durations
+
+    python Deploy/scripts/benchmark_tick.py --connectors 1,10,50 --modes serial,local-8,sqs
+    python Deploy/scripts/benchmark_tick.py --fetch-latency 2 --bedrock-latency 5 --output tick.json
+    python Deploy/scripts/benchmark_tick.py --modes local-8 --stage-limits insights=8,render=2
+    python Deploy/scripts/benchmark_tick.py --connectors 16 --modes serial,local-8 --export-entities 40
+"""
+import argparse
+import heapq
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import replay_tick  # noqa: E402  (sets up the environment and imports report_generator)
+import setera_xml_generator  # noqa: E402
+from replay_tick import LocalLambda, LocalTable, frozen_datetime, rg  # noqa: E402
+
+logging.getLogger().setLevel(logging.WARNING)
+
+TICK_AT = datetime(2025, 11, 13, 9, 0)
+SAMPLE_EXPORT = os.path.join(replay_tick.REPO_ROOT, 'acd.xml')
+INSIGHTS = "📊 <strong>Analisi di benchmark</strong>\n• Risposta Bedrock simulata"
+
+class SlowExportAdapter(BaseAdapter):
+    """Serves the sample export after a delay, with a different comment (and hash) per URL"""
+
+    def __init__(self, body: bytes, latency: float):
+        super().__init__()
+        self.body = body
+        self.latency = latency
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        time.sleep(self.latency)
+        body = self.body + f"\n<!-- {request.url} -->\n".encode('utf-8')
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.status_code, response.reason = 200, 'OK'
+        response.headers = CaseInsensitiveDict({'Content-Type': 'application/xml', 'Content-Length': str(len(body))})
+        response.raw = io.BytesIO(body)
+        return response
+
+    def close(self):
+        pass
+
+class SlowBedrock:
+    """Bedrock runtime stand-in answering the same insights after a delay"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def invoke_model(self, modelId: str, body: str, **kwargs):
+        time.sleep(self.latency)
+        payload = json.dumps({'content': [{'type': 'text', 'text': INSIGHTS}]}).encode('utf-8')
+        return {'body': io.BytesIO(payload)}
+
+class LocalSqs:
+    """SQS client stand-in: the messages are only collected"""
+
+    def __init__(self):
+        self.messages = []
+        self._lock = threading.Lock()
+
+    def send_message_batch(self, QueueUrl: str, Entries: list, **kwargs):
+        with self._lock:
+            self.messages.extend(entry['MessageBody'] for entry in Entries)
+        return {'Successful': [{'Id': entry['Id']} for entry in Entries], 'Failed': []}
+
+def build_users(connectors: int, connectors_per_export: int = 1) -> list:
+    """One end-user per connector, every connector due at TICK_AT"""
+    schedule = json.dumps({'frequency': 'daily', 'time': TICK_AT.strftime('%H:%M')})
+    return [{
+        'user_id': f"benchmark-user-{index}",
+        'tenant_id': 'benchmark-tenant',
+        'email': f"user{index}@example.com",
+        'name': f"Utente {index}",
+        'role': 'User',
+        'connectors': [{
+            'connector_id': f"benchmark-connector-{index}",
+            'name': f"Centralino {index}",
+            'xml_endpoint': f"https://setera.example/export/{index // connectors_per_export}.xml",
+            'report_enabled': True,
+            'report_schedule': schedule
+        }]
+    } for index in range(connectors)]
+
+def parse_stage_limits(text: str) -> dict:
+    """stage=limit pairs, e.g. 'insights=8,render=2'"""
+    limits = {}
+    for pair in text.split(','):
+        if pair.strip():
+            stage, _, limit = pair.partition('=')
+            if stage.strip() not in rg.REPORT_STAGES:
+                raise SystemExit(f"Unknown stage '{stage.strip()}' (stages: {', '.join(rg.REPORT_STAGES)})")
+            limits[stage.strip()] = int(limit)
+    return limits
+
+def install_stand_ins(connectors: int, export: bytes, args) -> None:
+    """Fresh stand-ins for one tick: nothing cached from the previous run"""
+    rg.users_table = LocalTable('user_id', build_users(connectors, args.connectors_per_export))
+    rg.fetch_state_table = LocalTable('connector_id')
+    rg.reports_table = LocalTable(None)
+    rg.schedule_table = None
+    rg.bedrock = SlowBedrock(args.bedrock_latency)
+    rg.lambda_client = LocalLambda()
+    rg.datetime = frozen_datetime(TICK_AT)
+    rg.report_cache = rg.ReportCache()
+    rg.partial_store = None
+    rg.export_archive = None
+    rg.xml_fetch_client = rg.XmlFetchClient()
+    rg.tracer = rg.Tracer(emf_enabled=False)
+    rg.report_pipeline = rg.ReportPipeline({**rg.create_report_pipeline().stage_limits, **args.stage_limits},
+                                           args.connector_concurrency)
+    adapter = SlowExportAdapter(export, args.fetch_latency)
+    rg.xml_fetch_client.session.mount('http://', adapter)
+    rg.xml_fetch_client.session.mount('https://', adapter)
+
+def get_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=replay_tick.REPO_ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return 'unknown'
+
+def estimate_completion(durations: list, workers: int) -> float:
+    """Makespan of the jobs handed out in order to the first free of the workers"""
+    finish_times = [0.0] * max(1, workers)
+    for duration in durations:
+        heapq.heappush(finish_times, heapq.heappop(finish_times) + duration)
+    return max(finish_times)
+
+def run_mode(mode: str, connectors: int, export: bytes, args) -> dict:
+    install_stand_ins(connectors, export, args)
+    sqs = None
+    if mode == 'sqs':
+        sqs = rg.sqs_client = LocalSqs()
+        rg.report_queue = rg.SqsReportQueue('local://report-jobs')
+    else:
+        rg.report_queue = rg.LocalReportQueue(concurrency=int(mode.split('-')[1]) if mode.startswith('local-') else 1)
+
+    started = time.perf_counter()
+    response = rg.lambda_handler({'trigger_type': 'schedule_check'}, None)
+    tick_seconds = time.perf_counter() - started
+    result = json.loads(response['body'])
+
+    run = {
+        'mode': mode,
+        'connectors': connectors,
+        'tick_seconds': round(tick_seconds, 4),
+        'jobs': result.get('jobs', 0),
+        'successful': result.get('successful', 0),
+        'failed': result.get('failed', 0)
+    }
+    if sqs is not None:
+        durations = []
+        for index, body in enumerate(sqs.messages):
+            started = time.perf_counter()
+            worker_response = rg.lambda_handler({'Records': [{'messageId': str(index), 'body': body}]}, None)
+            durations.append(time.perf_counter() - started)
+            run['failed'] += len(worker_response['batchItemFailures'])
+        run['successful'] = len(rg.lambda_client.emails)
+        run['job_seconds_max'] = round(max(durations, default=0.0), 4)
+        run['completion_seconds'] = round(tick_seconds + estimate_completion(durations, args.sqs_concurrency), 4)
+    else:
+        run['completion_seconds'] = run['tick_seconds']
+    return run
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the schedule tick against the number of due connectors')
+    parser.add_argument('--connectors', default='1,10,50', help='Comma-separated due connector counts (default: 1,10,50)')
+    parser.add_argument('--modes', default='serial,local-8,sqs', help='Comma-separated modes: serial, local-N, sqs')
+    parser.add_argument('--fetch-latency', type=float, default=0.2, help='Seconds per export download (default: 0.2)')
+    parser.add_argument('--bedrock-latency', type=float, default=0.5, help='Seconds per Bedrock call (default: 0.5)')
+    parser.add_argument('--connectors-per-export', type=int, default=1,
+                        help='Connectors sharing each export, i.e. one fetch (default: 1)')
+    parser.add_argument('--stage-limits', default='', type=parse_stage_limits,
+                        help='Comma-separated stage=limit overrides, stages: ' + ', '.join(rg.REPORT_STAGES))
+    parser.add_argument('--connector-concurrency', type=int, default=rg.REPORT_CONNECTOR_CONCURRENCY,
+                        help='Connectors of a shared export reported at once (default: REPORT_CONNECTOR_CONCURRENCY)')
+    parser.add_argument('--export-entities', type=int, default=0,
+                        help='Serve a synthetic ACD export of this many queues instead of acd.xml (default: 0)')
+    parser.add_argument('--export-days', type=int, default=31, help='Days of the synthetic export (default: 31)')
+    parser.add_argument('--sqs-concurrency', type=int, default=10, help='Parallel workers assumed in sqs mode (default: 10)')
+    parser.add_argument('--timeout', type=float, default=301, help='Lambda timeout to compare the ticks with (default: 301)')
+    parser.add_argument('--output', default='benchmark_tick.json', help='JSON results file')
+    args = parser.parse_args()
+
+    if args.export_entities:
+        export = setera_xml_generator.generate_setera_xml(setera_xml_generator.GeneratorConfig(
+            report_type='acd', entities=args.export_entities, days=args.export_days))
+    else:
+        with open(SAMPLE_EXPORT, 'rb') as f:
+            export = f.read()
+    counts = [int(count) for count in args.connectors.split(',') if count.strip()]
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+
+    results = []
+    for connectors in counts:
+        for mode in modes:
+            run = run_mode(mode, connectors, export, args)
+            results.append(run)
+            over = '  > timeout' if run['tick_seconds'] > args.timeout else ''
+            print(f"{connectors:>5} connectors  {mode:<10} tick {run['tick_seconds']:>9.2f} s  "
+                  f"completion {run['completion_seconds']:>9.2f} s  "
+                  f"{run['successful']:>5} sent {run['failed']:>4} failed{over}")
+
+    output = {
+        'meta': {
+            'commit': get_commit(),
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'fetch_latency': args.fetch_latency,
+            'bedrock_latency': args.bedrock_latency,
+            'sqs_concurrency': args.sqs_concurrency,
+            'connectors_per_export': args.connectors_per_export,
+            'export_bytes': len(export),
+            'stage_limits': rg.report_pipeline.stage_limits,
+            'connector_concurrency': args.connector_concurrency
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,389 @@
+"""
+Maya Analytics - offline replay of a schedule tick
+
+Replays a recorded schedule_check tick through lambda_handler() -> get_scheduled_users() ->
+generate_report_for_user() with every external service replaced by a local stand-in: the
+DynamoDB tables are served from JSON files, Bedrock answers with recorded responses, the
+email sender Lambda (SES) only captures the emails, and the Setera exports are served to the
+real streaming fetch path by a requests adapter. The clock is frozen at the tick time, so two
+replays of the same recording render the same emails byte for byte.
+
+A recording is a directory:
+
+    tick.json           {"now": "2025-11-13T09:00:00"}  (UTC time of the tick)
+    users.json          items of the users table (a scan result)
+    fetch_state.json    optional, items of the fetch state table
+    exports.json        {"<xml endpoint URL>": "exports/acd.xml", ...}, paths relative to the recording
+    bedrock/            recorded insights: <sha256 of the prompt>.txt
+    expected/           optional baseline: the emails/ folder of an earlier replay
+
+For every run the tick is timed per stage (scan, fetch and parse, insights, rendering, send,
+history) and the emails are written to <output>/emails. They are compared with the baseline
+(--baseline, default <recording>/expected): every changed email gets an HTML diff in
+<output>/diffs. Prompts without a recorded response are saved in <output>/bedrock_misses so
+they can be recorded, and answered with a placeholder meanwhile.
+
+    python Deploy/scripts/replay_tick.py recordings/tick-0900 --output replay-out --repeat 5
+    python Deploy/scripts/replay_tick.py recordings/tick-0900 --baseline replay-out/emails --fail-on-diff
+"""
+import argparse
+import difflib
+import functools
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import shutil
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Optional
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+REPORT_GENERATOR_DIR = os.path.join(REPO_ROOT, 'Deploy', 'src', 'report-generator')
+SCHEDULE_ENGINE_DIR = os.path.join(REPO_ROOT, 'Deploy', 'src', 'schedule-engine')  # Lambda layer
+
+# report_generator reads its configuration at import time; the AWS clients are created but never called
+for name, value in (('REGION', 'eu-central-1'), ('AWS_DEFAULT_REGION', 'eu-central-1'),
+                    ('USERS_TABLE', 'replay-users'), ('REPORTS_TABLE', 'replay-reports'),
+                    ('EMAIL_SENDER_FUNCTION', 'replay-email-sender'),
+                    ('FETCH_STATE_TABLE', 'replay-fetch-state')):
+    os.environ.setdefault(name, value)
+# Nothing persistent: every run starts cold and never touches S3
+for name in ('REPORT_CACHE_BUCKET', 'REPORT_CACHE_DIR', 'EXPORT_ARCHIVE_BUCKET', 'EXPORT_ARCHIVE_DIR'):
+    os.environ.pop(name, None)
+sys.path.insert(0, REPORT_GENERATOR_DIR)
+sys.path.insert(0, SCHEDULE_ENGINE_DIR)
+
+import report_generator as rg  # noqa: E402
+
+# Stages timed in every run: (label, report_generator function)
+STAGES = [
+    ('scan', 'get_scheduled_users'),
+    ('fetch_parse', 'fetch_connector_export'),
+    ('insights', 'generate_insights_with_claude'),
+    ('render', 'format_email_content'),
+    ('send', 'send_report_email'),
+    ('history', 'save_report_history'),
+    ('fetch_state', 'save_fetch_state'),
+    ('report', 'generate_report_for_user'),
+]
+
+MISSING_RESPONSE = "Risposta Bedrock non registrata per questo prompt ({prompt_hash})."
+
+def load_json(path: str, default=None):
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        # DynamoDB hands numbers out as Decimal
+        return json.load(f, parse_float=Decimal)
+
+class LocalTable:
+    """DynamoDB table stand-in with the calls report_generator makes (safe for its worker threads)"""
+
+    def __init__(self, key: Optional[str], items=None):
+        self.key = key
+        self.items = [dict(item) for item in items or []]
+        self._lock = threading.RLock()
+
+    def scan(self, **kwargs):
+        return {'Items': [dict(item) for item in self.items]}
+
+    def query(self, KeyConditionExpression: str, ExpressionAttributeValues: dict, **kwargs):
+        name, placeholder = [part.strip() for part in KeyConditionExpression.split('=')]
+        value = ExpressionAttributeValues[placeholder]
+        return {'Items': [dict(item) for item in self.items if item.get(name) == value]}
+
+    def get_item(self, Key: dict, **kwargs):
+        for item in self.items:
+            if all(item.get(name) == value for name, value in Key.items()):
+                return {'Item': dict(item)}
+        return {}
+
+    def put_item(self, Item: dict, **kwargs):
+        with self._lock:
+            if self.key:
+                self.items = [item for item in self.items if item.get(self.key) != Item.get(self.key)]
+            self.items.append(dict(Item))
+        return {}
+
+    def update_item(self, Key: dict, UpdateExpression: str, ExpressionAttributeValues: dict, **kwargs):
+        with self._lock:
+            item = self.get_item(Key).get('Item') or dict(Key)
+            for assignment in UpdateExpression[len('SET '):].split(','):
+                name, placeholder = [part.strip() for part in assignment.split('=')]
+                item[name] = ExpressionAttributeValues[placeholder]
+            return self.put_item(item)
+
+class LocalBedrock:
+    """Bedrock runtime stand-in answering with the recorded response of each prompt"""
+
+    def __init__(self, responses_dir: str, misses_dir: str):
+        self.responses_dir = responses_dir
+        self.misses_dir = misses_dir
+        self.calls = 0
+        self.misses = 0
+
+    def invoke_model(self, modelId: str, body: str, **kwargs):
+        self.calls += 1
+        prompt = json.loads(body)['messages'][0]['content']
+        prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        path = os.path.join(self.responses_dir, f"{prompt_hash}.txt")
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                text = f.read()
+        else:
+            self.misses += 1
+            os.makedirs(self.misses_dir, exist_ok=True)
+            with open(os.path.join(self.misses_dir, f"{prompt_hash}.prompt.txt"), 'w', encoding='utf-8') as f:
+                f.write(prompt)
+            text = MISSING_RESPONSE.format(prompt_hash=prompt_hash[:12])
+        payload = json.dumps({'content': [{'type': 'text', 'text': text}]}).encode('utf-8')
+        return {'body': io.BytesIO(payload)}
+
+class LocalLambda:
+    """Lambda client stand-in: the payloads sent to the email sender are captured"""
+
+    def __init__(self):
+        self.emails = []
+
+    def invoke(self, FunctionName: str, Payload: str, **kwargs):
+        self.emails.append(json.loads(Payload))
+        return {'StatusCode': 202}
+
+class ExportAdapter(BaseAdapter):
+    """Serves the recorded exports to the real fetch path, honouring conditional requests"""
+
+    def __init__(self, recording_dir: str, exports: dict):
+        super().__init__()
+        self.recording_dir = recording_dir
+        self.exports = exports
+        self.requests = 0
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        self.requests += 1
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.encoding = 'utf-8'
+        relative_path = self.exports.get(request.url)
+        if relative_path is None:
+            response.status_code, response.reason, body = 404, 'Not Found', b''
+            response.headers = CaseInsensitiveDict()
+        else:
+            with open(os.path.join(self.recording_dir, relative_path), 'rb') as f:
+                body = f.read()
+            etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+            response.headers = CaseInsensitiveDict({'ETag': etag, 'Content-Type': 'application/xml'})
+            if request.headers.get('If-None-Match') == etag:
+                response.status_code, response.reason, body = 304, 'Not Modified', b''
+            else:
+                response.status_code, response.reason = 200, 'OK'
+                response.headers['Content-Length'] = str(len(body))
+        response.raw = io.BytesIO(body)
+        return response
+
+    def close(self):
+        pass
+
+def frozen_datetime(now: datetime):
+    """datetime subclass whose utcnow()/now() return the tick time"""
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def utcnow(cls):
+            return now
+
+        @classmethod
+        def now(cls, tz=None):
+            return now if tz is None else now.replace(tzinfo=timezone.utc).astimezone(tz)
+
+    return FrozenDatetime
+
+def instrument(timings: dict) -> None:
+    """Wrap the stage functions of report_generator so each call is timed into timings[label]"""
+    for label, name in STAGES:
+        function = getattr(rg, name)
+        function = getattr(function, '__wrapped__', function)
+
+        def timed(*args, _function=function, _label=label, **kwargs):
+            started = time.perf_counter()
+            try:
+                return _function(*args, **kwargs)
+            finally:
+                timings.setdefault(_label, []).append(time.perf_counter() - started)
+
+        setattr(rg, name, functools.wraps(function)(timed))
+
+def email_file_name(email: dict, seen: dict) -> str:
+    """Stable file name of a captured email: user id plus its position among that user's emails"""
+    user_id = re.sub(r'[^A-Za-z0-9@._-]+', '_', str(email.get('user_id') or email.get('to_email') or 'unknown'))
+    seen[user_id] = seen.get(user_id, 0) + 1
+    return f"{user_id}-{seen[user_id]}.html"
+
+def run_tick(recording_dir: str, now: datetime, output_dir: str) -> dict:
+    """Replay the tick once on fresh stand-ins; returns timings, handler result and captured emails"""
+    users_table = LocalTable('user_id', load_json(os.path.join(recording_dir, 'users.json'), []))
+    fetch_state_table = LocalTable('connector_id', load_json(os.path.join(recording_dir, 'fetch_state.json'), []))
+    reports_table = LocalTable(None)  # History items are only appended
+    bedrock = LocalBedrock(os.path.join(recording_dir, 'bedrock'), os.path.join(output_dir, 'bedrock_misses'))
+    lambda_client = LocalLambda()
+    adapter = ExportAdapter(recording_dir, load_json(os.path.join(recording_dir, 'exports.json'), {}))
+
+    rg.users_table = users_table
+    rg.fetch_state_table = fetch_state_table
+    rg.reports_table = reports_table
+    rg.bedrock = bedrock
+    rg.lambda_client = lambda_client
+    rg.datetime = frozen_datetime(now)
+    rg.report_cache = rg.ReportCache()
+    rg.partial_store = None
+    rg.export_archive = None
+    rg.xml_fetch_client = rg.XmlFetchClient()
+    rg.tracer = rg.Tracer(emf_enabled=False)
+    rg.report_queue = rg.LocalReportQueue(concurrency=1)  # Jobs in schedule order: emails are compared by position
+    rg.xml_fetch_client.session.mount('http://', adapter)
+    rg.xml_fetch_client.session.mount('https://', adapter)
+
+    timings = {}
+    instrument(timings)
+    started = time.perf_counter()
+    response = rg.lambda_handler({'trigger_type': 'schedule_check'}, None)
+    timings['tick'] = [time.perf_counter() - started]
+
+    return {
+        'timings': timings,
+        'result': json.loads(response['body']),
+        'emails': lambda_client.emails,
+        'reports': reports_table.items,
+        'fetch_state': fetch_state_table.items,
+        'bedrock': {'calls': bedrock.calls, 'misses': bedrock.misses},
+        'export_requests': adapter.requests
+    }
+
+def summarize_timings(runs: list) -> dict:
+    """Per stage: calls per tick, and the median/min over the runs of the summed stage time"""
+    summary = {}
+    for label in [label for label, _ in STAGES] + ['tick']:
+        totals = [sum(run['timings'].get(label, [])) for run in runs]
+        summary[label] = {
+            'calls': len(runs[0]['timings'].get(label, [])),
+            'seconds_median': round(statistics.median(totals), 6),
+            'seconds_min': round(min(totals), 6)
+        }
+    return summary
+
+def write_emails(emails: list, emails_dir: str) -> list:
+    """Write the captured emails as HTML files, plus an index.json of their recipients and subjects"""
+    os.makedirs(emails_dir, exist_ok=True)
+    seen = {}
+    index = []
+    for email in emails:
+        file_name = email_file_name(email, seen)
+        with open(os.path.join(emails_dir, file_name), 'w', encoding='utf-8') as f:
+            f.write(email.get('html_content', ''))
+        index.append({'file': file_name, 'to_email': email.get('to_email'), 'subject': email.get('subject')})
+    with open(os.path.join(emails_dir, 'index.json'), 'w') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    return index
+
+def diff_emails(baseline_dir: str, emails_dir: str, diffs_dir: str) -> dict:
+    """Compare the emails with the baseline; an HTML side-by-side diff is written for every changed one"""
+    def html_files(directory):
+        return {name for name in os.listdir(directory) if name.endswith('.html')} if os.path.isdir(directory) else set()
+
+    baseline, current = html_files(baseline_dir), html_files(emails_dir)
+    report = {'identical': [], 'changed': [], 'added': sorted(current - baseline), 'missing': sorted(baseline - current)}
+    for name in sorted(baseline & current):
+        with open(os.path.join(baseline_dir, name), encoding='utf-8') as f:
+            before = f.read().splitlines()
+        with open(os.path.join(emails_dir, name), encoding='utf-8') as f:
+            after = f.read().splitlines()
+        if before == after:
+            report['identical'].append(name)
+            continue
+        report['changed'].append(name)
+        os.makedirs(diffs_dir, exist_ok=True)
+        diff = difflib.HtmlDiff(wrapcolumn=120).make_file(before, after, f"baseline/{name}", f"replay/{name}",
+                                                          context=True, numlines=3)
+        with open(os.path.join(diffs_dir, name.replace('.html', '.diff.html')), 'w', encoding='utf-8') as f:
+            f.write(diff)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a recorded schedule tick offline')
+    parser.add_argument('recording', help='Recording directory (tick.json, users.json, exports.json, bedrock/)')
+    parser.add_argument('--output', default='replay_output', help='Output directory (default: replay_output)')
+    parser.add_argument('--now', help='Tick time, ISO format (default: "now" of tick.json)')
+    parser.add_argument('--repeat', type=int, default=1, help='Timed replays of the tick (default: 1)')
+    parser.add_argument('--baseline', help='emails/ folder to diff against (default: <recording>/expected)')
+    parser.add_argument('--fail-on-diff', action='store_true', help='Exit with status 1 when an email changed')
+    parser.add_argument('--verbose', action='store_true', help='Keep the INFO logs of report_generator')
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    tick = load_json(os.path.join(args.recording, 'tick.json'), {})
+    now_text = args.now or tick.get('now')
+    if not now_text:
+        parser.error('the tick time is required: --now or "now" in tick.json')
+    now = datetime.fromisoformat(now_text)
+
+    if os.path.isdir(args.output):
+        shutil.rmtree(args.output)
+    os.makedirs(args.output)
+
+    runs = [run_tick(args.recording, now, args.output) for _ in range(max(args.repeat, 1))]
+    last = runs[-1]
+
+    emails_dir = os.path.join(args.output, 'emails')
+    index = write_emails(last['emails'], emails_dir)
+    baseline_dir = args.baseline or os.path.join(args.recording, 'expected')
+    diff_report = diff_emails(baseline_dir, emails_dir, os.path.join(args.output, 'diffs'))
+    timings = summarize_timings(runs)
+
+    output = {
+        'meta': {
+            'recording': os.path.abspath(args.recording),
+            'now': now.isoformat(),
+            'repeat': len(runs),
+            'baseline': os.path.abspath(baseline_dir) if os.path.isdir(baseline_dir) else None
+        },
+        'result': last['result'],
+        'timings': timings,
+        'bedrock': last['bedrock'],
+        'export_requests': last['export_requests'],
+        'emails': index,
+        'diff': diff_report
+    }
+    with open(os.path.join(args.output, 'replay.json'), 'w') as f:
+        json.dump(output, f, indent=2, ensure_ascii=False, cls=rg.DecimalEncoder)
+    with open(os.path.join(args.output, 'state.json'), 'w') as f:
+        json.dump({'reports': last['reports'], 'fetch_state': last['fetch_state']}, f, indent=2,
+                  ensure_ascii=False, cls=rg.DecimalEncoder)
+
+    print(f"Tick {now.isoformat()}: {last['result'].get('successful', 0)} sent, {last['result'].get('failed', 0)} failed, "
+          f"{len(last['emails'])} emails, {last['bedrock']['misses']}/{last['bedrock']['calls']} Bedrock misses")
+    for label, timing in timings.items():
+        print(f"  {label:<12} {timing['calls']:>4} calls  {timing['seconds_median'] * 1000:>10.2f} ms median  "
+              f"{timing['seconds_min'] * 1000:>10.2f} ms min")
+    if output['meta']['baseline']:
+        print(f"Diff against {baseline_dir}: {len(diff_report['identical'])} identical, {len(diff_report['changed'])} changed, "
+              f"{len(diff_report['added'])} added, {len(diff_report['missing'])} missing")
+    print(f"\nResults written to {args.output}")
+
+    if args.fail_on_diff and (diff_report['changed'] or diff_report['added'] or diff_report['missing']):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,592 @@
+"""
+Maya Analytics - synthetic Setera XML exports
+
+Generates Setera-shaped XML exports (ACD, User, IVR, HuntGroup, RuleBased) of any size, for
+load and scale testing without customer data. The layout follows the real exports bundled
+in the repository root:
+
+- one block of <{grouping}__groupsobjects> records per grouping (date, month, period,
+  quarter, time, week, weekday, year, yearmonth), each starting with its 'Total' row;
+- for every period of the grouping, a 'group' row per entity group followed by the
+  'object' rows of its entities (depth_in_hierarchy 0 and 1);
+- metric columns per report type, dynamic_column lists (ACD members and service-time
+  buckets, IVR/RuleBased transfer destinations), averages and percentages left out when
+  their denominator is zero, as Setera does;
+- optional <specifications><calls> rows and a <metadata> section describing the columns.
+
+Call volumes are drawn per entity, day and time slot (business-hours profile, quieter
+weekends) with a fixed seed, so a configuration always produces the same bytes. Every row is
+internally consistent, group/total rows are the sums of their object rows and all day-based
+groupings share the same daily values.
+
+    python Deploy/scripts/setera_xml_generator.py --type acd --entities 200 --days 31 --output acd.xml
+    python Deploy/scripts/setera_xml_generator.py --type user --entities 500 --output - | gzip > user.xml.gz
+
+iter_setera_xml() yields the document as byte chunks, to be streamed into the parser directly.
+"""
+import argparse
+import sys
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+REPORT_TYPES = ('acd', 'user', 'ivr', 'huntgroup', 'rulebased')
+
+# Groupings in the order Setera writes them
+GROUPINGS = ('date', 'month', 'period', 'quarter', 'time', 'week', 'weekday', 'year', 'yearmonth')
+
+WEEKDAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+MONTH_NAMES = ('January', 'February', 'March', 'April', 'May', 'June', 'July', 'August',
+               'September', 'October', 'November', 'December')
+
+CHUNK_SIZE = 64 * 1024
+
+# Column kinds: SUM is written as is, AVG/PCT are computed from two additive values and
+# omitted when the denominator is zero, DYN is a dynamic_column list
+SUM, AVG, PCT, DYN, SERVICE_LEVEL = 'sum', 'avg', 'pct', 'dyn', 'service_level'
+
+REPORT_COLUMNS = {
+    'acd': [
+        ('incoming_total', SUM),
+        ('incoming_queue_closed', SUM),
+        ('incoming_answered', SUM),
+        ('incoming_unanswered', SUM),
+        ('incoming_callbacks_requested', SUM),
+        ('outgoing_callbacks_resolved', SUM),
+        ('incoming_answered_average_queue_time', AVG, 'answered_queue_time', 'incoming_answered'),
+        ('incoming_answered_average_call_duration', AVG, 'incoming_answered_total_call_duration', 'incoming_answered'),
+        ('incoming_answered_total_call_duration', SUM),
+        ('incoming_unanswered_average_queue_time', AVG, 'unanswered_queue_time', 'incoming_unanswered'),
+        ('incoming_total_redirected', SUM),
+        ('incoming_redirected_no_agents_owerflow', SUM),
+        ('incoming_redirected_queue_timeout', SUM),
+        ('incoming_redirected_nightmode', SUM),
+        ('incoming_answered_within_service_time', DYN),
+        ('incoming_unanswered_within_service_time', DYN),
+        ('incoming_service_level', SERVICE_LEVEL, 'incoming_answered_within_service_time', 'incoming_total'),
+        ('incoming_percent_answered', PCT, 'incoming_answered', 'incoming_total'),
+        ('incoming_percent_unanswered', PCT, 'incoming_unanswered', 'incoming_total'),
+        ('incoming_percent_redirected', PCT, 'incoming_total_redirected', 'incoming_total'),
+        ('outgoing_transferred_out', SUM),
+        ('incoming_answered_by_member_specification', DYN),
+    ],
+    'user': [
+        ('incoming_total', SUM),
+        ('incoming_from_external', SUM),
+        ('incoming_from_internal', SUM),
+        ('incoming_from_queues', SUM),
+        ('incoming_answered', SUM),
+        ('incoming_unanswered', SUM),
+        ('incoming_busy', SUM),
+        ('incoming_total_redirected', SUM),
+        ('incoming_redirected_to_voicemail', SUM),
+        ('incoming_redirected_to_other', SUM),
+        ('incoming_total_duration', SUM),
+        ('outgoing_total', SUM),
+        ('outgoing_to_external', SUM),
+        ('outgoing_to_internal', SUM),
+        ('outgoing_answered', SUM),
+        ('outgoing_unanswered', SUM),
+        ('outgoing_busy', SUM),
+        ('outgoing_answered_average_duration', AVG, 'outgoing_answered_total_duration', 'outgoing_answered'),
+        ('outgoing_answered_total_duration', SUM),
+        ('outgoing_transferred_out', SUM),
+        ('total_calls', SUM),
+        ('total_calls_duration', SUM),
+        ('incoming_percent_answered', PCT, 'incoming_answered', 'incoming_total'),
+        ('failures', SUM),
+    ],
+    'ivr': [
+        ('incoming_total_handled_by_ivr', SUM),
+        ('incoming_connected', SUM),
+        ('incoming_not_connected', SUM),
+        ('incoming_average_call_duration_for_ivr', AVG, 'incoming_total_call_duration_for_ivr', 'incoming_total_handled_by_ivr'),
+        ('incoming_total_call_duration_for_ivr', SUM),
+        ('incoming_terminated_because_of_failure', SUM),
+        ('transferred_to_specification', DYN),
+    ],
+    'huntgroup': [
+        ('incoming_total', SUM),
+        ('incoming_answered_by_huntgroup_members', SUM),
+        ('incoming_unanswered_by_huntgroup_members', SUM),
+        ('incoming_sent_to_overflow_number', SUM),
+        ('incoming_answered_by_huntgroup_members_total_call_duration', SUM),
+    ],
+    'rulebased': [
+        ('incoming_total_handled_by_rulebase', SUM),
+        ('incoming_connected', SUM),
+        ('incoming_not_connected', SUM),
+        ('incoming_failure', SUM),
+        ('incoming_transferred_to_specification', DYN),
+    ],
+}
+
+# Exports that carry a <specifications><calls> section
+REPORTS_WITH_CALLS = ('acd', 'user', 'rulebased')
+
+class GeneratorConfig:
+    """Shape of a synthetic export"""
+
+    def __init__(self, report_type: str = 'acd', entities: int = 10, groups: int = 1, days: int = 7,
+                 start: Optional[date] = None, slots: int = 48, slot_minutes: int = 30, members: int = 5,
+                 destinations: int = 4, service_buckets: Tuple[int, ...] = (20, 40), calls: int = 0,
+                 volume: float = 2.0, seed: int = 1, bom: bool = True):
+        if report_type not in REPORT_TYPES:
+            raise ValueError(f"Unknown report type: {report_type} (expected one of {', '.join(REPORT_TYPES)})")
+        if slots * slot_minutes > 24 * 60:
+            raise ValueError("slots * slot_minutes must fit in a day")
+        self.report_type = report_type
+        self.entities = entities
+        self.groups = max(1, min(groups, entities))
+        self.days = days
+        self.start = start or date(2025, 11, 10)
+        self.slots = slots
+        self.slot_minutes = slot_minutes
+        self.members = members
+        self.destinations = destinations
+        self.service_buckets = tuple(sorted(service_buckets))
+        self.calls = calls
+        self.volume = volume  # Mean calls per entity per busy slot
+        self.seed = seed
+        self.bom = bom
+
+# ========================================
+# PERIOD LABELS
+# ========================================
+
+def format_date_label(day: date) -> str:
+    return f"{day.strftime('%d/%m/%Y')} {WEEKDAY_NAMES[day.weekday()][:3]}"
+
+def format_slot_label(slot: int, config: GeneratorConfig) -> str:
+    start = slot * config.slot_minutes
+    end = (start + config.slot_minutes) % (24 * 60)
+    return f"{start // 60:02d}:{start % 60:02d} - {end // 60:02d}:{end % 60:02d}"
+
+def format_period_label(days: List[date]) -> str:
+    if len(days) == 1:
+        return days[0].strftime('%d/%m/%Y')
+    return f"{days[0].strftime('%d/%m/%Y')} -> {days[-1].strftime('%d/%m/%Y')}"
+
+def day_bucket_label(grouping: str, day: date) -> str:
+    if grouping == 'date':
+        return format_date_label(day)
+    if grouping == 'weekday':
+        return WEEKDAY_NAMES[day.weekday()]
+    if grouping == 'week':
+        iso_year, iso_week, _ = day.isocalendar()
+        return f"{iso_year} W{iso_week}"
+    if grouping == 'month':
+        return MONTH_NAMES[day.month - 1]
+    if grouping == 'quarter':
+        return f"{day.year} Q{(day.month - 1) // 3 + 1}"
+    if grouping == 'year':
+        return str(day.year)
+    if grouping == 'yearmonth':
+        return f"{day.year} {MONTH_NAMES[day.month - 1]}"
+    raise ValueError(grouping)
+
+def grouping_buckets(grouping: str, config: GeneratorConfig) -> List[Tuple[str, str, List[int]]]:
+    """(label, axis, indexes) of every period of a grouping: axis 'day' or 'slot'"""
+    days = [config.start + timedelta(days=offset) for offset in range(config.days)]
+    if grouping == 'time':
+        return [(format_slot_label(slot, config), 'slot', [slot]) for slot in range(config.slots)]
+    if grouping == 'period':
+        return [(format_period_label(days), 'day', list(range(config.days)))]
+
+    buckets = {}
+    for index, day in enumerate(days):
+        buckets.setdefault(day_bucket_label(grouping, day), []).append(index)
+    items = [(label, 'day', indexes) for label, indexes in buckets.items()]
+    if grouping == 'weekday':
+        items.sort(key=lambda item: WEEKDAY_NAMES.index(item[0]))
+    return items
+
+# ========================================
+# ENTITIES AND VOLUMES
+# ========================================
+
+def phone_number(prefix: str, index: int) -> str:
+    return f"+39{prefix}{index:06d}"
+
+def entity_identity(report_type: str, index: int) -> Tuple[str, str]:
+    """(object_identifier, display label) of the index-th entity"""
+    if report_type == 'user':
+        return f"user.{index:04d}", f"User {index:04d}"
+    labels = {'acd': 'Coda', 'ivr': 'IVR', 'huntgroup': 'Gruppo Risposta', 'rulebased': 'Regola'}
+    prefixes = {'acd': '0599', 'ivr': '0690', 'huntgroup': '0550', 'rulebased': '0522'}
+    return phone_number(prefixes[report_type], index), f"{labels[report_type]} {index:04d}"
+
+def dynamic_key(identifier: str) -> str:
+    """Setera column key of a phone number: '+' dropped, leading digit XML-escaped (_x0033_ for 3)"""
+    digits = identifier.lstrip('+')
+    return f"_x{ord(digits[0]):04x}_{digits[1:]}"
+
+def draw_volumes(config: GeneratorConfig, rng: np.random.Generator) -> np.ndarray:
+    """Incoming calls per (entity, day, slot), business-hours profile and quieter weekends"""
+    hours = (np.arange(config.slots) * config.slot_minutes + config.slot_minutes / 2) / 60
+    hourly_profile = 0.05 + np.exp(-((hours - 11) ** 2) / 6) + 0.8 * np.exp(-((hours - 15.5) ** 2) / 5)
+    weekdays = np.array([(config.start + timedelta(days=offset)).weekday() for offset in range(config.days)])
+    daily_profile = np.where(weekdays >= 5, 0.25, 1.0) * rng.uniform(0.8, 1.2, config.days)
+    entity_scale = rng.lognormal(0.0, 0.6, config.entities)
+    rates = config.volume * entity_scale[:, None, None] * daily_profile[None, :, None] * hourly_profile[None, None, :]
+    return rng.poisson(rates).astype(np.int64)
+
+def binomial(rng: np.random.Generator, n: int, p: float) -> int:
+    return int(rng.binomial(n, p)) if n > 0 else 0
+
+def spread(rng: np.random.Generator, n: int, weights: np.ndarray) -> np.ndarray:
+    """Split n calls across the weighted categories"""
+    if n <= 0:
+        return np.zeros(len(weights), dtype=np.int64)
+    return rng.multinomial(n, weights)
+
+class ReportModel:
+    """Derives the additive values of one object row from its incoming call count"""
+
+    def __init__(self, config: GeneratorConfig, rng: np.random.Generator):
+        self.config = config
+        self.rng = rng
+        self.answer_rate = rng.uniform(0.72, 0.97, config.entities)
+        self.duration = rng.uniform(60, 240, config.entities)
+        self.member_weights = rng.dirichlet(np.ones(max(config.members, 1)), config.entities)
+        self.destination_weights = rng.dirichlet(np.ones(max(config.destinations, 1)), config.entities)
+        self.members = [(f"agent.{m:04d}", f"Answered by Agent {m:04d} (agent.{m:04d})") for m in range(config.members)]
+        destination_verb = 'Transferred to' if config.report_type == 'rulebased' else 'Connected to'
+        self.destinations = []
+        for d in range(config.destinations):
+            number = phone_number('0292', d)
+            self.destinations.append((dynamic_key(number), f"{destination_verb} {number} - Destinazione {d:03d}"))
+        self.service_labels = self._service_labels()
+
+    def _service_labels(self) -> Dict[str, List[Tuple[str, str]]]:
+        answered, unanswered, levels = [], [], []
+        lower = 0
+        for bucket in self.config.service_buckets:
+            answered.append((f"successwithin.{bucket}", f"Answered within {lower}-{bucket} seconds"))
+            unanswered.append((f"failedwithin.{bucket}", f"Unanswered within {lower}-{bucket} seconds"))
+            levels.append((f"servicelevel.{bucket}", f"(%) Service level ({bucket} seconds)"))
+            lower = bucket + 1
+        return {
+            'incoming_answered_within_service_time': answered,
+            'incoming_unanswered_within_service_time': unanswered,
+            'incoming_service_level': levels,
+        }
+
+    def dynamic_labels(self, column: str) -> List[Tuple[str, str]]:
+        if column == 'incoming_answered_by_member_specification':
+            return self.members
+        if column in ('transferred_to_specification', 'incoming_transferred_to_specification'):
+            return self.destinations
+        return self.service_labels[column]
+
+    def derive(self, entity: int, n: int) -> Dict:
+        derive = getattr(self, f'derive_{self.config.report_type}')
+        return derive(entity, n)
+
+    def service_split(self, n: int, mean_wait: float) -> np.ndarray:
+        """Calls per service-time bucket (cumulative thresholds), the remainder beyond the last one"""
+        buckets = self.config.service_buckets
+        edges = np.array((0,) + buckets, dtype=float)
+        cdf = 1 - np.exp(-edges[1:] / mean_wait)
+        weights = np.diff(np.concatenate(([0.0], cdf, [1.0])))
+        return spread(self.rng, n, weights)[:len(buckets)]
+
+    def derive_acd(self, entity: int, n: int) -> Dict:
+        rng = self.rng
+        closed = binomial(rng, n, 0.01)
+        redirected_split = spread(rng, binomial(rng, n - closed, 0.04), np.array([0.3, 0.3, 0.4]))
+        redirected = int(redirected_split.sum())
+        queued = n - closed - redirected
+        answered = binomial(rng, queued, self.answer_rate[entity])
+        unanswered = queued - answered
+        callbacks = binomial(rng, unanswered, 0.15)
+        return {
+            'incoming_total': n,
+            'incoming_queue_closed': closed,
+            'incoming_answered': answered,
+            'incoming_unanswered': unanswered,
+            'incoming_callbacks_requested': callbacks,
+            'outgoing_callbacks_resolved': binomial(rng, callbacks, 0.8),
+            'answered_queue_time': int(answered * rng.uniform(10, 30)),
+            'incoming_answered_total_call_duration': int(answered * self.duration[entity] * rng.uniform(0.7, 1.3)),
+            'unanswered_queue_time': int(unanswered * rng.uniform(20, 90)),
+            'incoming_total_redirected': redirected,
+            'incoming_redirected_no_agents_owerflow': int(redirected_split[0]),
+            'incoming_redirected_queue_timeout': int(redirected_split[1]),
+            'incoming_redirected_nightmode': int(redirected_split[2]),
+            'outgoing_transferred_out': binomial(rng, answered, 0.02),
+            'incoming_answered_within_service_time': self.service_split(answered, 15.0),
+            'incoming_unanswered_within_service_time': self.service_split(unanswered, 30.0),
+            'incoming_answered_by_member_specification': spread(rng, answered, self.member_weights[entity]),
+        }
+
+    def derive_user(self, entity: int, n: int) -> Dict:
+        rng = self.rng
+        sources = spread(rng, n, np.array([0.45, 0.35, 0.2]))
+        answered = binomial(rng, n, self.answer_rate[entity])
+        busy = binomial(rng, n - answered, 0.2)
+        not_answered = n - answered - busy
+        redirected = binomial(rng, not_answered, 0.5)
+        voicemail = binomial(rng, redirected, 0.6)
+        outgoing = binomial(rng, 2 * n + 1, 0.35)
+        outgoing_external = binomial(rng, outgoing, 0.6)
+        outgoing_answered = binomial(rng, outgoing, 0.7)
+        outgoing_busy = binomial(rng, outgoing - outgoing_answered, 0.3)
+        incoming_duration = int(answered * self.duration[entity] * rng.uniform(0.7, 1.3))
+        outgoing_duration = int(outgoing_answered * self.duration[entity] * rng.uniform(0.5, 1.1))
+        return {
+            'incoming_total': n,
+            'incoming_from_external': int(sources[0]),
+            'incoming_from_internal': int(sources[1]),
+            'incoming_from_queues': int(sources[2]),
+            'incoming_answered': answered,
+            'incoming_unanswered': not_answered - redirected,
+            'incoming_busy': busy,
+            'incoming_total_redirected': redirected,
+            'incoming_redirected_to_voicemail': voicemail,
+            'incoming_redirected_to_other': redirected - voicemail,
+            'incoming_total_duration': incoming_duration,
+            'outgoing_total': outgoing,
+            'outgoing_to_external': outgoing_external,
+            'outgoing_to_internal': outgoing - outgoing_external,
+            'outgoing_answered': outgoing_answered,
+            'outgoing_unanswered': outgoing - outgoing_answered - outgoing_busy,
+            'outgoing_busy': outgoing_busy,
+            'outgoing_answered_total_duration': outgoing_duration,
+            'outgoing_transferred_out': binomial(rng, outgoing_answered, 0.03),
+            'total_calls': n + outgoing,
+            'total_calls_duration': incoming_duration + outgoing_duration,
+            'failures': binomial(rng, n + outgoing, 0.005),
+        }
+
+    def derive_ivr(self, entity: int, n: int) -> Dict:
+        rng = self.rng
+        connected = binomial(rng, n, self.answer_rate[entity])
+        failures = binomial(rng, n - connected, 0.1)
+        return {
+            'incoming_total_handled_by_ivr': n,
+            'incoming_connected': connected,
+            'incoming_not_connected': n - connected,
+            'incoming_total_call_duration_for_ivr': int(n * rng.uniform(8, 25)),
+            'incoming_terminated_because_of_failure': failures,
+            'transferred_to_specification': spread(rng, connected, self.destination_weights[entity]),
+        }
+
+    def derive_huntgroup(self, entity: int, n: int) -> Dict:
+        rng = self.rng
+        answered = binomial(rng, n, self.answer_rate[entity])
+        overflow = binomial(rng, n - answered, 0.4)
+        return {
+            'incoming_total': n,
+            'incoming_answered_by_huntgroup_members': answered,
+            'incoming_unanswered_by_huntgroup_members': n - answered - overflow,
+            'incoming_sent_to_overflow_number': overflow,
+            'incoming_answered_by_huntgroup_members_total_call_duration': int(answered * self.duration[entity] * rng.uniform(0.7, 1.3)),
+        }
+
+    def derive_rulebased(self, entity: int, n: int) -> Dict:
+        rng = self.rng
+        connected = binomial(rng, n, max(self.answer_rate[entity], 0.9))
+        return {
+            'incoming_total_handled_by_rulebase': n,
+            'incoming_connected': connected,
+            'incoming_not_connected': n - connected,
+            'incoming_failure': binomial(rng, n - connected, 0.2),
+            'incoming_transferred_to_specification': spread(rng, connected, self.destination_weights[entity]),
+        }
+
+def sum_rows(rows: List[Dict]) -> Dict:
+    """Element-wise sum of the additive values of object rows (dynamic columns are arrays)"""
+    total = {}
+    for row in rows:
+        for key, value in row.items():
+            total[key] = total[key] + value if key in total else value
+    return total
+
+# ========================================
+# XML RENDERING
+# ========================================
+
+def format_number(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.15g}"
+    return str(int(value))
+
+def render_dynamic(column: str, values, labels: List[Tuple[str, str]]) -> str:
+    if values is None or not np.any(values):
+        return f"<{column} />"
+    parts = [f"<{column}>"]
+    for (key, name), value in zip(labels, values):
+        if isinstance(value, float) or value:
+            parts.append(f"<dynamic_column><column_key>{key}</column_key><column_name>{escape(name)}</column_name>"
+                         f"<column_value>{format_number(value)}</column_value></dynamic_column>")
+        elif column.startswith('incoming_unanswered'):
+            # Setera still lists the bucket, without a value
+            parts.append(f"<dynamic_column><column_key>{key}</column_key><column_name>{escape(name)}</column_name></dynamic_column>")
+    parts.append(f"</{column}>")
+    return ''.join(parts)
+
+def render_metrics(values: Dict, model: ReportModel) -> str:
+    parts = []
+    for spec in REPORT_COLUMNS[model.config.report_type]:
+        column, kind = spec[0], spec[1]
+        if kind == SUM:
+            parts.append(f"<{column}>{format_number(values[column])}</{column}>")
+        elif kind in (AVG, PCT):
+            denominator = values[spec[3]]
+            if denominator:
+                ratio = values[spec[2]] / denominator
+                value = round(ratio) if kind == AVG else ratio * 100
+                parts.append(f"<{column}>{format_number(value)}</{column}>")
+        elif kind == DYN:
+            parts.append(render_dynamic(column, values.get(column), model.dynamic_labels(column)))
+        elif kind == SERVICE_LEVEL:
+            denominator = values[spec[3]]
+            levels = None
+            if denominator:
+                levels = [float(value) for value in np.cumsum(values[spec[2]]) * 100.0 / denominator]
+            parts.append(render_dynamic(column, levels, model.dynamic_labels(column)))
+    return ''.join(parts)
+
+def render_record(grouping: str, header: str, values: Dict, model: ReportModel) -> str:
+    tag = f"{grouping}__groupsobjects"
+    return f"<{tag}>{header}{render_metrics(values, model)}</{tag}>"
+
+def render_calls(config: GeneratorConfig, rng: np.random.Generator) -> Iterator[str]:
+    """<specifications><calls> rows (per-call detail, ignored by the parsers but part of the payload)"""
+    call_types = ('Inc. answered', 'Inc. unanswered', 'Out. answered', 'Out. unanswered')
+    for index in range(config.calls):
+        day = config.start + timedelta(days=int(rng.integers(config.days)))
+        seconds = int(rng.integers(7 * 3600, 19 * 3600))
+        identifier, label = entity_identity(config.report_type, int(rng.integers(config.entities)))
+        yield (f"<calls><type>{call_types[index % len(call_types)]}</type>"
+               f"<timestamp>{day.isoformat()}T{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}</timestamp>"
+               f"<user_id>{identifier} | {escape(label)}</user_id><target_id>{phone_number('3470', index % 10000)}</target_id>"
+               f"<target_id_type>External</target_id_type><queue_time>{int(rng.integers(0, 60))}</queue_time></calls>")
+
+def render_metadata(config: GeneratorConfig) -> str:
+    parts = ['<metadata><reportMetadata>']
+    for key in ['period', 'grouping_name'] + [spec[0] for spec in REPORT_COLUMNS[config.report_type]]:
+        parts.append(f"<reportColumnMetadata><key>{key}</key><name>{key}</name><description>{key}</description>"
+                     f"<data_type>Value</data_type><value_type>Sum</value_type><available>True</available></reportColumnMetadata>")
+    parts.append('</reportMetadata></metadata>')
+    return ''.join(parts)
+
+def iter_records(config: GeneratorConfig) -> Iterator[str]:
+    """Every *__groupsobjects record of the export, as XML text"""
+    rng = np.random.default_rng(config.seed)
+    volumes = draw_volumes(config, rng)
+    model = ReportModel(config, rng)
+    entities = [entity_identity(config.report_type, index) for index in range(config.entities)]
+    group_names = ['Others'] if config.groups == 1 else [f"Gruppo {g:02d}" for g in range(config.groups)]
+    group_of = [index * config.groups // config.entities for index in range(config.entities)]
+
+    # Derived once per entity and day, so every day-based grouping adds up to the same totals;
+    # time slots are derived from the same call counts summed over the days
+    daily_counts = volumes.sum(axis=2)
+    day_rows = [[model.derive(entity, int(daily_counts[entity, day])) for day in range(config.days)]
+                for entity in range(config.entities)]
+    slot_counts = volumes.sum(axis=1)
+
+    for grouping in GROUPINGS:
+        blocks = []
+        for label, axis, indexes in grouping_buckets(grouping, config):
+            if axis == 'day':
+                rows = [sum_rows([day_rows[entity][day] for day in indexes]) for entity in range(config.entities)]
+            else:
+                rows = [model.derive(entity, int(slot_counts[entity, indexes].sum())) for entity in range(config.entities)]
+            blocks.append((label, rows))
+
+        grand_total = sum_rows([row for _, rows in blocks for row in rows])
+        yield render_record(grouping, '<period>Total</period><name>Total</name><type>total</type>'
+                            '<depth_in_hierarchy>0</depth_in_hierarchy>', grand_total, model)
+
+        for label, rows in blocks:
+            period = escape(label)
+            for group_index, group_name in enumerate(group_names):
+                members = [entity for entity in range(config.entities) if group_of[entity] == group_index]
+                yield render_record(grouping, f"<period>{period}</period><grouping_name>{escape(group_name)}</grouping_name>"
+                                    '<type>group</type><depth_in_hierarchy>0</depth_in_hierarchy>',
+                                    sum_rows([rows[entity] for entity in members]), model)
+                for entity in members:
+                    identifier, entity_label = entities[entity]
+                    yield render_record(grouping, f"<period>{period}</period>"
+                                        f"<name>{escape(group_name)}/{identifier} - {escape(entity_label)}</name>"
+                                        f"<group_names>{escape(group_name)}</group_names>"
+                                        f"<object_identifier>{identifier}</object_identifier>"
+                                        '<type>object</type><depth_in_hierarchy>1</depth_in_hierarchy>',
+                                        rows[entity], model)
+
+def iter_setera_xml(config: GeneratorConfig, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield the synthetic export as UTF-8 byte chunks of about chunk_size bytes"""
+    def pieces() -> Iterator[str]:
+        yield ('﻿' if config.bom else '') + '<?xml version="1.0" encoding="utf-8"?><root><data><report>'
+        yield from iter_records(config)
+        yield '</report>'
+        if config.calls and config.report_type in REPORTS_WITH_CALLS:
+            yield '<specifications>'
+            yield from render_calls(config, np.random.default_rng(config.seed + 1))
+            yield '</specifications>'
+        yield '</data>'
+        yield render_metadata(config)
+        yield '</root>'
+
+    buffer = []
+    size = 0
+    for piece in pieces():
+        data = piece.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b''.join(buffer)
+
+def generate_setera_xml(config: GeneratorConfig) -> bytes:
+    """The whole synthetic export in memory"""
+    return b''.join(iter_setera_xml(config))
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic Setera XML export')
+    parser.add_argument('--type', dest='report_type', choices=REPORT_TYPES, default='acd')
+    parser.add_argument('--entities', type=int, default=10, help='Queues/users/IVRs/groups/rules (default: 10)')
+    parser.add_argument('--groups', type=int, default=1, help='Entity groups (default: 1, "Others")')
+    parser.add_argument('--days', type=int, default=7, help='Days in the export range (default: 7)')
+    parser.add_argument('--start', type=date.fromisoformat, default=date(2025, 11, 10), help='First day (YYYY-MM-DD)')
+    parser.add_argument('--slots', type=int, default=48, help='Time slots per day (default: 48)')
+    parser.add_argument('--slot-minutes', type=int, default=30, help='Minutes per time slot (default: 30)')
+    parser.add_argument('--members', type=int, default=5, help='ACD member dynamic columns (default: 5)')
+    parser.add_argument('--destinations', type=int, default=4, help='IVR/RuleBased transfer destinations (default: 4)')
+    parser.add_argument('--service-buckets', default='20,40', help='ACD service-time thresholds in seconds (default: 20,40)')
+    parser.add_argument('--calls', type=int, default=0, help='Per-call <specifications> rows (default: 0)')
+    parser.add_argument('--volume', type=float, default=2.0, help='Mean calls per entity in a busy slot (default: 2)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default='-', help="Output file, '-' for stdout (default)")
+    args = parser.parse_args()
+
+    config = GeneratorConfig(
+        report_type=args.report_type, entities=args.entities, groups=args.groups, days=args.days,
+        start=args.start, slots=args.slots, slot_minutes=args.slot_minutes, members=args.members,
+        destinations=args.destinations,
+        service_buckets=tuple(int(bucket) for bucket in args.service_buckets.split(',') if bucket.strip()),
+        calls=args.calls, volume=args.volume, seed=args.seed
+    )
+
+    output = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+    written = 0
+    try:
+        for chunk in iter_setera_xml(config):
+            output.write(chunk)
+            written += len(chunk)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+    if args.output != '-':
+        print(f"Wrote {written} bytes to {args.output}", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
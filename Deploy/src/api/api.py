@@ -1,11 +1,12 @@
 import json
 import boto3
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from decimal import Decimal
 import logging
 from typing import Dict, List, Optional
 import uuid
+from schedule_engine import ScheduleError, compile_schedule
 
 # Setup logging
 logger = logging.getLogger()
@@ -25,6 +26,7 @@ RESELLER_ORGANIZATIONS_TABLE = os.environ.get('RESELLER_ORGANIZATIONS_TABLE', ''
 RESELLER_USER_ORGANIZATIONS_TABLE = os.environ.get('RESELLER_USER_ORGANIZATIONS_TABLE', '')
 RESELLER_ORG_TENANTS_TABLE = os.environ.get('RESELLER_ORG_TENANTS_TABLE', '')
 USER_POOL_ID = os.environ['USER_POOL_ID']
+SCHEDULE_TABLE = os.environ.get('SCHEDULE_TABLE', '')
 
 # DynamoDB tables
 tenants_table = dynamodb.Table(TENANTS_TABLE)
@@ -39,6 +41,8 @@ if RESELLER_USER_ORGANIZATIONS_TABLE:
     reseller_user_organizations_table = dynamodb.Table(RESELLER_USER_ORGANIZATIONS_TABLE)
 if RESELLER_ORG_TENANTS_TABLE:
     reseller_org_tenants_table = dynamodb.Table(RESELLER_ORG_TENANTS_TABLE)
+if SCHEDULE_TABLE:
+    schedule_table = dynamodb.Table(SCHEDULE_TABLE)
 
 class DecimalEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -305,6 +309,12 @@ def update_profile(event: Dict, user: Dict) -> Dict:
         user_item = result['Items'][0]
         actual_tenant_id = user_item['tenant_id']
         
+        if 'report_schedule' in body:
+            schedule_error = get_report_schedule_error(body['report_schedule'])
+            if schedule_error:
+                return response(400, {'error': f"Invalid report_schedule: {schedule_error}"})
+            body['report_schedule'] = normalize_report_schedule(body['report_schedule'])
+        
         # Update fields
         update_expression = "SET "
         expression_attribute_names = {}
@@ -324,15 +334,17 @@ def update_profile(event: Dict, user: Dict) -> Dict:
         if updates:
             update_expression += ", ".join(updates)
             
-            users_table.update_item(
+            updated = users_table.update_item(
                 Key={
                     'user_id': user_id,
                     'tenant_id': actual_tenant_id
                 },
                 UpdateExpression=update_expression,
                 ExpressionAttributeNames=expression_attribute_names,
-                ExpressionAttributeValues=expression_attribute_values
+                ExpressionAttributeValues=expression_attribute_values,
+                ReturnValues='ALL_NEW'
             )
+            sync_schedule_index(updated['Attributes'])
         
         return response(200, {'message': 'Profile updated successfully'})
         
@@ -372,6 +384,19 @@ def create_user(event: Dict, user: Dict) -> Dict:
             if not body.get(field):
                 return response(400, {'error': f'Missing required field: {field}'})
         
+        if 'report_schedule' in body:
+            schedule_error = get_report_schedule_error(body['report_schedule'])
+            if schedule_error:
+                return response(400, {'error': f"Invalid report_schedule: {schedule_error}"})
+            body['report_schedule'] = normalize_report_schedule(body['report_schedule'])
+        
+        for connector in body.get('connectors', []):
+            schedule_error = get_report_schedule_error(connector.get('report_schedule', '{}'))
+            if schedule_error:
+                return response(400, {'error': f"Invalid report_schedule: {schedule_error}"})
+            if 'report_schedule' in connector:
+                connector['report_schedule'] = normalize_report_schedule(connector['report_schedule'])
+        
         timestamp = datetime.utcnow().isoformat()
         
         # Generate UUID locally (NO Cognito for end-users)
@@ -412,6 +437,7 @@ def create_user(event: Dict, user: Dict) -> Dict:
             user_item['connectors'] = [connector]
         
         users_table.put_item(Item=user_item)
+        sync_schedule_index(user_item)
         
         logger.info(f"Created end-user {user_id} for tenant {tenant_id} (NO Cognito account)")
         
@@ -516,6 +542,12 @@ def update_user(event: Dict, user: Dict) -> Dict:
         elif is_reseller(user) and not can_reseller_access_tenant(user, target_user['tenant_id']):
             return response(403, {'error': 'Unauthorized: Cannot update users from tenants not assigned to you'})
         
+        if 'report_schedule' in body:
+            schedule_error = get_report_schedule_error(body['report_schedule'])
+            if schedule_error:
+                return response(400, {'error': f"Invalid report_schedule: {schedule_error}"})
+            body['report_schedule'] = normalize_report_schedule(body['report_schedule'])
+        
         # Update fields
         update_expression = "SET "
         expression_attribute_names = {}
@@ -537,15 +569,17 @@ def update_user(event: Dict, user: Dict) -> Dict:
         if updates:
             update_expression += ", ".join(updates)
             
-            users_table.update_item(
+            updated = users_table.update_item(
                 Key={
                     'user_id': user_id,
                     'tenant_id': target_user['tenant_id']
                 },
                 UpdateExpression=update_expression,
                 ExpressionAttributeNames=expression_attribute_names,
-                ExpressionAttributeValues=expression_attribute_values
+                ExpressionAttributeValues=expression_attribute_values,
+                ReturnValues='ALL_NEW'
             )
+            sync_schedule_index(updated['Attributes'])
         
         return response(200, {'message': 'User updated successfully'})
         
@@ -599,6 +633,7 @@ def delete_user(event: Dict, user: Dict) -> Dict:
                 'tenant_id': target_user['tenant_id']
             }
         )
+        remove_from_schedule_index(target_user)
         
         return response(200, {'message': 'User deleted successfully'})
         
@@ -606,10 +641,135 @@ def delete_user(event: Dict, user: Dict) -> Dict:
         logger.error(f"Error deleting user: {str(e)}")
         return response(500, {'error': str(e)})
 
+# ========================================
+# SCHEDULE VALIDATION
+# ========================================
+# Schedules are compiled by the schedule engine layer (schedule_engine.py), shared with the
+# report generator so that both store and compare the same CompiledSchedule.canonical.
+
+def get_report_schedule_error(report_schedule) -> Optional[str]:
+    """Why a report_schedule sent by the dashboard is invalid, None when it is valid"""
+    try:
+        schedule = compile_schedule(report_schedule, strict=True)
+    except ScheduleError as e:
+        return str(e)
+    if schedule.next_run_at(datetime.utcnow()) is None:
+        return 'the schedule never fires'
+    return None
+
+def normalize_report_schedule(report_schedule):
+    """
+    report_schedule as stored: a bare cron expression becomes {"cron": ...}
+
+    The dashboard reads report_schedule with JSON.parse, so every stored schedule is a JSON
+    object. Both forms compile to the same schedule.
+    """
+    if isinstance(report_schedule, str) and report_schedule.strip() and not report_schedule.strip().startswith('{'):
+        return json.dumps({'cron': report_schedule.strip()})
+    return report_schedule
+
+# ========================================
+# SCHEDULE INDEX
+# ========================================
+# Due-time index read by the report generator every minute (see SCHEDULE INDEX in
+# report_generator.py): one item per report-enabled connector with the UTC minute of its next
+# run. Items are rewritten here only when a schedule actually changes, so a run the generator
+# already claimed for the current minute is not scheduled a second time.
+
+SCHEDULE_PARTITION = 'due'
+SCHEDULE_SLOT_FORMAT = '%Y-%m-%dT%H:%M:00Z'
+def get_scheduled_connectors(user_item: Dict) -> Dict[str, str]:
+    """Schedule index key -> report_schedule of the report-enabled connectors of a user"""
+    if user_item.get('role') != 'User':
+        return {}
+    connectors = user_item.get('connectors', [])
+    if not connectors and user_item.get('xml_endpoint'):
+        if not user_item.get('report_enabled'):
+            return {}
+        return {f"legacy#{user_item['user_id']}": user_item.get('report_schedule', '{}')}
+    return {
+        connector['connector_id']: connector.get('report_schedule', user_item.get('report_schedule', '{}'))
+        for connector in connectors
+        if connector.get('report_enabled', True) and connector.get('connector_id')
+    }
+
+def sync_schedule_index(user_item: Dict, removed_connector_ids: List[str] = ()) -> None:
+    """
+    Bring the schedule index in line with a user item just written
+
+    Connectors with a new or changed schedule get their next run from the next minute on;
+    disabled, removed and superseded (legacy) entries are deleted. Errors are logged only:
+    the index can always be recreated with the report generator's rebuild_schedule_index.
+    """
+    if not SCHEDULE_TABLE:
+        return
+    try:
+        scheduled = get_scheduled_connectors(user_item)
+        start = datetime.utcnow().replace(second=0, microsecond=0) + timedelta(minutes=1)
+        for connector_id, report_schedule in scheduled.items():
+            try:
+                schedule = compile_schedule(report_schedule)
+            except ScheduleError as e:
+                logger.error(f"Invalid schedule for connector {connector_id}: {str(e)}")
+                schedule_table.delete_item(Key={'connector_id': connector_id})
+                continue
+            canonical = schedule.canonical
+            existing = schedule_table.get_item(Key={'connector_id': connector_id}).get('Item')
+            if existing and existing.get('report_schedule') == canonical:
+                continue
+            next_run = schedule.next_run_at(start)
+            if next_run is None:
+                schedule_table.delete_item(Key={'connector_id': connector_id})
+                continue
+            schedule_table.put_item(Item={
+                'connector_id': connector_id,
+                'user_id': user_item['user_id'],
+                'tenant_id': user_item['tenant_id'],
+                'schedule_partition': SCHEDULE_PARTITION,
+                'next_run_at': next_run.strftime(SCHEDULE_SLOT_FORMAT),
+                'report_schedule': canonical,
+                'updated_at': datetime.utcnow().isoformat()
+            })
+
+        for connector_id in get_schedule_index_keys(user_item, removed_connector_ids) - set(scheduled):
+            schedule_table.delete_item(Key={'connector_id': connector_id})
+    except Exception as e:
+        logger.error(f"Error syncing schedule index for user {user_item.get('user_id')}: {str(e)}")
+
+def get_schedule_index_keys(user_item: Dict, removed_connector_ids: List[str] = ()) -> set:
+    """Every schedule index key a user may own: its connectors, the removed ones and the legacy key"""
+    keys = {f"legacy#{user_item['user_id']}", *removed_connector_ids}
+    keys.update(c.get('connector_id') for c in user_item.get('connectors', []) if c.get('connector_id'))
+    return keys
+
+def remove_from_schedule_index(user_item: Dict) -> None:
+    """Delete the schedule index entries of a deleted user"""
+    if not SCHEDULE_TABLE:
+        return
+    try:
+        for connector_id in get_schedule_index_keys(user_item):
+            schedule_table.delete_item(Key={'connector_id': connector_id})
+    except Exception as e:
+        logger.error(f"Error removing schedule index entries of user {user_item.get('user_id')}: {str(e)}")
+
 # ========================================
 # CONNECTOR MANAGEMENT
 # ========================================
 
+# What the report generator does when a connector's export has not changed since the last report
+CONNECTOR_UNCHANGED_POLICIES = ('skip', 'resend', 'notice')
+
+# Window reported on by connectors whose xml_endpoint has {from}/{to} placeholders: month or
+# week to date, or a number of days (up to CONNECTOR_MAX_WINDOW_DAYS)
+CONNECTOR_REPORT_WINDOWS = ('month', 'week')
+CONNECTOR_MAX_WINDOW_DAYS = 92
+
+def is_valid_report_window(report_window) -> bool:
+    value = str(report_window).strip().lower()
+    if value.isdigit():
+        return 0 < int(value) <= CONNECTOR_MAX_WINDOW_DAYS
+    return value in CONNECTOR_REPORT_WINDOWS
+
 def create_connector(event: Dict, user: Dict) -> Dict:
     """Add connector to user (Admin, Reseller, or SuperAdmin only)"""
     if not is_admin(user) and not is_super_admin(user) and not is_reseller(user):
@@ -642,6 +802,18 @@ def create_connector(event: Dict, user: Dict) -> Dict:
         if not body.get('xml_endpoint'):
             return response(400, {'error': 'Missing required field: xml_endpoint'})
         
+        if 'report_schedule' in body:
+            schedule_error = get_report_schedule_error(body['report_schedule'])
+            if schedule_error:
+                return response(400, {'error': f"Invalid report_schedule: {schedule_error}"})
+            body['report_schedule'] = normalize_report_schedule(body['report_schedule'])
+        
+        if body.get('unchanged_policy', 'skip') not in CONNECTOR_UNCHANGED_POLICIES:
+            return response(400, {'error': f"Invalid unchanged_policy: must be one of {', '.join(CONNECTOR_UNCHANGED_POLICIES)}"})
+        
+        if not is_valid_report_window(body.get('report_window', 'month')):
+            return response(400, {'error': f"Invalid report_window: must be one of {', '.join(CONNECTOR_REPORT_WINDOWS)} or a number of days (1-{CONNECTOR_MAX_WINDOW_DAYS})"})
+        
         # Create connector
         connector = {
             'connector_id': str(uuid.uuid4()),
@@ -652,7 +824,9 @@ def create_connector(event: Dict, user: Dict) -> Dict:
             'report_schedule': body.get('report_schedule', json.dumps({
                 'frequency': 'daily',
                 'time': '09:00'
-            }))
+            })),
+            'unchanged_policy': body.get('unchanged_policy', 'skip'),
+            'report_window': str(body.get('report_window', 'month'))
         }
         
         # Get existing connectors or create new array
@@ -669,6 +843,8 @@ def create_connector(event: Dict, user: Dict) -> Dict:
             ExpressionAttributeValues={':connectors': connectors}
         )
         
+        sync_schedule_index({**target_user, 'connectors': connectors})
+        
         logger.info(f"Added connector {connector['connector_id']} to user {user_id}")
         
         return response(201, {
@@ -778,7 +954,19 @@ def update_connector(event: Dict, user: Dict) -> Dict:
         if 'report_enabled' in body:
             connectors[connector_index]['report_enabled'] = body['report_enabled']
         if 'report_schedule' in body:
+            schedule_error = get_report_schedule_error(body['report_schedule'])
+            if schedule_error:
+                return response(400, {'error': f"Invalid report_schedule: {schedule_error}"})
+            body['report_schedule'] = normalize_report_schedule(body['report_schedule'])
             connectors[connector_index]['report_schedule'] = body['report_schedule']
+        if 'unchanged_policy' in body:
+            if body['unchanged_policy'] not in CONNECTOR_UNCHANGED_POLICIES:
+                return response(400, {'error': f"Invalid unchanged_policy: must be one of {', '.join(CONNECTOR_UNCHANGED_POLICIES)}"})
+            connectors[connector_index]['unchanged_policy'] = body['unchanged_policy']
+        if 'report_window' in body:
+            if not is_valid_report_window(body['report_window']):
+                return response(400, {'error': f"Invalid report_window: must be one of {', '.join(CONNECTOR_REPORT_WINDOWS)} or a number of days (1-{CONNECTOR_MAX_WINDOW_DAYS})"})
+            connectors[connector_index]['report_window'] = str(body['report_window'])
         
         # Update user
         users_table.update_item(
@@ -790,6 +978,8 @@ def update_connector(event: Dict, user: Dict) -> Dict:
             ExpressionAttributeValues={':connectors': connectors}
         )
         
+        sync_schedule_index({**target_user, 'connectors': connectors})
+        
         logger.info(f"Updated connector {connector_id} for user {user_id}")
         
         return response(200, {
@@ -847,6 +1037,8 @@ def delete_connector(event: Dict, user: Dict) -> Dict:
             ExpressionAttributeValues={':connectors': connectors}
         )
         
+        sync_schedule_index({**target_user, 'connectors': connectors}, [connector_id])
+        
         logger.info(f"Deleted connector {connector_id} from user {user_id}")
         
         return response(200, {'message': 'Connector deleted successfully'})
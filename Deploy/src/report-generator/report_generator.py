@@ -3,13 +3,30 @@ import boto3
 import os
 import logging
 import xml.etree.ElementTree as ET
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 import requests
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import uuid
 import base64
+import copy
+import operator
 import io
+import hashlib
+import re
+import gzip
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from collections.abc import Mapping
+import time
+from urllib.parse import quote, urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from schedule_engine import CompiledSchedule, ScheduleError, SCHEDULE_DEFAULT_TIMEZONE, compile_schedule, get_schedule_timezone
 
 # Setup logging first
 logger = logging.getLogger()
@@ -18,7 +35,7 @@ logger.setLevel(logging.INFO)
 # Import matplotlib - will fail if not available (error visible in AWS console)
 import matplotlib
 matplotlib.use('Agg')  # Non-interactive backend for Lambda
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import matplotlib.patches as mpatches
 from matplotlib.patches import Rectangle
 import numpy as np
@@ -27,225 +44,1133 @@ import numpy as np
 dynamodb = boto3.resource('dynamodb')
 bedrock = boto3.client('bedrock-runtime', region_name=os.environ['REGION'])
 lambda_client = boto3.client('lambda')
+s3_client = boto3.client('s3')
+sqs_client = boto3.client('sqs')
 
 # Environment variables
 REGION = os.environ['REGION']
 USERS_TABLE = os.environ['USERS_TABLE']
 REPORTS_TABLE = os.environ['REPORTS_TABLE']
 EMAIL_SENDER_FUNCTION = os.environ['EMAIL_SENDER_FUNCTION']
+FETCH_STATE_TABLE = os.environ['FETCH_STATE_TABLE']
+SCHEDULE_TABLE = os.environ.get('SCHEDULE_TABLE', '')  # Due-time index of the connectors (full users scan when unset)
+REPORT_RUNS_TABLE = os.environ.get('REPORT_RUNS_TABLE', '')  # Run records of scheduled reports (no duplicate runs when set)
+SCHEDULE_MAX_LATENESS_MINUTES = int(os.environ.get('SCHEDULE_MAX_LATENESS_MINUTES', '60'))  # Later runs are skipped and recorded as failed
+SCHEDULE_MAX_SLOTS_PER_TICK = int(os.environ.get('SCHEDULE_MAX_SLOTS_PER_TICK', '100'))  # Missed slots walked per connector and tick
+MAX_XML_BYTES = int(os.environ.get('MAX_XML_BYTES', str(200 * 1024 * 1024)))  # Truncate exports past this size
+MAX_XML_ELEMENTS = int(os.environ.get('MAX_XML_ELEMENTS', '5000000'))  # Truncate exports with more elements
+MAX_XML_DEPTH = int(os.environ.get('MAX_XML_DEPTH', '32'))  # Max element nesting depth (Setera exports use ~6)
+XML_CONNECT_TIMEOUT = float(os.environ.get('XML_CONNECT_TIMEOUT', '5'))  # Seconds to open the TCP/TLS connection
+XML_READ_TIMEOUT = float(os.environ.get('XML_READ_TIMEOUT', '30'))  # Max seconds between two bytes of the response
+XML_FETCH_RETRIES = int(os.environ.get('XML_FETCH_RETRIES', '3'))  # Retries on 5xx, connection errors and timeouts
+REPORT_CACHE_BUCKET = os.environ.get('REPORT_CACHE_BUCKET', '')  # Persistent report cache in S3 (cache/ prefix)
+REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR', '')  # Local directory stand-in for the S3 tier
+REPORT_CACHE_TTL_SECONDS = int(os.environ.get('REPORT_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+DELTA_PARTIAL_TTL_SECONDS = int(os.environ.get('DELTA_PARTIAL_TTL_SECONDS', str(90 * 24 * 3600)))  # Per-day partials of delta connectors
+DELTA_FETCH_CONCURRENCY = int(os.environ.get('DELTA_FETCH_CONCURRENCY', '4'))  # Single-day downloads of a delta connector at once
+DELTA_MAX_DAY_FETCHES = int(os.environ.get('DELTA_MAX_DAY_FETCHES', '8'))  # Single-day downloads per run and connector
+EXPORT_ARCHIVE_BUCKET = os.environ.get('EXPORT_ARCHIVE_BUCKET', '')  # Raw export archive in S3 (archive/ prefix)
+EXPORT_ARCHIVE_DIR = os.environ.get('EXPORT_ARCHIVE_DIR', '')  # Local directory stand-in for the archive bucket
+TRACE_METRICS_ENABLED = os.environ.get('TRACE_METRICS_ENABLED', 'true').lower() == 'true'  # EMF lines per connector and tick
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'MayaAnalytics/ReportGenerator')
+REPORT_QUEUE_URL = os.environ.get('REPORT_QUEUE_URL', '')  # SQS queue of report jobs (run in the tick when unset)
+REPORT_WORKER_CONCURRENCY = int(os.environ.get('REPORT_WORKER_CONCURRENCY', '1'))  # Worker threads of the in-tick queue
+REPORT_CONNECTOR_CONCURRENCY = int(os.environ.get('REPORT_CONNECTOR_CONCURRENCY', '4'))  # Connectors of a shared export at once
+REPORT_FETCH_CONCURRENCY = int(os.environ.get('REPORT_FETCH_CONCURRENCY', '4'))  # Exports downloaded and parsed at once
+REPORT_INSIGHTS_CONCURRENCY = int(os.environ.get('REPORT_INSIGHTS_CONCURRENCY', '4'))  # Bedrock calls at once
+REPORT_RENDER_CONCURRENCY = int(os.environ.get('REPORT_RENDER_CONCURRENCY', '1'))  # Emails rendered at once (CPU-bound)
+REPORT_SEND_CONCURRENCY = int(os.environ.get('REPORT_SEND_CONCURRENCY', '4'))  # Email sender invocations at once
 
 # DynamoDB tables
 users_table = dynamodb.Table(USERS_TABLE)
 reports_table = dynamodb.Table(REPORTS_TABLE)
+fetch_state_table = dynamodb.Table(FETCH_STATE_TABLE)
+schedule_table = dynamodb.Table(SCHEDULE_TABLE) if SCHEDULE_TABLE else None
+report_runs_table = dynamodb.Table(REPORT_RUNS_TABLE) if REPORT_RUNS_TABLE else None
 
 class DecimalEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, Decimal):
             return int(obj) if obj % 1 == 0 else float(obj)
+        if isinstance(obj, (CompactRow, LazyGrouping)):
+            return obj.to_dict()
         return super(DecimalEncoder, self).default(obj)
 
 # ========================================
-# XML PARSERS FOR DIFFERENT REPORT TYPES
+# TRACING
+# ========================================
+# Spans time the stages of a report (fetch_parse, insights, render, send, history) per
+# connector and per tick. A closed span adds its duration and counters to the enclosing one,
+# so connector and tick spans end up with per-stage totals; both are printed as CloudWatch
+# Embedded Metric Format lines. A span costs two perf_counter() calls and a few dict updates,
+# cheap enough to stay on in production.
+
+# Counters recorded on spans: name -> (EMF metric name, unit)
+TRACE_COUNTERS = {
+    'bytes_fetched': ('BytesFetched', 'Bytes'),
+    'rows_parsed': ('RowsParsed', 'Count'),
+    'prompt_chars': ('PromptChars', 'Count'),
+    'html_bytes': ('HtmlBytes', 'Bytes'),
+    'reports_sent': ('ReportsSent', 'Count'),
+    'reports_failed': ('ReportsFailed', 'Count'),
+}
+
+def metric_name(name: str) -> str:
+    return ''.join(part.capitalize() for part in name.split('_'))
+
+class Span:
+    """A timed section of a tick; emit=True spans (connector, tick) are published as metrics"""
+
+    __slots__ = ('name', 'emit', 'properties', 'started', 'duration', 'stages', 'counters')
+
+    def __init__(self, name: str, emit: bool, properties: Dict):
+        self.name = name
+        self.emit = emit
+        self.properties = properties
+        self.started = time.perf_counter()
+        self.duration = None
+        self.stages = {}
+        self.counters = {}
+
+    def set(self, **properties) -> None:
+        self.properties.update(properties)
+
+    def elapsed(self) -> float:
+        return self.duration if self.duration is not None else time.perf_counter() - self.started
+
+    def summary(self) -> Dict:
+        return {
+            'duration_ms': round(self.elapsed() * 1000, 1),
+            'stages_ms': {stage: round(seconds * 1000, 1) for stage, seconds in self.stages.items()},
+            **self.counters
+        }
+
+class Tracer:
+    """Stacks of open spans, one per thread (the local report queue runs jobs on worker threads)"""
+
+    def __init__(self, namespace: str = METRICS_NAMESPACE, emf_enabled: bool = TRACE_METRICS_ENABLED):
+        self.namespace = namespace
+        self.emf_enabled = emf_enabled
+        self._local = threading.local()
+        self._merge_lock = threading.Lock()  # Spans of pool threads close into a shared parent
+
+    @property
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def start(self, name: str, emit: bool = False, **properties) -> Span:
+        span = Span(name, emit, properties)
+        self._stack.append(span)
+        return span
+
+    def stop(self, span: Span) -> Span:
+        span.duration = time.perf_counter() - span.started
+        # Spans left open by an exception are dropped with their parent
+        while self._stack and self._stack.pop() is not span:
+            pass
+        if self._stack:
+            parent = self._stack[-1]
+            with self._merge_lock:
+                if not span.emit:
+                    parent.stages[span.name] = parent.stages.get(span.name, 0.0) + span.duration
+                for stage, seconds in span.stages.items():
+                    parent.stages[stage] = parent.stages.get(stage, 0.0) + seconds
+                for name, value in span.counters.items():
+                    parent.counters[name] = parent.counters.get(name, 0) + value
+        if span.emit and self.emf_enabled:
+            self.emit_metrics(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str, **properties):
+        span = self.start(name, **properties)
+        try:
+            yield span
+        finally:
+            self.stop(span)
+
+    def current(self) -> Optional[Span]:
+        """Innermost open span of this thread"""
+        return self._stack[-1] if self._stack else None
+
+    @contextmanager
+    def attach(self, parent: Optional[Span]):
+        """Close the spans opened in this thread into parent, a span opened by another thread"""
+        if parent is None:
+            yield
+            return
+        stack, self._local.stack = self._stack, [parent]
+        try:
+            yield
+        finally:
+            self._local.stack = stack
+
+    def count(self, name: str, value: int) -> None:
+        """Add to a counter of the innermost open span (no-op outside a span)"""
+        if self._stack:
+            with self._merge_lock:
+                counters = self._stack[-1].counters
+                counters[name] = counters.get(name, 0) + value
+
+    def emit_metrics(self, span: Span) -> None:
+        """Print the span as a CloudWatch Embedded Metric Format line (Span is the only dimension)"""
+        metrics = {'Duration': (round(span.duration * 1000, 1), 'Milliseconds')}
+        for stage, seconds in span.stages.items():
+            metrics[f"{metric_name(stage)}Duration"] = (round(seconds * 1000, 1), 'Milliseconds')
+        for name, value in span.counters.items():
+            metric, unit = TRACE_COUNTERS.get(name, (metric_name(name), 'Count'))
+            metrics[metric] = (value, unit)
+
+        line = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': self.namespace,
+                    'Dimensions': [['Span']],
+                    'Metrics': [{'Name': name, 'Unit': unit} for name, (_, unit) in metrics.items()]
+                }]
+            },
+            'Span': span.name,
+            **span.properties,
+            **{name: value for name, (value, _) in metrics.items()}
+        }
+        # stdout, not the logger: the Lambda log prefix would hide the JSON from CloudWatch
+        print(json.dumps(line, cls=DecimalEncoder), flush=True)
+
+tracer = Tracer()
+
+# ========================================
+# STREAMING XML ENGINE
 # ========================================
 
-def parse_ivr_xml(xml_content: str) -> Dict:
+# Setera exports put every record in a <{grouping}__groupsobjects> element
+# (date, time, weekday, week, month, quarter, year, yearmonth, period)
+GROUPSOBJECTS_SUFFIX = '__groupsobjects'
+XML_STREAM_CHUNK_SIZE = 64 * 1024
+
+def iter_xml_chunks(xml_source: Union[str, bytes, Iterable], chunk_size: int = XML_STREAM_CHUNK_SIZE) -> Iterator:
+    """Yield the XML document in chunks (str/bytes are sliced, iterables of chunks pass through)"""
+    if isinstance(xml_source, (str, bytes, bytearray)):
+        for offset in range(0, len(xml_source), chunk_size):
+            yield xml_source[offset:offset + chunk_size]
+    else:
+        for chunk in xml_source:
+            if chunk:
+                yield chunk
+
+class XmlLimitExceeded(Exception):
     """
-    Parse IVR XML report with improved analysis for Maya Analytics
-    
-    IVR XML Structure:
-    - Multiple time groupings: date__groupsobjects, time__groupsobjects, weekday__groupsobjects, etc.
-    - Each group contains: period, type (total/group/object), metrics, transferred_to_specification
-    - Key metrics: incoming_total_handled_by_ivr, incoming_connected, incoming_not_connected, durations
-    - Dynamic transfer destinations in transferred_to_specification/dynamic_column
-    
-    NOTE: This parser handles reports with MULTIPLE IVR correctly.
-    Uses findall() to collect all IVR and aggregates data from all of them.
+    An export went over one of the caps of the streaming engine ('bytes', 'elements', 'depth')
+
+    Raised from inside the record stream: the records yielded before it are complete, so the
+    parse modes build the report from them and mark it as truncated instead of failing. The
+    parse functions let it through unchanged when there is nothing to build from. The bytes
+    limit counts UTF-8 bytes, also for a document passed as str.
+    """
+
+    def __init__(self, limit: str, maximum: int):
+        super().__init__(f"XML export over the {limit} limit ({maximum})")
+        self.limit = limit
+        self.maximum = maximum
+
+# Setera exports never declare a DTD: one in the prolog can only be an entity expansion attack
+XML_DTD_PATTERNS = {str: re.compile(r'<!DOCTYPE|<!ENTITY'), bytes: re.compile(rb'<!DOCTYPE|<!ENTITY')}
+
+def check_xml_prolog(chunk, previous_tail=None):
+    """
+    Refuse a chunk of the prolog declaring a DTD, so entities are never expanded by the parser
+
+    Called on every chunk fed before the parser reports the root element; returns the tail to
+    pass with the next chunk (a declaration may be split across two chunks).
+    """
+    kind = bytes if isinstance(chunk, (bytes, bytearray)) else str
+    text = previous_tail + chunk if previous_tail else chunk
+    if XML_DTD_PATTERNS[kind].search(text):
+        raise Exception("XML export declares a DTD (entity declarations are not allowed)")
+    return text[-16:]
+
+def iter_groupsobjects(xml_source: Union[str, bytes, Iterable], max_bytes: int = MAX_XML_BYTES,
+                       max_elements: int = MAX_XML_ELEMENTS, max_depth: int = MAX_XML_DEPTH) -> Iterator[Tuple[str, ET.Element]]:
+    """
+    Walk the XML document once and yield (grouping, element) for every *__groupsobjects record
+
+    The document is fed incrementally to an XMLPullParser, so only the record currently being
+    processed is kept in memory: each record is cleared and detached from its parent as soon
+    as the consumer resumes the generator. Past max_bytes, max_elements or max_depth the
+    stream stops with XmlLimitExceeded; a DTD in the prolog is refused (see check_xml_prolog).
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    open_elements = []
+    suffix_length = len(GROUPSOBJECTS_SUFFIX)
+    elements = 0
+
+    def drain_events():
+        nonlocal elements
+        for event, element in parser.read_events():
+            if event == 'start':
+                elements += 1
+                if elements > max_elements:
+                    raise XmlLimitExceeded('elements', max_elements)
+                open_elements.append(element)
+                if len(open_elements) > max_depth:
+                    raise XmlLimitExceeded('depth', max_depth)
+                continue
+
+            open_elements.pop()
+            if element.tag.endswith(GROUPSOBJECTS_SUFFIX):
+                yield element.tag[:-suffix_length], element
+                element.clear()
+                if open_elements:
+                    open_elements[-1].remove(element)
+
+    received = 0
+    prolog_tail = None
+    for chunk in iter_xml_chunks(xml_source):
+        received += len(chunk.encode('utf-8')) if isinstance(chunk, str) else len(chunk)
+        if received > max_bytes:
+            raise XmlLimitExceeded('bytes', max_bytes)
+        if not elements:
+            prolog_tail = check_xml_prolog(chunk, prolog_tail)
+        parser.feed(chunk)
+        yield from drain_events()
+
+    parser.close()
+    yield from drain_events()
+
+class ReportAccumulator:
+    """
+    Base class for per-report-type accumulators fed by the streaming engine
+
+    Subclasses define add_<grouping>(element) methods for the groupings they consume
+    (e.g. add_date, add_time, add_weekday) and build() to produce the parsed report dict.
+    Records of groupings without a handler are skipped.
+    """
+    report_type = ''
+
+    def __init__(self):
+        self._handlers = {}
+
+    def add(self, grouping: str, element) -> None:
+        handler = self._handlers.get(grouping, False)
+        if handler is False:
+            handler = getattr(self, f'add_{grouping}', None)
+            self._handlers[grouping] = handler
+        if handler is not None:
+            handler(element)
+
+    def build(self) -> Dict:
+        raise NotImplementedError
+
+def retain_record(element) -> ET.Element:
+    """
+    Detached copy of a record that outlives the engine's clear()
+
+    The children are moved to a new element, not copied, so retaining a record costs one
+    element. The record yielded by iter_groupsobjects() is left empty.
+    """
+    record = ET.Element(element.tag)
+    record.extend(list(element))
+    return record
+
+def consume_groupsobjects(xml_source: Union[str, bytes, Iterable], accumulator: ReportAccumulator) -> Dict:
+    """Run a single streaming pass over the document, feeding every record to the accumulator"""
+    for grouping, element in iter_groupsobjects(xml_source):
+        accumulator.add(grouping, element)
+    return accumulator.build()
+
+# ========================================
+# RECORD SCHEMAS
+# ========================================
+# Parsers describe their records declaratively: XML tag -> output key -> coercion.
+# A schema is compiled once into a tag index, so the children of a record are visited
+# a single time and every field is filled in one sweep (instead of one find() per metric).
+
+def coerce_raw(child) -> Optional[str]:
+    """Element text as exported (period/type keep the exact value, None when empty)"""
+    return child.text
+
+def coerce_text(child) -> str:
+    """Stripped element text, '' when empty"""
+    if child.text:
+        return child.text.strip()
+    return ''
+
+def coerce_int(child) -> int:
+    """Integer element text, 0 when empty or invalid"""
+    if child.text:
+        try:
+            return int(child.text)
+        except ValueError:
+            return 0
+    return 0
+
+def coerce_time(child) -> int:
+    """Time element text in seconds, 0 when empty or invalid"""
+    if child.text:
+        try:
+            # Time values can be in format "HH:MM:SS" or just seconds
+            time_str = child.text.strip()
+            if ':' in time_str:
+                parts = time_str.split(':')
+                if len(parts) == 3:  # HH:MM:SS
+                    return int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
+                elif len(parts) == 2:  # MM:SS
+                    return int(parts[0]) * 60 + int(parts[1])
+            return int(time_str)
+        except (ValueError, AttributeError):
+            return 0
+    return 0
+
+def coerce_float(child) -> float:
+    """Float element text, 0.0 when empty or invalid"""
+    if child.text:
+        try:
+            return float(child.text)
+        except ValueError:
+            return 0.0
+    return 0.0
+
+def coerce_dynamic_columns(child, prefix: str = '') -> Dict[str, int]:
+    """Map the dynamic_column children (column_name -> column_value), removing an optional name prefix"""
+    columns = {}
+    for dynamic_col in child.findall('dynamic_column'):
+        column_name = dynamic_col.find('column_name')
+        column_value = dynamic_col.find('column_value')
+
+        if column_name is not None and column_value is not None and column_name.text:
+            name = column_name.text.strip()
+            if prefix and name.startswith(prefix):
+                name = name[len(prefix):]
+            try:
+                columns[name] = int(column_value.text) if column_value.text else 0
+            except ValueError:
+                continue
+
+    return columns
+
+# coercion -> (converter, factory of the value used when the tag is missing)
+FIELD_COERCIONS = {
+    'raw': (coerce_raw, lambda: None),
+    'text': (coerce_text, str),
+    'int': (coerce_int, int),
+    'time': (coerce_time, int),
+    'float': (coerce_float, float),
+    'dynamic_column': (coerce_dynamic_columns, dict),
+}
+
+def bind_coercion(convert, args: Tuple):
+    """Converter with the extra coercion arguments of a field bound (e.g. a dynamic column prefix)"""
+    return lambda child: convert(child, *args)
+
+# Outcome of RecordSchema.select() for an extracted record
+RECORD_TOTAL = 'total'  # The report-wide 'total' row
+RECORD_ROW = 'row'      # A breakdown row, appended to the schema target
+RECORD_OTHER = 'other'  # Not kept as a row, still counted in the dynamic column totals
+
+# Metadata columns shared by every Setera record
+RECORD_METADATA_FIELDS = [
+    ('period', 'period', 'raw'),  # Specific date/time/day from XML
+    ('type', 'type', 'raw'),  # total/group/object
+    ('name', 'name', 'text'),  # Full name (e.g., "Others/belal.darwish - Belal Darwish")
+    ('grouping_name', 'grouping_name', 'text'),  # Name of the group/user/function (may be empty)
+    ('object_identifier', 'object_identifier', 'text'),  # Unique identifier
+    ('group_names', 'group_names', 'text'),  # Names of parent groups
+    ('depth_in_hierarchy', 'depth_in_hierarchy', 'text'),  # Hierarchy level
+]
+
+DATE_METADATA_LAYOUT = ['period', 'type', 'name', 'grouping_name', 'object_identifier', 'group_names', 'depth_in_hierarchy']
+TIME_METADATA_LAYOUT = ['period', 'name', 'grouping_name', 'object_identifier', 'group_names']
+WEEKDAY_METADATA_LAYOUT = ['day', 'name', 'grouping_name', 'object_identifier', 'group_names']
+
+def select_date_record(values: Dict) -> Optional[str]:
+    """Daily records: the total row plus every group/object day (the 'Total' period excluded)"""
+    if values['period'] is None or values['type'] is None:
+        return None
+    if values['type'] == 'total':
+        return RECORD_TOTAL
+    if values['type'] in ('group', 'object') and values['period'] != 'Total':
+        return RECORD_ROW
+    return RECORD_OTHER
+
+def select_time_record(values: Dict) -> Optional[str]:
+    """Hourly records: group/object slots (the 'Total' period excluded)"""
+    if values['period'] is not None and values['type'] in ('group', 'object') and values['period'] != 'Total':
+        return RECORD_ROW
+    return None
+
+def select_group_record(values: Dict) -> Optional[str]:
+    """Group-level records only (e.g. weekday breakdown), the 'Total' period excluded"""
+    if values['period'] is not None and values['type'] == 'group' and values['period'] != 'Total':
+        return RECORD_ROW
+    return None
+
+def select_no_record(values: Dict) -> Optional[str]:
+    """Records only inspected by the accumulator (e.g. name lookups), never kept as rows"""
+    return None
+
+class RecordSchema:
+    """
+    Declarative description of the records of one grouping, compiled into a tag index
+
+    fields: (xml_tag, output_key, coercion[, coercion_arg...]) tuples, see FIELD_COERCIONS.
+            A tag may feed several keys; the first occurrence of a tag wins, like find().
+            Only the fields whose key is laid out, summed or listed in inputs are compiled.
+    layout: keys of the produced row, in order (derived keys included)
+    select: function(values) -> RECORD_TOTAL / RECORD_ROW / RECORD_OTHER / None
+    target: record table RECORD_ROW rows are appended to ('daily', 'hourly', 'weekday')
+    derived: (output_key, DerivedColumn) computed vectorised over the record table
+    column_totals: dynamic_column keys summed over every selected record
+    inputs: keys extracted without being laid out (selection, lookups); schemas with a target
+            also extract every entity column, so an entity has one code across the tables
+    """
+
+    def __init__(self, fields: List[Tuple], layout: List[str], select=select_date_record,
+                 target: Optional[str] = 'daily', derived: Optional[List[Tuple]] = None,
+                 column_totals: Optional[List[str]] = None, inputs: Tuple = ('period', 'type')):
+        self.layout = list(layout)
+        self.select = select
+        self.target = target
+        self.derived = list(derived or [])
+        self.column_totals = list(column_totals or [])
+
+        # Values are pre-seeded in layout order so that a total row is the extracted dict itself
+        derived_keys = [key for key, _ in self.derived]
+        self.defaults = dict.fromkeys(self.layout)
+        entity_inputs = list(ENTITY_FIELDS) if target else []
+        self.extra_keys = [key for key in list(self.column_totals) + list(inputs) + entity_inputs
+                           if key not in self.defaults]
+        self.defaults.update(dict.fromkeys(self.extra_keys))
+        self.kinds = {}
+        self.index = {}
+        self.secondary_fields = []
+        self.dict_defaults = []
+        for field in fields:
+            tag, key, coercion = field[:3]
+            if key not in self.defaults or key in derived_keys or key in self.kinds:
+                continue
+            self.kinds[key] = coercion
+            convert, default = FIELD_COERCIONS[coercion]
+            if len(field) > 3:
+                convert = bind_coercion(convert, field[3:])
+            if tag in self.index:
+                # Further keys fed by the same tag are resolved with find() after the sweep
+                self.secondary_fields.append((tag, key, convert))
+            else:
+                self.index[tag] = (key, convert)
+            if default is dict:
+                self.dict_defaults.append(key)
+            else:
+                self.defaults[key] = default()
+
+    def extract(self, element) -> Dict:
+        """Fill every field from a single sweep over the record's children"""
+        values = self.defaults.copy()
+        for key in self.dict_defaults:
+            values[key] = {}
+        index = self.index
+        # Reverse order so that the first occurrence of a repeated tag is the one kept
+        for child in reversed(element):
+            field = index.get(child.tag)
+            if field is not None:
+                values[field[0]] = field[1](child)
+        for tag, key, convert in self.secondary_fields:
+            child = element.find(tag)
+            if child is not None:
+                values[key] = convert(child)
+        return values
+
+    def build_row(self, values: Dict) -> Dict:
+        """Lay out a single record (the report total) as a dict"""
+        if self.derived:
+            table = RecordTable(self, EntityTable())
+            table.append(values)
+            return table.rows()[0].to_dict()
+        for key in self.extra_keys:
+            del values[key]
+        return values
+
+# ========================================
+# COLUMNAR RECORD TABLES
+# ========================================
+# Breakdown rows are analysed column by column: one NumPy array per metric, the entity
+# columns (name, grouping_name, object_identifier, group_names, depth_in_hierarchy) as
+# integer codes into a dictionary shared by the whole report. Derived rates, scores and
+# threshold filters run vectorised on the arrays. Rows are slotted objects holding the
+# metric values and the entity code; they read like the legacy dicts, and plain dicts are
+# only built at the prompt/JSON boundary.
+
+# Entity columns repeated by every Setera record, interned once per report
+ENTITY_FIELDS = ('name', 'grouping_name', 'object_identifier', 'group_names', 'depth_in_hierarchy')
+
+# NumPy dtype of the numeric coercions (other coercions are kept as object columns)
+COLUMN_DTYPES = {
+    'int': np.int64,
+    'time': np.int64,
+    'float': np.float64,
+}
+
+# Record tables of a report, targets of the RecordSchemas
+RECORD_TABLE_TARGETS = ('daily', 'hourly', 'weekday')
+
+class DerivedColumn:
+    """Column computed vectorised from other columns of a RecordTable"""
+
+    def __init__(self, compute):
+        self.compute = compute
+
+    def __call__(self, table: 'RecordTable') -> np.ndarray:
+        return self.compute(table)
+
+    def to_list(self, values: np.ndarray, table: 'RecordTable') -> List:
+        """Legacy Python values of the column"""
+        return values.tolist()
+
+class RateColumn(DerivedColumn):
+    """
+    Percentage of two columns (vectorised calculate_percentage)
+
+    Guarded rates keep the legacy int 0 (not 0.0) in rows whose denominator is empty.
+    """
+
+    def __init__(self, numerator_key: str, denominator_key: str, guarded: bool = True):
+        self.numerator_key = numerator_key
+        self.denominator_key = denominator_key
+        self.guarded = guarded
+
+    def __call__(self, table: 'RecordTable') -> np.ndarray:
+        return calculate_percentage_array(table.column(self.numerator_key), table.column(self.denominator_key))
+
+    def to_list(self, values: np.ndarray, table: 'RecordTable') -> List:
+        rates = values.tolist()
+        if self.guarded:
+            for position in np.flatnonzero(table.column(self.denominator_key) <= 0).tolist():
+                rates[position] = 0
+        return rates
+
+class CompactRow(Mapping):
+    """
+    Breakdown row as a slotted object: the values of one record plus the code of its entity
+
+    A row class is made per record table (see make_row_class) with one slot per laid-out key,
+    except the entity columns, which are resolved through the report's EntityTable. Rows read
+    like the legacy dicts (row['key'], row.get(), iteration in layout order, equality with a
+    dict); to_dict() builds the plain dict for JSON dumps.
+    """
+    __slots__ = ('entity',)
+    _layout = ()
+    _value_keys = frozenset()
+    _entity_positions = {}
+    _entities = None
+
+    def __getitem__(self, key: str):
+        position = self._entity_positions.get(key)
+        if position is not None:
+            return self._entities.entries[self.entity][position]
+        if key in self._value_keys:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._layout)
+
+    def __len__(self) -> int:
+        return len(self._layout)
+
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
+
+    def to_dict(self) -> Dict:
+        return {key: self[key] for key in self._layout}
+
+def make_row_class(layout: List[str], entities: 'EntityTable') -> type:
+    """CompactRow subclass with a slot per non-entity key of layout, bound to a report's entity table"""
+    value_keys = [key for key in layout if key not in ENTITY_FIELDS]
+    return type('CompactRow', (CompactRow,), {
+        '__slots__': tuple(value_keys),
+        '_layout': tuple(layout),
+        '_value_keys': frozenset(value_keys),
+        '_entity_positions': {key: ENTITY_FIELDS.index(key) for key in layout if key in ENTITY_FIELDS},
+        '_entities': entities,
+    })
+
+class EntityTable:
+    """Entity dictionary of a report: (name, grouping_name, object_identifier, group_names, depth) <-> integer code"""
+
+    def __init__(self):
+        self.entries = []
+        self.codes = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def encode(self, values: Dict) -> int:
+        entity = (values['name'], values['grouping_name'], values['object_identifier'], values['group_names'],
+                  values.get('depth_in_hierarchy'))
+        code = self.codes.get(entity)
+        if code is None:
+            code = self.codes[entity] = len(self.entries)
+            self.entries.append(entity)
+        return code
+
+    def decode(self, codes: np.ndarray, field: str) -> List[str]:
+        """Values of one entity field for an array of codes"""
+        position = ENTITY_FIELDS.index(field)
+        names = [entity[position] for entity in self.entries]
+        return [names[code] for code in codes.tolist()]
+
+class RecordTable:
+    """
+    Columnar breakdown rows (daily, hourly, weekday) of one report
+
+    Every record is stored as a CompactRow holding its entity code; the text of period/type
+    labels is shared between rows. Columns are materialised on first use as NumPy arrays
+    (int64 counts and times, float64 percentages, object arrays for period/type and dynamic
+    column maps) and derived columns are computed vectorised. The rows double as the legacy
+    row dicts: rows() only fills in the derived values, so no second copy of the table is
+    built for the prompt builders.
     """
+
+    def __init__(self, schema: Optional[RecordSchema], entities: EntityTable):
+        self.layout = schema.layout if schema else []
+        self.kinds = schema.kinds if schema else {}
+        self.derived = dict(schema.derived) if schema else {}
+        self.entities = entities
+        self.row_class = make_row_class(self.layout, entities)
+        self.value_keys = [key for key in self.layout if key not in ENTITY_FIELDS and key not in self.derived]
+        self.label_keys = [key for key in self.value_keys if self.kinds.get(key) in ('raw', 'text')]
+        self.labels = {key: {} for key in self.label_keys}
+        self.codes = []
+        self.records = []
+        self.columns = {}
+        self.laid_out = 0
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def append(self, values: Dict) -> None:
+        """Add an extracted record (selection and dynamic column totals are already applied)"""
+        code = self.entities.encode(values)
+        for key in self.label_keys:
+            label = values[key]
+            if label is not None:
+                values[key] = self.labels[key].setdefault(label, label)
+        row = self.row_class()
+        row.entity = code
+        for key in self.value_keys:
+            setattr(row, key, values[key])
+        self.codes.append(code)
+        self.records.append(row)
+        if self.columns:
+            self.columns = {}
+
+    def distinct(self, key: str) -> List[str]:
+        """Distinct non-empty values of a label column (period, type, day) in order of appearance"""
+        return [label for label in self.labels.get(key, {}) if label]
+
+    def column(self, key: str) -> np.ndarray:
+        """Array of one column ('entity' for the codes), built on first use and cached"""
+        values = self.columns.get(key)
+        if values is None:
+            if key in self.derived:
+                values = self.derived[key](self)
+            elif key == 'entity':
+                values = np.array(self.codes, dtype=np.int64)
+            elif key in ENTITY_FIELDS:
+                values = np.empty(len(self), dtype=object)
+                values[:] = self.entities.decode(self.column('entity'), key)
+            elif self.kinds.get(key) in COLUMN_DTYPES:
+                values = np.fromiter(map(operator.attrgetter(key), self.records),
+                                     dtype=COLUMN_DTYPES[self.kinds[key]], count=len(self))
+            else:
+                values = np.empty(len(self), dtype=object)
+                values[:] = [record[key] for record in self.records]
+            self.columns[key] = values
+        return values
+
+    def rows(self) -> List[CompactRow]:
+        """Rows in table order (dict-like, schema layout order), derived values filled in"""
+        if self.laid_out < len(self.records):
+            pending = self.records[self.laid_out:]
+            for key, derive in self.derived.items():
+                derived_values = derive.to_list(self.column(key), self)[self.laid_out:]
+                for record, value in zip(pending, derived_values):
+                    setattr(record, key, value)
+            self.laid_out = len(self.records)
+        return self.records
+
+    def where(self, mask: np.ndarray) -> List[CompactRow]:
+        """Rows selected by a boolean mask, in table order"""
+        rows = self.rows()
+        return [rows[position] for position in np.flatnonzero(mask).tolist()]
+
+    def top(self, values: np.ndarray, count: int) -> List[CompactRow]:
+        """Rows with the highest values, ties in table order (like a stable reverse sort)"""
+        rows = self.rows()
+        order = np.argsort(-np.asarray(values), kind='stable')[:count]
+        return [rows[position] for position in order.tolist()]
+
+def label_positions(labels: np.ndarray, positions: Dict[str, int]) -> np.ndarray:
+    """Position of every label of an object column in a small label -> position map (-1 when unknown)"""
+    if not len(labels):
+        return np.zeros(0, dtype=np.int64)
+    distinct, inverse = np.unique(labels.astype(str), return_inverse=True)
+    lookup = np.array([positions.get(label, -1) for label in distinct.tolist()], dtype=np.int64)
+    return lookup[inverse]
+
+def parse_slot_hour(period: str) -> int:
+    """Hour of day of a time slot label ("14:00 - 14:30" -> 14), -1 when not a time"""
     try:
-        logger.info("🔍 Parsing IVR XML report...")
-        root = ET.fromstring(xml_content)
-        
-        # Collect data from different time groupings
-        daily_data = []
-        hourly_data = []
-        total_data = {}
-        transfer_destinations = {}
-        
-        # Parse daily data (date__groupsobjects) - handles multiple IVR
-        for date_group in root.findall('.//date__groupsobjects'):
-            period = date_group.find('period')
-            group_type = date_group.find('type')
-            
-            if period is not None and group_type is not None:
-                period_text = period.text
-                type_text = group_type.text
-                
-                # Extract detailed metadata: names, identifiers, groups
-                # Note: <name> contains full name (e.g., "Others/belal.darwish - Belal Darwish")
-                full_name = get_text_value(date_group, 'name')  # Full name from XML
-                grouping_name = get_text_value(date_group, 'grouping_name')
-                object_identifier = get_text_value(date_group, 'object_identifier')
-                group_names = get_text_value(date_group, 'group_names')
-                depth_in_hierarchy = get_text_value(date_group, 'depth_in_hierarchy')
-                
-                # Extract metrics
-                data_point = {
-                    'period': period_text,  # Specific date from XML (e.g., "2024-01-15", "15/01/2024")
-                    'type': type_text,  # total/group/object
-                    'name': full_name,  # Full name (e.g., "Others/belal.darwish - Belal Darwish")
-                    'grouping_name': grouping_name,  # Name of the IVR function
-                    'object_identifier': object_identifier,  # Unique identifier
-                    'group_names': group_names,  # Names of parent groups
-                    'depth_in_hierarchy': depth_in_hierarchy,  # Hierarchy level
-                    'total_handled': get_int_value(date_group, 'incoming_total_handled_by_ivr'),
-                    'connected': get_int_value(date_group, 'incoming_connected'),
-                    'not_connected': get_int_value(date_group, 'incoming_not_connected'),
-                    'avg_duration': get_int_value(date_group, 'incoming_average_call_duration_for_ivr'),
-                    'total_duration': get_int_value(date_group, 'incoming_total_call_duration_for_ivr'),
-                    'failures': get_int_value(date_group, 'incoming_terminated_because_of_failure'),
-                    'transfers': parse_transfer_destinations(date_group)
-                }
-                
-                if type_text == 'total':
-                    total_data = data_point
-                elif type_text == 'group' and period_text != 'Total':
-                    daily_data.append(data_point)
-                elif type_text == 'object' and period_text != 'Total':
-                    # Include object-level data (contains specific IVR function name)
-                    daily_data.append(data_point)
-                
-                # Collect all transfer destinations
-                if data_point['transfers']:
-                    for dest, count in data_point['transfers'].items():
-                        if dest not in transfer_destinations:
-                            transfer_destinations[dest] = 0
-                        transfer_destinations[dest] += count
-
-        # Parse hourly data (time__groupsobjects) - only active hours with enhanced analysis
-        for time_group in root.findall('.//time__groupsobjects'):
-            period = time_group.find('period')
-            group_type = time_group.find('type')
-            
-            if (period is not None and group_type is not None and 
-                (group_type.text == 'group' or group_type.text == 'object') and period.text != 'Total'):
-                
-                total_handled = get_int_value(time_group, 'incoming_total_handled_by_ivr')
-                connected = get_int_value(time_group, 'incoming_connected')
-                not_connected = get_int_value(time_group, 'incoming_not_connected')
-                avg_duration = get_int_value(time_group, 'incoming_average_call_duration_for_ivr')
-                
-                # Extract detailed metadata for hourly data
-                full_name = get_text_value(time_group, 'name')  # Full name from XML
-                grouping_name = get_text_value(time_group, 'grouping_name')
-                object_identifier = get_text_value(time_group, 'object_identifier')
-                group_names = get_text_value(time_group, 'group_names')
-                
-                hourly_data.append({
-                    'period': period.text,  # Specific time from XML (e.g., "09:00", "10:00")
-                    'name': full_name,
-                    'grouping_name': grouping_name,
-                    'object_identifier': object_identifier,
-                    'group_names': group_names,
-                    'total_handled': total_handled,
-                    'connected': connected,
-                    'not_connected': not_connected,
-                    'avg_duration': avg_duration,
-                    'connection_rate': calculate_percentage(connected, total_handled) if total_handled > 0 else 0,
-                    'abandonment_rate': calculate_percentage(not_connected, total_handled) if total_handled > 0 else 0,
-                    'transfers': parse_transfer_destinations(time_group),
-                    'efficiency_score': calculate_hourly_efficiency(total_handled, connected, avg_duration)
-                })
+        hour = int(period.split(' - ')[0].split(':')[0])
+    except (ValueError, AttributeError):
+        return -1
+    return hour if 0 <= hour < 24 else -1
 
-        # Parse weekday data with detailed metadata
-        weekday_data = []
-        for weekday_group in root.findall('.//weekday__groupsobjects'):
-            period = weekday_group.find('period')
-            group_type = weekday_group.find('type')
-            
-            if (period is not None and group_type is not None and 
-                group_type.text == 'group' and period.text not in ['Total']):
-                
-                full_name = get_text_value(weekday_group, 'name')  # Full name from XML
-                grouping_name = get_text_value(weekday_group, 'grouping_name')
-                object_identifier = get_text_value(weekday_group, 'object_identifier')
-                group_names = get_text_value(weekday_group, 'group_names')
-                
-                weekday_data.append({
-                    'day': period.text,  # Specific day name from XML (e.g., "Monday", "Lunedì", "1")
-                    'name': full_name,
-                    'grouping_name': grouping_name,
+# Coarse groupings whose records have a consumer (PROMPT_PERIOD_BREAKDOWNS), see LazyGrouping.
+# The month, quarter, year and period groupings are not kept.
+LAZY_GROUPINGS = ('week', 'yearmonth')
+
+class LazyGrouping:
+    """
+    Records of one coarse grouping of LAZY_GROUPINGS (week, yearmonth), decoded on demand
+
+    The streaming pass captures the record elements as they go by (their children are moved
+    out of the parser's tree, see retain_record) and lists their period labels in document
+    order. Only the decoding is deferred: the records are extracted with the report's date
+    schema the first time rows(), total or table is used, then the elements are released.
+    """
+
+    def __init__(self, grouping: str, schema: Optional[RecordSchema] = None, entities: Optional[EntityTable] = None):
+        self.grouping = grouping
+        self.schema = schema
+        self.entities = entities or EntityTable()
+        self.periods = []  # Distinct period labels, 'Total' excluded, in document order
+        self.elements = []
+        self._table = None
+        self._total = {}
+
+    def __len__(self) -> int:
+        return len(self.periods)
+
+    def retain(self, element) -> None:
+        period = element.findtext('period')
+        if period and period != 'Total' and period not in self.periods:
+            self.periods.append(period)
+        self.elements.append(retain_record(element))
+
+    @property
+    def decoded(self) -> bool:
+        return self._table is not None
+
+    @property
+    def table(self) -> RecordTable:
+        """Record table of the group/object rows, extracted on first use"""
+        if self._table is None:
+            table = RecordTable(self.schema, self.entities)
+            for element in self.elements:
+                values = self.schema.extract(element)
+                selection = self.schema.select(values)
+                if selection == RECORD_TOTAL:
+                    self._total = self.schema.build_row(values)
+                elif selection == RECORD_ROW:
+                    table.append(values)
+            self.elements = []
+            self._table = table
+        return self._table
+
+    @property
+    def total(self) -> Dict:
+        self.table
+        return self._total
+
+    def rows(self) -> List[Dict]:
+        """Legacy list of dicts (group and object rows), like daily_breakdown"""
+        return self.table.rows()
+
+    def group_rows(self) -> List[Dict]:
+        """Group-level rows only: one per period and entity group"""
+        return [row for row in self.rows() if row.get('type') == 'group']
+
+    def to_dict(self) -> Dict:
+        """Decoded form (report cache, JSON dumps)"""
+        return {'grouping': self.grouping, 'periods': self.periods, 'total': self.total,
+                'rows': [row.to_dict() if isinstance(row, CompactRow) else row for row in self.rows()]}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'LazyGrouping':
+        grouping = cls(data['grouping'])
+        grouping.periods = list(data['periods'])
+        grouping._total = data['total']
+        grouping._table = RecordTable(None, grouping.entities)
+        grouping._table.records = list(data['rows'])
+        grouping._table.laid_out = len(grouping._table.records)
+        return grouping
+
+class SchemaReportAccumulator(ReportAccumulator):
+    """
+    Accumulator driven by one RecordSchema per grouping
+
+    Records are extracted in one sweep and routed by the schema: the total row goes to
+    total_data, breakdown rows to the record table of the schema target (self.tables),
+    and dynamic columns listed in column_totals are summed into self.column_totals.
+    Groupings without a schema still reach add_<grouping> handlers. The records of the
+    LAZY_GROUPINGS are also retained in self.lazy_groupings, decoded only when used, see
+    period_groupings().
+
+    Entities (queues, users, IVRs, hunt groups, rulebases) are tracked on the way: every row
+    carries its entity code, and the dynamic columns of the daily rows are also summed per
+    entity, so build_entity_breakdown() needs no further pass over the rows.
+    """
+    schemas: Dict[str, RecordSchema] = {}
+    # Additive daily columns summed per entity, and the columns adding up to an entity's call volume
+    entity_metrics: List[str] = []
+    entity_volume_keys: Tuple[str, ...] = ()
+
+    def __init__(self):
+        super().__init__()
+        self.entities = EntityTable()
+        target_schemas = {schema.target: schema for schema in self.schemas.values() if schema.target}
+        self.tables = {target: RecordTable(target_schemas.get(target), self.entities)
+                       for target in RECORD_TABLE_TARGETS}
+        self.total_data = {}
+        self.column_totals = {}
+        self.entity_columns = {}  # Entity code -> column_totals key -> {column: count}
+        self.lazy_groupings = {}
+
+    def add(self, grouping: str, element) -> None:
+        schema = self.schemas.get(grouping)
+        if schema is None:
+            super().add(grouping, element)
+        else:
+            self.add_record(grouping, schema, schema.extract(element))
+        if grouping in LAZY_GROUPINGS:
+            # Last: retaining moves the children out of the element
+            lazy_grouping = self.lazy_groupings.get(grouping)
+            if lazy_grouping is None:
+                lazy_grouping = self.lazy_groupings[grouping] = LazyGrouping(grouping, self.schemas['date'], self.entities)
+            lazy_grouping.retain(element)
+
+    def period_groupings(self) -> Dict[str, LazyGrouping]:
+        """
+        The lazy groupings of the report spanning more than one period, once the streaming pass
+        is over (the prompts skip a single period, so a daily export keeps none)
+        """
+        return {grouping: lazy_grouping for grouping, lazy_grouping in self.lazy_groupings.items()
+                if len(lazy_grouping) > 1}
+
+    def add_record(self, grouping: str, schema: RecordSchema, values: Dict) -> None:
+        selection = schema.select(values)
+        if selection is None:
+            return
+
+        for key in schema.column_totals:
+            totals = self.column_totals.setdefault(key, {})
+            for column, count in values[key].items():
+                totals[column] = totals.get(column, 0) + count
+
+        if selection == RECORD_TOTAL:
+            self.total_data = schema.build_row(values)
+        elif selection == RECORD_ROW:
+            table = self.tables[schema.target]
+            table.append(values)
+            if schema.column_totals and schema.target == 'daily':
+                entity_columns = self.entity_columns.setdefault(table.codes[-1], {})
+                for key in schema.column_totals:
+                    totals = entity_columns.setdefault(key, {})
+                    for column, count in values[key].items():
+                        totals[column] = totals.get(column, 0) + count
+
+    def collect_entity_details(self, targets: Tuple[str, ...] = ('daily', 'hourly')) -> Dict[str, set]:
+        """
+        Distinct non-empty values of every entity column over the rows of some tables
+
+        Read from the entity dictionary through the distinct entity codes of the tables,
+        instead of looping over the rows.
+        """
+        codes = set()
+        for target in targets:
+            codes.update(self.tables[target].codes)
+        details = {field: set() for field in ENTITY_FIELDS}
+        entries = self.entities.entries
+        for code in codes:
+            for field, value in zip(ENTITY_FIELDS, entries[code]):
+                if value:
+                    details[field].add(value)
+        return details
+
+    def build_entity_breakdown(self) -> Dict:
+        """
+        Per-entity totals, hourly and daily volume vectors and dynamic columns, keyed by object_identifier
+
+        Sums are scattered by entity code over the columns of the daily and hourly tables
+        (np.add.at), so the rows are not visited again. Entities are the object records,
+        biggest volume first; 'days' gives the labels of the daily_volume positions.
+        """
+        daily, hourly = self.tables['daily'], self.tables['hourly']
+        entity_count = len(self.entities)
+        days = [label for label in daily.distinct('period') if label != 'Total']
+
+        totals = {}
+        daily_codes = daily.column('entity')
+        for key in self.entity_metrics:
+            sums = np.zeros(entity_count, dtype=np.int64)
+            np.add.at(sums, daily_codes, daily.column(key))
+            totals[key] = sums
+
+        daily_volume = np.zeros((entity_count, len(days)), dtype=np.int64)
+        if len(daily) and days:
+            positions = label_positions(daily.column('period'), {label: index for index, label in enumerate(days)})
+            kept = positions >= 0
+            np.add.at(daily_volume, (daily_codes[kept], positions[kept]),
+                      sum(daily.column(key) for key in self.entity_volume_keys)[kept])
+
+        hourly_volume = np.zeros((entity_count, 24), dtype=np.int64)
+        if len(hourly):
+            hours = {label: parse_slot_hour(label) for label in hourly.distinct('period')}
+            positions = label_positions(hourly.column('period'), hours)
+            kept = positions >= 0
+            np.add.at(hourly_volume, (hourly.column('entity')[kept], positions[kept]),
+                      sum(hourly.column(key) for key in self.entity_volume_keys)[kept])
+
+        # Records of one entity may differ in name or depth: merge them by identifier
+        merged = {}
+        for code, (name, grouping_name, object_identifier, group_names, _) in enumerate(self.entities.entries):
+            if not object_identifier:
+                continue
+            entity = merged.get(object_identifier)
+            if entity is None:
+                entity = merged[object_identifier] = {
                     'object_identifier': object_identifier,
+                    'name': name,
+                    'grouping_name': grouping_name,
                     'group_names': group_names,
-                    'total_handled': get_int_value(weekday_group, 'incoming_total_handled_by_ivr'),
-                    'connected': get_int_value(weekday_group, 'incoming_connected'),
-                    'not_connected': get_int_value(weekday_group, 'incoming_not_connected'),
-                    'avg_duration': get_int_value(weekday_group, 'incoming_average_call_duration_for_ivr'),
-                    'connection_rate': calculate_percentage(
-                        get_int_value(weekday_group, 'incoming_connected'),
-                        get_int_value(weekday_group, 'incoming_total_handled_by_ivr')
-                    )
-                })
+                    'totals': dict.fromkeys(self.entity_metrics, 0),
+                    'daily_volume': np.zeros(len(days), dtype=np.int64),
+                    'hourly_volume': np.zeros(24, dtype=np.int64),
+                    'volume': 0,
+                    'columns': {},
+                }
+            for key in self.entity_metrics:
+                entity['totals'][key] += int(totals[key][code])
+            entity['daily_volume'] += daily_volume[code]
+            entity['hourly_volume'] += hourly_volume[code]
+            for key, columns in self.entity_columns.get(code, {}).items():
+                entity_totals = entity['columns'].setdefault(key, {})
+                for column, count in columns.items():
+                    entity_totals[column] = entity_totals.get(column, 0) + count
+
+        entities = []
+        for entity in merged.values():
+            entity['volume'] = int(entity['daily_volume'].sum()) if days else 0
+            entity['daily_volume'] = entity['daily_volume'].tolist()
+            entity['hourly_volume'] = entity['hourly_volume'].tolist()
+            entities.append(entity)
+        entities.sort(key=lambda entity: entity['volume'], reverse=True)
+
+        return {
+            'days': days,
+            'volume_keys': list(self.entity_volume_keys),
+            'entities': entities,
+        }
+
+# ========================================
+# XML PARSERS FOR DIFFERENT REPORT TYPES
+# ========================================
+
+IVR_METRIC_FIELDS = [
+    ('incoming_total_handled_by_ivr', 'total_handled', 'int'),
+    ('incoming_connected', 'connected', 'int'),
+    ('incoming_not_connected', 'not_connected', 'int'),
+    ('incoming_average_call_duration_for_ivr', 'avg_duration', 'int'),
+    ('incoming_total_call_duration_for_ivr', 'total_duration', 'int'),
+    ('incoming_terminated_because_of_failure', 'failures', 'int'),
+    ('transferred_to_specification', 'transfers', 'dynamic_column', 'Connected to '),
+]
+
+IVR_RECORD_SCHEMAS = {
+    # Daily data (date__groupsobjects) - handles multiple IVR, collects all transfer destinations
+    'date': RecordSchema(
+        RECORD_METADATA_FIELDS + IVR_METRIC_FIELDS,
+        DATE_METADATA_LAYOUT + ['total_handled', 'connected', 'not_connected', 'avg_duration',
+                                'total_duration', 'failures', 'transfers'],
+        column_totals=['transfers'],
+    ),
+    # Hourly data (time__groupsobjects) - only active hours with enhanced analysis
+    'time': RecordSchema(
+        RECORD_METADATA_FIELDS + IVR_METRIC_FIELDS,
+        TIME_METADATA_LAYOUT + ['total_handled', 'connected', 'not_connected', 'avg_duration',
+                                'connection_rate', 'abandonment_rate', 'transfers', 'efficiency_score'],
+        select=select_time_record,
+        target='hourly',
+        derived=[
+            ('connection_rate', RateColumn('connected', 'total_handled')),
+            ('abandonment_rate', RateColumn('not_connected', 'total_handled')),
+            ('efficiency_score', DerivedColumn(lambda table: calculate_hourly_efficiency_array(
+                table.column('total_handled'), table.column('connected'), table.column('avg_duration')))),
+        ],
+    ),
+    # Weekday data with detailed metadata ('day' is the day name, e.g. "Monday", "Lunedì", "1")
+    'weekday': RecordSchema(
+        RECORD_METADATA_FIELDS + [('period', 'day', 'raw')] + IVR_METRIC_FIELDS,
+        WEEKDAY_METADATA_LAYOUT + ['total_handled', 'connected', 'not_connected', 'avg_duration',
+                                   'connection_rate'],
+        select=select_group_record,
+        target='weekday',
+        derived=[
+            ('connection_rate', RateColumn('connected', 'total_handled', guarded=False)),
+        ],
+    ),
+}
+
+class IvrReportAccumulator(SchemaReportAccumulator):
+    """Collects IVR records (date, time, weekday groupings) during the streaming pass"""
+    report_type = 'ivr'
+    schemas = IVR_RECORD_SCHEMAS
+    entity_metrics = ['total_handled', 'connected', 'not_connected', 'total_duration', 'failures']
+    entity_volume_keys = ('total_handled',)
+
+    def build(self) -> Dict:
+        daily, hourly, weekday = self.tables['daily'], self.tables['hourly'], self.tables['weekday']
+        daily_data = daily.rows()
+        hourly_data = hourly.rows()
+        weekday_data = weekday.rows()
+        total_data = self.total_data
+        transfer_destinations = self.column_totals.get('transfers', {})
 
         # Calculate derived metrics with enhanced analysis
         connection_rate = calculate_percentage(total_data.get('connected', 0), total_data.get('total_handled', 0))
         abandonment_rate = calculate_percentage(total_data.get('not_connected', 0), total_data.get('total_handled', 0))
-        
+
         # Advanced hourly analysis
-        hourly_patterns = identify_critical_hours(hourly_data)
-        
+        hourly_patterns = identify_critical_hours(hourly)
+
         # Enhanced temporal pattern analysis
-        temporal_insights = analyze_temporal_patterns(daily_data, weekday_data)
-        
+        temporal_insights = analyze_temporal_patterns(daily, weekday)
+
         # Identify peak hours with efficiency scoring
-        peak_hours = sorted(hourly_data, key=lambda x: x.get('efficiency_score', 0), reverse=True)[:3]
-        
+        peak_hours = hourly.top(hourly.column('efficiency_score'), 3)
+
         # Most active day with enhanced metrics
-        most_active_day = max(weekday_data, key=lambda x: x['total_handled']) if weekday_data else None
-        
-        # Collect all unique names, identifiers, and groups for detailed reporting
-        unique_groups = set()
-        unique_identifiers = set()
-        unique_names = set()
-        all_periods = []
-        all_weekdays = []
-        
-        unique_full_names = set()  # Full names from <name> tag
-        
-        for day in daily_data:
-            if day.get('name'):  # Full name from <name> tag
-                unique_full_names.add(day['name'])
-            if day.get('grouping_name'):
-                unique_names.add(day['grouping_name'])
-            if day.get('object_identifier'):
-                unique_identifiers.add(day['object_identifier'])
-            if day.get('group_names'):
-                unique_groups.add(day['group_names'])
-            if day.get('period'):
-                all_periods.append(day['period'])
-        
-        for hour in hourly_data:
-            if hour.get('name'):  # Full name from <name> tag
-                unique_full_names.add(hour['name'])
-            if hour.get('grouping_name'):
-                unique_names.add(hour['grouping_name'])
-            if hour.get('object_identifier'):
-                unique_identifiers.add(hour['object_identifier'])
-            if hour.get('group_names'):
-                unique_groups.add(hour['group_names'])
-        
-        for weekday in weekday_data:
-            if weekday.get('day'):
-                all_weekdays.append(weekday['day'])
-            if weekday.get('name'):  # Full name from <name> tag
-                unique_full_names.add(weekday['name'])
-            if weekday.get('grouping_name'):
-                unique_names.add(weekday['grouping_name'])
-            if weekday.get('object_identifier'):
-                unique_identifiers.add(weekday['object_identifier'])
-        
+        most_active_day = weekday.top(weekday.column('total_handled'), 1)[0] if len(weekday) else None
+
+        # Collect all unique names, identifiers, and groups for detailed reporting (from the entity dictionary)
+        details = self.collect_entity_details(('daily', 'hourly', 'weekday'))
+        unique_full_names = details['name']  # Full names from <name> tag
+        unique_names = details['grouping_name']
+        unique_identifiers = details['object_identifier']
+        unique_groups = self.collect_entity_details(('daily', 'hourly'))['group_names']
+        all_periods = daily.distinct('period')
+        all_weekdays = weekday.distinct('day')
+        entity_breakdown = self.build_entity_breakdown()
+
         logger.info(f"✅ IVR XML parsed successfully - {total_data.get('total_handled', 0)} total calls")
         logger.info(f"📋 Found {len(unique_full_names)} unique full names, {len(unique_identifiers)} identifiers, {len(unique_groups)} groups")
-        
+
         return {
             'report_type': 'ivr',
             'period_range': determine_period_range(daily_data),
@@ -275,6 +1200,8 @@ def parse_ivr_xml(xml_content: str) -> Dict:
                 'operational_efficiency': hourly_patterns.get('average_efficiency', 0)
             },
             'daily_breakdown': daily_data,
+            'period_groupings': self.period_groupings(),
+            'entity_breakdown': entity_breakdown,
             'hourly_analysis': {
                 'active_hours': hourly_patterns.get('total_active_hours', 0),
                 'peak_hours': peak_hours,
@@ -300,53 +1227,49 @@ def parse_ivr_xml(xml_content: str) -> Dict:
                 'weekend_performance': temporal_insights.get('weekend_vs_weekday', {})
             }
         }
-        
+
+def parse_ivr_xml(xml_content: Union[str, bytes, Iterable]) -> Dict:
+    """
+    Parse IVR XML report with improved analysis for Maya Analytics
+
+    IVR XML Structure:
+    - Multiple time groupings: date__groupsobjects, time__groupsobjects, weekday__groupsobjects, etc.
+    - Each group contains: period, type (total/group/object), metrics, transferred_to_specification
+    - Key metrics: incoming_total_handled_by_ivr, incoming_connected, incoming_not_connected, durations
+    - Dynamic transfer destinations in transferred_to_specification/dynamic_column
+
+    NOTE: This parser handles reports with MULTIPLE IVR correctly.
+    The document is streamed once and every record of every IVR is aggregated.
+    """
+    try:
+        logger.info("🔍 Parsing IVR XML report...")
+        return consume_groupsobjects(xml_content, IvrReportAccumulator())
+
     except ET.ParseError as e:
         logger.error(f"❌ XML Parse Error in IVR report: {str(e)}")
         raise Exception(f"Invalid XML format: {str(e)}")
+    except XmlLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"❌ Error parsing IVR XML: {str(e)}")
         raise Exception(f"IVR parsing failed: {str(e)}")
 
 def parse_transfer_destinations(element) -> Dict[str, int]:
     """Parse dynamic transfer destinations from transferred_to_specification"""
-    transfers = {}
-    
     transferred_spec = element.find('transferred_to_specification')
-    if transferred_spec is not None:
-        for dynamic_col in transferred_spec.findall('dynamic_column'):
-            column_name = dynamic_col.find('column_name')
-            column_value = dynamic_col.find('column_value')
-            
-            if column_name is not None and column_value is not None:
-                try:
-                    # Clean up the destination name
-                    dest_name = column_name.text.strip()
-                    if dest_name.startswith('Connected to '):
-                        dest_name = dest_name[13:]  # Remove "Connected to " prefix
-                    
-                    transfers[dest_name] = int(column_value.text)
-                except (ValueError, AttributeError):
-                    continue
-    
-    return transfers
+    if transferred_spec is None:
+        return {}
+    return coerce_dynamic_columns(transferred_spec, 'Connected to ')
 
 def get_text_value(element, tag_name: str) -> str:
     """Safely extract text value from XML element"""
     child = element.find(tag_name)
-    if child is not None and child.text:
-        return child.text.strip()
-    return ''
+    return coerce_text(child) if child is not None else ''
 
 def get_int_value(element, tag_name: str) -> int:
     """Safely extract integer value from XML element"""
     child = element.find(tag_name)
-    if child is not None and child.text:
-        try:
-            return int(child.text)
-        except ValueError:
-            return 0
-    return 0
+    return coerce_int(child) if child is not None else 0
 
 def calculate_hourly_efficiency(total_handled: int, connected: int, avg_duration: float) -> float:
     """Calculate efficiency score for an hour based on volume, success rate, and duration"""
@@ -371,67 +1294,83 @@ def calculate_hourly_efficiency(total_handled: int, connected: int, avg_duration
     
     return round(volume_score + connection_score + duration_score, 1)
 
-def identify_critical_hours(hourly_data: List[Dict]) -> Dict:
-    """Identify critical time patterns from hourly data"""
-    if not hourly_data:
+def calculate_hourly_efficiency_array(total_handled: np.ndarray, connected: np.ndarray, avg_duration: np.ndarray) -> np.ndarray:
+    """Vectorised calculate_hourly_efficiency over the columns of an hourly table"""
+    active = total_handled != 0
+    safe_total = np.where(active, total_handled, 1)
+
+    volume_score = np.minimum(total_handled / 10, 1.0) * 30
+    connection_score = (connected / safe_total) * 50
+    duration_score = np.select(
+        [(avg_duration >= 8) & (avg_duration <= 20), avg_duration < 8, avg_duration <= 30],
+        [20, 15, 10],
+        default=5
+    )
+
+    return np.where(active, round_array(volume_score + connection_score + duration_score, 1), 0.0)
+
+def identify_critical_hours(hourly: 'RecordTable') -> Dict:
+    """Identify critical time patterns from the hourly table"""
+    if not len(hourly):
         return {}
-    
-    # Sort by abandonment rate to find critical hours
-    critical_hours = [h for h in hourly_data if h.get('abandonment_rate', 0) > 50]
-    dead_hours = [h for h in hourly_data if h.get('total_handled', 0) == 0]
-    optimal_hours = [h for h in hourly_data if h.get('connection_rate', 0) >= 90 and h.get('total_handled', 0) > 0]
-    
-    # Find peak efficiency hours
-    efficiency_sorted = sorted(hourly_data, key=lambda x: x.get('efficiency_score', 0), reverse=True)
-    peak_efficiency = efficiency_sorted[:3] if len(efficiency_sorted) >= 3 else efficiency_sorted
-    
+
+    total_handled = hourly.column('total_handled')
+    efficiency_score = hourly.column('efficiency_score')
+
     return {
-        'critical_hours': critical_hours,
-        'dead_hours': dead_hours, 
-        'optimal_hours': optimal_hours,
-        'peak_efficiency': peak_efficiency,
-        'total_active_hours': len([h for h in hourly_data if h.get('total_handled', 0) > 0]),
-        'average_efficiency': round(sum(h.get('efficiency_score', 0) for h in hourly_data) / len(hourly_data), 1) if hourly_data else 0
+        'critical_hours': hourly.where(hourly.column('abandonment_rate') > 50),
+        'dead_hours': hourly.where(total_handled == 0),
+        'optimal_hours': hourly.where((hourly.column('connection_rate') >= 90) & (total_handled > 0)),
+        # Find peak efficiency hours
+        'peak_efficiency': hourly.top(efficiency_score, 3),
+        'total_active_hours': int(np.count_nonzero(total_handled > 0)),
+        'average_efficiency': round(float(efficiency_score.sum()) / len(hourly), 1)
     }
 
-def analyze_temporal_patterns(daily_breakdown: List[Dict], weekday_analysis: List[Dict]) -> Dict:
+# Day names (lowercase) counted as weekend in the weekday breakdown
+WEEKEND_DAY_NAMES = ['saturday', 'sunday', 'sabato', 'domenica']
+
+def analyze_temporal_patterns(daily: 'RecordTable', weekday: 'RecordTable') -> Dict:
     """Advanced temporal pattern analysis"""
     patterns = {}
-    
+
     # Daily trend analysis
-    if daily_breakdown:
-        daily_volumes = [d.get('total_handled', 0) for d in daily_breakdown if d.get('type') == 'group']
+    if len(daily):
+        daily_handled = daily.column('total_handled')
+        daily_volumes = daily_handled[daily.column('type') == 'group']
         if len(daily_volumes) > 1:
             # Calculate trend
             trend = "crescente" if daily_volumes[-1] > daily_volumes[0] else "decrescente" if daily_volumes[-1] < daily_volumes[0] else "stabile"
             volatility = calculate_volatility(daily_volumes)
             patterns['daily_trend'] = trend
             patterns['volatility'] = volatility
-            patterns['peak_day'] = max(daily_breakdown, key=lambda x: x.get('total_handled', 0)) if daily_breakdown else None
-    
+            patterns['peak_day'] = daily.top(daily_handled, 1)[0]
+
     # Weekly pattern analysis
-    if weekday_analysis:
-        weekend_performance = [d for d in weekday_analysis if d.get('day', '').lower() in ['saturday', 'sunday', 'sabato', 'domenica']]
-        weekday_performance = [d for d in weekday_analysis if d not in weekend_performance]
-        
+    if len(weekday):
+        weekday_handled = weekday.column('total_handled')
+        weekend = np.array([day.lower() in WEEKEND_DAY_NAMES for day in weekday.column('day')], dtype=bool)
+        weekend_count = int(np.count_nonzero(weekend))
+        weekday_count = len(weekday) - weekend_count
+
         patterns['weekend_vs_weekday'] = {
-            'weekend_avg': round(sum(w.get('total_handled', 0) for w in weekend_performance) / max(len(weekend_performance), 1), 1),
-            'weekday_avg': round(sum(w.get('total_handled', 0) for w in weekday_performance) / max(len(weekday_performance), 1), 1),
-            'most_active_weekday': max(weekday_analysis, key=lambda x: x.get('total_handled', 0)) if weekday_analysis else None
+            'weekend_avg': round(int(weekday_handled[weekend].sum()) / max(weekend_count, 1), 1),
+            'weekday_avg': round(int(weekday_handled[~weekend].sum()) / max(weekday_count, 1), 1),
+            'most_active_weekday': weekday.top(weekday_handled, 1)[0]
         }
-    
+
     return patterns
 
-def calculate_volatility(values: List[int]) -> str:
-    """Calculate volatility description from a list of values"""
+def calculate_volatility(values) -> str:
+    """Calculate volatility description from a sequence (or array) of values"""
+    values = np.asarray(values, dtype=np.float64)
     if len(values) < 2:
         return "insufficienti dati"
-    
-    mean_val = sum(values) / len(values)
-    variance = sum((x - mean_val) ** 2 for x in values) / len(values)
-    std_dev = variance ** 0.5
+
+    mean_val = values.mean()
+    std_dev = np.sqrt(((values - mean_val) ** 2).mean())
     coefficient_of_variation = (std_dev / mean_val) * 100 if mean_val > 0 else 0
-    
+
     if coefficient_of_variation < 15:
         return "stabile"
     elif coefficient_of_variation < 30:
@@ -445,6 +1384,21 @@ def calculate_percentage(numerator: int, denominator: int) -> float:
         return 0.0
     return round((numerator / denominator) * 100, 1)
 
+def calculate_percentage_array(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Vectorised calculate_percentage (0.0 where the denominator is 0)"""
+    ratio = np.zeros(len(denominator), dtype=np.float64)
+    np.divide(numerator, denominator, out=ratio, where=denominator != 0)
+    return round_array(ratio * 100, 1)
+
+def round_array(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """Vectorised round() with the same results as Python's correctly rounded round()"""
+    scaled = values * 10 ** ndigits
+    rounded = np.round(values, ndigits)
+    # np.round scales in binary floating point: only values sitting on a .5 tie can differ
+    for position in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6).tolist():
+        rounded[position] = round(float(values[position]), ndigits)
+    return rounded
+
 def format_duration_minutes(seconds: int) -> str:
     """Convert seconds to minutes:seconds format"""
     if seconds < 60:
@@ -499,130 +1453,78 @@ def assess_service_quality(connection_rate: float, avg_duration: float) -> str:
 # ACD (AUTOMATIC CALL DISTRIBUTION) PARSER
 # ========================================
 
-def parse_acd_xml(xml_content: str) -> Dict:
-    """
-    Parse ACD XML report with comprehensive call center analysis
-    
-    ACD XML Structure:
-    - Key metrics: incoming_total, incoming_answered, incoming_unanswered, service_level
-    - Queue metrics: queue_time, speed_of_answer, callbacks
-    - Redirects: redirected calls, nightmode, overflow
-    - Service levels: answered within time thresholds
-    
-    NOTE: This parser handles reports with MULTIPLE ACD groups correctly.
-    Uses findall() to collect all groups and aggregates data from all of them.
-    """
-    try:
-        logger.info("🔍 Parsing ACD XML report...")
-        root = ET.fromstring(xml_content)
-        
-        daily_data = []
-        hourly_data = []
-        total_data = {}
-        answered_by_members = {}
-        
-        # Parse daily data (date__groupsobjects) - handles multiple ACD groups
-        for date_group in root.findall('.//date__groupsobjects'):
-            period = date_group.find('period')
-            group_type = date_group.find('type')
-            
-            if period is not None and group_type is not None:
-                period_text = period.text
-                type_text = group_type.text
-                
-                # Extract detailed metadata: names, identifiers, groups
-                # Note: <name> contains full name (e.g., "Others/belal.darwish - Belal Darwish")
-                full_name = get_text_value(date_group, 'name')  # Full name from XML
-                grouping_name = get_text_value(date_group, 'grouping_name')
-                object_identifier = get_text_value(date_group, 'object_identifier')
-                group_names = get_text_value(date_group, 'group_names')
-                depth_in_hierarchy = get_text_value(date_group, 'depth_in_hierarchy')
-                
-                data_point = {
-                    'period': period_text,  # Specific date/day/time from XML
-                    'type': type_text,  # total/group/object
-                    'name': full_name,  # Full name (e.g., "Others/belal.darwish - Belal Darwish")
-                    'grouping_name': grouping_name,  # Name of the group/user/function
-                    'object_identifier': object_identifier,  # Unique identifier
-                    'group_names': group_names,  # Names of parent groups
-                    'depth_in_hierarchy': depth_in_hierarchy,  # Hierarchy level
-                    'incoming_total': get_int_value(date_group, 'incoming_total'),
-                    'incoming_answered': get_int_value(date_group, 'incoming_answered'),
-                    'incoming_unanswered': get_int_value(date_group, 'incoming_unanswered'),
-                    'incoming_queue_closed': get_int_value(date_group, 'incoming_queue_closed'),
-                    'incoming_callbacks_requested': get_int_value(date_group, 'incoming_callbacks_requested'),
-                    'outgoing_callbacks_resolved': get_int_value(date_group, 'outgoing_callbacks_resolved'),
-                    'incoming_total_redirected': get_int_value(date_group, 'incoming_total_redirected'),
-                    'incoming_redirected_no_agents_owerflow': get_int_value(date_group, 'incoming_redirected_no_agents_owerflow'),
-                    'incoming_redirected_queue_timeout': get_int_value(date_group, 'incoming_redirected_queue_timeout'),
-                    'incoming_redirected_nightmode': get_int_value(date_group, 'incoming_redirected_nightmode'),
-                    'avg_speed_of_answer': get_time_value(date_group, 'incoming_answered_average_queue_time'),
-                    'avg_call_duration': get_time_value(date_group, 'incoming_answered_average_call_duration'),
-                    'total_call_duration': get_time_value(date_group, 'incoming_answered_total_call_duration'),
-                    'avg_queue_time_unanswered': get_time_value(date_group, 'incoming_unanswered_average_queue_time'),
-                    'percent_answered': get_float_value(date_group, 'incoming_percent_answered'),
-                    'percent_unanswered': get_float_value(date_group, 'incoming_percent_unanswered'),
-                    'percent_redirected': get_float_value(date_group, 'incoming_percent_redirected'),
-                    'service_level_20': get_float_value(date_group, 'incoming_service_level'),
-                    'answered_within_20': get_int_value(date_group, 'incoming_answered_within_service_time'),
-                    'unanswered_within_20': get_int_value(date_group, 'incoming_unanswered_within_service_time'),
-                }
-                
-                if type_text == 'total':
-                    total_data = data_point
-                elif type_text == 'group' and period_text != 'Total':
-                    daily_data.append(data_point)
-                elif type_text == 'object' and period_text != 'Total':
-                    # Include object-level data (contains specific ACD group name)
-                    daily_data.append(data_point)
-                
-                # Parse answered by members (dynamic columns)
-                answered_by_spec = date_group.find('incoming_answered_by_member_specification')
-                if answered_by_spec is not None:
-                    for dynamic_col in answered_by_spec.findall('dynamic_column'):
-                        member_name = dynamic_col.find('column_name')
-                        member_value = dynamic_col.find('column_value')
-                        if member_name is not None and member_value is not None:
-                            member = member_name.text.strip()
-                            count = int(member_value.text) if member_value.text else 0
-                            if member not in answered_by_members:
-                                answered_by_members[member] = 0
-                            answered_by_members[member] += count
-        
-        # Parse hourly data (time__groupsobjects)
-        for time_group in root.findall('.//time__groupsobjects'):
-            period = time_group.find('period')
-            group_type = time_group.find('type')
-            
-            if (period is not None and group_type is not None and 
-                (group_type.text == 'group' or group_type.text == 'object') and period.text != 'Total'):
-                
-                total_incoming = get_int_value(time_group, 'incoming_total')
-                answered = get_int_value(time_group, 'incoming_answered')
-                unanswered = get_int_value(time_group, 'incoming_unanswered')
-                
-                # Extract detailed metadata for hourly data
-                full_name = get_text_value(time_group, 'name')  # Full name from XML
-                grouping_name = get_text_value(time_group, 'grouping_name')
-                object_identifier = get_text_value(time_group, 'object_identifier')
-                group_names = get_text_value(time_group, 'group_names')
-                
-                hourly_data.append({
-                    'period': period.text,  # Specific time from XML (e.g., "09:00", "10:00")
-                    'name': full_name,
-                    'grouping_name': grouping_name,
-                    'object_identifier': object_identifier,
-                    'group_names': group_names,
-                    'incoming_total': total_incoming,
-                    'incoming_answered': answered,
-                    'incoming_unanswered': unanswered,
-                    'answer_rate': calculate_percentage(answered, total_incoming) if total_incoming > 0 else 0,
-                    'abandonment_rate': calculate_percentage(unanswered, total_incoming) if total_incoming > 0 else 0,
-                    'avg_speed_of_answer': get_time_value(time_group, 'incoming_answered_average_queue_time'),
-                    'avg_call_duration': get_time_value(time_group, 'incoming_answered_average_call_duration'),
-                    'service_level': get_float_value(time_group, 'incoming_service_level'),
-                })
-        
+ACD_METRIC_FIELDS = [
+    ('incoming_total', 'incoming_total', 'int'),
+    ('incoming_answered', 'incoming_answered', 'int'),
+    ('incoming_unanswered', 'incoming_unanswered', 'int'),
+    ('incoming_queue_closed', 'incoming_queue_closed', 'int'),
+    ('incoming_callbacks_requested', 'incoming_callbacks_requested', 'int'),
+    ('outgoing_callbacks_resolved', 'outgoing_callbacks_resolved', 'int'),
+    ('incoming_total_redirected', 'incoming_total_redirected', 'int'),
+    ('incoming_redirected_no_agents_owerflow', 'incoming_redirected_no_agents_owerflow', 'int'),
+    ('incoming_redirected_queue_timeout', 'incoming_redirected_queue_timeout', 'int'),
+    ('incoming_redirected_nightmode', 'incoming_redirected_nightmode', 'int'),
+    ('incoming_answered_average_queue_time', 'avg_speed_of_answer', 'time'),
+    ('incoming_answered_average_call_duration', 'avg_call_duration', 'time'),
+    ('incoming_answered_total_call_duration', 'total_call_duration', 'time'),
+    ('incoming_unanswered_average_queue_time', 'avg_queue_time_unanswered', 'time'),
+    ('incoming_percent_answered', 'percent_answered', 'float'),
+    ('incoming_percent_unanswered', 'percent_unanswered', 'float'),
+    ('incoming_percent_redirected', 'percent_redirected', 'float'),
+    # Service level columns carry dynamic_column children in the exports, so they read as 0
+    ('incoming_service_level', 'service_level_20', 'float'),
+    ('incoming_service_level', 'service_level', 'float'),
+    ('incoming_answered_within_service_time', 'answered_within_20', 'int'),
+    ('incoming_unanswered_within_service_time', 'unanswered_within_20', 'int'),
+    # Answered by members (dynamic columns)
+    ('incoming_answered_by_member_specification', 'answered_by_members', 'dynamic_column'),
+]
+
+ACD_RECORD_SCHEMAS = {
+    # Daily data (date__groupsobjects) - handles multiple ACD groups, sums calls answered by member
+    'date': RecordSchema(
+        RECORD_METADATA_FIELDS + ACD_METRIC_FIELDS,
+        DATE_METADATA_LAYOUT + [
+            'incoming_total', 'incoming_answered', 'incoming_unanswered', 'incoming_queue_closed',
+            'incoming_callbacks_requested', 'outgoing_callbacks_resolved', 'incoming_total_redirected',
+            'incoming_redirected_no_agents_owerflow', 'incoming_redirected_queue_timeout',
+            'incoming_redirected_nightmode', 'avg_speed_of_answer', 'avg_call_duration',
+            'total_call_duration', 'avg_queue_time_unanswered', 'percent_answered', 'percent_unanswered',
+            'percent_redirected', 'service_level_20', 'answered_within_20', 'unanswered_within_20',
+        ],
+        column_totals=['answered_by_members'],
+    ),
+    # Hourly data (time__groupsobjects)
+    'time': RecordSchema(
+        RECORD_METADATA_FIELDS + ACD_METRIC_FIELDS,
+        TIME_METADATA_LAYOUT + [
+            'incoming_total', 'incoming_answered', 'incoming_unanswered', 'answer_rate', 'abandonment_rate',
+            'avg_speed_of_answer', 'avg_call_duration', 'service_level',
+        ],
+        select=select_time_record,
+        target='hourly',
+        derived=[
+            ('answer_rate', RateColumn('incoming_answered', 'incoming_total')),
+            ('abandonment_rate', RateColumn('incoming_unanswered', 'incoming_total')),
+        ],
+    ),
+}
+
+class AcdReportAccumulator(SchemaReportAccumulator):
+    """Collects ACD records (date and time groupings) during the streaming pass"""
+    report_type = 'acd'
+    schemas = ACD_RECORD_SCHEMAS
+    entity_metrics = ['incoming_total', 'incoming_answered', 'incoming_unanswered', 'incoming_total_redirected',
+                      'incoming_callbacks_requested', 'total_call_duration']
+    entity_volume_keys = ('incoming_total',)
+
+    def build(self) -> Dict:
+        daily, hourly = self.tables['daily'], self.tables['hourly']
+        daily_data = daily.rows()
+        hourly_data = hourly.rows()
+        total_data = self.total_data
+        answered_by_members = self.column_totals.get('answered_by_members', {})
+
         # Calculate derived metrics
         total_incoming = total_data.get('incoming_total', 0)
         total_answered = total_data.get('incoming_answered', 0)
@@ -630,47 +1532,26 @@ def parse_acd_xml(xml_content: str) -> Dict:
         answer_rate = calculate_percentage(total_answered, total_incoming)
         abandonment_rate = calculate_percentage(total_unanswered, total_incoming)
         service_level = total_data.get('service_level_20', 0)
-        
+
         # Identify peak hours
-        peak_hours = sorted(hourly_data, key=lambda x: x.get('incoming_total', 0), reverse=True)[:3]
-        
+        peak_hours = hourly.top(hourly.column('incoming_total'), 3)
+
         # Critical hours analysis
-        critical_hours = [h for h in hourly_data if h.get('abandonment_rate', 0) > 50]
-        optimal_hours = [h for h in hourly_data if h.get('answer_rate', 0) >= 90 and h.get('service_level', 0) >= 80]
-        
-        # Collect all unique names, identifiers, and groups for detailed reporting
-        unique_groups = set()
-        unique_identifiers = set()
-        unique_names = set()
-        all_periods = []
-        
-        unique_full_names = set()  # Full names from <name> tag
-        
-        for day in daily_data:
-            if day.get('name'):  # Full name from <name> tag
-                unique_full_names.add(day['name'])
-            if day.get('grouping_name'):
-                unique_names.add(day['grouping_name'])
-            if day.get('object_identifier'):
-                unique_identifiers.add(day['object_identifier'])
-            if day.get('group_names'):
-                unique_groups.add(day['group_names'])
-            if day.get('period'):
-                all_periods.append(day['period'])
-        
-        for hour in hourly_data:
-            if hour.get('name'):  # Full name from <name> tag
-                unique_full_names.add(hour['name'])
-            if hour.get('grouping_name'):
-                unique_names.add(hour['grouping_name'])
-            if hour.get('object_identifier'):
-                unique_identifiers.add(hour['object_identifier'])
-            if hour.get('group_names'):
-                unique_groups.add(hour['group_names'])
-        
+        critical_hours = hourly.where(hourly.column('abandonment_rate') > 50)
+        optimal_hours = hourly.where((hourly.column('answer_rate') >= 90) & (hourly.column('service_level') >= 80))
+
+        # Collect all unique names, identifiers, and groups for detailed reporting (from the entity dictionary)
+        details = self.collect_entity_details()
+        unique_full_names = details['name']  # Full names from <name> tag
+        unique_names = details['grouping_name']
+        unique_identifiers = details['object_identifier']
+        unique_groups = details['group_names']
+        all_periods = daily.distinct('period')
+        entity_breakdown = self.build_entity_breakdown()
+
         logger.info(f"✅ ACD XML parsed successfully - {total_incoming} total calls")
         logger.info(f"📋 Found {len(unique_full_names)} unique full names, {len(unique_identifiers)} identifiers, {len(unique_groups)} groups")
-        
+
         return {
             'report_type': 'acd',
             'period_range': determine_period_range(daily_data),
@@ -706,12 +1587,14 @@ def parse_acd_xml(xml_content: str) -> Dict:
                 'avg_queue_time_unanswered': total_data.get('avg_queue_time_unanswered', 0),
             },
             'daily_breakdown': daily_data,
+            'period_groupings': self.period_groupings(),
+            'entity_breakdown': entity_breakdown,
             'hourly_analysis': {
                 'all_hourly_data': hourly_data,
                 'peak_hours': peak_hours,
                 'critical_hours': critical_hours,
                 'optimal_hours': optimal_hours,
-                'active_hours': len([h for h in hourly_data if h.get('incoming_total', 0) > 0]),
+                'active_hours': int(np.count_nonzero(hourly.column('incoming_total') > 0)),
             },
             'agent_analysis': {
                 'answered_by_members': answered_by_members,
@@ -723,10 +1606,29 @@ def parse_acd_xml(xml_content: str) -> Dict:
                 'peak_periods': [h['period'] for h in peak_hours],
             }
         }
-        
+
+def parse_acd_xml(xml_content: Union[str, bytes, Iterable]) -> Dict:
+    """
+    Parse ACD XML report with comprehensive call center analysis
+
+    ACD XML Structure:
+    - Key metrics: incoming_total, incoming_answered, incoming_unanswered, service_level
+    - Queue metrics: queue_time, speed_of_answer, callbacks
+    - Redirects: redirected calls, nightmode, overflow
+    - Service levels: answered within time thresholds
+
+    NOTE: This parser handles reports with MULTIPLE ACD groups correctly.
+    The document is streamed once and every record of every group is aggregated.
+    """
+    try:
+        logger.info("🔍 Parsing ACD XML report...")
+        return consume_groupsobjects(xml_content, AcdReportAccumulator())
+
     except ET.ParseError as e:
         logger.error(f"❌ XML Parse Error in ACD report: {str(e)}")
         raise Exception(f"Invalid XML format: {str(e)}")
+    except XmlLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"❌ Error parsing ACD XML: {str(e)}")
         raise Exception(f"ACD parsing failed: {str(e)}")
@@ -735,154 +1637,136 @@ def parse_acd_xml(xml_content: str) -> Dict:
 # USER PARSER
 # ========================================
 
-def parse_user_xml(xml_content: str) -> Dict:
-    """
-    Parse User XML report with comprehensive call center analysis
-    
-    NOTE: This parser handles reports with MULTIPLE users correctly.
-    Uses findall() to collect all users and aggregates data from all of them.
-    """
-    try:
-        logger.info("🔍 Parsing User XML report...")
-        root = ET.fromstring(xml_content)
-        
-        daily_data = []
-        hourly_data = []
-        total_data = {}
-        
-        # Parse daily data (date__groupsobjects) - handles multiple users
-        for date_group in root.findall('.//date__groupsobjects'):
-            period = date_group.find('period')
-            group_type = date_group.find('type')
-            
-            if period is not None and group_type is not None:
-                period_text = period.text
-                type_text = group_type.text
-                
-                # Extract detailed metadata: names, identifiers, groups
-                # Note: <name> contains full name (e.g., "Others/belal.darwish - Belal Darwish")
-                #       <grouping_name> may not always be present
-                full_name = get_text_value(date_group, 'name')  # Full name from XML
-                grouping_name = get_text_value(date_group, 'grouping_name')
-                object_identifier = get_text_value(date_group, 'object_identifier')
-                group_names = get_text_value(date_group, 'group_names')
-                depth_in_hierarchy = get_text_value(date_group, 'depth_in_hierarchy')
-                
-                data_point = {
-                    'period': period_text,  # Specific date from XML
-                    'type': type_text,  # total/group/object
-                    'name': full_name,  # Full name (e.g., "Others/belal.darwish - Belal Darwish")
-                    'grouping_name': grouping_name,  # Grouping name (may be empty)
-                    'object_identifier': object_identifier,  # Unique user identifier/number
-                    'group_names': group_names,  # Names of groups the user belongs to
-                    'depth_in_hierarchy': depth_in_hierarchy,  # Hierarchy level
-                    'incoming_total': get_int_value(date_group, 'incoming_total'),
-                    'incoming_external': get_int_value(date_group, 'incoming_from_external'),
-                    'incoming_internal': get_int_value(date_group, 'incoming_from_internal'),
-                    'incoming_from_queues': get_int_value(date_group, 'incoming_from_queues'),
-                    'incoming_answered': get_int_value(date_group, 'incoming_answered'),
-                    'incoming_unanswered': get_int_value(date_group, 'incoming_unanswered'),
-                    'incoming_busy': get_int_value(date_group, 'incoming_busy'),
-                    'incoming_total_redirected': get_int_value(date_group, 'incoming_total_redirected'),
-                    'incoming_redirected_voicemail': get_int_value(date_group, 'incoming_redirected_to_voicemail'),
-                    'incoming_redirected_other': get_int_value(date_group, 'incoming_redirected_to_other'),
-                    'incoming_avg_speed_of_answer': get_time_value(date_group, 'incoming_answered_average_speed_of_answer'),
-                    'incoming_avg_duration': get_time_value(date_group, 'incoming_answered_average_duration'),
-                    'incoming_total_duration': get_time_value(date_group, 'incoming_total_duration'),
-                    'outgoing_total': get_int_value(date_group, 'outgoing_total'),
-                    'outgoing_external': get_int_value(date_group, 'outgoing_to_external'),
-                    'outgoing_internal': get_int_value(date_group, 'outgoing_to_internal'),
-                    'outgoing_answered': get_int_value(date_group, 'outgoing_answered'),
-                    'outgoing_unanswered': get_int_value(date_group, 'outgoing_unanswered'),
-                    'outgoing_busy': get_int_value(date_group, 'outgoing_busy'),
-                    'outgoing_avg_duration': get_time_value(date_group, 'outgoing_answered_average_duration'),
-                    'outgoing_total_duration': get_time_value(date_group, 'outgoing_answered_total_duration'),
-                    'transferred_out': get_int_value(date_group, 'outgoing_transferred_out'),
-                    'total_calls': get_int_value(date_group, 'total_calls'),
-                    'total_calls_duration': get_time_value(date_group, 'total_calls_duration'),
-                    'failures': get_int_value(date_group, 'failures'),
-                    'percent_answered': get_float_value(date_group, 'incoming_percent_answered'),
-                }
-                
-                if type_text == 'total':
-                    total_data = data_point
-                elif type_text == 'group' and period_text != 'Total':
-                    daily_data.append(data_point)
-                elif type_text == 'object' and period_text != 'Total':
-                    # Include object-level data (contains specific user name like "Others/belal.darwish - Belal Darwish")
-                    daily_data.append(data_point)
-        
+USER_METRIC_FIELDS = [
+    ('incoming_total', 'incoming_total', 'int'),
+    ('incoming_from_external', 'incoming_external', 'int'),
+    ('incoming_from_internal', 'incoming_internal', 'int'),
+    ('incoming_from_queues', 'incoming_from_queues', 'int'),
+    ('incoming_answered', 'incoming_answered', 'int'),
+    ('incoming_unanswered', 'incoming_unanswered', 'int'),
+    ('incoming_busy', 'incoming_busy', 'int'),
+    ('incoming_total_redirected', 'incoming_total_redirected', 'int'),
+    ('incoming_redirected_to_voicemail', 'incoming_redirected_voicemail', 'int'),
+    ('incoming_redirected_to_other', 'incoming_redirected_other', 'int'),
+    ('incoming_answered_average_speed_of_answer', 'incoming_avg_speed_of_answer', 'time'),
+    ('incoming_answered_average_duration', 'incoming_avg_duration', 'time'),
+    ('incoming_total_duration', 'incoming_total_duration', 'time'),
+    ('outgoing_total', 'outgoing_total', 'int'),
+    ('outgoing_to_external', 'outgoing_external', 'int'),
+    ('outgoing_to_internal', 'outgoing_internal', 'int'),
+    ('outgoing_answered', 'outgoing_answered', 'int'),
+    ('outgoing_unanswered', 'outgoing_unanswered', 'int'),
+    ('outgoing_busy', 'outgoing_busy', 'int'),
+    ('outgoing_answered_average_duration', 'outgoing_avg_duration', 'time'),
+    ('outgoing_answered_total_duration', 'outgoing_total_duration', 'time'),
+    ('outgoing_transferred_out', 'transferred_out', 'int'),
+    ('total_calls', 'total_calls', 'int'),
+    ('total_calls_duration', 'total_calls_duration', 'time'),
+    ('failures', 'failures', 'int'),
+    ('incoming_percent_answered', 'percent_answered', 'float'),
+]
+
+# Object records carry the real user name (e.g., "Others/belal.darwish - Belal Darwish"), kept as exported
+USER_NAME_FIELDS = [
+    ('name', 'object_name', 'raw'),
+    ('object_identifier', 'object_identifier_raw', 'raw'),
+]
+
+USER_NAME_INPUTS = ('type', 'object_name', 'object_identifier_raw')
+
+USER_NAME_SCHEMA = RecordSchema([('type', 'type', 'raw')] + USER_NAME_FIELDS, [], select=select_no_record,
+                                target=None, inputs=USER_NAME_INPUTS)
+
+USER_RECORD_SCHEMAS = {
+    # Daily data (date__groupsobjects) - handles multiple users
+    'date': RecordSchema(
+        RECORD_METADATA_FIELDS + USER_NAME_FIELDS + USER_METRIC_FIELDS,
+        DATE_METADATA_LAYOUT + [
+            'incoming_total', 'incoming_external', 'incoming_internal', 'incoming_from_queues',
+            'incoming_answered', 'incoming_unanswered', 'incoming_busy', 'incoming_total_redirected',
+            'incoming_redirected_voicemail', 'incoming_redirected_other', 'incoming_avg_speed_of_answer',
+            'incoming_avg_duration', 'incoming_total_duration', 'outgoing_total', 'outgoing_external',
+            'outgoing_internal', 'outgoing_answered', 'outgoing_unanswered', 'outgoing_busy',
+            'outgoing_avg_duration', 'outgoing_total_duration', 'transferred_out', 'total_calls',
+            'total_calls_duration', 'failures', 'percent_answered',
+        ],
+        inputs=('period',) + USER_NAME_INPUTS,
+    ),
+    # Hourly data (time__groupsobjects)
+    'time': RecordSchema(
+        RECORD_METADATA_FIELDS + USER_METRIC_FIELDS,
+        TIME_METADATA_LAYOUT + [
+            'incoming_total', 'incoming_answered', 'incoming_unanswered', 'outgoing_total',
+            'outgoing_answered', 'answer_rate', 'incoming_avg_duration', 'outgoing_avg_duration',
+        ],
+        select=select_time_record,
+        target='hourly',
+        derived=[
+            ('answer_rate', RateColumn('incoming_answered', 'incoming_total')),
+        ],
+    ),
+    # Only inspected for the user name when no date object carries one
+    'month': USER_NAME_SCHEMA,
+    'period': USER_NAME_SCHEMA,
+    'quarter': USER_NAME_SCHEMA,
+}
+
+class UserReportAccumulator(SchemaReportAccumulator):
+    """Collects User records (date and time groupings) during the streaming pass"""
+    report_type = 'user'
+    schemas = USER_RECORD_SCHEMAS
+    entity_metrics = ['incoming_total', 'incoming_answered', 'incoming_unanswered', 'outgoing_total',
+                      'outgoing_answered', 'total_calls', 'total_calls_duration']
+    entity_volume_keys = ('incoming_total', 'outgoing_total')
+
+    # Groupings checked (in order) for the user name when no date object carries one
+    NAME_FALLBACK_GROUPINGS = ['month', 'period', 'quarter']
+
+    def __init__(self):
+        super().__init__()
+        self.user_name_from_object = None
+        self.user_identifier_from_object = None
+        self.fallback_objects = {}
+
+    def add_record(self, grouping: str, schema: RecordSchema, values: Dict) -> None:
         # Find the actual user name from object elements (not from total/group)
-        # Object elements contain the real user name (e.g., "Others/belal.darwish - Belal Darwish")
-        user_name_from_object = None
-        user_identifier_from_object = None
-        for date_group in root.findall('.//date__groupsobjects'):
-            group_type = date_group.find('type')
-            name_elem = date_group.find('name')
-            if group_type is not None and group_type.text == 'object':
-                if name_elem is not None and name_elem.text and name_elem.text != 'Total':
-                    user_name_from_object = name_elem.text
-                identifier_elem = date_group.find('object_identifier')
-                if identifier_elem is not None and identifier_elem.text:
-                    user_identifier_from_object = identifier_elem.text
-                if user_name_from_object:  # Found it, no need to continue
-                    break
-        
+        if values['type'] == 'object' and 'object_name' in values:
+            object_name = values['object_name']
+            if grouping == 'date':
+                if not self.user_name_from_object:
+                    if object_name and object_name != 'Total':
+                        self.user_name_from_object = object_name
+                    if values['object_identifier_raw']:
+                        self.user_identifier_from_object = values['object_identifier_raw']
+            elif grouping not in self.fallback_objects and object_name and object_name != 'Total':
+                # Remember the first object record with a name for the month/period/quarter groupings
+                self.fallback_objects[grouping] = (object_name, values['object_identifier_raw'] or None)
+
+        super().add_record(grouping, schema, values)
+
+    def build(self) -> Dict:
+        daily, hourly = self.tables['daily'], self.tables['hourly']
+        daily_data = daily.rows()
+        hourly_data = hourly.rows()
+        total_data = self.total_data
+        user_name_from_object = self.user_name_from_object
+        user_identifier_from_object = self.user_identifier_from_object
+
         # Also check other grouping types (month, period, quarter) for object elements
         if not user_name_from_object:
-            for grouping_type in ['month__groupsobjects', 'period__groupsobjects', 'quarter__groupsobjects']:
-                for group_elem in root.findall(f'.//{grouping_type}'):
-                    group_type = group_elem.find('type')
-                    name_elem = group_elem.find('name')
-                    if group_type is not None and group_type.text == 'object':
-                        if name_elem is not None and name_elem.text and name_elem.text != 'Total':
-                            user_name_from_object = name_elem.text
-                            identifier_elem = group_elem.find('object_identifier')
-                            if identifier_elem is not None and identifier_elem.text:
-                                user_identifier_from_object = identifier_elem.text
-                            break
-                if user_name_from_object:
+            for grouping_type in self.NAME_FALLBACK_GROUPINGS:
+                if grouping_type in self.fallback_objects:
+                    user_name_from_object, identifier = self.fallback_objects[grouping_type]
+                    if identifier:
+                        user_identifier_from_object = identifier
                     break
-        
+
         # Update total_data with actual user name if found
         if user_name_from_object:
             total_data['name'] = user_name_from_object
             if user_identifier_from_object:
                 total_data['object_identifier'] = user_identifier_from_object
-        
-        # Parse hourly data
-        for time_group in root.findall('.//time__groupsobjects'):
-            period = time_group.find('period')
-            group_type = time_group.find('type')
-            
-            if (period is not None and group_type is not None and 
-                (group_type.text == 'group' or group_type.text == 'object') and period.text != 'Total'):
-                
-                total_incoming = get_int_value(time_group, 'incoming_total')
-                answered = get_int_value(time_group, 'incoming_answered')
-                
-                # Extract detailed metadata for hourly data
-                full_name = get_text_value(time_group, 'name')  # Full name from XML
-                grouping_name = get_text_value(time_group, 'grouping_name')
-                object_identifier = get_text_value(time_group, 'object_identifier')
-                group_names = get_text_value(time_group, 'group_names')
-                
-                hourly_data.append({
-                    'period': period.text,  # Specific time from XML
-                    'name': full_name,
-                    'grouping_name': grouping_name,
-                    'object_identifier': object_identifier,
-                    'group_names': group_names,
-                    'incoming_total': total_incoming,
-                    'incoming_answered': answered,
-                    'incoming_unanswered': get_int_value(time_group, 'incoming_unanswered'),
-                    'outgoing_total': get_int_value(time_group, 'outgoing_total'),
-                    'outgoing_answered': get_int_value(time_group, 'outgoing_answered'),
-                    'answer_rate': calculate_percentage(answered, total_incoming) if total_incoming > 0 else 0,
-                    'incoming_avg_duration': get_time_value(time_group, 'incoming_answered_average_duration'),
-                    'outgoing_avg_duration': get_time_value(time_group, 'outgoing_answered_average_duration'),
-                })
-        
+
         # Calculate metrics
         total_incoming = total_data.get('incoming_total', 0)
         total_answered = total_data.get('incoming_answered', 0)
@@ -894,63 +1778,29 @@ def parse_user_xml(xml_content: str) -> Dict:
         is_only_incoming = total_outgoing == 0 and total_incoming > 0
         is_empty_dataset = total_incoming == 0 and total_outgoing == 0
         has_both_directions = total_incoming > 0 and total_outgoing > 0
-        
-        peak_hours = sorted(hourly_data, key=lambda x: x.get('incoming_total', 0) + x.get('outgoing_total', 0), reverse=True)[:3]
-        
-        # Collect all unique names, identifiers, and groups for detailed reporting
-        unique_groups = set()
-        unique_identifiers = set()
-        unique_names = set()
-        unique_full_names = set()  # Full names from <name> tag
-        all_periods = []
-        
-        for day in daily_data:
-            # Only add names that are actual user names (not "Total" or empty)
-            day_name = day.get('name', '')
-            if day_name and day_name != 'Total' and day_name.strip():
-                # Prefer names that look like user names (contain "/" and " - " pattern like "Others/belal.darwish - Belal Darwish")
-                if '/' in day_name and ' - ' in day_name:
-                    unique_full_names.add(day_name)
-                elif day_name != 'Total':
-                    unique_full_names.add(day_name)
-            if day.get('grouping_name'):
-                unique_names.add(day['grouping_name'])
-            if day.get('object_identifier'):
-                unique_identifiers.add(day['object_identifier'])
-            if day.get('group_names'):
-                unique_groups.add(day['group_names'])
-            if day.get('period'):
-                all_periods.append(day['period'])
-        
-        for hour in hourly_data:
-            # Only add names that are actual user names (not "Total" or empty)
-            hour_name = hour.get('name', '')
-            if hour_name and hour_name != 'Total' and hour_name.strip():
-                # Prefer names that look like user names (contain "/" and " - " pattern)
-                if '/' in hour_name and ' - ' in hour_name:
-                    unique_full_names.add(hour_name)
-                elif hour_name != 'Total':
-                    unique_full_names.add(hour_name)
-            if hour.get('grouping_name'):
-                unique_names.add(hour['grouping_name'])
-            if hour.get('object_identifier'):
-                unique_identifiers.add(hour['object_identifier'])
-            if hour.get('group_names'):
-                unique_groups.add(hour['group_names'])
-        
+
+        hourly_calls = hourly.column('incoming_total') + hourly.column('outgoing_total')
+        peak_hours = hourly.top(hourly_calls, 3)
+
+        # Collect all unique names, identifiers, and groups for detailed reporting (from the entity dictionary)
+        details = self.collect_entity_details()
+        # Only actual user names (not "Total" or empty)
+        unique_full_names = {name for name in details['name'] if name != 'Total'}  # Full names from <name> tag
+        unique_names = details['grouping_name']
+        unique_identifiers = details['object_identifier']
+        unique_groups = details['group_names']
+        all_periods = daily.distinct('period')
+        entity_breakdown = self.build_entity_breakdown()
+
         # Also add the user name from total_data if it was found
         if total_data.get('name') and total_data.get('name') != 'Total':
-            total_name = total_data.get('name', '')
-            if '/' in total_name and ' - ' in total_name:
-                unique_full_names.add(total_name)
-            elif total_name != 'Total':
-                unique_full_names.add(total_name)
-        
+            unique_full_names.add(total_data['name'])
+
         logger.info(f"✅ User XML parsed successfully - {total_incoming} incoming, {total_outgoing} outgoing")
         logger.info(f"📋 Found {len(unique_full_names)} unique full names, {len(unique_identifiers)} identifiers, {len(unique_groups)} groups")
         if user_name_from_object:
             logger.info(f"👤 User name extracted: {user_name_from_object}")
-        
+
         return {
             'report_type': 'user',
             'period_range': determine_period_range(daily_data),
@@ -997,20 +1847,35 @@ def parse_user_xml(xml_content: str) -> Dict:
                 'has_both_directions': has_both_directions,
             },
             'daily_breakdown': daily_data,
+            'period_groupings': self.period_groupings(),
+            'entity_breakdown': entity_breakdown,
             'hourly_analysis': {
                 'all_hourly_data': hourly_data,
                 'peak_hours': peak_hours,
-                'active_hours': len([h for h in hourly_data if (h.get('incoming_total', 0) + h.get('outgoing_total', 0)) > 0]),
+                'active_hours': int(np.count_nonzero(hourly_calls > 0)),
             },
             'insights': {
                 'call_activity': assess_call_activity(total_incoming, total_outgoing),
                 'efficiency': assess_user_efficiency(answer_rate, total_data.get('incoming_avg_duration', 0)),
             }
         }
-        
+
+def parse_user_xml(xml_content: Union[str, bytes, Iterable]) -> Dict:
+    """
+    Parse User XML report with comprehensive call center analysis
+
+    NOTE: This parser handles reports with MULTIPLE users correctly.
+    The document is streamed once and every record of every user is aggregated.
+    """
+    try:
+        logger.info("🔍 Parsing User XML report...")
+        return consume_groupsobjects(xml_content, UserReportAccumulator())
+
     except ET.ParseError as e:
         logger.error(f"❌ XML Parse Error in User report: {str(e)}")
         raise Exception(f"Invalid XML format: {str(e)}")
+    except XmlLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"❌ Error parsing User XML: {str(e)}")
         raise Exception(f"User parsing failed: {str(e)}")
@@ -1019,95 +1884,54 @@ def parse_user_xml(xml_content: str) -> Dict:
 # HUNTGROUP PARSER
 # ========================================
 
-def parse_huntgroup_xml(xml_content: str) -> Dict:
-    """
-    Parse HuntGroup XML report with comprehensive call center analysis
-    
-    NOTE: This parser handles reports with MULTIPLE HuntGroups correctly.
-    Uses findall() to collect all groups and aggregates data from all of them.
-    """
-    try:
-        logger.info("🔍 Parsing HuntGroup XML report...")
-        root = ET.fromstring(xml_content)
-        
-        daily_data = []
-        hourly_data = []
-        total_data = {}
-        
-        # Parse daily data - handles multiple HuntGroups
-        for date_group in root.findall('.//date__groupsobjects'):
-            period = date_group.find('period')
-            group_type = date_group.find('type')
-            
-            if period is not None and group_type is not None:
-                period_text = period.text
-                type_text = group_type.text
-                
-                # Extract detailed metadata: names, identifiers, groups
-                # Note: <name> contains full name (e.g., "Others/belal.darwish - Belal Darwish")
-                full_name = get_text_value(date_group, 'name')  # Full name from XML
-                grouping_name = get_text_value(date_group, 'grouping_name')
-                object_identifier = get_text_value(date_group, 'object_identifier')
-                group_names = get_text_value(date_group, 'group_names')
-                depth_in_hierarchy = get_text_value(date_group, 'depth_in_hierarchy')
-                
-                data_point = {
-                    'period': period_text,  # Specific date from XML
-                    'type': type_text,  # total/group/object
-                    'name': full_name,  # Full name (e.g., "Others/belal.darwish - Belal Darwish")
-                    'grouping_name': grouping_name,  # Name of the HuntGroup
-                    'object_identifier': object_identifier,  # Unique HuntGroup identifier/number
-                    'group_names': group_names,  # Names of parent groups
-                    'depth_in_hierarchy': depth_in_hierarchy,  # Hierarchy level
-                    'incoming_total': get_int_value(date_group, 'incoming_total'),
-                    'answered_by_members': get_int_value(date_group, 'incoming_answered_by_huntgroup_members'),
-                    'unanswered_by_members': get_int_value(date_group, 'incoming_unanswered_by_huntgroup_members'),
-                    'sent_to_overflow': get_int_value(date_group, 'incoming_sent_to_overflow_number'),
-                    'avg_speed_of_answer': get_time_value(date_group, 'incoming_answered_by_huntgroup_members_average_speed_of_answer'),
-                    'avg_call_duration': get_time_value(date_group, 'incoming_answered_by_huntgroup_members_average_call_duration'),
-                    'total_call_duration': get_time_value(date_group, 'incoming_answered_by_huntgroup_members_total_call_duration'),
-                }
-                
-                if type_text == 'total':
-                    total_data = data_point
-                elif type_text == 'group' and period_text != 'Total':
-                    daily_data.append(data_point)
-                elif type_text == 'object' and period_text != 'Total':
-                    # Include object-level data (contains specific HuntGroup name)
-                    daily_data.append(data_point)
-        
-        # Parse hourly data
-        for time_group in root.findall('.//time__groupsobjects'):
-            period = time_group.find('period')
-            group_type = time_group.find('type')
-            
-            if (period is not None and group_type is not None and 
-                (group_type.text == 'group' or group_type.text == 'object') and period.text != 'Total'):
-                
-                total_incoming = get_int_value(time_group, 'incoming_total')
-                answered = get_int_value(time_group, 'incoming_answered_by_huntgroup_members')
-                
-                # Extract detailed metadata for hourly data
-                full_name = get_text_value(time_group, 'name')  # Full name from XML
-                grouping_name = get_text_value(time_group, 'grouping_name')
-                object_identifier = get_text_value(time_group, 'object_identifier')
-                group_names = get_text_value(time_group, 'group_names')
-                
-                hourly_data.append({
-                    'period': period.text,  # Specific time from XML
-                    'name': full_name,
-                    'grouping_name': grouping_name,
-                    'object_identifier': object_identifier,
-                    'group_names': group_names,
-                    'incoming_total': total_incoming,
-                    'answered_by_members': answered,
-                    'unanswered_by_members': get_int_value(time_group, 'incoming_unanswered_by_huntgroup_members'),
-                    'sent_to_overflow': get_int_value(time_group, 'incoming_sent_to_overflow_number'),
-                    'answer_rate': calculate_percentage(answered, total_incoming) if total_incoming > 0 else 0,
-                    'avg_speed_of_answer': get_time_value(time_group, 'incoming_answered_by_huntgroup_members_average_speed_of_answer'),
-                    'avg_call_duration': get_time_value(time_group, 'incoming_answered_by_huntgroup_members_average_call_duration'),
-                })
-        
+HUNTGROUP_METRIC_FIELDS = [
+    ('incoming_total', 'incoming_total', 'int'),
+    ('incoming_answered_by_huntgroup_members', 'answered_by_members', 'int'),
+    ('incoming_unanswered_by_huntgroup_members', 'unanswered_by_members', 'int'),
+    ('incoming_sent_to_overflow_number', 'sent_to_overflow', 'int'),
+    ('incoming_answered_by_huntgroup_members_average_speed_of_answer', 'avg_speed_of_answer', 'time'),
+    ('incoming_answered_by_huntgroup_members_average_call_duration', 'avg_call_duration', 'time'),
+    ('incoming_answered_by_huntgroup_members_total_call_duration', 'total_call_duration', 'time'),
+]
+
+HUNTGROUP_RECORD_SCHEMAS = {
+    # Daily data - handles multiple HuntGroups
+    'date': RecordSchema(
+        RECORD_METADATA_FIELDS + HUNTGROUP_METRIC_FIELDS,
+        DATE_METADATA_LAYOUT + [
+            'incoming_total', 'answered_by_members', 'unanswered_by_members', 'sent_to_overflow',
+            'avg_speed_of_answer', 'avg_call_duration', 'total_call_duration',
+        ],
+    ),
+    # Hourly data (time__groupsobjects)
+    'time': RecordSchema(
+        RECORD_METADATA_FIELDS + HUNTGROUP_METRIC_FIELDS,
+        TIME_METADATA_LAYOUT + [
+            'incoming_total', 'answered_by_members', 'unanswered_by_members', 'sent_to_overflow',
+            'answer_rate', 'avg_speed_of_answer', 'avg_call_duration',
+        ],
+        select=select_time_record,
+        target='hourly',
+        derived=[
+            ('answer_rate', RateColumn('answered_by_members', 'incoming_total')),
+        ],
+    ),
+}
+
+class HuntGroupReportAccumulator(SchemaReportAccumulator):
+    """Collects HuntGroup records (date and time groupings) during the streaming pass"""
+    report_type = 'huntgroup'
+    schemas = HUNTGROUP_RECORD_SCHEMAS
+    entity_metrics = ['incoming_total', 'answered_by_members', 'unanswered_by_members', 'sent_to_overflow',
+                      'total_call_duration']
+    entity_volume_keys = ('incoming_total',)
+
+    def build(self) -> Dict:
+        daily, hourly = self.tables['daily'], self.tables['hourly']
+        daily_data = daily.rows()
+        hourly_data = hourly.rows()
+        total_data = self.total_data
+
         # Calculate metrics
         total_incoming = total_data.get('incoming_total', 0)
         total_answered = total_data.get('answered_by_members', 0)
@@ -1115,43 +1939,22 @@ def parse_huntgroup_xml(xml_content: str) -> Dict:
         total_overflow = total_data.get('sent_to_overflow', 0)
         answer_rate = calculate_percentage(total_answered, total_incoming)
         overflow_rate = calculate_percentage(total_overflow, total_incoming)
-        
-        peak_hours = sorted(hourly_data, key=lambda x: x.get('incoming_total', 0), reverse=True)[:3]
-        critical_hours = [h for h in hourly_data if h.get('answer_rate', 0) < 70]
-        
-        # Collect all unique names, identifiers, and groups for detailed reporting
-        unique_groups = set()
-        unique_identifiers = set()
-        unique_names = set()
-        all_periods = []
-        
-        unique_full_names = set()  # Full names from <name> tag
-        
-        for day in daily_data:
-            if day.get('name'):  # Full name from <name> tag
-                unique_full_names.add(day['name'])
-            if day.get('grouping_name'):
-                unique_names.add(day['grouping_name'])
-            if day.get('object_identifier'):
-                unique_identifiers.add(day['object_identifier'])
-            if day.get('group_names'):
-                unique_groups.add(day['group_names'])
-            if day.get('period'):
-                all_periods.append(day['period'])
-        
-        for hour in hourly_data:
-            if hour.get('name'):  # Full name from <name> tag
-                unique_full_names.add(hour['name'])
-            if hour.get('grouping_name'):
-                unique_names.add(hour['grouping_name'])
-            if hour.get('object_identifier'):
-                unique_identifiers.add(hour['object_identifier'])
-            if hour.get('group_names'):
-                unique_groups.add(hour['group_names'])
-        
+
+        peak_hours = hourly.top(hourly.column('incoming_total'), 3)
+        critical_hours = hourly.where(hourly.column('answer_rate') < 70)
+
+        # Collect all unique names, identifiers, and groups for detailed reporting (from the entity dictionary)
+        details = self.collect_entity_details()
+        unique_full_names = details['name']  # Full names from <name> tag
+        unique_names = details['grouping_name']
+        unique_identifiers = details['object_identifier']
+        unique_groups = details['group_names']
+        all_periods = daily.distinct('period')
+        entity_breakdown = self.build_entity_breakdown()
+
         logger.info(f"✅ HuntGroup XML parsed successfully - {total_incoming} total calls")
         logger.info(f"📋 Found {len(unique_full_names)} unique full names, {len(unique_identifiers)} identifiers, {len(unique_groups)} groups")
-        
+
         return {
             'report_type': 'huntgroup',
             'period_range': determine_period_range(daily_data),
@@ -1180,21 +1983,36 @@ def parse_huntgroup_xml(xml_content: str) -> Dict:
                 'total_call_duration': format_duration_minutes(total_data.get('total_call_duration', 0)),
             },
             'daily_breakdown': daily_data,
+            'period_groupings': self.period_groupings(),
+            'entity_breakdown': entity_breakdown,
             'hourly_analysis': {
                 'all_hourly_data': hourly_data,
                 'peak_hours': peak_hours,
                 'critical_hours': critical_hours,
-                'active_hours': len([h for h in hourly_data if h.get('incoming_total', 0) > 0]),
+                'active_hours': int(np.count_nonzero(hourly.column('incoming_total') > 0)),
             },
             'insights': {
                 'distribution_efficiency': assess_distribution_efficiency(answer_rate, overflow_rate),
                 'service_quality': assess_service_quality(answer_rate, total_data.get('avg_speed_of_answer', 0)),
             }
         }
-        
+
+def parse_huntgroup_xml(xml_content: Union[str, bytes, Iterable]) -> Dict:
+    """
+    Parse HuntGroup XML report with comprehensive call center analysis
+
+    NOTE: This parser handles reports with MULTIPLE HuntGroups correctly.
+    The document is streamed once and every record of every group is aggregated.
+    """
+    try:
+        logger.info("🔍 Parsing HuntGroup XML report...")
+        return consume_groupsobjects(xml_content, HuntGroupReportAccumulator())
+
     except ET.ParseError as e:
         logger.error(f"❌ XML Parse Error in HuntGroup report: {str(e)}")
         raise Exception(f"Invalid XML format: {str(e)}")
+    except XmlLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"❌ Error parsing HuntGroup XML: {str(e)}")
         raise Exception(f"HuntGroup parsing failed: {str(e)}")
@@ -1203,141 +2021,68 @@ def parse_huntgroup_xml(xml_content: str) -> Dict:
 # RULEBASED PARSER
 # ========================================
 
-def parse_rulebased_xml(xml_content: str) -> Dict:
-    """
-    Parse RuleBased XML report with comprehensive call center analysis
-    
-    NOTE: This parser handles reports with MULTIPLE RuleBased correctly.
-    Uses findall() to collect all rulebases and aggregates data from all of them.
-    """
-    try:
-        logger.info("🔍 Parsing RuleBased XML report...")
-        root = ET.fromstring(xml_content)
-        
-        daily_data = []
-        hourly_data = []
-        total_data = {}
-        transfer_destinations = {}
-        
-        # Parse daily data - handles multiple RuleBased
-        for date_group in root.findall('.//date__groupsobjects'):
-            period = date_group.find('period')
-            group_type = date_group.find('type')
-            
-            if period is not None and group_type is not None:
-                period_text = period.text
-                type_text = group_type.text
-                
-                # Extract detailed metadata: names, identifiers, groups
-                # Note: <name> contains full name (e.g., "Others/belal.darwish - Belal Darwish")
-                full_name = get_text_value(date_group, 'name')  # Full name from XML
-                grouping_name = get_text_value(date_group, 'grouping_name')
-                object_identifier = get_text_value(date_group, 'object_identifier')
-                group_names = get_text_value(date_group, 'group_names')
-                depth_in_hierarchy = get_text_value(date_group, 'depth_in_hierarchy')
-                
-                data_point = {
-                    'period': period_text,  # Specific date from XML
-                    'type': type_text,  # total/group/object
-                    'name': full_name,  # Full name (e.g., "Others/belal.darwish - Belal Darwish")
-                    'grouping_name': grouping_name,  # Name of the RuleBased function
-                    'object_identifier': object_identifier,  # Unique RuleBased identifier/number
-                    'group_names': group_names,  # Names of parent groups
-                    'depth_in_hierarchy': depth_in_hierarchy,  # Hierarchy level
-                    'handled_by_rulebase': get_int_value(date_group, 'incoming_total_handled_by_rulebase'),
-                    'connected': get_int_value(date_group, 'incoming_connected'),
-                    'not_connected': get_int_value(date_group, 'incoming_not_connected'),
-                    'failures': get_int_value(date_group, 'incoming_failure'),
-                    'transfers': parse_transfer_destinations_rulebased(date_group)
-                }
-                
-                if type_text == 'total':
-                    total_data = data_point
-                elif type_text == 'group' and period_text != 'Total':
-                    daily_data.append(data_point)
-                elif type_text == 'object' and period_text != 'Total':
-                    # Include object-level data (contains specific RuleBased function name)
-                    daily_data.append(data_point)
-                
-                # Collect transfer destinations
-                if data_point['transfers']:
-                    for dest, count in data_point['transfers'].items():
-                        if dest not in transfer_destinations:
-                            transfer_destinations[dest] = 0
-                        transfer_destinations[dest] += count
-        
-        # Parse hourly data
-        for time_group in root.findall('.//time__groupsobjects'):
-            period = time_group.find('period')
-            group_type = time_group.find('type')
-            
-            if (period is not None and group_type is not None and 
-                (group_type.text == 'group' or group_type.text == 'object') and period.text != 'Total'):
-                
-                handled = get_int_value(time_group, 'incoming_total_handled_by_rulebase')
-                connected = get_int_value(time_group, 'incoming_connected')
-                
-                # Extract detailed metadata for hourly data
-                full_name = get_text_value(time_group, 'name')  # Full name from XML
-                grouping_name = get_text_value(time_group, 'grouping_name')
-                object_identifier = get_text_value(time_group, 'object_identifier')
-                group_names = get_text_value(time_group, 'group_names')
-                
-                hourly_data.append({
-                    'period': period.text,  # Specific time from XML
-                    'name': full_name,
-                    'grouping_name': grouping_name,
-                    'object_identifier': object_identifier,
-                    'group_names': group_names,
-                    'handled_by_rulebase': handled,
-                    'connected': connected,
-                    'not_connected': get_int_value(time_group, 'incoming_not_connected'),
-                    'connection_rate': calculate_percentage(connected, handled) if handled > 0 else 0,
-                    'transfers': parse_transfer_destinations_rulebased(time_group),
-                })
-        
+RULEBASED_METRIC_FIELDS = [
+    ('incoming_total_handled_by_rulebase', 'handled_by_rulebase', 'int'),
+    ('incoming_connected', 'connected', 'int'),
+    ('incoming_not_connected', 'not_connected', 'int'),
+    ('incoming_failure', 'failures', 'int'),
+    ('incoming_transferred_to_specification', 'transfers', 'dynamic_column', 'Transferred to '),
+]
+
+RULEBASED_RECORD_SCHEMAS = {
+    # Daily data - handles multiple RuleBased, collects transfer destinations
+    'date': RecordSchema(
+        RECORD_METADATA_FIELDS + RULEBASED_METRIC_FIELDS,
+        DATE_METADATA_LAYOUT + ['handled_by_rulebase', 'connected', 'not_connected', 'failures', 'transfers'],
+        column_totals=['transfers'],
+    ),
+    # Hourly data (time__groupsobjects)
+    'time': RecordSchema(
+        RECORD_METADATA_FIELDS + RULEBASED_METRIC_FIELDS,
+        TIME_METADATA_LAYOUT + ['handled_by_rulebase', 'connected', 'not_connected', 'connection_rate', 'transfers'],
+        select=select_time_record,
+        target='hourly',
+        derived=[
+            ('connection_rate', RateColumn('connected', 'handled_by_rulebase')),
+        ],
+    ),
+}
+
+class RuleBasedReportAccumulator(SchemaReportAccumulator):
+    """Collects RuleBased records (date and time groupings) during the streaming pass"""
+    report_type = 'rulebased'
+    schemas = RULEBASED_RECORD_SCHEMAS
+    entity_metrics = ['handled_by_rulebase', 'connected', 'not_connected', 'failures']
+    entity_volume_keys = ('handled_by_rulebase',)
+
+    def build(self) -> Dict:
+        daily, hourly = self.tables['daily'], self.tables['hourly']
+        daily_data = daily.rows()
+        hourly_data = hourly.rows()
+        total_data = self.total_data
+        transfer_destinations = self.column_totals.get('transfers', {})
+
         # Calculate metrics
         total_handled = total_data.get('handled_by_rulebase', 0)
         total_connected = total_data.get('connected', 0)
         total_not_connected = total_data.get('not_connected', 0)
         connection_rate = calculate_percentage(total_connected, total_handled)
-        
-        peak_hours = sorted(hourly_data, key=lambda x: x.get('handled_by_rulebase', 0), reverse=True)[:3]
-        critical_hours = [h for h in hourly_data if h.get('connection_rate', 0) < 70]
-        
-        # Collect all unique names, identifiers, and groups for detailed reporting
-        unique_groups = set()
-        unique_identifiers = set()
-        unique_names = set()
-        all_periods = []
-        
-        unique_full_names = set()  # Full names from <name> tag
-        
-        for day in daily_data:
-            if day.get('name'):  # Full name from <name> tag
-                unique_full_names.add(day['name'])
-            if day.get('grouping_name'):
-                unique_names.add(day['grouping_name'])
-            if day.get('object_identifier'):
-                unique_identifiers.add(day['object_identifier'])
-            if day.get('group_names'):
-                unique_groups.add(day['group_names'])
-            if day.get('period'):
-                all_periods.append(day['period'])
-        
-        for hour in hourly_data:
-            if hour.get('name'):  # Full name from <name> tag
-                unique_full_names.add(hour['name'])
-            if hour.get('grouping_name'):
-                unique_names.add(hour['grouping_name'])
-            if hour.get('object_identifier'):
-                unique_identifiers.add(hour['object_identifier'])
-            if hour.get('group_names'):
-                unique_groups.add(hour['group_names'])
-        
+
+        peak_hours = hourly.top(hourly.column('handled_by_rulebase'), 3)
+        critical_hours = hourly.where(hourly.column('connection_rate') < 70)
+
+        # Collect all unique names, identifiers, and groups for detailed reporting (from the entity dictionary)
+        details = self.collect_entity_details()
+        unique_full_names = details['name']  # Full names from <name> tag
+        unique_names = details['grouping_name']
+        unique_identifiers = details['object_identifier']
+        unique_groups = details['group_names']
+        all_periods = daily.distinct('period')
+        entity_breakdown = self.build_entity_breakdown()
+
         logger.info(f"✅ RuleBased XML parsed successfully - {total_handled} total handled")
         logger.info(f"📋 Found {len(unique_full_names)} unique full names, {len(unique_identifiers)} identifiers, {len(unique_groups)} groups")
-        
+
         return {
             'report_type': 'rulebased',
             'period_range': determine_period_range(daily_data),
@@ -1363,11 +2108,13 @@ def parse_rulebased_xml(xml_content: str) -> Dict:
                 'total_transfers': sum(transfer_destinations.values()) if transfer_destinations else 0,
             },
             'daily_breakdown': daily_data,
+            'period_groupings': self.period_groupings(),
+            'entity_breakdown': entity_breakdown,
             'hourly_analysis': {
                 'all_hourly_data': hourly_data,
                 'peak_hours': peak_hours,
                 'critical_hours': critical_hours,
-                'active_hours': len([h for h in hourly_data if h.get('handled_by_rulebase', 0) > 0]),
+                'active_hours': int(np.count_nonzero(hourly.column('handled_by_rulebase') > 0)),
             },
             'transfer_analysis': {
                 'destinations': transfer_destinations,
@@ -1379,10 +2126,23 @@ def parse_rulebased_xml(xml_content: str) -> Dict:
                 'service_quality': assess_service_quality(connection_rate, 0),
             }
         }
-        
+
+def parse_rulebased_xml(xml_content: Union[str, bytes, Iterable]) -> Dict:
+    """
+    Parse RuleBased XML report with comprehensive call center analysis
+
+    NOTE: This parser handles reports with MULTIPLE RuleBased correctly.
+    The document is streamed once and every record of every rulebase is aggregated.
+    """
+    try:
+        logger.info("🔍 Parsing RuleBased XML report...")
+        return consume_groupsobjects(xml_content, RuleBasedReportAccumulator())
+
     except ET.ParseError as e:
         logger.error(f"❌ XML Parse Error in RuleBased report: {str(e)}")
         raise Exception(f"Invalid XML format: {str(e)}")
+    except XmlLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"❌ Error parsing RuleBased XML: {str(e)}")
         raise Exception(f"RuleBased parsing failed: {str(e)}")
@@ -1394,51 +2154,19 @@ def parse_rulebased_xml(xml_content: str) -> Dict:
 def get_time_value(element, tag_name: str) -> int:
     """Safely extract time value in seconds from XML element"""
     child = element.find(tag_name)
-    if child is not None and child.text:
-        try:
-            # Time values can be in format "HH:MM:SS" or just seconds
-            time_str = child.text.strip()
-            if ':' in time_str:
-                parts = time_str.split(':')
-                if len(parts) == 3:  # HH:MM:SS
-                    return int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
-                elif len(parts) == 2:  # MM:SS
-                    return int(parts[0]) * 60 + int(parts[1])
-            return int(time_str)
-        except (ValueError, AttributeError):
-            return 0
-    return 0
+    return coerce_time(child) if child is not None else 0
 
 def get_float_value(element, tag_name: str) -> float:
     """Safely extract float value from XML element"""
     child = element.find(tag_name)
-    if child is not None and child.text:
-        try:
-            return float(child.text)
-        except ValueError:
-            return 0.0
-    return 0.0
+    return coerce_float(child) if child is not None else 0.0
 
 def parse_transfer_destinations_rulebased(element) -> Dict[str, int]:
     """Parse dynamic transfer destinations from incoming_transferred_to_specification"""
-    transfers = {}
-    
     transferred_spec = element.find('incoming_transferred_to_specification')
-    if transferred_spec is not None:
-        for dynamic_col in transferred_spec.findall('dynamic_column'):
-            column_name = dynamic_col.find('column_name')
-            column_value = dynamic_col.find('column_value')
-            
-            if column_name is not None and column_value is not None:
-                try:
-                    dest_name = column_name.text.strip()
-                    if dest_name.startswith('Transferred to '):
-                        dest_name = dest_name[15:]  # Remove prefix
-                    transfers[dest_name] = int(column_value.text)
-                except (ValueError, AttributeError):
-                    continue
-    
-    return transfers
+    if transferred_spec is None:
+        return {}
+    return coerce_dynamic_columns(transferred_spec, 'Transferred to ')
 
 def assess_queue_efficiency(service_level: float, avg_speed: int) -> str:
     """Assess queue efficiency based on service level and speed of answer"""
@@ -1500,36 +2228,44 @@ def assess_routing_efficiency(connection_rate: float, failures: int) -> str:
 # LEGACY PARSERS (KEPT FOR COMPATIBILITY)
 # ========================================
 
-def parse_trunk_xml(xml_content: str) -> Dict:
+class PlaceholderReportAccumulator(ReportAccumulator):
+    """Accumulator for report types without analysis yet: records are validated by the stream but ignored"""
+
+    def __init__(self, report_type: str, message: str):
+        super().__init__()
+        self.report_type = report_type
+        self.message = message
+
+    def build(self) -> Dict:
+        return {
+            'report_type': self.report_type,
+            'message': self.message
+        }
+
+def parse_trunk_xml(xml_content: Union[str, bytes, Iterable]) -> Dict:
     """Parse Trunk XML report (placeholder)"""
     try:
         logger.info("🔍 Parsing Trunk XML report...")
-        root = ET.fromstring(xml_content)
-        
-        return {
-            'report_type': 'trunk',
-            'message': 'Trunk analysis not implemented yet'
-        }
-        
+        return consume_groupsobjects(xml_content, create_report_accumulator('trunk'))
+
+    except XmlLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"❌ Error parsing Trunk XML: {str(e)}")
         raise Exception(f"Trunk parsing failed: {str(e)}")
 
-def parse_queue_xml(xml_content: str) -> Dict:
+def parse_queue_xml(xml_content: Union[str, bytes, Iterable]) -> Dict:
     """Parse Queue XML report - redirects to ACD parser"""
     return parse_acd_xml(xml_content)
 
-def parse_ddi_xml(xml_content: str) -> Dict:
+def parse_ddi_xml(xml_content: Union[str, bytes, Iterable]) -> Dict:
     """Parse DDI XML report (placeholder)"""
     try:
         logger.info("🔍 Parsing DDI XML report...")
-        root = ET.fromstring(xml_content)
-        
-        return {
-            'report_type': 'ddi',
-            'message': 'DDI analysis not implemented yet'
-        }
-        
+        return consume_groupsobjects(xml_content, create_report_accumulator('ddi'))
+
+    except XmlLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"❌ Error parsing DDI XML: {str(e)}")
         raise Exception(f"DDI parsing failed: {str(e)}")
@@ -1538,141 +2274,141 @@ def parse_ddi_xml(xml_content: str) -> Dict:
 # REPORT TYPE DETECTION
 # ========================================
 
-def detect_report_type(xml_content: str) -> str:
+# Tags that only appear in one export type, checked in priority order (most specific first).
+# A report type is detected when any of its indicator tags is part of the fingerprint.
+# ACD: queue-specific metrics like queue_closed, service_level, callbacks, queue_time
+ACD_INDICATOR_TAGS = frozenset([
+    'incoming_queue_closed',
+    'incoming_service_level',
+    'incoming_answered_within_service_time',
+    'incoming_unanswered_within_service_time',
+    'incoming_callbacks_requested',
+    'outgoing_callbacks_resolved',
+    'incoming_answered_by_member_specification',
+    'incoming_answered_average_queue_time',
+    'incoming_unanswered_average_queue_time',
+    'incoming_redirected_no_agents_owerflow',
+    'incoming_redirected_queue_timeout',
+    'incoming_redirected_nightmode',
+])
+
+# HUNTGROUP: answered_by_huntgroup_members, sent_to_overflow_number
+HUNTGROUP_INDICATOR_TAGS = frozenset([
+    'incoming_answered_by_huntgroup_members',
+    'incoming_unanswered_by_huntgroup_members',
+    'incoming_sent_to_overflow_number',
+    'incoming_answered_by_huntgroup_members_average_speed_of_answer',
+])
+
+# RULEBASED: total_handled_by_rulebase, incoming_transferred_to_specification
+RULEBASED_INDICATOR_TAGS = frozenset([
+    'incoming_total_handled_by_rulebase',
+    'incoming_transferred_to_specification',
+    'incoming_failure',
+])
+
+# IVR: total_handled_by_ivr, average_call_duration_for_ivr, terminated_because_of_failure
+IVR_INDICATOR_TAGS = frozenset([
+    'incoming_total_handled_by_ivr',
+    'incoming_average_call_duration_for_ivr',
+    'incoming_total_call_duration_for_ivr',
+    'incoming_terminated_because_of_failure',
+])
+
+# USER: incoming/outgoing split, external/internal, from_queues (only when no other type matched)
+USER_INDICATOR_TAGS = frozenset([
+    'incoming_from_external',
+    'incoming_from_internal',
+    'incoming_from_queues',
+    'outgoing_to_external',
+    'outgoing_to_internal',
+    'outgoing_transferred_out',
+    'total_calls',
+    'total_calls_duration',
+])
+
+REPORT_TYPE_INDICATORS = [
+    ('acd', ACD_INDICATOR_TAGS),
+    ('huntgroup', HUNTGROUP_INDICATOR_TAGS),
+    ('rulebased', RULEBASED_INDICATOR_TAGS),
+    ('ivr', IVR_INDICATOR_TAGS),
+    ('user', USER_INDICATOR_TAGS),
+]
+
+# Upper bound on the number of records inspected before falling back to structural detection
+FINGERPRINT_MAX_RECORDS = 16
+# Standalone detection feeds small chunks so it can stop right after the first record
+FINGERPRINT_CHUNK_SIZE = 4 * 1024
+
+def classify_report_fingerprint(tags) -> Optional[str]:
+    """Return the report type whose indicator tags appear in the fingerprint, or None if undecided"""
+    for report_type, indicator_tags in REPORT_TYPE_INDICATORS:
+        if not indicator_tags.isdisjoint(tags):
+            return report_type
+    return None
+
+def classify_report_fallback(tags) -> str:
+    """Structural detection for fingerprints without any type-specific indicator"""
+    # Check for Trunk specific elements
+    if 'trunk' in tags or 'sip_trunk' in tags:
+        return 'trunk'
+
+    # Check for Queue specific elements (Queue reports use ACD parser)
+    if 'queue' in tags or 'queue_stats' in tags:
+        return 'acd'
+
+    # Check for DDI specific elements
+    if 'ddi' in tags or 'direct_dial' in tags:
+        return 'ddi'
+
+    # If we have basic incoming/outgoing structure but no specific indicators,
+    # check if it looks like a user report by structure
+    if ('incoming_total' in tags or 'outgoing_total' in tags) and \
+            'incoming_answered' in tags and 'outgoing_answered' in tags:
+        return 'user'
+
+    logger.warning("⚠️ Unknown report type - defaulting to ACD")
+    return 'acd'  # Default to ACD if uncertain
+
+def detect_report_type(xml_content: Union[str, bytes, Iterable]) -> str:
     """
-    Detect the type of report based on XML structure (not element names, but actual structure)
-    
-    NOTE: This function works correctly even when a report contains MULTIPLE elements of the same type:
-    - Multiple users in the same report → detected as 'user'
-    - Multiple ACD groups in the same report → detected as 'acd'
-    - Multiple IVR in the same report → detected as 'ivr'
-    - Multiple HuntGroups in the same report → detected as 'huntgroup'
-    - Multiple RuleBased in the same report → detected as 'rulebased'
-    
-    The detection uses .find() which searches the entire XML tree, so it finds indicators
-    even if there are multiple occurrences. Reports should NOT be mixed (e.g., ACD + USER together).
-    
-    Returns: 'acd', 'user', 'ivr', 'huntgroup', 'rulebased', 'trunk', 'queue', 'ddi', or 'unknown'
+    Detect the type of report from a tag fingerprint of the first records of the document
+
+    Tags are collected while streaming and classified after every completed *__groupsobjects
+    record; detection stops as soon as an indicator tag is found (normally on the first record,
+    the 'Total' row, which carries every metric column of the export). Documents whose first
+    FINGERPRINT_MAX_RECORDS records carry no indicator fall back to structural detection.
+
+    Reports with MULTIPLE elements of the same type (users, ACD groups, IVR, HuntGroups,
+    RuleBased) share the same columns, so they are detected like single-entity reports.
+    Reports should NOT be mixed (e.g., ACD + USER together).
+
+    Returns: 'acd', 'user', 'ivr', 'huntgroup', 'rulebased', 'trunk', 'ddi', or 'unknown'
     """
     try:
-        root = ET.fromstring(xml_content)
-        
-        # ACD: Has queue-specific metrics like queue_closed, service_level, callbacks, queue_time
-        # Unique ACD indicators: queue_closed, service_level, answered_within_service_time, 
-        # callbacks_requested, answered_by_member_specification, queue_time metrics
-        # Works with multiple ACD groups in the same report (finds any occurrence in the tree)
-        has_acd_indicators = (
-            root.find('.//incoming_queue_closed') is not None or
-            root.find('.//incoming_service_level') is not None or
-            root.find('.//incoming_answered_within_service_time') is not None or
-            root.find('.//incoming_unanswered_within_service_time') is not None or
-            root.find('.//incoming_callbacks_requested') is not None or
-            root.find('.//outgoing_callbacks_resolved') is not None or
-            root.find('.//incoming_answered_by_member_specification') is not None or
-            root.find('.//incoming_answered_average_queue_time') is not None or
-            root.find('.//incoming_unanswered_average_queue_time') is not None or
-            root.find('.//incoming_redirected_no_agents_owerflow') is not None or
-            root.find('.//incoming_redirected_queue_timeout') is not None or
-            root.find('.//incoming_redirected_nightmode') is not None
-        )
-        
-        # HUNTGROUP: Has huntgroup-specific metrics
-        # Unique indicators: answered_by_huntgroup_members, sent_to_overflow_number
-        # Works with multiple HuntGroups in the same report (finds any occurrence in the tree)
-        has_huntgroup_indicators = (
-            root.find('.//incoming_answered_by_huntgroup_members') is not None or
-            root.find('.//incoming_unanswered_by_huntgroup_members') is not None or
-            root.find('.//incoming_sent_to_overflow_number') is not None or
-            root.find('.//incoming_answered_by_huntgroup_members_average_speed_of_answer') is not None
-        )
-        
-        # RULEBASED: Has rulebase-specific metrics
-        # Unique indicators: total_handled_by_rulebase, incoming_transferred_to_specification
-        # Works with multiple RuleBased in the same report (finds any occurrence in the tree)
-        has_rulebased_indicators = (
-            root.find('.//incoming_total_handled_by_rulebase') is not None or
-            root.find('.//incoming_transferred_to_specification') is not None or
-            root.find('.//incoming_failure') is not None
-        )
-        
-        # IVR: Has IVR-specific metrics
-        # Unique indicators: total_handled_by_ivr, average_call_duration_for_ivr, terminated_because_of_failure
-        # Works with multiple IVR in the same report (finds any occurrence in the tree)
-        has_ivr_indicators = (
-            root.find('.//incoming_total_handled_by_ivr') is not None or
-            root.find('.//incoming_average_call_duration_for_ivr') is not None or
-            root.find('.//incoming_total_call_duration_for_ivr') is not None or
-            root.find('.//incoming_terminated_because_of_failure') is not None or
-            (root.find('.//transferred_to_specification') is not None and 
-             root.find('.//incoming_total_handled_by_ivr') is not None)
-        )
-        
-        # USER: Has user-specific structure with incoming/outgoing split, external/internal, from_queues
-        # Unique indicators: incoming_from_external, incoming_from_internal, incoming_from_queues,
-        # outgoing_to_external, outgoing_to_internal, outgoing_transferred_out, total_calls (in/out)
-        # Works with multiple users in the same report (finds any occurrence in the tree)
-        # BUT: Must NOT have ACD, HUNTGROUP, RULEBASED, or IVR indicators
-        has_user_indicators = (
-            root.find('.//incoming_from_external') is not None or
-            root.find('.//incoming_from_internal') is not None or
-            root.find('.//incoming_from_queues') is not None or
-            root.find('.//outgoing_to_external') is not None or
-            root.find('.//outgoing_to_internal') is not None or
-            root.find('.//outgoing_transferred_out') is not None or
-            root.find('.//total_calls') is not None or
-            root.find('.//total_calls_duration') is not None
-        )
-        
-        # Detection logic with priority (most specific first)
-        if has_acd_indicators:
-            return 'acd'
-        
-        if has_huntgroup_indicators:
-            return 'huntgroup'
-        
-        if has_rulebased_indicators:
-            return 'rulebased'
-        
-        if has_ivr_indicators:
-            return 'ivr'
-        
-        # USER detection: has user structure AND doesn't have other specific indicators
-        if has_user_indicators and not (has_acd_indicators or has_huntgroup_indicators or 
-                                       has_rulebased_indicators or has_ivr_indicators):
-            return 'user'
-            
-        # Check for Trunk specific elements
-        if (root.find('.//trunk') is not None or 
-            root.find('.//sip_trunk') is not None):
-            return 'trunk'
-            
-        # Check for Queue specific elements (fallback to ACD)
-        if (root.find('.//queue') is not None or 
-            root.find('.//queue_stats') is not None):
-            return 'acd'  # Queue reports use ACD parser
-            
-        # Check for DDI specific elements  
-        if (root.find('.//ddi') is not None or 
-            root.find('.//direct_dial') is not None):
-            return 'ddi'
-        
-        # If we have basic incoming/outgoing structure but no specific indicators, 
-        # check if it looks like a user report by structure
-        has_basic_structure = (
-            root.find('.//incoming_total') is not None or
-            root.find('.//outgoing_total') is not None
-        )
-        
-        if has_basic_structure and not (has_acd_indicators or has_huntgroup_indicators or 
-                                       has_rulebased_indicators or has_ivr_indicators):
-            # Check if it has the user report structure pattern
-            if (root.find('.//incoming_answered') is not None and 
-                root.find('.//outgoing_answered') is not None):
-                return 'user'
-        
-        logger.warning("⚠️ Unknown report type - defaulting to ACD")
-        return 'acd'  # Default to ACD if uncertain
-        
+        tags = set()
+        records = 0
+        parser = ET.XMLPullParser(events=('end',))
+        prolog_tail = None
+        for chunk in iter_xml_chunks(xml_content, FINGERPRINT_CHUNK_SIZE):
+            if not tags:
+                prolog_tail = check_xml_prolog(chunk, prolog_tail)
+            parser.feed(chunk)
+            for _, element in parser.read_events():
+                tags.add(element.tag)
+                if element.tag.endswith(GROUPSOBJECTS_SUFFIX):
+                    records += 1
+                    report_type = classify_report_fingerprint(tags)
+                    if report_type:
+                        return report_type
+                    if records >= FINGERPRINT_MAX_RECORDS:
+                        return classify_report_fallback(tags)
+        parser.close()
+        for _, element in parser.read_events():
+            tags.add(element.tag)
+
+        return classify_report_fingerprint(tags) or classify_report_fallback(tags)
+
     except ET.ParseError as e:
         logger.error(f"❌ XML Parse Error in detection: {str(e)}")
         return 'unknown'
@@ -1684,41 +2420,718 @@ def detect_report_type(xml_content: str) -> str:
 # XML PROCESSING PIPELINE
 # ========================================
 
-def parse_xml_report(xml_content: str) -> Dict:
+REPORT_ACCUMULATORS = {
+    'acd': AcdReportAccumulator,
+    'user': UserReportAccumulator,
+    'ivr': IvrReportAccumulator,
+    'huntgroup': HuntGroupReportAccumulator,
+    'rulebased': RuleBasedReportAccumulator,
+    'queue': AcdReportAccumulator,  # Queue reports use ACD parser
+}
+
+PLACEHOLDER_REPORT_MESSAGES = {
+    'trunk': 'Trunk analysis not implemented yet',
+    'ddi': 'DDI analysis not implemented yet',
+}
+
+REPORT_TYPE_LABELS = {
+    'acd': 'ACD',
+    'user': 'User',
+    'ivr': 'IVR',
+    'huntgroup': 'HuntGroup',
+    'rulebased': 'RuleBased',
+    'queue': 'ACD',
+    'trunk': 'Trunk',
+    'ddi': 'DDI',
+}
+
+def create_report_accumulator(report_type: str) -> ReportAccumulator:
+    """Instantiate the accumulator for a detected report type"""
+    if report_type in PLACEHOLDER_REPORT_MESSAGES:
+        return PlaceholderReportAccumulator(report_type, PLACEHOLDER_REPORT_MESSAGES[report_type])
+    accumulator_class = REPORT_ACCUMULATORS.get(report_type)
+    if not accumulator_class:
+        raise Exception(f"No parser available for report type: {report_type}")
+    return accumulator_class()
+
+def iter_typed_groupsobjects(xml_content: Union[str, bytes, Iterable]) -> Iterator[Tuple[str, str, ET.Element]]:
+    """Walk the records like iter_groupsobjects(), yielding (report_type, grouping, element)"""
+    return iter_typed_records(iter_groupsobjects(xml_content))
+
+def iter_typed_records(records: Iterable[Tuple[str, ET.Element]]) -> Iterator[Tuple[str, str, ET.Element]]:
+    """
+    Yield (report_type, grouping, element) for a stream of (grouping, element) records
+
+    The type is classified from the tag fingerprint of the first record(s); records seen while
+    still undecided are buffered and replayed once the type is known, so the document is never
+    parsed twice. Nothing is yielded for a stream without records.
     """
-    Main XML parsing function that routes to appropriate parser
+    report_type = None
+    fingerprint = set()
+    pending_records = []
+    for grouping, element in records:
+        if report_type is None:
+            fingerprint.update(child.tag for child in element.iter())
+            report_type = classify_report_fingerprint(fingerprint)
+            if report_type is None and len(pending_records) + 1 < FINGERPRINT_MAX_RECORDS:
+                # Undecided: keep a copy, the engine clears the element once we move on
+                pending_records.append((grouping, copy.deepcopy(element)))
+                continue
+            if report_type is None:
+                report_type = classify_report_fallback(fingerprint)
+            for pending_grouping, pending_element in pending_records:
+                yield report_type, pending_grouping, pending_element
+            pending_records = []
+
+        yield report_type, grouping, element
+
+    if pending_records:
+        report_type = classify_report_fallback(fingerprint)
+        for pending_grouping, pending_element in pending_records:
+            yield report_type, pending_grouping, pending_element
+
+def detect_recordless_report_type(xml_content: Union[str, bytes, Iterable]) -> str:
+    """Type of a document without any record: structural detection over the whole document when possible"""
+    if isinstance(xml_content, (str, bytes, bytearray)):
+        return detect_report_type(xml_content)
+    return classify_report_fallback(set())
+
+def describe_truncation(error: XmlLimitExceeded, grouping: str, records_read: int) -> Dict:
+    """
+    The 'truncated' marker of a report built from the records read before a cap was hit
+
+    Setera writes the groupings in alphabetical order (date, month, period, quarter, time, week,
+    weekday, year, yearmonth), each opening with its total row. The report-wide totals are the
+    first record of 'date', so they are complete once anything was read; the detail of the
+    grouping being read and of the ones after it is not (a cap hit in 'month' also loses the
+    time and weekday breakdowns).
+    """
+    logger.warning(f"✂️ XML export truncated: {error} in the {grouping or 'first'} grouping, after {records_read} records")
+    return {'limit': error.limit, 'maximum': error.maximum, 'grouping': grouping, 'records_read': records_read}
+
+def parse_xml_report(xml_content: Union[str, bytes, Iterable]) -> Dict:
+    """
+    Main XML parsing function: detects the report type and parses it in a single streaming pass
+
+    The type is classified from the tag fingerprint of the first record(s) (see
+    iter_typed_groupsobjects); the matching accumulator is then committed and fed every record.
+    An export over the caps of the streaming engine is reported from the records read until
+    then, with a 'truncated' marker (see describe_truncation).
     """
-    if not xml_content or not xml_content.strip():
+    if isinstance(xml_content, (str, bytes, bytearray)) and (not xml_content or not xml_content.strip()):
         raise Exception("Empty XML content provided")
-    
-    # Detect report type
-    report_type = detect_report_type(xml_content)
-    logger.info(f"📊 Detected report type: {report_type}")
-    
-    # Route to appropriate parser
-    parsers = {
-        'acd': parse_acd_xml,
-        'user': parse_user_xml, 
-        'ivr': parse_ivr_xml,
-        'huntgroup': parse_huntgroup_xml,
-        'rulebased': parse_rulebased_xml,
-        'trunk': parse_trunk_xml,
-        'queue': parse_queue_xml,  # Redirects to ACD
-        'ddi': parse_ddi_xml
-    }
-    
-    parser_func = parsers.get(report_type)
-    if not parser_func:
-        raise Exception(f"No parser available for report type: {report_type}")
-    
-    return parser_func(xml_content)
+
+    return parse_report_records(iter_groupsobjects(xml_content), lambda: detect_recordless_report_type(xml_content))
+
+def parse_report_records(records: Iterable[Tuple[str, ET.Element]], recordless_type=None) -> Dict:
+    """
+    Parse a stream of (grouping, element) records, as parse_xml_report() does for a document
+
+    recordless_type() gives the report type when the stream has no record at all.
+    """
+    def commit(report_type: str) -> ReportAccumulator:
+        logger.info(f"📊 Detected report type: {report_type}")
+        logger.info(f"🔍 Parsing {REPORT_TYPE_LABELS.get(report_type, report_type)} XML report...")
+        return create_report_accumulator(report_type)
+
+    accumulator = None
+    truncated = None
+    grouping = ''
+    records_read = 0
+    try:
+        try:
+            for report_type, grouping, element in iter_typed_records(records):
+                if accumulator is None:
+                    accumulator = commit(report_type)
+                accumulator.add(grouping, element)
+                records_read += 1
+        except XmlLimitExceeded as e:
+            if accumulator is None:
+                raise
+            truncated = describe_truncation(e, grouping, records_read)
+
+        if accumulator is None:
+            accumulator = commit(recordless_type() if recordless_type else classify_report_fallback(set()))
+
+        parsed_data = accumulator.build()
+        if truncated:
+            parsed_data['truncated'] = truncated
+        tracer.count('rows_parsed', records_read)
+        return parsed_data
+
+    except ET.ParseError as e:
+        logger.error(f"❌ XML Parse Error in report: {str(e)}")
+        raise Exception(f"Invalid XML format: {str(e)}")
+    except XmlLimitExceeded:
+        raise
+    except Exception as e:
+        label = REPORT_TYPE_LABELS.get(accumulator.report_type, 'Report') if accumulator else 'Report'
+        logger.error(f"❌ Error parsing {label} XML: {str(e)}")
+        raise Exception(f"{label} parsing failed: {str(e)}")
+
+# ========================================
+# SUMMARY PARSE MODE
+# ========================================
+# Previews, health checks and "is there anything to report" decisions only need the totals
+# and the entity names. Setera writes the date grouping first (the total row, then every
+# group/object of every day), so the summary parse abandons the stream as soon as the date
+# records are over: the time/week/month/... records are neither downloaded nor parsed.
+
+class ReportSummary:
+    """Totals, KPI summary and entities of an export, as returned by parse_xml_summary()"""
+
+    def __init__(self, report_type: str, period_range: str = 'N/A', total_data: Optional[Dict] = None,
+                 summary: Optional[Dict] = None, entity_names: Optional[List[str]] = None,
+                 entity_identifiers: Optional[List[str]] = None, records_read: int = 0, stopped_early: bool = False,
+                 truncated: Optional[Dict] = None):
+        self.report_type = report_type
+        self.period_range = period_range
+        self.total_data = total_data or {}
+        self.summary = summary or {}  # The 'summary' of the full parse, minus SUMMARY_UNAVAILABLE_KEYS
+        self.entity_names = entity_names or []
+        self.entity_identifiers = entity_identifiers or []
+        self.records_read = records_read
+        self.stopped_early = stopped_early  # True when the rest of the export was never read
+        self.truncated = truncated  # Set when a cap of the streaming engine was hit in the date grouping
+
+    def as_dict(self) -> Dict:
+        return {
+            'report_type': self.report_type,
+            'period_range': self.period_range,
+            'total_data': self.total_data,
+            'summary': self.summary,
+            'entity_names': self.entity_names,
+            'entity_identifiers': self.entity_identifiers,
+            'records_read': self.records_read,
+            'stopped_early': self.stopped_early,
+            'truncated': self.truncated,
+        }
+
+# Summary KPIs computed from a grouping the summary parse never reads
+SUMMARY_UNAVAILABLE_KEYS = {
+    'ivr': ('operational_efficiency',),  # Average efficiency score of the hourly grouping
+}
+
+class SummaryReportAccumulator(ReportAccumulator):
+    """
+    Feeds the date records to the report type's accumulator, then sets done
+
+    The total row and the per-day rows give the summary KPIs, the period range and the
+    entities exactly as the full parse computes them; the hourly/weekday tables stay empty.
+    """
+
+    def __init__(self, report_type: str):
+        super().__init__()
+        self.report_type = report_type
+        self.report_accumulator = create_report_accumulator(report_type)
+        self.seen_date = False
+        self.done = False
+        self.records_read = 0
+        self.truncated = None
+
+    def add(self, grouping: str, element) -> None:
+        if grouping != 'date':
+            # The date grouping is over: everything needed has been read
+            self.done = self.seen_date
+            return
+        self.seen_date = True
+        self.records_read += 1
+        self.report_accumulator.add(grouping, element)
+
+    def build(self) -> ReportSummary:
+        parsed_data = self.report_accumulator.build()
+        summary = dict(parsed_data.get('summary', {}))
+        for key in SUMMARY_UNAVAILABLE_KEYS.get(self.report_type, ()):
+            summary.pop(key, None)
+        entity_identifiers = parsed_data.get('specific_details', {}).get('unique_object_identifiers', [])
+        return ReportSummary(
+            self.report_type,
+            period_range=parsed_data.get('period_range', 'N/A'),
+            total_data=getattr(self.report_accumulator, 'total_data', {}),
+            summary=summary,
+            entity_names=extract_entity_names(parsed_data),
+            entity_identifiers=sorted(entity_identifiers),
+            records_read=self.records_read,
+            stopped_early=self.done,
+            truncated=self.truncated,
+        )
+
+def parse_xml_summary(xml_content: Union[str, bytes, Iterable]) -> ReportSummary:
+    """
+    Summary parse mode: report type, totals, KPI summary and entity names of an export
+
+    Same streaming engine and type detection as parse_xml_report(), but the stream is closed
+    right after the date grouping (a streamed download stops there too).
+    """
+    if isinstance(xml_content, (str, bytes, bytearray)) and (not xml_content or not xml_content.strip()):
+        raise Exception("Empty XML content provided")
+
+    accumulator = None
+    grouping = ''
+    records = iter_typed_groupsobjects(xml_content)
+    try:
+        try:
+            for report_type, grouping, element in records:
+                if accumulator is None:
+                    accumulator = SummaryReportAccumulator(report_type)
+                accumulator.add(grouping, element)
+                if accumulator.done:
+                    break
+        except XmlLimitExceeded as e:
+            if accumulator is None:
+                raise
+            accumulator.truncated = describe_truncation(e, grouping, accumulator.records_read)
+
+        if accumulator is None:
+            accumulator = SummaryReportAccumulator(detect_recordless_report_type(xml_content))
+
+        summary = accumulator.build()
+        logger.info(f"📋 Summary of {REPORT_TYPE_LABELS.get(summary.report_type, summary.report_type)} export: "
+                    f"{len(summary.entity_names)} entities, {summary.records_read} records read"
+                    f"{' (stopped early)' if summary.stopped_early else ''}")
+        return summary
+
+    except ET.ParseError as e:
+        logger.error(f"❌ XML Parse Error in report summary: {str(e)}")
+        raise Exception(f"Invalid XML format: {str(e)}")
+    except XmlLimitExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error parsing report summary: {str(e)}")
+        raise Exception(f"Summary parsing failed: {str(e)}")
+    finally:
+        records.close()
+
+# ========================================
+# REPORT CACHE
+# ========================================
+# Parsed reports and Claude insights are content-addressed: the key is the SHA-256 of the raw
+# export bytes plus the version of the code that produced the value, so changing the parsers
+# or the prompts invalidates the old entries by itself (bump the versions below).
+# Two tiers: an in-process LRU that survives warm invocations, then a persistent store
+# (S3 prefix of the reports bucket, or a local directory for local runs and tests).
+
+PARSER_VERSION = '5'  # Bump when the output of parse_xml_report() changes
+PROMPT_VERSION = '3'  # Bump when the analysis prompts or the Bedrock model change
+REPORT_CACHE_MEMORY_ENTRIES = 32
+
+def encode_cache_value(value):
+    """JSON-ready copy of a cached value (tuples and lazy groupings are tagged so they survive the round trip)"""
+    if isinstance(value, LazyGrouping):
+        return {'__lazy_grouping__': encode_cache_value(value.to_dict())}
+    if isinstance(value, CompactRow):
+        return encode_cache_value(value.to_dict())
+    if isinstance(value, tuple):
+        return {'__tuple__': [encode_cache_value(item) for item in value]}
+    if isinstance(value, list):
+        return [encode_cache_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: encode_cache_value(item) for key, item in value.items()}
+    return value
+
+def decode_cache_object(obj: Dict):
+    """json object_hook restoring the tuples and lazy groupings tagged by encode_cache_value()"""
+    if len(obj) == 1 and '__tuple__' in obj:
+        return tuple(obj['__tuple__'])
+    if len(obj) == 1 and '__lazy_grouping__' in obj:
+        return LazyGrouping.from_dict(obj['__lazy_grouping__'])
+    return obj
+
+def serialize_cache_value(value) -> bytes:
+    return gzip.compress(json.dumps(encode_cache_value(value), cls=DecimalEncoder).encode('utf-8'))
+
+def deserialize_cache_value(data: bytes):
+    return json.loads(gzip.decompress(data).decode('utf-8'), object_hook=decode_cache_object)
+
+class MemoryCacheStore:
+    """In-process LRU tier, kept across warm invocations of the container"""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()  # Shared by the worker threads of the local report queue
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+class S3CacheStore:
+    """Persistent tier: gzipped JSON objects under a prefix of the reports bucket
+
+    Entries older than the TTL are ignored on read; a lifecycle rule on the prefix deletes them.
+    """
+
+    def __init__(self, bucket: str, prefix: str, ttl_seconds: int):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: str):
+        try:
+            obj = s3_client.get_object(Bucket=self.bucket, Key=self.prefix + key)
+        except s3_client.exceptions.NoSuchKey:
+            return None
+        age = (datetime.now(timezone.utc) - obj['LastModified']).total_seconds()
+        if age > self.ttl_seconds:
+            return None
+        return deserialize_cache_value(obj['Body'].read())
+
+    def put(self, key: str, value) -> None:
+        s3_client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=serialize_cache_value(value),
+                             ContentType='application/gzip')
+
+class FileCacheStore:
+    """Persistent tier on the local filesystem (stand-in for S3 in local runs and tests)"""
+
+    def __init__(self, directory: str, ttl_seconds: int):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: str):
+        path = os.path.join(self.directory, key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                os.remove(path)
+                return None
+            with open(path, 'rb') as f:
+                return deserialize_cache_value(f.read())
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, value) -> None:
+        path = os.path.join(self.directory, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(serialize_cache_value(value))
+        os.replace(path + '.tmp', path)
+
+class ReportCache:
+    """
+    Two-tier cache of parsed reports and insights, keyed by export content hash
+
+    Persistent tier errors are logged and counted as misses: the cache never fails a report.
+    Hit/miss counters are kept per kind ('parsed', 'insights') until reset_counters().
+    """
+
+    def __init__(self, persistent=None, max_entries: int = REPORT_CACHE_MEMORY_ENTRIES,
+                 ttl_seconds: int = REPORT_CACHE_TTL_SECONDS):
+        self.memory = MemoryCacheStore(max_entries, ttl_seconds)
+        self.persistent = persistent
+        self._lock = threading.Lock()  # Counters are updated by the pipeline's worker threads too
+        self.reset_counters()
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.counters = {
+                kind: {'memory_hits': 0, 'persistent_hits': 0, 'misses': 0, 'stores': 0}
+                for kind in ('parsed', 'insights')
+            }
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return copy.deepcopy(self.counters)
+
+    def count(self, kind: str, counter: str) -> None:
+        with self._lock:
+            self.counters[kind][counter] += 1
+
+    def get(self, kind: str, key: str):
+        value = self.memory.get(key)
+        if value is not None:
+            self.count(kind, 'memory_hits')
+            return value
+
+        if self.persistent is not None:
+            try:
+                value = self.persistent.get(key)
+            except Exception as e:
+                logger.warning(f"⚠️ Report cache read failed for {key}: {str(e)}")
+                value = None
+            if value is not None:
+                self.count(kind, 'persistent_hits')
+                self.memory.put(key, value)
+                return value
+
+        self.count(kind, 'misses')
+        return None
+
+    def put(self, kind: str, key: str, value) -> None:
+        self.count(kind, 'stores')
+        self.memory.put(key, value)
+        if self.persistent is not None:
+            try:
+                self.persistent.put(key, value)
+            except Exception as e:
+                logger.warning(f"⚠️ Report cache write failed for {key}: {str(e)}")
+
+    def get_parsed(self, content_hash: str) -> Optional[Dict]:
+        return self.get('parsed', f"parsed/{content_hash}-p{PARSER_VERSION}.json.gz")
+
+    def put_parsed(self, content_hash: str, parsed_data: Dict) -> None:
+        self.put('parsed', f"parsed/{content_hash}-p{PARSER_VERSION}.json.gz", parsed_data)
+
+    def get_insights(self, content_hash: str) -> Optional[str]:
+        cached = self.get('insights', f"insights/{content_hash}-p{PARSER_VERSION}-q{PROMPT_VERSION}.json.gz")
+        return cached['insights'] if cached else None
+
+    def put_insights(self, content_hash: str, insights: str) -> None:
+        self.put('insights', f"insights/{content_hash}-p{PARSER_VERSION}-q{PROMPT_VERSION}.json.gz", {'insights': insights})
+
+def create_report_cache() -> ReportCache:
+    """Report cache with the persistent tier configured by the environment (none if unset)"""
+    if REPORT_CACHE_BUCKET:
+        return ReportCache(S3CacheStore(REPORT_CACHE_BUCKET, 'cache/', REPORT_CACHE_TTL_SECONDS))
+    if REPORT_CACHE_DIR:
+        return ReportCache(FileCacheStore(REPORT_CACHE_DIR, REPORT_CACHE_TTL_SECONDS))
+    return ReportCache()
+
+# Shared across warm invocations, like the AWS clients
+report_cache = create_report_cache()
+
+# ========================================
+# RAW EXPORT ARCHIVE
+# ========================================
+# Every downloaded export is kept gzipped, so a parser fix, a prompt change or a backfill can
+# reprocess it without asking the customer's Setera server again. Objects are content-addressed
+# by the SHA-256 of the raw bytes (the content_hash of XmlExport): an export downloaded again
+# unchanged, or shared by several connectors, is stored once. Each download then adds a small
+# JSON entry per connector under index/<connector>/<period>/ pointing at its object.
+
+EXPORT_ARCHIVE_SPOOL_BYTES = 8 * 1024 * 1024  # Compressed bytes kept in memory before spilling to /tmp
+EXPORT_ARCHIVE_COMPRESSLEVEL = 6
+ARCHIVE_DATE_PATTERN = re.compile(r'\d{2}/\d{2}/\d{4}')
+
+class ArchiveWriter:
+    """
+    Gzips the chunks of an export while they are streamed into the parser
+
+    The compressed bytes are spooled (in memory, then in a temporary file), so the export is
+    never held whole; mtime=0 makes identical exports compress to identical objects.
+    """
+
+    def __init__(self):
+        self.file = tempfile.SpooledTemporaryFile(max_size=EXPORT_ARCHIVE_SPOOL_BYTES)
+        self._gzip = gzip.GzipFile(fileobj=self.file, mode='wb', compresslevel=EXPORT_ARCHIVE_COMPRESSLEVEL, mtime=0)
+        self.raw_bytes = 0
+
+    def tee(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        for chunk in chunks:
+            self._gzip.write(chunk)
+            self.raw_bytes += len(chunk)
+            yield chunk
+
+    def finish(self):
+        """The compressed export, rewound for the upload"""
+        self._gzip.close()
+        self.file.seek(0)
+        return self.file
+
+    def close(self) -> None:
+        self.file.close()
+
+class S3ArchiveStore:
+    """Archive objects under a prefix of the reports bucket"""
+
+    def __init__(self, bucket: str, prefix: str):
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def exists(self, key: str) -> bool:
+        try:
+            s3_client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+            return True
+        except s3_client.exceptions.ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def put_file(self, key: str, fileobj, content_type: str) -> None:
+        s3_client.upload_fileobj(fileobj, self.bucket, self.prefix + key, ExtraArgs={'ContentType': content_type})
+
+    def open(self, key: str):
+        return s3_client.get_object(Bucket=self.bucket, Key=self.prefix + key)['Body']
+
+    def list_keys(self, prefix: str) -> List[str]:
+        keys = []
+        paginator = s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix + prefix):
+            keys.extend(obj['Key'][len(self.prefix):] for obj in page.get('Contents', []))
+        return keys
+
+class FileArchiveStore:
+    """Archive objects on the local filesystem (stand-in for S3 in local runs and tests)"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self.directory, key))
+
+    def put_file(self, key: str, fileobj, content_type: str) -> None:
+        path = os.path.join(self.directory, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            shutil.copyfileobj(fileobj, f)
+        os.replace(path + '.tmp', path)
+
+    def open(self, key: str):
+        return open(os.path.join(self.directory, key), 'rb')
+
+    def list_keys(self, prefix: str) -> List[str]:
+        root = os.path.join(self.directory, prefix)
+        keys = []
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                if not filename.endswith('.tmp'):
+                    keys.append(os.path.relpath(os.path.join(dirpath, filename), self.directory).replace(os.sep, '/'))
+        return keys
+
+def get_archive_period(period_range: str) -> str:
+    """Index folder of a report period: 'YYYY-MM-DD_YYYY-MM-DD', or 'undated' without dates"""
+    days = []
+    for text in ARCHIVE_DATE_PATTERN.findall(period_range or ''):
+        try:
+            days.append(datetime.strptime(text, '%d/%m/%Y').date())
+        except ValueError:
+            continue
+    if not days:
+        return 'undated'
+    return f"{min(days).isoformat()}_{max(days).isoformat()}"
+
+class ExportArchive:
+    """
+    Content-addressed archive of the raw exports, indexed by connector and period
+
+    Like the report cache, store errors are logged and never fail a report.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    @staticmethod
+    def object_key(content_hash: str) -> str:
+        return f"objects/{content_hash[:2]}/{content_hash}.xml.gz"
+
+    @staticmethod
+    def index_prefix(connector_id: str, period: str = '') -> str:
+        prefix = f"index/{quote(connector_id, safe='')}/"
+        return f"{prefix}{period}/" if period else prefix
+
+    def store_export(self, writer: ArchiveWriter, content_hash: str, connector_ids: List[str], period: str,
+                     xml_endpoint: str, report_type: str = '', truncated: Optional[Dict] = None) -> None:
+        """Upload the compressed export unless the archive has it already, then index it for each connector"""
+        object_key = self.object_key(content_hash)
+        try:
+            compressed = writer.finish()
+            compressed.seek(0, os.SEEK_END)
+            archived_bytes = compressed.tell()
+            compressed.seek(0)
+            deduplicated = self.store.exists(object_key)
+            if not deduplicated:
+                self.store.put_file(object_key, compressed, 'application/gzip')
+
+            fetched_at = datetime.utcnow()
+            entry = {
+                'content_hash': content_hash,
+                'object_key': object_key,
+                'period': period,
+                'xml_endpoint': xml_endpoint,
+                'report_type': report_type,
+                'raw_bytes': writer.raw_bytes,
+                'archived_bytes': archived_bytes,
+                'truncated': truncated,
+                'fetched_at': fetched_at.isoformat()
+            }
+            body = json.dumps(entry, cls=DecimalEncoder).encode('utf-8')
+            for connector_id in connector_ids:
+                index_key = (f"{self.index_prefix(connector_id, period)}"
+                             f"{fetched_at.strftime('%Y%m%dT%H%M%S%fZ')}-{content_hash[:12]}.json")
+                self.store.put_file(index_key, io.BytesIO(body), 'application/json')
+
+            logger.info(f"🗄️ Export {content_hash[:12]} archived for {len(connector_ids)} connectors "
+                        f"({writer.raw_bytes} -> {archived_bytes} bytes{', already stored' if deduplicated else ''})")
+        except Exception as e:
+            logger.warning(f"⚠️ Export archive write failed for {object_key}: {str(e)}")
+        finally:
+            writer.close()
+
+    def list_exports(self, connector_id: str, period: str = '') -> List[Dict]:
+        """Index entries of a connector (optionally of a single period), oldest download first"""
+        entries = []
+        for key in sorted(self.store.list_keys(self.index_prefix(connector_id, period))):
+            with self.store.open(key) as f:
+                entry = json.loads(f.read().decode('utf-8'))
+            entry['connector_id'] = connector_id
+            entries.append(entry)
+        entries.sort(key=lambda entry: entry['fetched_at'])
+        return entries
+
+    def iter_export(self, content_hash: str, chunk_size: int = XML_STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        """Stream an archived export back as raw byte chunks, decompressed on the fly"""
+        with self.store.open(self.object_key(content_hash)) as body:
+            with gzip.GzipFile(fileobj=body, mode='rb') as f:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+
+def create_export_archive() -> Optional[ExportArchive]:
+    """Export archive configured by the environment (None when archiving is off)"""
+    if EXPORT_ARCHIVE_BUCKET:
+        return ExportArchive(S3ArchiveStore(EXPORT_ARCHIVE_BUCKET, 'archive/'))
+    if EXPORT_ARCHIVE_DIR:
+        return ExportArchive(FileArchiveStore(EXPORT_ARCHIVE_DIR))
+    return None
+
+export_archive = create_export_archive()
+
+def iter_archived_export(content_hash: str) -> Iterator[bytes]:
+    """
+    Raw chunks of an archived export, meant to be fed straight into parse_xml_report()
+
+    The export is decompressed while the parser consumes it, like a streamed download.
+    """
+    if export_archive is None:
+        raise Exception("Export archive not configured (EXPORT_ARCHIVE_BUCKET or EXPORT_ARCHIVE_DIR)")
+    return export_archive.iter_export(content_hash)
+
+def parse_archived_export(content_hash: str) -> Dict:
+    """Parse an archived export again with the current parsers, without contacting the Setera server"""
+    return parse_xml_report(iter_archived_export(content_hash))
 
 # ========================================
 # CLAUDE INTEGRATION
 # ========================================
 
-def generate_insights_with_claude(parsed_data: Dict) -> str:
-    """Generate human-readable insights using Claude AI"""
+def generate_insights_with_claude(parsed_data: Dict, content_hash: Optional[str] = None) -> str:
+    """Generate human-readable insights using Claude AI
+
+    With the content hash of the export, insights are served from (and stored in) the report
+    cache. Fallback insights produced when Bedrock fails are never cached.
+    """
+    if content_hash:
+        cached_insights = report_cache.get_insights(content_hash)
+        if cached_insights is not None:
+            logger.info("♻️ Claude insights served from the report cache")
+            return cached_insights
+
     try:
         logger.info("🤖 Generating insights with Claude...")
         
@@ -1737,6 +3150,7 @@ def generate_insights_with_claude(parsed_data: Dict) -> str:
             prompt = create_rulebased_analysis_prompt(parsed_data)
         else:
             prompt = create_generic_analysis_prompt(parsed_data)
+        tracer.count('prompt_chars', len(prompt))
         
         # Call Claude via Bedrock
         response = bedrock.invoke_model(
@@ -1758,6 +3172,8 @@ def generate_insights_with_claude(parsed_data: Dict) -> str:
         insights = response_body['content'][0]['text']
         
         logger.info("✅ Claude insights generated successfully")
+        if content_hash:
+            report_cache.put_insights(content_hash, insights)
         return insights
         
     except Exception as e:
@@ -1765,6 +3181,59 @@ def generate_insights_with_claude(parsed_data: Dict) -> str:
         # Fallback to basic summary
         return generate_fallback_insights(parsed_data)
 
+# Coarse groupings added to the prompts when the export spans more than one of their periods
+# (monthly connectors); a daily export keeps no records of them. Each must be in LAZY_GROUPINGS
+PROMPT_PERIOD_BREAKDOWNS = [
+    ('week', '📅 BREAKDOWN SETTIMANALE'),
+    ('yearmonth', '📅 BREAKDOWN MENSILE'),
+]
+
+def format_period_breakdowns(data: Dict) -> str:
+    """Weekly/monthly group-level breakdown sections of a prompt ('' when the export covers a single period)"""
+    period_groupings = data.get('period_groupings') or {}
+    sections = ""
+    for grouping, title in PROMPT_PERIOD_BREAKDOWNS:
+        lazy_grouping = period_groupings.get(grouping)
+        if lazy_grouping is None or len(lazy_grouping) < 2:
+            continue
+        sections += f"\n{title} ({len(lazy_grouping)} periodi):\n{json.dumps(lazy_grouping.group_rows(), indent=2, cls=DecimalEncoder)}\n"
+    return sections
+
+def format_truncation_notice(data: Dict) -> str:
+    """Warning line of a prompt for a report built from a truncated export ('' otherwise)"""
+    truncated = data.get('truncated')
+    if not truncated:
+        return ""
+    return (f"\n⚠️ EXPORT TRONCATO: l'export supera il limite di elaborazione ({truncated.get('limit')}). "
+            f"I totali sono completi, ma i dettagli a partire dal raggruppamento '{truncated.get('grouping')}' "
+            f"sono parziali: non interpretare fasce orarie o periodi mancanti come assenza di traffico.")
+
+# Entities listed in the per-entity section of a prompt (biggest volume first)
+PROMPT_ENTITY_LIMIT = 20
+
+def format_entity_breakdown(data: Dict) -> str:
+    """Per-entity section of a prompt: totals, peak hour and busiest day of each entity ('' for a single entity)"""
+    entity_breakdown = data.get('entity_breakdown') or {}
+    entities = entity_breakdown.get('entities', [])
+    if len(entities) < 2:
+        return ""
+    days = entity_breakdown.get('days', [])
+    section = f"\n📋 BREAKDOWN PER ENTITÀ ({len(entities)} entità"
+    section += f", prime {PROMPT_ENTITY_LIMIT} per volume):\n" if len(entities) > PROMPT_ENTITY_LIMIT else "):\n"
+    for entity in entities[:PROMPT_ENTITY_LIMIT]:
+        hourly_volume = entity.get('hourly_volume', [])
+        daily_volume = entity.get('daily_volume', [])
+        line = f"- {entity.get('name') or entity.get('object_identifier')}: volume {entity.get('volume', 0)}, totali {json.dumps(entity.get('totals', {}))}"
+        if hourly_volume and max(hourly_volume) > 0:
+            line += f", ora di picco {hourly_volume.index(max(hourly_volume)):02d}:00"
+        if daily_volume and max(daily_volume) > 0:
+            line += f", giorno più attivo {days[daily_volume.index(max(daily_volume))]}"
+        for key, columns in entity.get('columns', {}).items():
+            top_columns = sorted(columns.items(), key=lambda x: x[1], reverse=True)[:5]
+            line += f", {key}: {json.dumps(dict(top_columns), ensure_ascii=False)}"
+        section += line + "\n"
+    return section
+
 def create_ivr_analysis_prompt(data: Dict) -> str:
     """Create specialized prompt for IVR analysis with enhanced formatting and ultra-precise insights"""
     summary = data.get('summary', {})
@@ -1846,7 +3315,7 @@ Devi menzionare esplicitamente:
 - Gli orari specifici (non "mattina" ma "09:00", "10:00", ecc.)
 
 📊 DATI GENERALI:
-🗓️ Periodo: {data.get('period_range', 'N/A')}
+🗓️ Periodo: {data.get('period_range', 'N/A')}{format_truncation_notice(data)}
 📞 Chiamate totali: {summary.get('total_calls', 0)}
 ✅ Tasso di connessione: {summary.get('connection_rate', 0)}%
 ❌ Tasso di abbandono: {summary.get('abandonment_rate', 0)}%
@@ -1854,18 +3323,18 @@ Devi menzionare esplicitamente:
 🎯 Qualità del servizio: {insights.get('service_quality', 'N/A')}
 
 📈 BREAKDOWN GIORNALIERO DETTAGLIATO:
-{json.dumps(daily_breakdown, indent=2) if daily_breakdown else 'Nessun dato giornaliero'}
-
+{json.dumps(daily_breakdown, indent=2, cls=DecimalEncoder) if daily_breakdown else 'Nessun dato giornaliero'}
+{format_period_breakdowns(data)}{format_entity_breakdown(data)}
 🕐 ANALISI ORARIA COMPLETA:
 Ore attive: {hourly_analysis.get('active_hours', 0)}
-Ore di picco: {json.dumps(peak_hours, indent=2) if peak_hours else 'Nessun picco identificato'}
-Tutti i dati orari: {json.dumps(all_hourly_data, indent=2) if all_hourly_data else 'Nessun dato orario'}
+Ore di picco: {json.dumps(peak_hours, indent=2, cls=DecimalEncoder) if peak_hours else 'Nessun picco identificato'}
+Tutti i dati orari: {json.dumps(all_hourly_data, indent=2, cls=DecimalEncoder) if all_hourly_data else 'Nessun dato orario'}
 
 📅 PATTERN SETTIMANALI:
-{json.dumps(weekday_analysis, indent=2) if weekday_analysis else 'Nessun pattern settimanale'}
+{json.dumps(weekday_analysis, indent=2, cls=DecimalEncoder) if weekday_analysis else 'Nessun pattern settimanale'}
 
 📲 ANALISI TRASFERIMENTI:
-Destinazioni: {json.dumps(transfer_analysis.get('destinations', {}), indent=2)}
+Destinazioni: {json.dumps(transfer_analysis.get('destinations', {}), indent=2, cls=DecimalEncoder)}
 Destinazione più popolare: {transfer_analysis.get('most_popular_destination', 'N/A')}
 
 FORNISCI UN'ANALISI ULTRA-PRECISA E ULTRA-DETTAGLIATA con metriche avanzate IVR calcolate ESCLUSIVAMENTE dai dati reali:
@@ -2065,7 +3534,7 @@ Devi menzionare esplicitamente:
 - I nomi specifici degli agenti quando disponibili nei dati
 
 📊 DATI GENERALI CENTRALINO:
-🗓️ Periodo: {data.get('period_range', 'N/A')}
+🗓️ Periodo: {data.get('period_range', 'N/A')}{format_truncation_notice(data)}
 📞 Chiamate totali in arrivo: {summary.get('total_incoming_calls', 0)}
 ✅ Chiamate risposte: {summary.get('answered_calls', 0)}
 ❌ Chiamate non risposte: {summary.get('unanswered_calls', 0)}
@@ -2080,16 +3549,16 @@ Devi menzionare esplicitamente:
 🚫 Coda chiusa: {summary.get('queue_closed_calls', 0)}
 
 📈 BREAKDOWN GIORNALIERO:
-{json.dumps(daily_breakdown, indent=2) if daily_breakdown else 'Nessun dato giornaliero'}
-
+{json.dumps(daily_breakdown, indent=2, cls=DecimalEncoder) if daily_breakdown else 'Nessun dato giornaliero'}
+{format_period_breakdowns(data)}{format_entity_breakdown(data)}
 🕐 ANALISI ORARIA CENTRALINO:
 Ore attive: {hourly_analysis.get('active_hours', 0)}
-Ore di picco: {json.dumps(peak_hours, indent=2) if peak_hours else 'Nessun picco'}
-Ore critiche (abbandono >50%): {json.dumps(critical_hours, indent=2) if critical_hours else 'Nessuna ora critica'}
-Ore ottimali (risposta >90%, SL >80%): {json.dumps(optimal_hours, indent=2) if optimal_hours else 'Nessuna ora ottimale'}
+Ore di picco: {json.dumps(peak_hours, indent=2, cls=DecimalEncoder) if peak_hours else 'Nessun picco'}
+Ore critiche (abbandono >50%): {json.dumps(critical_hours, indent=2, cls=DecimalEncoder) if critical_hours else 'Nessuna ora critica'}
+Ore ottimali (risposta >90%, SL >80%): {json.dumps(optimal_hours, indent=2, cls=DecimalEncoder) if optimal_hours else 'Nessuna ora ottimale'}
 
 👥 ANALISI AGENTI:
-Top 5 agenti: {json.dumps(top_agents, indent=2) if top_agents else 'Nessun dato agenti'}
+Top 5 agenti: {json.dumps(top_agents, indent=2, cls=DecimalEncoder) if top_agents else 'Nessun dato agenti'}
 
 FORNISCI UN'ANALISI ULTRA-PRECISA E ULTRA-DETTAGLIATA con metriche avanzate calcolate ESCLUSIVAMENTE dai dati reali:
 
@@ -2336,7 +3805,7 @@ Devi menzionare esplicitamente:
 - Gli orari specifici (non "mattina" ma "09:00", "10:00", ecc.)
 
 📊 DATI GENERALI CENTRALINO:
-🗓️ Periodo: {data.get('period_range', 'N/A')}
+🗓️ Periodo: {data.get('period_range', 'N/A')}{format_truncation_notice(data)}
 📞 Chiamate in arrivo totali: {summary.get('incoming_total', 0)}
    - Esterne: {summary.get('incoming_external', 0)}
    - Interne: {summary.get('incoming_internal', 0)}
@@ -2365,11 +3834,11 @@ Devi menzionare esplicitamente:
 📈 Tasso di risposta: {summary.get('answer_rate', 0)}%
 
 📈 BREAKDOWN GIORNALIERO:
-{json.dumps(daily_breakdown, indent=2) if daily_breakdown else 'Nessun dato giornaliero'}
-{"⚠️ NOTA: I dati giornalieri contengono informazioni per più utenti. Analizza e differenzia per utente quando possibile." if len(user_display_names) > 1 else ""}
+{json.dumps(daily_breakdown, indent=2, cls=DecimalEncoder) if daily_breakdown else 'Nessun dato giornaliero'}
+{format_period_breakdowns(data)}{format_entity_breakdown(data)}{"⚠️ NOTA: I dati giornalieri contengono informazioni per più utenti. Analizza e differenzia per utente quando possibile." if len(user_display_names) > 1 else ""}
 
 🕐 ANALISI ORARIA:
-Ore di picco: {json.dumps(peak_hours, indent=2) if peak_hours else 'Nessun picco'}
+Ore di picco: {json.dumps(peak_hours, indent=2, cls=DecimalEncoder) if peak_hours else 'Nessun picco'}
 Ore attive: {hourly_analysis.get('active_hours', 0)}
 {"⚠️ NOTA: I dati orari contengono informazioni per più utenti. Crea analisi separate o comparativa per utente." if len(user_display_names) > 1 else ""}
 
@@ -2554,7 +4023,7 @@ Devi menzionare esplicitamente:
 - Gli orari specifici (non "mattina" ma "09:00", "10:00", ecc.)
 
 📊 DATI GENERALI CENTRALINO:
-🗓️ Periodo: {data.get('period_range', 'N/A')}
+🗓️ Periodo: {data.get('period_range', 'N/A')}{format_truncation_notice(data)}
 📞 Chiamate totali in arrivo: {summary.get('incoming_total', 0)}
 ✅ Risposte da membri gruppo: {summary.get('answered_by_members', 0)}
 ❌ Non risposte da membri: {summary.get('unanswered_by_members', 0)}
@@ -2566,11 +4035,11 @@ Devi menzionare esplicitamente:
 ⏱️ Durata totale: {summary.get('total_call_duration', 'N/A')}
 
 📈 BREAKDOWN GIORNALIERO:
-{json.dumps(daily_breakdown, indent=2) if daily_breakdown else 'Nessun dato giornaliero'}
-
+{json.dumps(daily_breakdown, indent=2, cls=DecimalEncoder) if daily_breakdown else 'Nessun dato giornaliero'}
+{format_period_breakdowns(data)}{format_entity_breakdown(data)}
 🕐 ANALISI ORARIA CENTRALINO:
-Ore di picco: {json.dumps(peak_hours, indent=2) if peak_hours else 'Nessun picco'}
-Ore critiche (risposta <70%): {json.dumps(critical_hours, indent=2) if critical_hours else 'Nessuna ora critica'}
+Ore di picco: {json.dumps(peak_hours, indent=2, cls=DecimalEncoder) if peak_hours else 'Nessun picco'}
+Ore critiche (risposta <70%): {json.dumps(critical_hours, indent=2, cls=DecimalEncoder) if critical_hours else 'Nessuna ora critica'}
 Ore attive: {hourly_analysis.get('active_hours', 0)}
 
 FORNISCI UN'ANALISI ULTRA-PRECISA FOCALIZZATA SULL'ANDAMENTO DEL CENTRALINO:
@@ -2732,7 +4201,7 @@ Devi menzionare esplicitamente:
 - Gli orari specifici (non "mattina" ma "09:00", "10:00", ecc.)
 
 📊 DATI GENERALI CENTRALINO:
-🗓️ Periodo: {data.get('period_range', 'N/A')}
+🗓️ Periodo: {data.get('period_range', 'N/A')}{format_truncation_notice(data)}
 📞 Chiamate gestite da rulebase: {summary.get('handled_by_rulebase', 0)}
 ✅ Chiamate connesse: {summary.get('connected', 0)}
 ❌ Chiamate non connesse: {summary.get('not_connected', 0)}
@@ -2741,17 +4210,17 @@ Devi menzionare esplicitamente:
 🔄 Trasferimenti totali: {summary.get('total_transfers', 0)}
 
 📈 BREAKDOWN GIORNALIERO:
-{json.dumps(daily_breakdown, indent=2) if daily_breakdown else 'Nessun dato giornaliero'}
-
+{json.dumps(daily_breakdown, indent=2, cls=DecimalEncoder) if daily_breakdown else 'Nessun dato giornaliero'}
+{format_period_breakdowns(data)}{format_entity_breakdown(data)}
 🕐 ANALISI ORARIA CENTRALINO:
-Ore di picco: {json.dumps(peak_hours, indent=2) if peak_hours else 'Nessun picco'}
-Ore critiche (connessione <70%): {json.dumps(critical_hours, indent=2) if critical_hours else 'Nessuna ora critica'}
+Ore di picco: {json.dumps(peak_hours, indent=2, cls=DecimalEncoder) if peak_hours else 'Nessun picco'}
+Ore critiche (connessione <70%): {json.dumps(critical_hours, indent=2, cls=DecimalEncoder) if critical_hours else 'Nessuna ora critica'}
 Ore attive: {hourly_analysis.get('active_hours', 0)}
 
 📲 ANALISI TRASFERIMENTI:
-Destinazioni: {json.dumps(transfer_analysis.get('destinations', {}), indent=2)}
+Destinazioni: {json.dumps(transfer_analysis.get('destinations', {}), indent=2, cls=DecimalEncoder)}
 Destinazione più popolare: {transfer_analysis.get('most_popular_destination', 'N/A')}
-Distribuzione: {json.dumps(transfer_analysis.get('transfer_distribution', {}), indent=2)}
+Distribuzione: {json.dumps(transfer_analysis.get('transfer_distribution', {}), indent=2, cls=DecimalEncoder)}
 
 FORNISCI UN'ANALISI ULTRA-PRECISA FOCALIZZATA SULL'ANDAMENTO DEL CENTRALINO:
 
@@ -3068,6 +4537,9 @@ def generate_fallback_insights(data: Dict) -> str:
 # CHART GENERATION (QuickSight-style)
 # ========================================
 
+# Charts are drawn on standalone Figure objects, not through pyplot's global figure manager:
+# several emails can be rendered at once (see REPORT PIPELINE) and an early return leaks no figure
+
 # Setera brand colors (professional palette)
 SETERA_COLORS = {
     'primary': '#113357',      # Primary dark blue
@@ -3092,7 +4564,6 @@ def generate_chart_base64(fig) -> str:
                    facecolor='white', edgecolor='none')
         buf.seek(0)
         img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-        plt.close(fig)
         return img_base64
     except Exception as e:
         logger.error(f"❌ Error generating chart base64: {str(e)}")
@@ -3101,7 +4572,8 @@ def generate_chart_base64(fig) -> str:
 def generate_line_chart(data: Dict, title: str, xlabel: str = "", ylabel: str = "") -> str:
     """Generate line chart like QuickSight"""
     try:
-        fig, ax = plt.subplots(figsize=(10, 5), facecolor='white')
+        fig = Figure(figsize=(10, 5), facecolor='white')
+        ax = fig.subplots()
         
         x_data = data.get('x', [])
         y_data = data.get('y', [])
@@ -3126,7 +4598,7 @@ def generate_line_chart(data: Dict, title: str, xlabel: str = "", ylabel: str =
         ax.spines['bottom'].set_color(SETERA_COLORS['light'])
         ax.tick_params(colors=SETERA_COLORS['text_light'], labelsize=10)
         
-        plt.tight_layout()
+        fig.tight_layout()
         return generate_chart_base64(fig)
     except Exception as e:
         logger.error(f"❌ Error generating line chart: {str(e)}")
@@ -3135,7 +4607,8 @@ def generate_line_chart(data: Dict, title: str, xlabel: str = "", ylabel: str =
 def generate_bar_chart(data: Dict, title: str, xlabel: str = "", ylabel: str = "", horizontal: bool = False) -> str:
     """Generate bar chart like QuickSight"""
     try:
-        fig, ax = plt.subplots(figsize=(10, 6), facecolor='white')
+        fig = Figure(figsize=(10, 6), facecolor='white')
+        ax = fig.subplots()
         
         x_data = data.get('x', [])
         y_data = data.get('y', [])
@@ -3170,7 +4643,7 @@ def generate_bar_chart(data: Dict, title: str, xlabel: str = "", ylabel: str = "
         ax.spines['bottom'].set_color(SETERA_COLORS['light'])
         ax.tick_params(colors=SETERA_COLORS['text_light'], labelsize=10)
         
-        plt.tight_layout()
+        fig.tight_layout()
         return generate_chart_base64(fig)
     except Exception as e:
         logger.error(f"❌ Error generating bar chart: {str(e)}")
@@ -3179,7 +4652,8 @@ def generate_bar_chart(data: Dict, title: str, xlabel: str = "", ylabel: str = "
 def generate_pie_chart(data: Dict, title: str) -> str:
     """Generate pie chart like QuickSight"""
     try:
-        fig, ax = plt.subplots(figsize=(8, 8), facecolor='white')
+        fig = Figure(figsize=(8, 8), facecolor='white')
+        ax = fig.subplots()
         
         labels = data.get('labels', [])
         values = data.get('values', [])
@@ -3200,7 +4674,7 @@ def generate_pie_chart(data: Dict, title: str) -> str:
         
         ax.set_title(title, fontsize=14, fontweight='bold', color=SETERA_COLORS['text'], pad=20)
         
-        plt.tight_layout()
+        fig.tight_layout()
         return generate_chart_base64(fig)
     except Exception as e:
         logger.error(f"❌ Error generating pie chart: {str(e)}")
@@ -3209,7 +4683,8 @@ def generate_pie_chart(data: Dict, title: str) -> str:
 def generate_gauge_chart(value: float, max_value: float, title: str, threshold_good: float = 0.7, threshold_warning: float = 0.5) -> str:
     """Generate gauge/KPI chart like QuickSight"""
     try:
-        fig, ax = plt.subplots(figsize=(6, 4), facecolor='white')
+        fig = Figure(figsize=(6, 4), facecolor='white')
+        ax = fig.subplots()
         
         percentage = value / max_value if max_value > 0 else 0
         
@@ -3240,7 +4715,7 @@ def generate_gauge_chart(value: float, max_value: float, title: str, threshold_g
         ax.set_ylim(-0.5, 1.2)
         ax.axis('off')
         
-        plt.tight_layout()
+        fig.tight_layout()
         return generate_chart_base64(fig)
     except Exception as e:
         logger.error(f"❌ Error generating gauge chart: {str(e)}")
@@ -3504,7 +4979,8 @@ def format_email_content(user_data: Dict, insights: str, parsed_data: Dict = Non
                     # Create grouped bar chart
                     x = np.arange(len(daily_data['days']))
                     width = 0.35
-                    fig, ax = plt.subplots(figsize=(10, 6), facecolor='white')
+                    fig = Figure(figsize=(10, 6), facecolor='white')
+                    ax = fig.subplots()
                     bars1 = ax.bar(x - width/2, daily_data['incoming'], width, label='In Arrivo', 
                                   color=SETERA_COLORS['primary'], edgecolor='white', linewidth=1.5)
                     bars2 = ax.bar(x + width/2, daily_data['outgoing'], width, label='In Uscita', 
@@ -3518,7 +4994,7 @@ def format_email_content(user_data: Dict, insights: str, parsed_data: Dict = Non
                     ax.grid(True, alpha=0.3, linestyle='--', linewidth=0.5, axis='y')
                     ax.spines['top'].set_visible(False)
                     ax.spines['right'].set_visible(False)
-                    plt.tight_layout()
+                    fig.tight_layout()
                     chart_img = generate_chart_base64(fig)
                     if chart_img:
                         chart_cards.append({
@@ -3860,6 +5336,24 @@ def format_email_content(user_data: Dict, insights: str, parsed_data: Dict = Non
         </html>
         """
 
+def format_no_new_data_email(user_data: Dict) -> str:
+    """Short notice sent instead of the report when the connector's export has not changed"""
+    full_name = user_data.get('name', 'Utente')
+    user_name = full_name.split()[0] if full_name else 'Utente'
+    connector_name = user_data.get('connector_name', 'Report')
+    timestamp = datetime.utcnow().strftime('%d/%m/%Y %H:%M')
+
+    return f"""
+        <html>
+        <body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; color: {SETERA_COLORS['text']};">
+        <h2>🤖 Maya Analytics</h2>
+        <p>Ciao {user_name},</p>
+        <p>I dati di <strong>{connector_name}</strong> non sono cambiati dall'ultimo report inviato, quindi non è stata generata una nuova analisi.</p>
+        <p style="color: {SETERA_COLORS['text_light']}; font-size: 13px;">📅 Verificato il: {timestamp} UTC</p>
+        </body>
+        </html>
+        """
+
 def format_insights_html(insights: str) -> str:
     """Convert text insights to formatted HTML with table conversion"""
     if not insights:
@@ -3951,26 +5445,167 @@ def convert_table_to_html(table_rows: List[List[str]]) -> str:
 # DATA FETCHING
 # ========================================
 
-def fetch_xml_data(xml_endpoint: str, xml_token: Optional[str] = None) -> str:
-    """Fetch XML data from the provided endpoint"""
+def build_xml_request_headers(xml_token: Optional[str] = None, validators: Optional[Dict] = None) -> Dict[str, str]:
+    """HTTP headers for a Setera XML export request (validators turn it into a conditional GET)"""
+    headers = {'User-Agent': 'Maya-Analytics/1.0'}
+    if validators:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+    if xml_token:
+        # Support different auth methods
+        if xml_token.startswith('Bearer '):
+            headers['Authorization'] = xml_token
+        elif xml_token.startswith('Basic '):
+            headers['Authorization'] = xml_token
+        else:
+            # Assume Bearer token
+            headers['Authorization'] = f'Bearer {xml_token}'
+    return headers
+
+# HTTP statuses worth retrying: transient server and gateway errors
+XML_RETRY_STATUSES = (500, 502, 503, 504)
+# Connection pools kept by the shared session: one per Setera host, a few sockets each
+XML_POOL_HOSTS = 16
+XML_POOL_CONNECTIONS_PER_HOST = 4
+
+class FetchStats:
+    """Timing and byte counters of a single XML export download"""
+
+    def __init__(self, xml_endpoint: str):
+        self.host = urlparse(xml_endpoint).netloc
+        self.started = time.perf_counter()
+        self.status = None
+        self.retries = 0
+        self.content_encoding = ''
+        self.headers_seconds = 0.0  # Until the response headers are received (retries included)
+        self.total_seconds = 0.0    # Until the body has been fully read
+        self.wire_bytes = 0         # Body bytes read from the socket (compressed, when negotiated)
+        self.body_bytes = 0         # Body bytes handed to the parser (decompressed)
+
+    def headers_received(self, response) -> None:
+        self.headers_seconds = time.perf_counter() - self.started
+        self.status = response.status_code
+        self.content_encoding = response.headers.get('Content-Encoding', '')
+        retries = getattr(response.raw, 'retries', None)
+        self.retries = len(retries.history) if retries is not None else 0
+
+    def body_received(self, response, body_bytes: int) -> None:
+        self.total_seconds = time.perf_counter() - self.started
+        self.body_bytes = body_bytes
+        try:
+            self.wire_bytes = response.raw.tell()
+        except Exception:
+            self.wire_bytes = body_bytes
+
+    def as_dict(self) -> Dict:
+        return {
+            'host': self.host,
+            'status': self.status,
+            'retries': self.retries,
+            'content_encoding': self.content_encoding,
+            'headers_seconds': round(self.headers_seconds, 3),
+            'total_seconds': round(self.total_seconds, 3),
+            'wire_bytes': self.wire_bytes,
+            'body_bytes': self.body_bytes
+        }
+
+class XmlFetchClient:
+    """
+    Managed HTTP client for the Setera XML exports
+
+    A single requests.Session is shared by every fetch of the container (it survives warm
+    Lambda invocations), so connectors pointing at the same Setera host reuse a kept-alive
+    connection from that host's pool instead of repeating the TCP/TLS handshake. Responses
+    are negotiated with gzip/deflate and decompressed transparently while streaming.
+
+    Connection errors, connect/read timeouts and 5xx answers are retried a bounded number of
+    times with exponential backoff plus jitter, before any byte of the body is consumed: once
+    the body is being streamed into the parser the download cannot be replayed, so a failure
+    there surfaces as an error. Every fetch records a FetchStats; the counters are summed
+    until reset_counters() is called (once per schedule tick).
+    """
+
+    def __init__(self, connect_timeout: float = XML_CONNECT_TIMEOUT, read_timeout: float = XML_READ_TIMEOUT,
+                 max_retries: int = XML_FETCH_RETRIES):
+        self.timeout = (connect_timeout, read_timeout)
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            other=0,
+            allowed_methods=frozenset(['GET']),
+            status_forcelist=XML_RETRY_STATUSES,
+            backoff_factor=0.5,
+            backoff_jitter=0.5,
+            backoff_max=10,
+            raise_on_status=False  # The last 5xx is returned and reported through raise_for_status()
+        )
+        adapter = HTTPAdapter(pool_connections=XML_POOL_HOSTS, pool_maxsize=XML_POOL_CONNECTIONS_PER_HOST,
+                              max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+        self._lock = threading.Lock()  # Downloads complete on the pipeline's worker threads
+        self.reset_counters()
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.counters = {
+                'fetches': 0,
+                'not_modified': 0,
+                'retries': 0,
+                'wire_bytes': 0,
+                'body_bytes': 0,
+                'seconds': 0.0
+            }
+
+    def get(self, xml_endpoint: str, xml_token: Optional[str] = None, stream: bool = False,
+            validators: Optional[Dict] = None):
+        """Send the GET request and return (response, stats) once the headers are received"""
+        stats = FetchStats(xml_endpoint)
+        response = self.session.get(xml_endpoint, headers=build_xml_request_headers(xml_token, validators),
+                                    timeout=self.timeout, stream=stream)
+        stats.headers_received(response)
+        return response, stats
+
+    def record(self, stats: FetchStats, response, body_bytes: int) -> None:
+        """Close the counters of a completed download"""
+        stats.body_received(response, body_bytes)
+        with self._lock:
+            self.counters['fetches'] += 1
+            if stats.status == 304:
+                self.counters['not_modified'] += 1
+            self.counters['retries'] += stats.retries
+            self.counters['wire_bytes'] += stats.wire_bytes
+            self.counters['body_bytes'] += stats.body_bytes
+            self.counters['seconds'] += stats.total_seconds
+        logger.info(f"📶 XML fetch stats: {json.dumps(stats.as_dict())}")
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {**self.counters, 'seconds': round(self.counters['seconds'], 3)}
+
+# Shared across warm invocations, like the AWS clients
+xml_fetch_client = XmlFetchClient()
+
+def fetch_xml_data(xml_endpoint: str, xml_token: Optional[str] = None, max_bytes: int = MAX_XML_BYTES) -> str:
+    """Fetch XML data from the provided endpoint (whole body in memory, up to max_bytes)"""
     try:
         logger.info(f"📥 Fetching XML data from: {xml_endpoint}")
         
-        headers = {'User-Agent': 'Maya-Analytics/1.0'}
-        if xml_token:
-            # Support different auth methods
-            if xml_token.startswith('Bearer '):
-                headers['Authorization'] = xml_token
-            elif xml_token.startswith('Basic '):
-                headers['Authorization'] = xml_token
-            else:
-                # Assume Bearer token
-                headers['Authorization'] = f'Bearer {xml_token}'
-        
-        response = requests.get(xml_endpoint, headers=headers, timeout=30)
-        response.raise_for_status()
+        response, stats = xml_fetch_client.get(xml_endpoint, xml_token, stream=True)
+        try:
+            response.raise_for_status()
+        except Exception:
+            response.close()
+            raise
         
-        xml_content = response.text
+        body = b''.join(iter_response_chunks(response, xml_endpoint, max_bytes, stats))
+        xml_content = body.decode(response.encoding or 'utf-8', errors='replace')
         if not xml_content or not xml_content.strip():
             raise Exception("Empty response from XML endpoint")
             
@@ -3986,11 +5621,114 @@ def fetch_xml_data(xml_endpoint: str, xml_token: Optional[str] = None) -> str:
     except Exception as e:
         raise Exception(f"Error fetching XML data: {str(e)}")
 
+class XmlExport:
+    """
+    A Setera XML export opened for streaming
+
+    Iterating it yields the raw byte chunks of the body (see iter_response_chunks) and hashes
+    them on the way, so content_hash is available once the parser has consumed the export.
+    When the request carried validators and the server answered 304 Not Modified,
+    not_modified is set and there is no body to read.
+    """
+
+    def __init__(self, response, stats: FetchStats, xml_endpoint: str, max_bytes: int):
+        self.not_modified = response.status_code == 304
+        self.etag = response.headers.get('ETag', '')
+        self.last_modified = response.headers.get('Last-Modified', '')
+        self._response = response
+        self._stats = stats
+        self._xml_endpoint = xml_endpoint
+        self._max_bytes = max_bytes
+        self._digest = hashlib.sha256()
+        self.body_bytes = 0
+        if self.not_modified:
+            response.close()
+            xml_fetch_client.record(stats, response, 0)
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in iter_response_chunks(self._response, self._xml_endpoint, self._max_bytes, self._stats):
+            self._digest.update(chunk)
+            self.body_bytes += len(chunk)
+            yield chunk
+
+    @property
+    def content_hash(self) -> str:
+        return self._digest.hexdigest()
+
+def open_xml_export(xml_endpoint: str, xml_token: Optional[str] = None, max_bytes: int = MAX_XML_BYTES,
+                    validators: Optional[Dict] = None) -> XmlExport:
+    """
+    Open a streamed download of the XML export at the provided endpoint
+
+    Connection and HTTP errors are raised here, before parsing starts; the body is then read
+    lazily and stops with XmlLimitExceeded once the received bytes exceed max_bytes (the parse
+    modes then report the records read so far as truncated). validators ({'etag',
+    'last_modified'} of a previous download) make the request conditional.
+    """
+    try:
+        logger.info(f"📥 Streaming XML data from: {xml_endpoint}")
+
+        response, stats = xml_fetch_client.get(xml_endpoint, xml_token, stream=True, validators=validators)
+        try:
+            response.raise_for_status()
+            declared_length = response.headers.get('Content-Length')
+            if declared_length and declared_length.isdigit() and int(declared_length) > max_bytes:
+                logger.warning(f"⚠️ XML export declares {declared_length} bytes, over the {max_bytes} limit: it will be truncated")
+        except Exception:
+            response.close()
+            raise
+
+    except requests.exceptions.Timeout:
+        raise Exception(f"Timeout connecting to {xml_endpoint}")
+    except requests.exceptions.ConnectionError:
+        raise Exception(f"Cannot connect to {xml_endpoint}")
+    except requests.exceptions.HTTPError as e:
+        raise Exception(f"HTTP error {e.response.status_code} from {xml_endpoint}")
+    except Exception as e:
+        raise Exception(f"Error fetching XML data: {str(e)}")
+
+    export = XmlExport(response, stats, xml_endpoint, max_bytes)
+    if export.not_modified:
+        logger.info(f"♻️ XML export not modified since last download: {xml_endpoint}")
+    return export
+
+def stream_xml_data(xml_endpoint: str, xml_token: Optional[str] = None, max_bytes: int = MAX_XML_BYTES) -> Iterator[bytes]:
+    """
+    Stream XML data from the provided endpoint as raw byte chunks
+
+    Meant to be fed straight into parse_xml_report(): download and parsing overlap and the
+    export is never held in memory as a whole (neither as bytes nor as decoded str; the
+    parser handles the UTF-8 BOM itself). Errors are raised as in open_xml_export().
+    """
+    return iter(open_xml_export(xml_endpoint, xml_token, max_bytes))
+
+def iter_response_chunks(response, xml_endpoint: str, max_bytes: int, stats: Optional[FetchStats] = None) -> Iterator[bytes]:
+    """Yield the body of a streamed response, enforcing the size limit (the response is always closed)"""
+    received = 0
+    with response:
+        try:
+            for chunk in response.iter_content(chunk_size=XML_STREAM_CHUNK_SIZE):
+                if not chunk:
+                    continue
+                received += len(chunk)
+                if received > max_bytes:
+                    raise XmlLimitExceeded('bytes', max_bytes)
+                yield chunk
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Error reading XML data from {xml_endpoint}: {str(e)}")
+        if stats is not None:
+            xml_fetch_client.record(stats, response, received)
+
+    if not received:
+        raise Exception("Empty response from XML endpoint")
+
+    logger.info(f"✅ XML data streamed successfully ({received} bytes)")
+
 # ========================================
 # EMAIL SENDING
 # ========================================
 
-def send_report_email(user_email: str, user_name: str, html_content: str, user_id: str = None, entity_names: list = None, report_type: str = None):
+def send_report_email(user_email: str, user_name: str, html_content: str, user_id: str = None, entity_names: list = None, report_type: str = None, title: str = 'Report Automatico'):
     """Send report email via email sender Lambda"""
     try:
         logger.info(f"📧 Sending report email to: {user_email}")
@@ -4042,7 +5780,7 @@ def send_report_email(user_email: str, user_name: str, html_content: str, user_i
                         else:
                             entities_str = f"({display_names[0]}, {display_names[1]}, ...)"
         
-        subject = f'🤖 Maya Analytics - Report Automatico del {date_str}'
+        subject = f'🤖 Maya Analytics - {title} del {date_str}'
         if entities_str:
             subject += f' - {entities_str}'
         
@@ -4091,94 +5829,693 @@ def save_report_history(user_id: str, user_data: Dict, insights: str, status: st
     except Exception as e:
         logger.error(f"❌ Error saving report history: {str(e)}")
 
+# ========================================
+# CONNECTOR FETCH STATE
+# ========================================
+
+# What to do when a connector's export has not changed since the last report
+# (304 Not Modified, or a body with the same content hash)
+UNCHANGED_POLICY_SKIP = 'skip'      # Send nothing
+UNCHANGED_POLICY_RESEND = 'resend'  # Send the last report again (cached insights, no Bedrock call)
+UNCHANGED_POLICY_NOTICE = 'notice'  # Send a short "no new data" notice
+UNCHANGED_POLICIES = (UNCHANGED_POLICY_SKIP, UNCHANGED_POLICY_RESEND, UNCHANGED_POLICY_NOTICE)
+
+def get_fetch_state_key(user_data: Dict) -> str:
+    """Fetch state key: the connector id, or the user id for the legacy single-endpoint format"""
+    connector_id = user_data.get('connector_id')
+    if connector_id:
+        return connector_id
+    return f"legacy#{user_data.get('user_id', 'unknown')}"
+
+def load_fetch_state(state_key: str) -> Dict:
+    """Validators, content hash and cached report of the last export sent for a connector"""
+    try:
+        result = fetch_state_table.get_item(Key={'connector_id': state_key})
+        return result.get('Item', {})
+    except Exception as e:
+        logger.error(f"❌ Error loading fetch state for {state_key}: {str(e)}")
+        return {}
+
+def save_fetch_state(state_key: str, fetched: 'FetchedExport', report_type: str, entity_names: List[str], insights: str):
+    """Remember the export just reported on, so the next run can send a conditional request"""
+    try:
+        fetch_state_table.put_item(Item={
+            'connector_id': state_key,
+            'etag': fetched.etag,
+            'last_modified': fetched.last_modified,
+            'content_hash': fetched.content_hash,
+            'delta_through': fetched.delta_through,
+            'delta_segments': list(fetched.delta_segments),
+            'report_type': report_type,
+            'entity_names': list(entity_names),
+            'insights': insights,
+            'updated_at': datetime.utcnow().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"❌ Error saving fetch state for {state_key}: {str(e)}")
+
+def refresh_fetch_validators(state_key: str, fetched: 'FetchedExport'):
+    """Store the validators of an unchanged export whose ETag/Last-Modified moved anyway"""
+    try:
+        fetch_state_table.update_item(
+            Key={'connector_id': state_key},
+            UpdateExpression='SET etag = :etag, last_modified = :last_modified, updated_at = :updated_at',
+            ExpressionAttributeValues={
+                ':etag': fetched.etag,
+                ':last_modified': fetched.last_modified,
+                ':updated_at': datetime.utcnow().isoformat()
+            }
+        )
+    except Exception as e:
+        logger.error(f"❌ Error refreshing fetch validators for {state_key}: {str(e)}")
+
+def handle_unchanged_export(user_data: Dict, fetch_state: Dict, user_email: str) -> bool:
+    """Apply the connector's unchanged-export policy instead of regenerating the report"""
+    user_id = user_data.get('user_id', 'unknown')
+    user_name = user_data.get('name', 'Utente')
+    policy = user_data.get('unchanged_policy') or UNCHANGED_POLICY_SKIP
+    if policy not in UNCHANGED_POLICIES:
+        logger.warning(f"⚠️ Unknown unchanged_policy '{policy}', using '{UNCHANGED_POLICY_SKIP}'")
+        policy = UNCHANGED_POLICY_SKIP
+
+    insights = fetch_state.get('insights', '')
+    if policy == UNCHANGED_POLICY_RESEND and not insights:
+        # Nothing cached to resend (e.g. state written before the first successful report)
+        policy = UNCHANGED_POLICY_NOTICE
+
+    logger.info(f"♻️ Export unchanged for {user_email}, applying policy: {policy}")
+
+    if policy == UNCHANGED_POLICY_SKIP:
+        save_report_history(user_id, user_data, "No new data since the last report", 'skipped_unchanged')
+    elif policy == UNCHANGED_POLICY_RESEND:
+        html_content = format_email_content(user_data, insights)
+        send_report_email(user_email, user_name, html_content, user_id,
+                          fetch_state.get('entity_names', []), fetch_state.get('report_type', ''))
+        save_report_history(user_id, user_data, insights, 'resent')
+    else:
+        html_content = format_no_new_data_email(user_data)
+        send_report_email(user_email, user_name, html_content, user_id, title='Nessun nuovo dato')
+        save_report_history(user_id, user_data, "No new data since the last report", 'no_new_data')
+
+    return True
+
+# ========================================
+# DELTA FETCH
+# ========================================
+# A connector endpoint may be a URL template with {from} / {to} date placeholders (ISO dates,
+# or any strftime format such as {from:%d/%m/%Y}). Such a connector reports on a window that
+# ends with the last complete day in the timezone of its schedule (see get_report_window).
+# Every part of the window is downloaded once and kept as a partial: the records of the export
+# of a range of days, captured as text. The fetch state of the connector lists the segments
+# (day ranges) of its last successful run and the last day covered (delta_through): a run
+# reuses the segments still inside its window and downloads only the days missing since, then
+# merges the partials into the records of a single export. Download size and XML parsing scale
+# with the new days instead of the whole window.
+#
+# Windows anchored on their first day ('month', 'week') grow by a day at a time, so the missing
+# days are downloaded as one range request. A rolling window of N days drops its first day
+# every day, which a range partial cannot do: its missing days are downloaded one by one
+# (DELTA_FETCH_CONCURRENCY at a time, at most DELTA_MAX_DAY_FETCHES per run). When more are
+# missing (first run, expired partials) the window is fetched as one range request for the
+# report, and the newest missing days are stored for the next runs.
+
+DELTA_PLACEHOLDER_PATTERN = re.compile(r'\{(from|to)(?::([^{}]*))?\}')
+DELTA_REPORT_WINDOWS = ('month', 'week')  # Or a number of days
+DELTA_DEFAULT_REPORT_WINDOW = 'month'
+DELTA_MAX_WINDOW_DAYS = 92
+
+# Columns averaged over another column (averages, percentages, service levels). They are
+# merged as the average weighted by that column, which is exact for ratios of sums.
+DELTA_WEIGHTED_COLUMNS = {
+    'incoming_average_call_duration_for_ivr': 'incoming_total_handled_by_ivr',
+    'incoming_answered_average_queue_time': 'incoming_answered',
+    'incoming_answered_average_call_duration': 'incoming_answered',
+    'incoming_answered_average_speed_of_answer': 'incoming_answered',
+    'incoming_answered_average_duration': 'incoming_answered',
+    'incoming_unanswered_average_queue_time': 'incoming_unanswered',
+    'outgoing_answered_average_duration': 'outgoing_answered',
+    'incoming_answered_by_huntgroup_members_average_speed_of_answer': 'incoming_answered_by_huntgroup_members',
+    'incoming_answered_by_huntgroup_members_average_call_duration': 'incoming_answered_by_huntgroup_members',
+    'incoming_percent_answered': 'incoming_total',
+    'incoming_percent_unanswered': 'incoming_total',
+    'incoming_percent_redirected': 'incoming_total',
+    'incoming_service_level': 'incoming_total',
+}
+# Other averaged columns, merged as a plain mean of the days
+DELTA_AVERAGED_MARKERS = ('average', 'percent', 'service_level')
+# Columns identifying a record (copied, never summed)
+DELTA_IDENTITY_COLUMNS = ('period', 'type', 'name', 'grouping_name', 'object_identifier', 'group_names',
+                          'depth_in_hierarchy')
+DELTA_WEEKDAY_ORDER = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+def is_delta_endpoint(xml_endpoint: str) -> bool:
+    """True for a URL template with {from}/{to} placeholders"""
+    return bool(xml_endpoint) and DELTA_PLACEHOLDER_PATTERN.search(xml_endpoint) is not None
+
+def resolve_xml_endpoint(xml_endpoint: str, start, end) -> str:
+    """Fill the {from}/{to} placeholders of a URL template with the first and last day"""
+    def fill(match):
+        day = start if match.group(1) == 'from' else end
+        return day.strftime(match.group(2)) if match.group(2) else day.isoformat()
+    return DELTA_PLACEHOLDER_PATTERN.sub(fill, xml_endpoint)
+
+def is_rolling_window(report_window) -> bool:
+    """True for a window of the last N days (its first day moves every day)"""
+    window = str(report_window or DELTA_DEFAULT_REPORT_WINDOW).strip().lower()
+    return window.isdigit() and int(window) > 0
+
+def get_connector_today(user_data: Dict):
+    """Today in the timezone of the connector's schedule, where its report window ends"""
+    now = datetime.utcnow()
+    schedule = get_connector_schedule(user_data)
+    tzinfo = schedule.tzinfo if schedule is not None else get_schedule_timezone(SCHEDULE_DEFAULT_TIMEZONE)
+    if tzinfo is None:
+        return now.date()
+    return now.replace(tzinfo=timezone.utc).astimezone(tzinfo).date()
+
+def get_report_window(report_window, today) -> Tuple:
+    """
+    (first day, last day) a delta connector reports on, ending with the last complete day
+
+    'month': month to date (the whole previous month on the 1st), 'week': week to date from
+    Monday, a number N: the last N days. Unknown values fall back to 'month'.
+    """
+    end = today - timedelta(days=1)
+    window = str(report_window or DELTA_DEFAULT_REPORT_WINDOW).strip().lower()
+    if window.isdigit() and int(window) > 0:
+        return end - timedelta(days=min(int(window), DELTA_MAX_WINDOW_DAYS) - 1), end
+    if window == 'week':
+        return end - timedelta(days=end.weekday()), end
+    if window != 'month':
+        logger.warning(f"⚠️ Unknown report_window '{report_window}', using '{DELTA_DEFAULT_REPORT_WINDOW}'")
+    return end.replace(day=1), end
+
+def capture_record(grouping: str, element) -> List:
+    """
+    A record as [grouping, [[tag, text], ...]], storable as JSON
+
+    Columns with dynamic_column children are captured as [[column_key, column_name, value], ...].
+    """
+    fields = []
+    for child in element:
+        dynamic_columns = child.findall('dynamic_column')
+        if dynamic_columns:
+            fields.append([child.tag, [[dynamic.findtext('column_key') or '', dynamic.findtext('column_name') or '',
+                                        dynamic.findtext('column_value') or ''] for dynamic in dynamic_columns]])
+        else:
+            fields.append([child.tag, child.text or ''])
+    return [grouping, fields]
+
+def parse_metric(text: str) -> Optional[Tuple[float, str]]:
+    """(value, format) of a metric text: 'int', 'float' or 'time' (HH:MM:SS); None when not numeric"""
+    text = (text or '').strip()
+    if not text:
+        return None
+    if ':' in text:
+        try:
+            seconds = 0
+            for part in text.split(':'):
+                seconds = seconds * 60 + int(part)
+            return float(seconds), 'time'
+        except ValueError:
+            return None
+    try:
+        return float(int(text)), 'int'
+    except ValueError:
+        pass
+    try:
+        return float(text), 'float'
+    except ValueError:
+        return None
+
+def format_metric(value: float, metric_format: str) -> str:
+    """Metric text in the format it was exported in"""
+    if metric_format == 'time':
+        seconds = int(round(value))
+        return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+    if metric_format == 'int':
+        return str(int(round(value)))
+    return f"{value:.15g}"  # Setera exports 15 significant digits
+
+class MetricMerge:
+    """Running merge of one column: a sum, or an average weighted by another column"""
+    __slots__ = ('total', 'weight', 'averaged', 'metric_format', 'count', 'text')
+
+    def __init__(self, averaged: bool):
+        self.total = 0.0
+        self.weight = 0.0
+        self.averaged = averaged
+        self.metric_format = 'int'
+        self.count = 0  # Numeric values merged
+        self.text = ''  # First value (kept as exported when it is the only one)
+
+    def add(self, text: str, weight: float) -> None:
+        metric = parse_metric(text)
+        if metric is None:
+            self.text = self.text or text
+            return
+        if not self.count:
+            self.text = text
+        self.count += 1
+        value, metric_format = metric
+        if metric_format != 'int':
+            self.metric_format = metric_format
+        if self.averaged:
+            self.total += value * weight
+            self.weight += weight
+        else:
+            self.total += value
+
+    def value(self) -> str:
+        if self.count <= 1:
+            return self.text
+        if self.averaged:
+            return format_metric(self.total / self.weight if self.weight else 0.0, self.metric_format)
+        return format_metric(self.total, self.metric_format)
+
+class RecordMerger:
+    """
+    Merges the captured records of single-day exports into the records of one export
+
+    Records are matched on their grouping and identity columns: the daily records of different
+    days stay apart, the others (time slots, weekdays, weeks, months, totals) are summed, or
+    averaged as described by DELTA_WEIGHTED_COLUMNS. The 'period' grouping is relabelled with
+    the merged range, like a multi-day Setera export ("10/11/2025 -> 13/11/2025").
+    """
+
+    def __init__(self):
+        self.groupings = OrderedDict()  # grouping -> OrderedDict(key -> merged record)
+        self.days = []
+
+    def add(self, day, records: List, last_day=None) -> None:
+        """Merge the records of the export of day (or of the range day..last_day)"""
+        self.days.append(day)
+        if last_day is not None and last_day != day:
+            self.days.append(last_day)
+        for grouping, fields in records:
+            identity = {}
+            values = {}
+            for tag, value in fields:
+                if tag in DELTA_IDENTITY_COLUMNS:
+                    identity.setdefault(tag, value)
+                else:
+                    values.setdefault(tag, value)
+            period = identity.get('period', '')
+            if grouping == 'period' and period != 'Total':
+                period = ''  # Relabelled with the merged range
+            key = (period,) + tuple(identity.get(tag, '') for tag in DELTA_IDENTITY_COLUMNS[1:])
+            merged = self.groupings.setdefault(grouping, OrderedDict()).get(key)
+            if merged is None:
+                merged = {'identity': identity, 'tags': [tag for tag, _ in fields], 'metrics': {}}
+                self.groupings[grouping][key] = merged
+            self.merge_values(merged, values)
+
+    def merge_values(self, merged: Dict, values: Dict) -> None:
+        metrics = merged['metrics']
+        for tag, value in values.items():
+            if tag not in merged['tags']:
+                merged['tags'].append(tag)
+            averaged = tag in DELTA_WEIGHTED_COLUMNS or any(marker in tag for marker in DELTA_AVERAGED_MARKERS)
+            weight = 1.0
+            if tag in DELTA_WEIGHTED_COLUMNS:
+                weight_text = values.get(DELTA_WEIGHTED_COLUMNS[tag])
+                weight_metric = parse_metric(weight_text) if isinstance(weight_text, str) else None
+                weight = weight_metric[0] if weight_metric else 0.0
+            metric = metrics.get(tag)
+            if isinstance(value, list):
+                if not isinstance(metric, dict):
+                    # A column without dynamic columns on some day is exported empty that day
+                    metric = metrics[tag] = {}
+                for column_key, column_name, column_value in value:
+                    column = metric.get(column_key or column_name)
+                    if column is None:
+                        column = metric[column_key or column_name] = [column_key, column_name, MetricMerge(averaged)]
+                    column[2].add(column_value, weight)
+            elif not isinstance(metric, dict):
+                if metric is None:
+                    metric = metrics[tag] = MetricMerge(averaged)
+                metric.add(value, weight)
+
+    def period_label(self) -> str:
+        days = sorted(self.days)
+        if not days:
+            return ''
+        if len(days) == 1:
+            return days[0].strftime('%d/%m/%Y')
+        return f"{days[0].strftime('%d/%m/%Y')} -> {days[-1].strftime('%d/%m/%Y')}"
+
+    def ordered(self, grouping: str, records: List[Dict]) -> List[Dict]:
+        """Records in export order: totals first, time slots and weekdays sorted"""
+        def sort_key(record):
+            period = record['identity'].get('period', '')
+            if period == 'Total':
+                return (0, 0, '')
+            if grouping == 'weekday' and period in DELTA_WEEKDAY_ORDER:
+                return (1, DELTA_WEEKDAY_ORDER.index(period), '')
+            return (1, 0, period if grouping == 'time' else '')
+        return sorted(records, key=sort_key)
+
+    def records(self) -> Iterator[Tuple[str, ET.Element]]:
+        """The merged (grouping, element) records, ready for parse_report_records()"""
+        label = self.period_label()
+        for grouping, merged_records in self.groupings.items():
+            for merged in self.ordered(grouping, list(merged_records.values())):
+                element = ET.Element(f"{grouping}{GROUPSOBJECTS_SUFFIX}")
+                for tag in merged['tags']:
+                    child = ET.SubElement(element, tag)
+                    if tag in merged['identity']:
+                        child.text = merged['identity'][tag]
+                        if tag == 'period' and grouping == 'period' and child.text != 'Total':
+                            child.text = label
+                        continue
+                    metric = merged['metrics'].get(tag)
+                    if isinstance(metric, dict):
+                        for column_key, column_name, column in metric.values():
+                            dynamic = ET.SubElement(child, 'dynamic_column')
+                            ET.SubElement(dynamic, 'column_key').text = column_key
+                            ET.SubElement(dynamic, 'column_name').text = column_name
+                            ET.SubElement(dynamic, 'column_value').text = column.value()
+                    elif metric is not None:
+                        child.text = metric.value()
+                yield grouping, element
+
+class PartialStore:
+    """Per-day partials of the delta connectors, in a persistent cache store (S3 prefix or directory)"""
+
+    def __init__(self, store):
+        self.store = store
+
+    @staticmethod
+    def key(day_endpoint: str, xml_token: Optional[str]) -> str:
+        # Keyed by request: connectors sharing a template share the partials of their days
+        digest = hashlib.sha256(f"{day_endpoint}\n{xml_token or ''}".encode('utf-8')).hexdigest()
+        return f"{digest}.json.gz"
+
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            return self.store.get(key)
+        except Exception as e:
+            logger.warning(f"⚠️ Delta partial read failed for {key}: {str(e)}")
+            return None
+
+    def put(self, key: str, partial: Dict) -> None:
+        try:
+            self.store.put(key, partial)
+        except Exception as e:
+            logger.warning(f"⚠️ Delta partial write failed for {key}: {str(e)}")
+
+def create_partial_store() -> Optional[PartialStore]:
+    """Partial store on the report cache's persistent tier (None when it is not configured)"""
+    if REPORT_CACHE_BUCKET:
+        return PartialStore(S3CacheStore(REPORT_CACHE_BUCKET, 'partials/', DELTA_PARTIAL_TTL_SECONDS))
+    if REPORT_CACHE_DIR:
+        return PartialStore(FileCacheStore(os.path.join(REPORT_CACHE_DIR, 'partials'), DELTA_PARTIAL_TTL_SECONDS))
+    return None
+
+partial_store = create_partial_store()
+
+def format_delta_segment(first, last) -> str:
+    return f"{first.isoformat()}/{last.isoformat()}"
+
+def parse_delta_segment(text: str) -> Tuple:
+    first, _, last = text.partition('/')
+    return datetime.strptime(first, '%Y-%m-%d').date(), datetime.strptime(last or first, '%Y-%m-%d').date()
+
+def get_partial_key(xml_endpoint: str, xml_token: Optional[str], first, last) -> str:
+    return PartialStore.key(resolve_xml_endpoint(xml_endpoint, first, last), xml_token)
+
+def fetch_partial(xml_endpoint: str, xml_token: Optional[str], first, last,
+                  connector_ids: Optional[List[str]] = None) -> Dict:
+    """Download the export of first..last (a URL template) and capture its records (archived for connector_ids)"""
+    range_endpoint = resolve_xml_endpoint(xml_endpoint, first, last)
+    export = open_xml_export(range_endpoint, xml_token)
+    writer = ArchiveWriter() if export_archive is not None and connector_ids else None
+    records = []
+    truncated = None
+    try:
+        for grouping, element in iter_groupsobjects(writer.tee(export) if writer else export):
+            records.append(capture_record(grouping, element))
+    except XmlLimitExceeded as e:
+        truncated = describe_truncation(e, records[-1][0] if records else '', len(records))
+    except ET.ParseError as e:
+        if writer:
+            writer.close()
+        raise Exception(f"Invalid XML format for {format_delta_segment(first, last)}: {str(e)}")
+    tracer.count('bytes_fetched', export.body_bytes)
+    if writer:
+        export_archive.store_export(writer, export.content_hash, connector_ids, f"{first.isoformat()}_{last.isoformat()}",
+                                    range_endpoint, truncated=truncated)
+    return {'start': first.isoformat(), 'end': last.isoformat(), 'content_hash': export.content_hash,
+            'records': records, 'truncated': truncated}
+
+def load_partial(xml_endpoint: str, xml_token: Optional[str], first, last) -> Optional[Dict]:
+    """Stored partial of first..last (partials of earlier versions cover one 'day')"""
+    partial = partial_store.get(get_partial_key(xml_endpoint, xml_token, first, last))
+    if partial is not None:
+        partial.setdefault('start', partial.get('day', first.isoformat()))
+        partial.setdefault('end', partial['start'])
+    return partial
+
+def fetch_partials(xml_endpoint: str, xml_token: Optional[str], day_ranges: List[Tuple],
+                   connector_ids: Optional[List[str]] = None) -> List[Dict]:
+    """Download (first, last) ranges, DELTA_FETCH_CONCURRENCY at a time; each is stored unless truncated"""
+    parent = tracer.current()
+
+    def fetch(day_range):
+        with tracer.attach(parent):
+            partial = fetch_partial(xml_endpoint, xml_token, day_range[0], day_range[1], connector_ids)
+        if partial['truncated']:
+            # Not stored: the range is downloaded again next time
+            logger.warning(f"⚠️ Delta partial {format_delta_segment(*day_range)} truncated, not stored")
+        else:
+            partial_store.put(get_partial_key(xml_endpoint, xml_token, *day_range), partial)
+        return partial
+
+    if len(day_ranges) < 2 or DELTA_FETCH_CONCURRENCY <= 1:
+        return [fetch(day_range) for day_range in day_ranges]
+    with ThreadPoolExecutor(max_workers=min(DELTA_FETCH_CONCURRENCY, len(day_ranges)),
+                            thread_name_prefix='delta-fetch') as executor:
+        return list(executor.map(fetch, day_ranges))
+
+def load_delta_segments(xml_endpoint: str, xml_token: Optional[str], start, end, delta_state: Dict) -> List[Dict]:
+    """Stored partials of the last run (its fetch state) that lie inside start..end"""
+    partials = []
+    covered = set()
+    segments = [parse_delta_segment(text) for text in delta_state.get('delta_segments') or []]
+    if not segments and delta_state.get('delta_through'):
+        # Fetch state of an earlier version: every day up to delta_through was stored on its own
+        through = min(datetime.strptime(delta_state['delta_through'], '%Y-%m-%d').date(), end)
+        segments = [(start + timedelta(days=offset), start + timedelta(days=offset))
+                    for offset in range((through - start).days + 1)]
+    for first, last in segments:
+        days = {first + timedelta(days=offset) for offset in range((last - first).days + 1)}
+        if first < start or last > end or days & covered:
+            continue
+        partial = load_partial(xml_endpoint, xml_token, first, last)
+        if partial is not None:
+            partials.append(partial)
+            covered |= days
+    return partials
+
+def get_delta_segments(partials: List[Dict]) -> List[str]:
+    """Segments to remember in the fetch state: the stored (untruncated) partials"""
+    return sorted(f"{partial['start']}/{partial['end']}" for partial in partials if not partial['truncated'])
+
+def get_missing_ranges(start, end, partials: List[Dict]) -> List[Tuple]:
+    """Contiguous (first, last) ranges of start..end not covered by the partials"""
+    covered = set()
+    for partial in partials:
+        first, last = parse_delta_segment(f"{partial['start']}/{partial['end']}")
+        covered.update(first + timedelta(days=offset) for offset in range((last - first).days + 1))
+    ranges = []
+    day = start
+    while day <= end:
+        if day not in covered:
+            if ranges and ranges[-1][1] == day - timedelta(days=1):
+                ranges[-1] = (ranges[-1][0], day)
+            else:
+                ranges.append((day, day))
+        day += timedelta(days=1)
+    return ranges
+
+def fetch_delta_export(xml_endpoint: str, xml_token: Optional[str] = None, report_window=None,
+                       today=None, connector_ids: Optional[List[str]] = None,
+                       delta_state: Optional[Dict] = None) -> 'FetchedExport':
+    """
+    Report window of a delta connector: the stored segments of the last run plus the days missing since
+
+    delta_state is the fetch state of the connector (delta_segments, delta_through). The
+    content hash covers the partials of the window, so an unchanged window is detected like an
+    unchanged export. Without a persistent store the window is downloaded as one export (the
+    template is filled with the whole range). Only the downloaded ranges are archived: the
+    others were archived when they were first fetched.
+    """
+    start, end = get_report_window(report_window, today or datetime.utcnow().date())
+    if partial_store is None:
+        fetched = fetch_and_parse_export(resolve_xml_endpoint(xml_endpoint, start, end), xml_token,
+                                         connector_ids=connector_ids)
+        fetched.delta_through = end.isoformat()
+        return fetched
+
+    partials = load_delta_segments(xml_endpoint, xml_token, start, end, delta_state or {})
+    missing = get_missing_ranges(start, end, partials)
+    # Ranges stored by a run whose fetch state was not saved (failed or unchanged report)
+    retried = [partial for partial in (load_partial(xml_endpoint, xml_token, *day_range) for day_range in missing)
+               if partial is not None]
+    if retried:
+        partials += retried
+        missing = get_missing_ranges(start, end, partials)
+    if is_rolling_window(report_window):
+        missing_days = [(first + timedelta(days=offset),) * 2
+                        for first, last in missing for offset in range((last - first).days + 1)]
+        if len(missing_days) > DELTA_MAX_DAY_FETCHES:
+            # Too many single days for one run: the report comes from one range request, and
+            # the newest days (the ones staying longest in the window) are stored for the next runs
+            logger.info(f"🧩 Delta window {start.isoformat()} - {end.isoformat()}: {len(missing_days)} days missing, "
+                        f"fetched as one range, {DELTA_MAX_DAY_FETCHES} days stored")
+            stored = fetch_partials(xml_endpoint, xml_token, missing_days[-DELTA_MAX_DAY_FETCHES:], connector_ids)
+            fetched = fetch_and_parse_export(resolve_xml_endpoint(xml_endpoint, start, end), xml_token,
+                                             connector_ids=connector_ids)
+            fetched.delta_through = end.isoformat()
+            fetched.delta_segments = get_delta_segments(partials + stored)
+            return fetched
+        missing = missing_days
+
+    downloaded = fetch_partials(xml_endpoint, xml_token, missing, connector_ids)
+    logger.info(f"🧩 Delta window {start.isoformat()} - {end.isoformat()}: {len(partials)} stored segments, "
+                f"{len(downloaded)} downloaded ({', '.join(format_delta_segment(*day_range) for day_range in missing) or 'none'})")
+
+    partials = sorted(partials + downloaded, key=lambda partial: partial['start'])
+    merger = RecordMerger()
+    segment_hashes = []
+    truncated = None
+    for partial in partials:
+        first, last = parse_delta_segment(f"{partial['start']}/{partial['end']}")
+        merger.add(first, partial['records'], last)
+        segment_hashes.append(f"{format_delta_segment(first, last)}:{partial['content_hash']}")
+        truncated = truncated or partial['truncated']
+
+    content_hash = hashlib.sha256('\n'.join(segment_hashes).encode('utf-8')).hexdigest()
+    parsed_data = report_cache.get_parsed(content_hash)
+    if parsed_data is None:
+        parsed_data = parse_report_records(merger.records())
+        if truncated:
+            parsed_data['truncated'] = truncated
+        report_cache.put_parsed(content_hash, parsed_data)
+    return FetchedExport(parsed_data, content_hash, delta_through=end.isoformat(),
+                         delta_segments=get_delta_segments(partials))
+
+def fetch_connector_export(user_data: Dict, validators: Optional[Dict] = None,
+                           connector_ids: Optional[List[str]] = None,
+                           delta_state: Optional[Dict] = None) -> 'FetchedExport':
+    """
+    Fetch and parse the export of a connector: delta window for URL templates, else the endpoint
+
+    The downloads are archived under connector_ids (default: the connector itself). delta_state
+    is the fetch state a delta connector resumes from (default: validators, its own fetch state).
+    """
+    xml_endpoint = user_data.get('xml_endpoint', '')
+    xml_token = user_data.get('xml_token') or None
+    if connector_ids is None:
+        connector_ids = [get_fetch_state_key(user_data)]
+    if is_delta_endpoint(xml_endpoint):
+        return fetch_delta_export(xml_endpoint, xml_token, user_data.get('report_window'),
+                                  today=get_connector_today(user_data), connector_ids=connector_ids,
+                                  delta_state=validators if delta_state is None else delta_state)
+    return fetch_and_parse_export(xml_endpoint, xml_token, validators=validators, connector_ids=connector_ids)
+
 # ========================================
 # SCHEDULE CHECKING
 # ========================================
 
-def should_generate_report_now(user: Dict) -> bool:
+def get_connector_schedule(user: Dict) -> Optional[CompiledSchedule]:
+    """Compiled schedule of a connector (or legacy user); None, logged, when it is invalid"""
+    try:
+        return compile_schedule(user.get('report_schedule', '{}'))
+    except ScheduleError as e:
+        logger.error(f"❌ Invalid schedule for {get_fetch_state_key(user)}: {str(e)}")
+        return None
+
+def should_generate_report_now(user: Dict, now: Optional[datetime] = None) -> bool:
     """Check if report should be generated now based on user schedule"""
     try:
         if not user.get('report_enabled'):
             return False
         
-        schedule_str = user.get('report_schedule', '{}')
-        if isinstance(schedule_str, str):
-            schedule = json.loads(schedule_str)
-        else:
-            schedule = schedule_str
-        
-        now = datetime.utcnow()
-        frequency = schedule.get('frequency', 'daily')
-        time_str = schedule.get('time', '09:00')
-        
-        # Parse scheduled time
-        try:
-            hour, minute = map(int, time_str.split(':'))
-        except:
-            hour, minute = 9, 0
-        
-        # Check if we're within the scheduled minute
-        if now.hour != hour or now.minute != minute:
-            return False
-        
-        if frequency == 'daily':
-            return True
-        elif frequency == 'weekly':
-            day_of_week = schedule.get('day_of_week', '1')  # Monday
-            return str(now.weekday() + 1) == str(day_of_week)
-        elif frequency == 'monthly':
-            day_of_month = schedule.get('day_of_month', '1')
-            return str(now.day) == str(day_of_month)
+        schedule = get_connector_schedule(user)
         
-        return False
+        # Check if we're within a scheduled minute
+        return schedule is not None and schedule.fires_at(now or datetime.utcnow())
         
     except Exception as e:
         logger.error(f"❌ Error checking schedule for user {user.get('user_id', 'unknown')}: {str(e)}")
         return False
 
+def build_connector_user(user: Dict, connector: Dict) -> Dict:
+    """A user-like dict for one connector of a user (what generate_report_for_user expects)"""
+    return {
+        **user,
+        'xml_endpoint': connector.get('xml_endpoint', ''),
+        'xml_token': connector.get('xml_token', ''),
+        'report_enabled': connector.get('report_enabled', True),  # Use connector's report_enabled, not user's
+        'report_schedule': connector.get('report_schedule', user.get('report_schedule', '{}')),
+        'connector_id': connector.get('connector_id'),
+        'connector_name': connector.get('name', 'Report'),
+        'unchanged_policy': connector.get('unchanged_policy', UNCHANGED_POLICY_SKIP),
+        'report_window': connector.get('report_window', DELTA_DEFAULT_REPORT_WINDOW)
+    }
+
+def iter_connector_users(user: Dict) -> Iterator[Dict]:
+    """Report-enabled connectors of an end-user, as user-like dicts (legacy format: the user itself)"""
+    # Skip non-end-users (Admin/SuperAdmin/Reseller)
+    if user.get('role') != 'User':
+        return
+
+    # Check if user has connectors with enabled reports
+    connectors = user.get('connectors', [])
+
+    # Backward compatibility: check old format (xml_endpoint directly on user)
+    if not connectors and user.get('xml_endpoint'):
+        # Old format - treat as single connector
+        yield user
+        return
+
+    for connector in connectors:
+        if connector.get('report_enabled', True):
+            yield build_connector_user(user, connector)
+
+def scan_users() -> Iterator[Dict]:
+    """Every item of the users table (the scan is paginated: one page stops at 1 MB)"""
+    scan_kwargs = {}
+    while True:
+        response = users_table.scan(**scan_kwargs)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
 def get_scheduled_users() -> List[Dict]:
     """Get users who should receive reports now
     
-    Supports both old format (xml_endpoint directly on user) and new format (connectors array)
+    Supports both old format (xml_endpoint directly on user) and new format (connectors array).
+    With the schedule index only the due connectors are read, and runs missed by late ticks are
+    caught up; without it every user is scanned and only the current minute fires. Each
+    connector carries the slot it runs for in schedule_slot (see REPORT RUNS).
     """
     try:
         logger.info("🔍 Checking for scheduled users...")
         
-        # Scan all users (end-users don't have report_enabled field, they use connectors)
-        response = users_table.scan()
-        
-        users = response.get('Items', [])
-        scheduled_users = []
-        
-        for user in users:
-            # Skip non-end-users (Admin/SuperAdmin/Reseller)
-            if user.get('role') != 'User':
-                continue
-            
-            # Check if user has connectors with enabled reports
-            connectors = user.get('connectors', [])
-            
-            # Backward compatibility: check old format (xml_endpoint directly on user)
-            if not connectors and user.get('xml_endpoint'):
-                # Old format - treat as single connector
-                if should_generate_report_now(user):
-                    scheduled_users.append(user)
-            else:
-                # New format - check each connector
-                for connector in connectors:
-                    if connector.get('report_enabled', True):
-                        # Create a user-like dict for this connector
-                        connector_user = {
-                            **user,
-                            'xml_endpoint': connector.get('xml_endpoint', ''),
-                            'xml_token': connector.get('xml_token', ''),
-                            'report_enabled': connector.get('report_enabled', True),  # Use connector's report_enabled, not user's
-                            'report_schedule': connector.get('report_schedule', user.get('report_schedule', '{}')),
-                            'connector_id': connector.get('connector_id'),
-                            'connector_name': connector.get('name', 'Report')
-                        }
-                        if should_generate_report_now(connector_user):
-                            scheduled_users.append(connector_user)
+        if schedule_table is not None:
+            scheduled_users = get_due_connector_users()
+        else:
+            # Scan all users (end-users don't have report_enabled field, they use connectors)
+            now = datetime.utcnow().replace(second=0, microsecond=0)
+            scheduled_users = [
+                {**connector_user, 'schedule_slot': format_schedule_slot(now)}
+                for user in scan_users()
+                for connector_user in iter_connector_users(user)
+                if should_generate_report_now(connector_user, now)
+            ]
         
         logger.info(f"📅 Found {len(scheduled_users)} connectors scheduled for reports")
         return scheduled_users
@@ -4187,17 +6524,514 @@ def get_scheduled_users() -> List[Dict]:
         logger.error(f"❌ Error getting scheduled users: {str(e)}")
         return []
 
+# ========================================
+# SCHEDULE INDEX
+# ========================================
+# One item per report-enabled connector (keyed like the fetch state: connector id, or
+# legacy#<user_id>) with the UTC minute of its next run in next_run_at. next_run_at is the
+# connector's watermark: every slot before it has been handled. A tick walks the slots due
+# since it (see get_due_slots) and runs the latest one, if it is at most
+# SCHEDULE_MAX_LATENESS_MINUTES old, under its own key (see REPORT RUNS): a report covers the
+# export up to now, so one run per missed slot would send the same report again. The other
+# slots are recorded as skipped runs; last_run_at is the last slot run. The due-index GSI
+# (schedule_partition, next_run_at) lets a tick query only the connectors due by now, so its
+# cost follows the number of due reports instead of the size of the users table. Disabled or
+# deleted connectors have no item. The API keeps the items in sync with the schedules
+# (see sync_schedule_index in api.py); rebuild_schedule_index() recreates them all.
+
+SCHEDULE_PARTITION = 'due'
+SCHEDULE_INDEX_NAME = 'due-index'
+SCHEDULE_SLOT_FORMAT = '%Y-%m-%dT%H:%M:00Z'
+
+def compute_next_run_at(user: Dict, start: datetime) -> Optional[datetime]:
+    """First minute at or after start (UTC, naive) when the schedule fires; None if it never does"""
+    if not user.get('report_enabled'):
+        return None
+    schedule = get_connector_schedule(user)
+    return schedule.next_run_at(start) if schedule is not None else None
+
+def get_due_slots(schedule: CompiledSchedule, watermark: datetime, now: datetime,
+                  limit: int = SCHEDULE_MAX_SLOTS_PER_TICK) -> List[datetime]:
+    """
+    Every slot from watermark to now (UTC minutes), oldest first, at most limit of them
+
+    A late, throttled or overrunning tick walks the slots missed since the watermark, so that
+    each one is either run or recorded as skipped; the slots past limit are left to the next ticks.
+    """
+    slots = []
+    slot = schedule.next_run_at(watermark)
+    while slot is not None and slot <= now and len(slots) < limit:
+        slots.append(slot)
+        slot = schedule.next_run_at(slot + timedelta(minutes=1))
+    return slots
+
+def is_slot_too_late(slot: datetime, now: datetime) -> bool:
+    """Whether the run of a slot would start more than SCHEDULE_MAX_LATENESS_MINUTES after it"""
+    return now - slot > timedelta(minutes=SCHEDULE_MAX_LATENESS_MINUTES)
+
+def format_schedule_slot(slot: datetime) -> str:
+    return slot.strftime(SCHEDULE_SLOT_FORMAT)
+
+def parse_schedule_slot(text: str) -> datetime:
+    return datetime.strptime(text, SCHEDULE_SLOT_FORMAT)
+
+def query_due_schedule_entries(now: datetime) -> Iterator[Dict]:
+    """Schedule index items due at or before now, oldest first"""
+    query_kwargs = {
+        'IndexName': SCHEDULE_INDEX_NAME,
+        'KeyConditionExpression': 'schedule_partition = :partition AND next_run_at <= :now',
+        'ExpressionAttributeValues': {':partition': SCHEDULE_PARTITION, ':now': format_schedule_slot(now)}
+    }
+    while True:
+        response = schedule_table.query(**query_kwargs)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def put_schedule_entry(connector_user: Dict, next_run: datetime) -> None:
+    schedule_table.put_item(Item={
+        'connector_id': get_fetch_state_key(connector_user),
+        'user_id': connector_user.get('user_id'),
+        'tenant_id': connector_user.get('tenant_id'),
+        'schedule_partition': SCHEDULE_PARTITION,
+        'next_run_at': format_schedule_slot(next_run),
+        'report_schedule': compile_schedule(connector_user.get('report_schedule', '{}')).canonical,
+        'updated_at': datetime.utcnow().isoformat()
+    })
+
+def claim_schedule_entry(entry: Dict, next_run: Optional[datetime], report_schedule: str = '',
+                         fired_slot: Optional[datetime] = None) -> bool:
+    """
+    Move a due entry to its next run (and schedule snapshot), only if no other tick did it first
+
+    The conditional write makes overlapping or duplicate ticks (a slow tick still running when
+    the next minute starts, an EventBridge event delivered twice) pick each due run only once.
+    fired_slot, the slot run by this tick, becomes last_run_at. Without a next run the entry is
+    deleted.
+    """
+    try:
+        if next_run is None:
+            schedule_table.delete_item(
+                Key={'connector_id': entry['connector_id']},
+                ConditionExpression='next_run_at = :current',
+                ExpressionAttributeValues={':current': entry['next_run_at']}
+            )
+        else:
+            schedule_table.update_item(
+                Key={'connector_id': entry['connector_id']},
+                UpdateExpression='SET next_run_at = :next, last_run_at = :fired, report_schedule = :schedule, '
+                                 'updated_at = :updated_at',
+                ConditionExpression='next_run_at = :current',
+                ExpressionAttributeValues={
+                    ':next': format_schedule_slot(next_run),
+                    ':current': entry['next_run_at'],
+                    ':fired': format_schedule_slot(fired_slot) if fired_slot else entry.get('last_run_at', ''),
+                    ':schedule': report_schedule or entry.get('report_schedule', ''),
+                    ':updated_at': datetime.utcnow().isoformat()
+                }
+            )
+        return True
+    except schedule_table.meta.client.exceptions.ConditionalCheckFailedException:
+        logger.info(f"⏭️ Scheduled run of {entry['connector_id']} already claimed by another tick")
+        return False
+
+def find_connector_user(user: Optional[Dict], connector_id: str) -> Optional[Dict]:
+    """The report-enabled connector of a user with the given schedule index key"""
+    if not user:
+        return None
+    for connector_user in iter_connector_users(user):
+        if get_fetch_state_key(connector_user) == connector_id:
+            return connector_user
+    return None
+
+def get_due_connector_users() -> List[Dict]:
+    """
+    Connectors due by now according to the schedule index, claimed for this tick
+
+    Each due entry is checked against the current user item (the connector may have been
+    disabled, deleted or rescheduled since the entry was written) and moved past the slots due
+    since its watermark (see get_due_slots). The latest slot is returned as the connector dict
+    with its schedule_slot, unless it is too late; the slots it supersedes and the late ones
+    are recorded as skipped runs instead (see skip_report_run).
+    """
+    now = datetime.utcnow()
+    current_slot = now.replace(second=0, microsecond=0)
+    users = {}
+    due_users = []
+
+    for entry in query_due_schedule_entries(now):
+        user_key = (entry.get('user_id'), entry.get('tenant_id'))
+        if user_key not in users:
+            users[user_key] = users_table.get_item(Key={'user_id': user_key[0], 'tenant_id': user_key[1]}).get('Item')
+        connector_user = find_connector_user(users[user_key], entry['connector_id'])
+
+        slot = parse_schedule_slot(entry['next_run_at'])
+        schedule = get_connector_schedule(connector_user) if connector_user is not None else None
+        if schedule is None:
+            claim_schedule_entry(entry, None)
+            continue
+        # Canonical schedule, stored in the entry to notice schedules changed behind its back
+        report_schedule = schedule.canonical
+        if report_schedule != entry.get('report_schedule'):
+            # Rescheduled without the index being updated: due only if the new schedule is
+            next_run = compute_next_run_at(connector_user, slot)
+            if next_run is None or next_run > current_slot:
+                claim_schedule_entry(entry, next_run, report_schedule)
+                continue
+
+        due_slots = get_due_slots(schedule, slot, current_slot)
+        if len(due_slots) == SCHEDULE_MAX_SLOTS_PER_TICK:
+            # More slots than a tick walks: the entry stays due from the first one left
+            next_run = schedule.next_run_at(due_slots[-1] + timedelta(minutes=1))
+        else:
+            next_run = compute_next_run_at(connector_user, current_slot + timedelta(minutes=1))
+        run_slot = due_slots[-1] if due_slots and not is_slot_too_late(due_slots[-1], now) else None
+        if not claim_schedule_entry(entry, next_run, report_schedule, run_slot):
+            continue
+
+        for skipped_slot in due_slots:
+            if skipped_slot == run_slot:
+                continue
+            connector_slot = {**connector_user, 'schedule_slot': format_schedule_slot(skipped_slot)}
+            if run_slot is not None:
+                skip_report_run(connector_slot, f"scheduled run of {format_schedule_slot(skipped_slot)} superseded "
+                                                f"by the run of {format_schedule_slot(run_slot)}", 'skipped_superseded')
+            else:
+                skip_report_run(connector_slot, f"scheduled run of {format_schedule_slot(skipped_slot)} skipped: "
+                                                f"more than {SCHEDULE_MAX_LATENESS_MINUTES} minutes late")
+        if len(due_slots) > 1 or (due_slots and due_slots[-1] != current_slot):
+            logger.info(f"⏰ Catching up {len(due_slots)} missed run(s) of {entry['connector_id']} "
+                        f"since {entry['next_run_at']}: "
+                        f"{'running ' + format_schedule_slot(run_slot) if run_slot else 'all too late'}")
+        if run_slot is not None:
+            due_users.append({**connector_user, 'schedule_slot': format_schedule_slot(run_slot)})
+
+    return due_users
+
+def rebuild_schedule_index() -> Dict:
+    """Recreate the schedule index from the users table (backfill, or repair after manual edits)"""
+    if schedule_table is None:
+        raise Exception("SCHEDULE_TABLE not configured")
+
+    start = datetime.utcnow().replace(second=0, microsecond=0) + timedelta(minutes=1)
+    indexed = set()
+    for user in scan_users():
+        for connector_user in iter_connector_users(user):
+            next_run = compute_next_run_at(connector_user, start)
+            if next_run is not None:
+                put_schedule_entry(connector_user, next_run)
+                indexed.add(get_fetch_state_key(connector_user))
+
+    removed = 0
+    scan_kwargs = {'ProjectionExpression': 'connector_id'}
+    while True:
+        response = schedule_table.scan(**scan_kwargs)
+        for item in response.get('Items', []):
+            if item['connector_id'] not in indexed:
+                schedule_table.delete_item(Key={'connector_id': item['connector_id']})
+                removed += 1
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    logger.info(f"🗂️ Schedule index rebuilt: {len(indexed)} connectors indexed, {removed} stale entries removed")
+    return {'indexed': len(indexed), 'removed': removed}
+
+# ========================================
+# REPORT RUNS
+# ========================================
+# A scheduled report is identified by its connector and slot (the schedule minute it runs for).
+# Before running it, a worker writes the run record <connector_id>#<slot> with a conditional put,
+# so a duplicate tick, an SQS message delivered twice or a retried job never regenerates or
+# resends it. The record stays 'running' until the report is done (sent or failed: failed
+# reports are not retried, as before). A worker that dies mid-run leaves its record 'running':
+# past REPORT_RUN_LEASE_SECONDS another worker may claim the run again, which is when SQS
+# redelivers the job. A slot that is not run (superseded by a later slot, or past
+# SCHEDULE_MAX_LATENESS_MINUTES) is recorded once as such, in the run records and in the
+# report history (see skip_report_run). Without
+# REPORT_RUNS_TABLE every run is claimed.
+
+REPORT_RUN_LEASE_SECONDS = 30 * 60  # Shorter than the visibility timeout of the job queue (1806 s)
+REPORT_RUN_TTL_DAYS = 7
+REPORT_RUN_RUNNING = 'running'
+REPORT_RUN_DONE = 'done'
+
+def get_report_run_id(connector_user: Dict) -> str:
+    return f"{get_fetch_state_key(connector_user)}#{connector_user['schedule_slot']}"
+
+def claim_report_run(connector_user: Dict) -> bool:
+    """Start the run of a connector's slot; False when it already ran or is running elsewhere"""
+    if report_runs_table is None or not connector_user.get('schedule_slot'):
+        return True
+    run_id = get_report_run_id(connector_user)
+    now = datetime.utcnow()
+    try:
+        report_runs_table.put_item(
+            Item={
+                'run_id': run_id,
+                'connector_id': get_fetch_state_key(connector_user),
+                'slot': connector_user['schedule_slot'],
+                'status': REPORT_RUN_RUNNING,
+                'lease_until': (now + timedelta(seconds=REPORT_RUN_LEASE_SECONDS)).isoformat(),
+                'started_at': now.isoformat(),
+                'ttl': int((now + timedelta(days=REPORT_RUN_TTL_DAYS)).timestamp())
+            },
+            ConditionExpression='attribute_not_exists(run_id) OR (#status = :running AND lease_until < :now)',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':running': REPORT_RUN_RUNNING, ':now': now.isoformat()}
+        )
+        return True
+    except report_runs_table.meta.client.exceptions.ConditionalCheckFailedException:
+        logger.info(f"⏭️ Report run {run_id} already done or in progress, skipped")
+        return False
+
+def finish_report_run(connector_user: Dict, success: bool) -> None:
+    """Mark the run of a connector's slot done: later deliveries of the job skip it"""
+    if report_runs_table is None or not connector_user.get('schedule_slot'):
+        return
+    try:
+        report_runs_table.update_item(
+            Key={'run_id': get_report_run_id(connector_user)},
+            UpdateExpression='SET #status = :done, outcome = :outcome, finished_at = :finished_at',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={
+                ':done': REPORT_RUN_DONE,
+                ':outcome': 'sent' if success else 'failed',
+                ':finished_at': datetime.utcnow().isoformat()
+            }
+        )
+    except Exception as e:
+        logger.error(f"❌ Error finishing report run {get_report_run_id(connector_user)}: {str(e)}")
+
+def skip_report_run(connector_user: Dict, reason: str, status: str = 'failed') -> None:
+    """
+    Record the slot of a connector as a run that was never started, once: 'failed' (too late)
+    or 'skipped_superseded' (a later slot ran instead)
+    """
+    if report_runs_table is not None and connector_user.get('schedule_slot'):
+        now = datetime.utcnow()
+        try:
+            report_runs_table.put_item(
+                Item={
+                    'run_id': get_report_run_id(connector_user),
+                    'connector_id': get_fetch_state_key(connector_user),
+                    'slot': connector_user['schedule_slot'],
+                    'status': REPORT_RUN_DONE,
+                    'outcome': status,
+                    'reason': reason,
+                    'finished_at': now.isoformat(),
+                    'ttl': int((now + timedelta(days=REPORT_RUN_TTL_DAYS)).timestamp())
+                },
+                ConditionExpression='attribute_not_exists(run_id)'
+            )
+        except report_runs_table.meta.client.exceptions.ConditionalCheckFailedException:
+            logger.info(f"⏭️ Report run {get_report_run_id(connector_user)} already recorded, not skipped")
+            return
+        except Exception as e:
+            logger.error(f"❌ Error recording skipped report run {get_report_run_id(connector_user)}: {str(e)}")
+    logger.warning(f"⚠️ {get_fetch_state_key(connector_user)}: {reason}")
+    save_report_history(connector_user.get('user_id', 'unknown'), connector_user,
+                        f"Error: {reason}" if status == 'failed' else reason, status)
+
+def release_report_run(connector_user: Dict) -> None:
+    """Drop the record of a run that did not happen (its job raised), so the retried job can claim it"""
+    if report_runs_table is None or not connector_user.get('schedule_slot'):
+        return
+    try:
+        report_runs_table.delete_item(
+            Key={'run_id': get_report_run_id(connector_user)},
+            ConditionExpression='#status = :running',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':running': REPORT_RUN_RUNNING}
+        )
+    except Exception as e:
+        logger.error(f"❌ Error releasing report run {get_report_run_id(connector_user)}: {str(e)}")
+
+# ========================================
+# REPORT PIPELINE
+# ========================================
+# A report goes through four stages: fetch_parse (the Setera download streamed into the parser),
+# insights (Bedrock), render (charts and HTML, CPU-bound) and send (email sender invocation).
+# Each stage admits a limited number of connectors at once (REPORT_*_CONCURRENCY), so with
+# several connectors in flight (worker threads of the local report queue, connectors of a shared
+# export) one connector's download or Bedrock call overlaps another's parsing or rendering, while
+# parses and renders do not pile up on the GIL and Bedrock calls stay under the account quota.
+# A connector waits for a free slot before entering a stage: that backpressure bounds the parsed
+# reports held in memory, and the wait is traced as <stage>_wait.
+#
+# Every stage runs on threads, so what overlaps is waiting: downloads, Bedrock and the email
+# sender. Parsing and rendering hold the GIL, and two connectors never parse or render at the
+# same time, whatever the limits (benchmark_tick.py --export-entities measures a CPU-bound
+# tick). The render stage is HTML formatting, cheap next to the parse that streams from the
+# socket. Moving the parse to a process would mean shipping the export or the parsed report
+# across a pipe (multiprocessing.Process with a Pipe works in Lambda; only Pool and Queue need
+# /dev/shm), and at 1536 MB the function gets less than one vCPU (a full one comes at 1769 MB).
+# CPU-bound work scales out with the job queue instead: one invocation, with its own CPU, per job.
+
+REPORT_STAGES = ('fetch_parse', 'insights', 'render', 'send')
+
+class ReportPipeline:
+    """Per-stage concurrency limits, plus a pool running the connectors of a shared export"""
+
+    def __init__(self, stage_limits: Dict[str, int], connector_concurrency: int = 1):
+        self.stage_limits = {stage: max(1, stage_limits.get(stage, 1)) for stage in REPORT_STAGES}
+        self.connector_concurrency = max(1, connector_concurrency)
+        self._slots = {stage: threading.BoundedSemaphore(limit) for stage, limit in self.stage_limits.items()}
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+        self._executor = None
+
+    @contextmanager
+    def stage(self, name: str):
+        """Traced span of a stage, entered once one of its slots is free"""
+        slots = self._slots[name]
+        if not slots.acquire(blocking=False):
+            with tracer.span(f"{name}_wait"):
+                slots.acquire()
+        try:
+            with tracer.span(name) as span:
+                yield span
+        finally:
+            slots.release()
+
+    @contextmanager
+    def single_flight(self, key: str):
+        """One thread at a time per key: connectors of one export make one Bedrock call, the others hit the cache"""
+        if not key:
+            yield
+            return
+        with self._flights_lock:
+            flight = self._flights.setdefault(key, [threading.Lock(), 0])
+            flight[1] += 1
+        try:
+            with flight[0]:
+                yield
+        finally:
+            with self._flights_lock:
+                flight[1] -= 1
+                if not flight[1]:
+                    del self._flights[key]
+
+    def map(self, function, items: List) -> List:
+        """function over items, up to connector_concurrency at a time; results in the order of items"""
+        if self.connector_concurrency == 1 or len(items) < 2:
+            return [function(item) for item in items]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.connector_concurrency,
+                                                thread_name_prefix='report-connector')
+        parent = tracer.current()
+
+        def run(item):
+            with tracer.attach(parent):
+                return function(item)
+
+        return list(self._executor.map(run, items))
+
+def create_report_pipeline() -> ReportPipeline:
+    return ReportPipeline({
+        'fetch_parse': REPORT_FETCH_CONCURRENCY,
+        'insights': REPORT_INSIGHTS_CONCURRENCY,
+        'render': REPORT_RENDER_CONCURRENCY,
+        'send': REPORT_SEND_CONCURRENCY
+    }, REPORT_CONNECTOR_CONCURRENCY)
+
+# Shared by the worker threads of the local report queue
+report_pipeline = create_report_pipeline()
+
 # ========================================
 # MAIN REPORT GENERATION
 # ========================================
 
-def generate_report_for_user(user_data: Dict) -> bool:
-    """Generate and send report for a single user"""
+def extract_entity_names(parsed_data: Dict) -> List[str]:
+    """Entity names of a parsed report, used in the email subject"""
+    report_type = parsed_data.get('report_type', '')
+    specific_details = parsed_data.get('specific_details', {})
+    if not specific_details:
+        return []
+
+    # Try to get full names first (most specific)
+    full_names = specific_details.get('unique_full_names', [])
+    if full_names:
+        return full_names
+
+    # Fallback to other name types based on report type
+    if report_type == 'user':
+        return specific_details.get('unique_user_names', [])
+    elif report_type == 'acd':
+        return specific_details.get('unique_grouping_names', [])
+    elif report_type == 'huntgroup':
+        return specific_details.get('unique_huntgroup_names', [])
+    elif report_type == 'rulebased':
+        return specific_details.get('unique_rulebased_names', [])
+    elif report_type == 'ivr':
+        return specific_details.get('unique_ivr_names', [])
+    return []
+
+class FetchedExport:
+    """An XML export downloaded and parsed once, possibly shared by several connectors of a tick"""
+
+    def __init__(self, parsed_data: Optional[Dict], content_hash: str = '', etag: str = '',
+                 last_modified: str = '', not_modified: bool = False, delta_through: str = '',
+                 delta_segments: Optional[List[str]] = None):
+        self.parsed_data = parsed_data  # None when the server answered 304 Not Modified
+        self.content_hash = content_hash
+        self.etag = etag
+        self.last_modified = last_modified
+        self.not_modified = not_modified
+        self.delta_through = delta_through  # Last day of the window of a delta connector (ISO date)
+        self.delta_segments = delta_segments or []  # Stored partials of that window ("first/last" ISO dates)
+
+def fetch_and_parse_export(xml_endpoint: str, xml_token: Optional[str] = None, validators: Optional[Dict] = None,
+                           connector_ids: Optional[List[str]] = None) -> FetchedExport:
+    """Fetch an export (conditionally, when validators are given) and stream it into the parser
+
+    The parse result is stored in the report cache under the content hash of the export, and
+    the raw export in the export archive, indexed for connector_ids.
+    """
+    export = open_xml_export(xml_endpoint, xml_token, validators=validators)
+    if export.not_modified:
+        return FetchedExport(None, etag=export.etag, last_modified=export.last_modified, not_modified=True)
+
+    writer = ArchiveWriter() if export_archive is not None and connector_ids else None
+    try:
+        parsed_data = parse_xml_report(writer.tee(export) if writer else export)
+    except Exception:
+        if writer:
+            writer.close()
+        raise
+    report_cache.put_parsed(export.content_hash, parsed_data)
+    tracer.count('bytes_fetched', export.body_bytes)
+    if writer:
+        export_archive.store_export(writer, export.content_hash, connector_ids,
+                                    get_archive_period(parsed_data.get('period_range', '')), xml_endpoint,
+                                    parsed_data.get('report_type', ''), parsed_data.get('truncated'))
+    return FetchedExport(parsed_data, export.content_hash, export.etag, export.last_modified)
+
+def load_cached_export(fetch_state: Dict) -> Optional[FetchedExport]:
+    """The last reported export of a connector, rebuilt from the report cache (None on a miss)"""
+    content_hash = fetch_state.get('content_hash', '')
+    parsed_data = report_cache.get_parsed(content_hash) if content_hash else None
+    if parsed_data is None:
+        return None
+    return FetchedExport(parsed_data, content_hash, fetch_state.get('etag', ''), fetch_state.get('last_modified', ''))
+
+def generate_report_for_user(user_data: Dict, force: bool = False, fetched: Optional[FetchedExport] = None,
+                             fetch_state: Optional[Dict] = None) -> bool:
+    """Generate and send report for a single user
+
+    The export is fetched conditionally against the connector's last report: when it has not
+    changed, the Bedrock call, rendering and email are replaced by the connector's
+    unchanged_policy. force=True (manual tests) always regenerates the report, from the cached
+    parse when the export has not changed. fetched and fetch_state are passed by
+    generate_reports_for_group() when the export is shared.
+    """
     user_id = user_data.get('user_id', 'unknown')
     # Use report_email if present, otherwise fallback to email
     # report_email can be duplicated across users (multiple users can receive reports at same email)
     user_email = user_data.get('report_email', '') or user_data.get('email', '')
     user_name = user_data.get('name', 'Utente')
+    span = tracer.start('connector', emit=True, connector_id=get_fetch_state_key(user_data), user_id=user_id)
     
     try:
         logger.info(f"🚀 Starting report generation for user: {user_email}")
@@ -4210,51 +7044,54 @@ def generate_report_for_user(user_data: Dict) -> bool:
         if not user_email:
             raise Exception("User email not available")
         
-        # Fetch XML data
-        xml_token = user_data.get('xml_token')
-        xml_content = fetch_xml_data(xml_endpoint, xml_token)
-        
-        # Parse XML data
-        parsed_data = parse_xml_report(xml_content)
-        
-        # Generate insights with Claude
-        insights = generate_insights_with_claude(parsed_data)
+        # Fetch and parse XML data (the download is streamed into the parser)
+        state_key = get_fetch_state_key(user_data)
+        if fetch_state is None:
+            fetch_state = load_fetch_state(state_key)
+        if fetched is None:
+            with report_pipeline.stage('fetch_parse'):
+                fetched = fetch_connector_export(user_data, validators=fetch_state)
+        if fetched.not_modified:
+            if not force:
+                span.set(status='unchanged')
+                return handle_unchanged_export(user_data, fetch_state, user_email)
+            # Forced run on an unchanged export: reuse its cached parse, or download it again
+            with report_pipeline.stage('fetch_parse'):
+                fetched = load_cached_export(fetch_state) or fetch_connector_export(user_data)
+        elif not force and fetch_state.get('content_hash') == fetched.content_hash:
+            refresh_fetch_validators(state_key, fetched)
+            span.set(status='unchanged')
+            return handle_unchanged_export(user_data, fetch_state, user_email)
+        
+        # Generate insights with Claude (served from the report cache for an export seen before)
+        parsed_data = fetched.parsed_data
+        with report_pipeline.single_flight(fetched.content_hash), report_pipeline.stage('insights'):
+            insights = generate_insights_with_claude(parsed_data, fetched.content_hash)
         
         # Extract report type and entity names from parsed_data for email subject
         report_type = parsed_data.get('report_type', '')
-        entity_names = []
-        specific_details = parsed_data.get('specific_details', {})
-        if specific_details:
-            # Try to get full names first (most specific)
-            full_names = specific_details.get('unique_full_names', [])
-            if full_names:
-                entity_names = full_names
-            else:
-                # Fallback to other name types based on report type
-                if report_type == 'user':
-                    entity_names = specific_details.get('unique_user_names', [])
-                elif report_type == 'acd':
-                    entity_names = specific_details.get('unique_grouping_names', [])
-                elif report_type == 'huntgroup':
-                    entity_names = specific_details.get('unique_huntgroup_names', [])
-                elif report_type == 'rulebased':
-                    entity_names = specific_details.get('unique_rulebased_names', [])
-                elif report_type == 'ivr':
-                    entity_names = specific_details.get('unique_ivr_names', [])
+        entity_names = extract_entity_names(parsed_data)
         
         # Format email content
-        html_content = format_email_content(user_data, insights)
+        with report_pipeline.stage('render'):
+            html_content = format_email_content(user_data, insights)
+        tracer.count('html_bytes', len(html_content.encode('utf-8')))
         
         # Send email with entity names and report type
-        send_report_email(user_email, user_name, html_content, user_id, entity_names, report_type)
+        with report_pipeline.stage('send'):
+            send_report_email(user_email, user_name, html_content, user_id, entity_names, report_type)
         
         # Save to history
-        save_report_history(user_id, user_data, insights, 'sent')
+        with tracer.span('history'):
+            save_report_history(user_id, user_data, insights, 'sent')
+            save_fetch_state(state_key, fetched, report_type, entity_names, insights)
         
+        span.set(status='sent', report_type=report_type)
         logger.info(f"✅ Report generated and sent successfully for: {user_email}")
         return True
         
     except Exception as e:
+        span.set(status='failed')
         logger.error(f"❌ Error generating report for user {user_email}: {str(e)}")
         
         # Save error to history
@@ -4265,6 +7102,275 @@ def generate_report_for_user(user_data: Dict) -> bool:
         
         return False
 
+    finally:
+        tracer.stop(span)
+
+def get_export_key(user_data: Dict) -> Tuple[str, str]:
+    """Connectors with the same endpoint and token download the very same export"""
+    xml_endpoint = user_data.get('xml_endpoint', '')
+    if is_delta_endpoint(xml_endpoint):
+        # The same template over another window is another export
+        xml_endpoint = f"{xml_endpoint}#{user_data.get('report_window') or DELTA_DEFAULT_REPORT_WINDOW}"
+    return xml_endpoint, user_data.get('xml_token', '') or ''
+
+def group_by_export(scheduled_users: List[Dict]) -> List[List[Dict]]:
+    """Group the connectors due in a tick by export, keeping the schedule order"""
+    groups = {}
+    unconfigured = []
+    for user in scheduled_users:
+        if not user.get('xml_endpoint'):
+            # Reported as a configuration error by generate_report_for_user
+            unconfigured.append([user])
+            continue
+        groups.setdefault(get_export_key(user), []).append(user)
+    return list(groups.values()) + unconfigured
+
+def get_shared_validators(fetch_states: List[Dict]) -> Optional[Dict]:
+    """Validators for a shared fetch, only when every connector of the group last saw the same export"""
+    validators = {
+        'etag': fetch_states[0].get('etag', ''),
+        'last_modified': fetch_states[0].get('last_modified', '')
+    }
+    if not any(validators.values()):
+        return None
+    for fetch_state in fetch_states[1:]:
+        if fetch_state.get('etag', '') != validators['etag'] or fetch_state.get('last_modified', '') != validators['last_modified']:
+            return None
+    return validators
+
+def generate_reports_for_group(users: List[Dict]) -> List[bool]:
+    """Generate the reports of connectors sharing one export: it is fetched and parsed only once"""
+    if len(users) == 1:
+        return [generate_report_for_user(users[0])]
+
+    xml_endpoint = users[0].get('xml_endpoint', '')
+    fetch_states = [load_fetch_state(get_fetch_state_key(user)) for user in users]
+    logger.info(f"🔗 Coalescing {len(users)} connectors on a single fetch of {xml_endpoint}")
+
+    try:
+        with report_pipeline.stage('fetch_parse'):
+            fetched = fetch_connector_export(users[0], get_shared_validators(fetch_states),
+                                             [get_fetch_state_key(user) for user in users],
+                                             delta_state=fetch_states[0])
+    except Exception as e:
+        logger.error(f"❌ Error fetching shared export {xml_endpoint}: {str(e)}")
+        for user in users:
+            try:
+                save_report_history(user.get('user_id', 'unknown'), user, f"Error: {str(e)}", 'failed')
+            except:
+                pass
+        return [False] * len(users)
+
+    # The connectors of the export go through the remaining stages side by side
+    return report_pipeline.map(
+        lambda connector: generate_report_for_user(connector[0], fetched=fetched, fetch_state=connector[1]),
+        list(zip(users, fetch_states))
+    )
+
+# ========================================
+# REPORT JOBS
+# ========================================
+# The schedule check only selects the due connectors and turns each export group (see
+# group_by_export) into a job. With REPORT_QUEUE_URL the jobs are sent to SQS and every job runs
+# in its own invocation of this function (the SQS event source caps how many at once), so a slow
+# Setera endpoint or Bedrock call delays its own job instead of pushing the rest of the tick past
+# the Lambda timeout. Without a queue the jobs run in the tick on a LocalReportQueue of
+# REPORT_WORKER_CONCURRENCY threads (1: one report after the other, as before). Jobs carry the
+# keys of their connectors only: workers reload the users, so no XML token goes through SQS.
+# Each connector also carries its schedule slot: workers claim its run first (see REPORT RUNS).
+
+REPORT_JOB_TYPE = 'report_group'
+SQS_SEND_BATCH_SIZE = 10  # send_message_batch limit
+
+def build_report_job(users: List[Dict], tick_at: datetime) -> Dict:
+    """Job of the connectors of one export group, due at tick_at"""
+    return {
+        'job_type': REPORT_JOB_TYPE,
+        'job_id': str(uuid.uuid4()),
+        'tick_at': tick_at.isoformat(),
+        'connectors': [
+            {'user_id': user.get('user_id'), 'tenant_id': user.get('tenant_id'),
+             'connector_id': get_fetch_state_key(user), 'slot': user.get('schedule_slot', '')}
+            for user in users
+        ]
+    }
+
+def load_report_job_users(job: Dict) -> List[Dict]:
+    """Current connector dicts of a job; connectors deleted or disabled since the tick are dropped"""
+    users = {}
+    connector_users = []
+    for connector in job.get('connectors', []):
+        user_key = (connector.get('user_id'), connector.get('tenant_id'))
+        if user_key not in users:
+            users[user_key] = users_table.get_item(Key={'user_id': user_key[0], 'tenant_id': user_key[1]}).get('Item')
+        connector_user = find_connector_user(users[user_key], connector.get('connector_id'))
+        if connector_user is None:
+            logger.warning(f"⚠️ Connector {connector.get('connector_id')} deleted or disabled since the tick, skipped")
+            continue
+        connector_users.append({**connector_user, 'schedule_slot': connector.get('slot', '')})
+    return connector_users
+
+def is_report_run_too_late(connector_user: Dict, now: datetime) -> bool:
+    """Whether the slot of a job's connector is past its lateness limit (a job that waited in the queue)"""
+    if not connector_user.get('schedule_slot'):
+        return False
+    return is_slot_too_late(parse_schedule_slot(connector_user['schedule_slot']), now)
+
+def process_report_job(job: Dict) -> List[bool]:
+    """
+    Run a report job (worker side): the reports of its export group
+
+    Connectors whose run was already claimed (a duplicate or retried job) are left out; slots
+    the job reached past their lateness limit are recorded as failed runs instead.
+    """
+    with tracer.span('job', emit=True, job_id=job.get('job_id')) as job_span:
+        job_users = load_report_job_users(job)
+        now = datetime.utcnow()
+        late_users = [user for user in job_users if is_report_run_too_late(user, now)]
+        for user in late_users:
+            skip_report_run(user, f"scheduled run of {user['schedule_slot']} skipped: "
+                                  f"the report job started too late ({job['tick_at']} tick)")
+        users = [user for user in job_users if user not in late_users and claim_report_run(user)]
+        try:
+            results = generate_reports_for_group(users) if users else []
+        except Exception:
+            for user in users:
+                release_report_run(user)
+            raise
+        for user, success in zip(users, results):
+            finish_report_run(user, success)
+        job_span.set(connectors=len(users), sent=sum(1 for success in results if success),
+                     duplicates=len(job_users) - len(users) - len(late_users), late=len(late_users))
+    return results + [False] * len(late_users)
+
+class LocalReportQueue:
+    """
+    In-process stand-in for the SQS queue: jobs run on a pool of worker threads
+
+    Jobs go through JSON like an SQS message body, so workers see what they would see behind
+    SQS. With concurrency 1 every job runs in the calling thread as soon as it is sent.
+    """
+
+    def __init__(self, concurrency: int = REPORT_WORKER_CONCURRENCY, worker=None):
+        self.concurrency = max(1, concurrency)
+        self.worker = worker
+        self._executor = None
+        self._pending = []
+
+    def send(self, jobs: List[Dict]) -> List[Dict]:
+        """Queue the jobs; returns the jobs that could not be queued (none here)"""
+        for job in jobs:
+            body = json.dumps(job, cls=DecimalEncoder)
+            if self.concurrency == 1:
+                future = Future()
+                future.set_result(self.run(body))
+            else:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='report-worker')
+                future = self._executor.submit(self.run, body, tracer.current())
+            self._pending.append(future)
+        return []
+
+    def run(self, body: str, parent: Optional[Span] = None) -> List[bool]:
+        job = json.loads(body)
+        try:
+            with tracer.attach(parent):
+                return (self.worker or process_report_job)(job)
+        except Exception as e:
+            logger.error(f"❌ Report job {job.get('job_id')} failed: {str(e)}")
+            return [False] * len(job.get('connectors', []))
+
+    def join(self) -> List[List[bool]]:
+        """Wait for the jobs sent so far: the results of each one, in the order they were sent"""
+        pending, self._pending = self._pending, []
+        return [future.result() for future in pending]
+
+class SqsReportQueue:
+    """Report jobs sent to SQS, run by this function's SQS event source (handle_report_job_records)"""
+
+    def __init__(self, queue_url: str):
+        self.queue_url = queue_url
+
+    def send(self, jobs: List[Dict]) -> List[Dict]:
+        """Send the jobs in batches; returns the jobs SQS refused twice"""
+        unsent = []
+        for start in range(0, len(jobs), SQS_SEND_BATCH_SIZE):
+            batch = {str(index): job for index, job in enumerate(jobs[start:start + SQS_SEND_BATCH_SIZE])}
+            for attempt in range(2):
+                try:
+                    response = sqs_client.send_message_batch(QueueUrl=self.queue_url, Entries=[
+                        {'Id': entry_id, 'MessageBody': json.dumps(job, cls=DecimalEncoder)}
+                        for entry_id, job in batch.items()
+                    ])
+                    failed = response.get('Failed', [])
+                except Exception as e:
+                    logger.warning(f"⚠️ Sending {len(batch)} report jobs failed: {str(e)}")
+                    failed = [{'Id': entry_id, 'Message': str(e)} for entry_id in batch]
+                batch = {entry['Id']: batch[entry['Id']] for entry in failed}
+                if not batch:
+                    break
+            unsent.extend(batch.values())
+        return unsent
+
+    def join(self) -> List[List[bool]]:
+        """Nothing runs here: the workers are other invocations"""
+        return []
+
+def create_report_queue():
+    if REPORT_QUEUE_URL:
+        return SqsReportQueue(REPORT_QUEUE_URL)
+    return LocalReportQueue(REPORT_WORKER_CONCURRENCY)
+
+report_queue = create_report_queue()
+
+def dispatch_report_jobs(export_groups: List[List[Dict]]) -> Dict:
+    """Queue one job per export group; connectors of jobs that could not be queued are recorded as failed"""
+    tick_at = datetime.utcnow().replace(second=0, microsecond=0)
+    jobs = [build_report_job(group, tick_at) for group in export_groups]
+    groups = {job['job_id']: group for job, group in zip(jobs, export_groups)}
+
+    unsent = report_queue.send(jobs)
+    for job in unsent:
+        logger.error(f"❌ Report job {job['job_id']} could not be queued")
+        for user in groups[job['job_id']]:
+            try:
+                save_report_history(user.get('user_id', 'unknown'), user, "Error: report job could not be queued", 'failed')
+            except:
+                pass
+
+    results = [success for job_results in report_queue.join() for success in job_results]
+    return {
+        'jobs': len(jobs),
+        'queued': len(jobs) - len(unsent),
+        'successful': sum(1 for success in results if success),
+        'failed': sum(1 for success in results if not success) + sum(len(job['connectors']) for job in unsent)
+    }
+
+def handle_report_job_records(records: List[Dict]) -> Dict:
+    """
+    SQS event (worker side): run the job of each record
+
+    Reports that fail are recorded in the history by generate_report_for_user and not retried;
+    a job that raises (e.g. the users could not be read) is handed back to SQS for a retry.
+    """
+    failures = []
+    for record in records:
+        xml_fetch_client.reset_counters()
+        report_cache.reset_counters()
+        try:
+            results = process_report_job(json.loads(record['body']))
+            summary = {
+                'successful': sum(1 for success in results if success),
+                'failed': sum(1 for success in results if not success),
+                'xml_fetch': xml_fetch_client.snapshot(),
+                'report_cache': report_cache.snapshot()
+            }
+            logger.info(f"📊 Report job summary: {json.dumps(summary, cls=DecimalEncoder)}")
+        except Exception as e:
+            logger.error(f"❌ Report job {record.get('messageId')} failed: {str(e)}")
+            failures.append({'itemIdentifier': record['messageId']})
+    return {'batchItemFailures': failures}
+
 # ========================================
 # LAMBDA HANDLER
 # ========================================
@@ -4273,51 +7379,55 @@ def lambda_handler(event, context):
     """Main Lambda handler for Maya report generation"""
     logger.info(f"🤖 Maya Report Generator triggered: {json.dumps(event, cls=DecimalEncoder)}")
     
+    if event.get('Records'):
+        # Report jobs queued by the schedule check
+        return handle_report_job_records(event['Records'])
+    
     try:
         trigger_type = event.get('trigger_type', 'schedule_check')
         
         if trigger_type == 'schedule_check':
-            # Check for users scheduled to receive reports now
-            scheduled_users = get_scheduled_users()
-            
-            if not scheduled_users:
-                logger.info("📅 No users scheduled for reports at this time")
-                return {
-                    'statusCode': 200,
-                    'body': json.dumps({
-                        'message': 'No reports scheduled',
-                        'timestamp': datetime.utcnow().isoformat()
-                    }, cls=DecimalEncoder)
-                }
+            with tracer.span('tick', emit=True) as tick_span:
+                # Check for users scheduled to receive reports now
+                xml_fetch_client.reset_counters()
+                report_cache.reset_counters()
+                with tracer.span('scan'):
+                    scheduled_users = get_scheduled_users()
             
-            # Generate reports for scheduled users
-            total_users = len(scheduled_users)
-            successful_reports = 0
-            failed_reports = 0
+                if not scheduled_users:
+                    logger.info("📅 No users scheduled for reports at this time")
+                    return {
+                        'statusCode': 200,
+                        'body': json.dumps({
+                            'message': 'No reports scheduled',
+                            'timestamp': datetime.utcnow().isoformat()
+                        }, cls=DecimalEncoder)
+                    }
             
-            for user in scheduled_users:
-                try:
-                    if generate_report_for_user(user):
-                        successful_reports += 1
-                    else:
-                        failed_reports += 1
-                except Exception as e:
-                    logger.error(f"❌ Failed to process user {user.get('email', 'unknown')}: {str(e)}")
-                    failed_reports += 1
+                # One job per distinct export, run by the report queue's workers
+                total_users = len(scheduled_users)
+                export_groups = group_by_export(scheduled_users)
+                coalesced_fetches = total_users - len(export_groups)
+                dispatched = dispatch_report_jobs(export_groups)
+                tracer.count('reports_sent', dispatched['successful'])
+                tracer.count('reports_failed', dispatched['failed'])
             
-            result = {
-                'message': f'Reports processed for {total_users} users',
-                'successful': successful_reports,
-                'failed': failed_reports,
-                'timestamp': datetime.utcnow().isoformat()
-            }
+                result = {
+                    'message': f'Reports processed for {total_users} users',
+                    **dispatched,
+                    'coalesced_fetches': coalesced_fetches,
+                    'xml_fetch': xml_fetch_client.snapshot(),
+                    'report_cache': report_cache.snapshot(),
+                    'timings': tick_span.summary(),
+                    'timestamp': datetime.utcnow().isoformat()
+                }
             
-            logger.info(f"📊 Report generation summary: {json.dumps(result)}")
+                logger.info(f"📊 Report generation summary: {json.dumps(result)}")
             
-            return {
-                'statusCode': 200,
-                'body': json.dumps(result, cls=DecimalEncoder)
-            }
+                return {
+                    'statusCode': 200,
+                    'body': json.dumps(result, cls=DecimalEncoder)
+                }
             
         elif trigger_type == 'manual_test':
             # Manual test trigger for specific user
@@ -4335,7 +7445,7 @@ def lambda_handler(event, context):
                 raise Exception(f"User not found: {user_id}")
             
             user_data = result['Items'][0]
-            success = generate_report_for_user(user_data)
+            success = generate_report_for_user(user_data, force=True)
             
             return {
                 'statusCode': 200 if success else 500,
@@ -4346,7 +7456,55 @@ def lambda_handler(event, context):
                     'timestamp': datetime.utcnow().isoformat()
                 }, cls=DecimalEncoder)
             }
-            
+
+        elif trigger_type == 'preview':
+            # Totals and entities of a user's export: summary parse only, no Bedrock call, no email
+            user_id = event.get('user_id')
+            if not user_id:
+                raise Exception("user_id required for preview")
+
+            result = users_table.query(
+                KeyConditionExpression='user_id = :uid',
+                ExpressionAttributeValues={':uid': user_id}
+            )
+
+            if not result.get('Items'):
+                raise Exception(f"User not found: {user_id}")
+
+            user_data = result['Items'][0]
+            xml_endpoint = user_data.get('xml_endpoint', '')
+            if not xml_endpoint:
+                raise Exception("XML endpoint not configured for user")
+
+            if is_delta_endpoint(xml_endpoint):
+                # Summary of the whole report window, in a single request
+                xml_endpoint = resolve_xml_endpoint(xml_endpoint, *get_report_window(user_data.get('report_window'),
+                                                                                      get_connector_today(user_data)))
+            summary = parse_xml_summary(open_xml_export(xml_endpoint, user_data.get('xml_token')))
+
+            return {
+                'statusCode': 200,
+                'body': json.dumps({
+                    'message': 'Preview completed',
+                    'preview': summary.as_dict(),
+                    'user_email': user_data.get('email'),
+                    'timestamp': datetime.utcnow().isoformat()
+                }, cls=DecimalEncoder)
+            }
+
+        elif trigger_type == 'rebuild_schedule_index':
+            # Backfill or repair the due-time index of the connectors
+            counts = rebuild_schedule_index()
+
+            return {
+                'statusCode': 200,
+                'body': json.dumps({
+                    'message': 'Schedule index rebuilt',
+                    **counts,
+                    'timestamp': datetime.utcnow().isoformat()
+                }, cls=DecimalEncoder)
+            }
+
         else:
             raise Exception(f"Unknown trigger type: {trigger_type}")
             
@@ -0,0 +1,281 @@
+"""
+Schedule engine shared by the API and the report generator (packaged as a Lambda layer)
+
+A report_schedule is compiled once per distinct string into bitsets (minutes, hours, days of
+month, months, days of week) and cached, so the next run is found by jumping between set bits
+instead of walking day by day. Accepted forms:
+  - the dashboard object: {"frequency": "daily|weekly|monthly", "time": "HH:MM",
+    "day_of_week": "1"-"7" (Monday = 1), "day_of_month": "1"-"31"}
+  - a 5-field cron expression: {"cron": "0 9 * * 1-5"} or the bare string "0 9 * * 1-5"
+Both take an optional IANA "timezone" (default SCHEDULE_DEFAULT_TIMEZONE): times are wall
+clock times there. Both functions store CompiledSchedule.canonical in the schedule index and
+compare it, which is why there is a single copy of this module. python-dateutil comes with
+the functions using the layer.
+"""
+import calendar
+import functools
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from dateutil import tz as dateutil_tz
+
+SCHEDULE_DEFAULT_TIMEZONE = os.environ.get('SCHEDULE_DEFAULT_TIMEZONE', 'UTC')
+
+logger = logging.getLogger()
+
+CRON_MONTH_NAMES = {name: number for number, name in enumerate(
+    ('JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC'), start=1)}
+CRON_DAY_NAMES = {name: number for number, name in enumerate(('SUN', 'MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT'))}
+SCHEDULE_FREQUENCIES = ('daily', 'weekly', 'monthly')
+# Years searched for a next run (a 29 February schedule can wait 8 years around 2100)
+SCHEDULE_SEARCH_YEARS = 8
+SCHEDULE_CACHE_SIZE = 1024
+# A day-of-week bitset repeated over 35 days, to map it on the days of a month in one multiply
+WEEK_REPEAT = sum(1 << (7 * week) for week in range(5))
+
+class ScheduleError(Exception):
+    """Invalid report_schedule (the message says what is wrong, for the API's 400 responses)"""
+    pass
+
+def next_set_bit(mask: int, start: int) -> int:
+    """Lowest set bit of mask at or above start, -1 if there is none"""
+    mask >>= start
+    if not mask:
+        return -1
+    return start + (mask & -mask).bit_length() - 1
+
+def parse_cron_value(text: str, names: Optional[Dict[str, int]]) -> int:
+    if names and text.upper() in names:
+        return names[text.upper()]
+    if not text.isdigit():
+        raise ScheduleError(f"invalid cron value '{text}'")
+    return int(text)
+
+def parse_cron_field(text: str, first: int, last: int, names: Optional[Dict[str, int]] = None) -> int:
+    """Bitset of a cron field: lists of values, ranges (a-b), steps (*/n, a-b/n, a/n) and names"""
+    mask = 0
+    for part in text.split(','):
+        range_text, _, step_text = part.partition('/')
+        if step_text and not step_text.isdigit():
+            raise ScheduleError(f"invalid cron step '{part}'")
+        step = int(step_text) if step_text else 1
+        if range_text in ('*', '?'):
+            low, high = first, last
+        else:
+            low_text, _, high_text = range_text.partition('-')
+            low = parse_cron_value(low_text, names)
+            high = parse_cron_value(high_text, names) if high_text else (last if step_text else low)
+        if step < 1 or not first <= low <= high <= last:
+            raise ScheduleError(f"cron field '{part}' out of range {first}-{last}")
+        for value in range(low, high + 1, step):
+            mask |= 1 << value
+    return mask
+
+def format_cron_field(mask: int, first: int, last: int, restricted: bool = False) -> str:
+    """Shortest list of values and ranges for a bitset ('*' when every value is set, unless restricted)"""
+    if not restricted and mask == ((1 << (last + 1)) - 1) & ~((1 << first) - 1):
+        return '*'
+    parts = []
+    value = next_set_bit(mask, first)
+    while value >= 0:
+        end = value
+        while mask >> (end + 1) & 1:
+            end += 1
+        parts.append(str(value) if end == value else f"{value}-{end}")
+        value = next_set_bit(mask, end + 1)
+    return ','.join(parts)
+
+def format_day_field(mask: int, first: int, last: int, star: bool) -> str:
+    """
+    A day field that starts with '*' again when it did (see month_days): '*', '*/n', or
+    '*/<span>' (the first day alone) followed by the other days
+    """
+    if not star:
+        return format_cron_field(mask, first, last, restricted=True)
+    span = last - first + 1
+    for step in range(1, span + 1):
+        if mask == sum(1 << value for value in range(first, last + 1, step)):
+            return '*' if step == 1 else f"*/{step}"
+    return f"*/{span}," + format_cron_field(mask & ~(1 << first), first, last, restricted=True)
+
+def get_schedule_timezone(name: str):
+    """tzinfo of an IANA timezone name, None for UTC"""
+    if name.upper() in ('UTC', 'ETC/UTC', 'GMT', 'Z'):
+        return None
+    tzinfo = dateutil_tz.gettz(name) if '/' in name else None
+    if tzinfo is None:
+        raise ScheduleError(f"unknown timezone '{name}'")
+    return tzinfo
+
+class CompiledSchedule:
+    """A report schedule as bitsets, in the wall clock time of its timezone"""
+    __slots__ = ('minutes', 'hours', 'days_of_month', 'months', 'days_of_week',
+                 'day_of_month_star', 'day_of_week_star', 'timezone', 'tzinfo')
+
+    def __init__(self, fields: List[str], timezone_name: str):
+        if len(fields) != 5:
+            raise ScheduleError("a cron expression needs 5 fields (minute hour day-of-month month day-of-week)")
+        minute, hour, day_of_month, month, day_of_week = fields
+        self.minutes = parse_cron_field(minute, 0, 59)
+        self.hours = parse_cron_field(hour, 0, 23)
+        self.days_of_month = parse_cron_field(day_of_month, 1, 31)
+        self.months = parse_cron_field(month, 1, 12, CRON_MONTH_NAMES)
+        days_of_week = parse_cron_field(day_of_week, 0, 7, CRON_DAY_NAMES)
+        self.days_of_week = (days_of_week | days_of_week >> 7) & 0x7F  # 7 is Sunday too
+        # Like cron: a day field starting with '*' (even '*/2') makes a day match both fields,
+        # otherwise a day matching either one fires
+        self.day_of_month_star = day_of_month.startswith(('*', '?'))
+        self.day_of_week_star = day_of_week.startswith(('*', '?'))
+        self.timezone = timezone_name
+        self.tzinfo = get_schedule_timezone(timezone_name)
+
+    @property
+    def cron(self) -> str:
+        return ' '.join([
+            format_cron_field(self.minutes, 0, 59),
+            format_cron_field(self.hours, 0, 23),
+            format_day_field(self.days_of_month, 1, 31, self.day_of_month_star),
+            format_cron_field(self.months, 1, 12),
+            format_day_field(self.days_of_week, 0, 6, self.day_of_week_star)
+        ])
+
+    @property
+    def canonical(self) -> str:
+        """Normalized cron and timezone, compiling back into the same schedule (the day fields keep their '*')"""
+        return json.dumps({'cron': self.cron, 'timezone': self.timezone}, sort_keys=True)
+
+    def month_days(self, year: int, month: int) -> int:
+        """Bitset of the days of a month the schedule fires on (bit 1 = the 1st)"""
+        first_weekday, length = calendar.monthrange(year, month)
+        valid = ((1 << length) - 1) << 1
+        by_day_of_month = self.days_of_month & valid
+        if self.day_of_week_star and self.days_of_week == 0x7F:
+            return by_day_of_month
+        # Rotate the week so that bit 0 is the weekday of the 1st (cron counts from Sunday)
+        shift = (first_weekday + 1) % 7
+        week = ((self.days_of_week >> shift) | (self.days_of_week << (7 - shift))) & 0x7F
+        by_day_of_week = ((week * WEEK_REPEAT) << 1) & valid
+        if self.day_of_month_star or self.day_of_week_star:
+            return by_day_of_month & by_day_of_week
+        return by_day_of_month | by_day_of_week
+
+    def next_local_time(self, start: datetime) -> Optional[datetime]:
+        """First wall clock minute at or after start (naive, local) matching the bitsets"""
+        year, month, day, hour, minute = start.year, start.month, start.day, start.hour, start.minute
+        while year <= start.year + SCHEDULE_SEARCH_YEARS:
+            next_month = next_set_bit(self.months, month)
+            if next_month < 0:
+                year, month, day, hour, minute = year + 1, 1, 1, 0, 0
+                continue
+            if next_month != month:
+                month, day, hour, minute = next_month, 1, 0, 0
+            next_day = next_set_bit(self.month_days(year, month), day)
+            if next_day < 0:
+                month, day, hour, minute = month + 1, 1, 0, 0
+                continue
+            if next_day != day:
+                day, hour, minute = next_day, 0, 0
+            next_hour = next_set_bit(self.hours, hour)
+            if next_hour < 0:
+                day, hour, minute = day + 1, 0, 0
+                continue
+            if next_hour != hour:
+                hour, minute = next_hour, 0
+            next_minute = next_set_bit(self.minutes, minute)
+            if next_minute < 0:
+                hour, minute = hour + 1, 0
+                continue
+            return datetime(year, month, day, hour, next_minute)
+        return None
+
+    def to_utc(self, local: datetime) -> datetime:
+        """UTC (naive) of a wall clock time: skipped by a DST change it runs right after it"""
+        aware = local.replace(tzinfo=self.tzinfo)
+        if not dateutil_tz.datetime_exists(aware):
+            aware = dateutil_tz.resolve_imaginary(aware)
+        return aware.astimezone(timezone.utc).replace(tzinfo=None)
+
+    def next_run_at(self, start: datetime) -> Optional[datetime]:
+        """First minute at or after start (UTC, naive) when the schedule fires; None if it never does"""
+        start = start.replace(second=0, microsecond=0)
+        if self.tzinfo is None:
+            return self.next_local_time(start)
+        local = self.next_local_time(start.replace(tzinfo=timezone.utc).astimezone(self.tzinfo).replace(tzinfo=None))
+        while local is not None:
+            run_at = self.to_utc(local)
+            if run_at >= start:
+                return run_at
+            # A wall clock time repeated when the clocks go back fires the first time only
+            local = self.next_local_time(local + timedelta(minutes=1))
+        return None
+
+    def fires_at(self, moment: datetime) -> bool:
+        """Whether the schedule fires in the minute of moment (UTC, naive)"""
+        moment = moment.replace(second=0, microsecond=0)
+        return self.next_run_at(moment) == moment
+
+def compile_legacy_schedule(schedule: Dict, strict: bool = True) -> List[str]:
+    """
+    Cron fields of a dashboard schedule object (frequency, time, day_of_week, day_of_month)
+
+    Stored schedules are read with strict=False: an unreadable time falls back to 09:00, as it
+    always did, with a warning, instead of leaving the connector without reports.
+    """
+    frequency = schedule.get('frequency', 'daily')
+    if frequency not in SCHEDULE_FREQUENCIES:
+        raise ScheduleError(f"frequency must be one of {', '.join(SCHEDULE_FREQUENCIES)} or cron")
+    time_text = str(schedule.get('time', '09:00'))
+    hour_text, _, minute_text = time_text.partition(':')
+    if not (hour_text.isdigit() and minute_text.isdigit() and int(hour_text) < 24 and int(minute_text) < 60):
+        if strict:
+            raise ScheduleError(f"time must be HH:MM, got '{time_text}'")
+        logger.warning(f"Schedule time '{time_text}' is not HH:MM, falling back to 09:00")
+        hour_text, minute_text = '9', '0'
+
+    day_of_month = day_of_week = '*'
+    if frequency == 'weekly':
+        # The dashboard sends Sunday as 0
+        day_of_week = str(schedule.get('day_of_week', '1'))
+        if day_of_week not in [str(day) for day in range(0, 8)]:
+            raise ScheduleError("day_of_week must be 1 (Monday) to 7 (Sunday), or 0 (Sunday)")
+    elif frequency == 'monthly':
+        day_of_month = str(schedule.get('day_of_month', '1'))
+        if day_of_month not in [str(day) for day in range(1, 32)]:
+            raise ScheduleError("day_of_month must be 1 to 31")
+    return [str(int(minute_text)), str(int(hour_text)), day_of_month, '*', day_of_week]
+
+@functools.lru_cache(maxsize=SCHEDULE_CACHE_SIZE)
+def compile_schedule_text(schedule_text: str, strict: bool = False) -> CompiledSchedule:
+    text = schedule_text.strip()
+    if not text.startswith('{'):
+        # Bare cron expression ('' is the default daily schedule)
+        if not text:
+            return CompiledSchedule(compile_legacy_schedule({}), SCHEDULE_DEFAULT_TIMEZONE)
+        return CompiledSchedule(text.split(), SCHEDULE_DEFAULT_TIMEZONE)
+
+    try:
+        schedule = json.loads(text)
+    except ValueError:
+        raise ScheduleError("not valid JSON")
+    if not isinstance(schedule, dict):
+        raise ScheduleError("expected a JSON object or a cron expression")
+    timezone_name = str(schedule.get('timezone') or SCHEDULE_DEFAULT_TIMEZONE)
+    if schedule.get('cron') or schedule.get('frequency') == 'cron':
+        return CompiledSchedule(str(schedule.get('cron', '')).split(), timezone_name)
+    return CompiledSchedule(compile_legacy_schedule(schedule, strict), timezone_name)
+
+def compile_schedule(report_schedule, strict: bool = False) -> CompiledSchedule:
+    """
+    Compiled form of a report_schedule attribute (JSON string, object or cron string), cached per string
+
+    strict rejects what stored schedules are forgiven (see compile_legacy_schedule): the API
+    validates new schedules with it.
+    """
+    if report_schedule is None:
+        report_schedule = ''
+    elif not isinstance(report_schedule, str):
+        report_schedule = json.dumps(report_schedule, sort_keys=True, default=str)
+    return compile_schedule_text(report_schedule, strict)
@@ -0,0 +1,26 @@
+"""
+Test setup: the Lambda sources, the schedule engine layer and the scripts (setera_xml_generator)
+are importable as top-level modules
+
+The functions read their configuration at import time; the AWS clients they create are never
+called by the tests.
+"""
+import os
+import sys
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+for name, value in (('REGION', 'eu-central-1'), ('AWS_DEFAULT_REGION', 'eu-central-1'),
+                    ('TENANTS_TABLE', 'test-tenants'), ('USERS_TABLE', 'test-users'),
+                    ('REPORTS_TABLE', 'test-reports'), ('USER_POOL_ID', 'test-pool'),
+                    ('EMAIL_SENDER_FUNCTION', 'test-email-sender'),
+                    ('FETCH_STATE_TABLE', 'test-fetch-state')):
+    os.environ.setdefault(name, value)
+# Nothing persistent unless a test configures it
+for name in ('REPORT_CACHE_BUCKET', 'REPORT_CACHE_DIR', 'EXPORT_ARCHIVE_BUCKET', 'EXPORT_ARCHIVE_DIR',
+             'SCHEDULE_TABLE', 'REPORT_RUNS_TABLE', 'REPORT_QUEUE_URL', 'SCHEDULE_DEFAULT_TIMEZONE'):
+    os.environ.pop(name, None)
+
+for directory in ('api', 'report-generator', 'schedule-engine'):
+    sys.path.insert(0, os.path.join(SRC_DIR, directory))
+sys.path.insert(0, os.path.join(SRC_DIR, '..', 'scripts'))
@@ -0,0 +1,86 @@
+"""Delta merging (RecordMerger): the single-day exports of a window merged like one Setera export"""
+from datetime import date
+
+import report_generator as rg
+
+
+def record(grouping, period, **values):
+    return [grouping, [['period', period], ['name', 'Coda 1']] + [[tag, value] for tag, value in values.items()]]
+
+
+def merged_values(merger):
+    return [(grouping, {child.tag: child.text for child in element}) for grouping, element in merger.records()]
+
+
+def test_counts_are_summed_and_averages_weighted_by_their_column():
+    merger = rg.RecordMerger()
+    merger.add(date(2025, 11, 10), [record('period', '10/11/2025', incoming_total='10', incoming_answered='8',
+                                           incoming_answered_average_queue_time='00:00:10',
+                                           incoming_percent_answered='80')])
+    merger.add(date(2025, 11, 11), [record('period', '11/11/2025', incoming_total='30', incoming_answered='2',
+                                           incoming_answered_average_queue_time='00:01:00',
+                                           incoming_percent_answered='6.66666666666667')])
+    [(grouping, values)] = merged_values(merger)
+    assert grouping == 'period'
+    assert values['period'] == '10/11/2025 -> 11/11/2025'
+    assert (values['incoming_total'], values['incoming_answered']) == ('40', '10')
+    # (8 * 10 s + 2 * 60 s) / 10 answered, not the mean of the two days (35 s)
+    assert values['incoming_answered_average_queue_time'] == '00:00:20'
+    # (10 * 80 + 30 * 6.67) / 40 calls = 25 %: the percentage of the merged counts
+    assert float(values['incoming_percent_answered']) == 25.0
+
+
+def test_other_averaged_columns_are_a_plain_mean():
+    merger = rg.RecordMerger()
+    merger.add(date(2025, 11, 10), [record('period', '10/11/2025', agents_average_occupancy='40')])
+    merger.add(date(2025, 11, 11), [record('period', '11/11/2025', agents_average_occupancy='60')])
+    merger.add(date(2025, 11, 12), [record('period', '12/11/2025', agents_average_occupancy='')])
+    [(_, values)] = merged_values(merger)
+    assert values['agents_average_occupancy'] == '50'
+
+
+def test_a_weighted_average_without_weight_is_zero():
+    merger = rg.RecordMerger()
+    for day in (10, 11):
+        merger.add(date(2025, 11, day), [record('period', f"{day}/11/2025", incoming_answered='0',
+                                                incoming_answered_average_queue_time='00:00:00')])
+    [(_, values)] = merged_values(merger)
+    assert values['incoming_answered_average_queue_time'] == '00:00:00'
+
+
+def test_daily_records_stay_apart_and_time_slots_are_merged_in_order():
+    merger = rg.RecordMerger()
+    merger.add(date(2025, 11, 10), [record('day', '10/11/2025', incoming_total='4'),
+                                    record('time', '10:00', incoming_total='1'),
+                                    record('time', '09:00', incoming_total='3'),
+                                    record('period', 'Total', incoming_total='4')])
+    merger.add(date(2025, 11, 11), [record('day', '11/11/2025', incoming_total='5'),
+                                    record('time', '09:00', incoming_total='5'),
+                                    record('period', 'Total', incoming_total='5')])
+    values = [(grouping, record_values['period'], record_values['incoming_total'])
+              for grouping, record_values in merged_values(merger)]
+    assert values == [('day', '10/11/2025', '4'), ('day', '11/11/2025', '5'),
+                      ('time', '09:00', '8'), ('time', '10:00', '1'), ('period', 'Total', '9')]
+
+
+def test_dynamic_columns_are_merged_per_column_key():
+    def dynamic(*columns):
+        return ['period', [['period', 'x'], ['name', 'Coda 1'], ['incoming_by_reason', [list(column) for column in columns]]]]
+
+    merger = rg.RecordMerger()
+    merger.add(date(2025, 11, 10), [dynamic(('busy', 'Occupato', '2'), ('noanswer', 'Nessuna risposta', '1'))])
+    merger.add(date(2025, 11, 11), [dynamic(('busy', 'Occupato', '3'))])
+    [(_, element)] = list(merger.records())
+    columns = [(column.findtext('column_key'), column.findtext('column_value'))
+               for column in element.find('incoming_by_reason').findall('dynamic_column')]
+    assert columns == [('busy', '5'), ('noanswer', '1')]
+    assert element.findtext('period') == '10/11/2025 -> 11/11/2025'
+
+
+def test_a_single_value_is_kept_as_exported():
+    merger = rg.RecordMerger()
+    merger.add(date(2025, 11, 10), [record('period', '10/11/2025', incoming_service_level='87.50')],
+               last_day=date(2025, 11, 12))
+    [(_, values)] = merged_values(merger)
+    assert values['incoming_service_level'] == '87.50'
+    assert values['period'] == '10/11/2025 -> 12/11/2025'
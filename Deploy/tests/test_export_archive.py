@@ -0,0 +1,37 @@
+"""Raw export archive: content-addressed objects indexed by connector and period"""
+import hashlib
+import os
+
+import report_generator as rg
+
+
+def archive_export(archive, body, connector_ids, period):
+    writer = rg.ArchiveWriter()
+    assert b''.join(writer.tee([body[:10], body[10:]])) == body
+    content_hash = hashlib.sha256(body).hexdigest()
+    archive.store_export(writer, content_hash, connector_ids, period, 'https://setera.example/export.xml', 'acd')
+    return content_hash
+
+
+def test_exports_are_stored_once_and_indexed_per_connector_and_period(tmp_path):
+    archive = rg.ExportArchive(rg.FileArchiveStore(str(tmp_path)))
+    body = b'<report><queue>Coda 1</queue></report>'
+    content_hash = archive_export(archive, body, ['c1', 'c/2'], '2025-11-01_2025-11-30')
+    assert archive_export(archive, body, ['c1'], '2025-11-01_2025-11-30') == content_hash
+
+    objects = os.listdir(tmp_path / 'objects' / content_hash[:2])
+    assert objects == [f"{content_hash}.xml.gz"]
+    assert b''.join(archive.iter_export(content_hash)) == body
+
+    entries = archive.list_exports('c1')
+    assert [entry['object_key'] for entry in entries] == [rg.ExportArchive.object_key(content_hash)] * 2
+    assert entries[0]['raw_bytes'] == len(body)
+    assert [entry['connector_id'] for entry in archive.list_exports('c/2', '2025-11-01_2025-11-30')] == ['c/2']
+    assert archive.list_exports('c1', '2025-10-01_2025-10-31') == []
+    assert os.path.isdir(tmp_path / 'index' / 'c%2F2' / '2025-11-01_2025-11-30')
+
+
+def test_archive_period_of_a_report_range():
+    assert rg.get_archive_period('10/11/2025 -> 13/11/2025') == '2025-11-10_2025-11-13'
+    assert rg.get_archive_period('13/11/2025') == '2025-11-13_2025-11-13'
+    assert rg.get_archive_period('') == 'undated'
@@ -0,0 +1,43 @@
+"""Coarse groupings (week, yearmonth) retained for the prompts and decoded on first use"""
+import json
+
+import report_generator as rg
+import setera_xml_generator
+
+
+def parse_export(days):
+    return rg.parse_xml_report(setera_xml_generator.generate_setera_xml(setera_xml_generator.GeneratorConfig(
+        report_type='acd', entities=3, groups=1, days=days)))
+
+
+def test_only_the_groupings_a_prompt_reads_are_exposed():
+    period_groupings = parse_export(40)['period_groupings']
+    # The export also has month, quarter, year and period records: they are not kept
+    assert sorted(period_groupings) == sorted(rg.LAZY_GROUPINGS)
+    assert sorted(period_groupings) == sorted(grouping for grouping, _ in rg.PROMPT_PERIOD_BREAKDOWNS)
+    for lazy_grouping in period_groupings.values():
+        assert len(lazy_grouping) > 1
+        assert len(lazy_grouping.group_rows()) == len(lazy_grouping)  # One group, one row per period
+
+
+def test_records_are_decoded_on_first_use():
+    week = parse_export(40)['period_groupings']['week']
+    assert not week.decoded and week.elements
+    rows = week.rows()
+    assert week.decoded and not week.elements
+    assert [row['period'] for row in week.group_rows()] == week.periods
+    assert sum(row['incoming_total'] for row in week.group_rows()) == week.total['incoming_total']
+    assert len(rows) > len(week.periods)  # Object rows too
+
+
+def test_a_single_period_export_keeps_no_grouping():
+    data = parse_export(1)
+    assert data['period_groupings'] == {}
+    assert rg.format_period_breakdowns(data) == ''
+
+
+def test_groupings_survive_the_report_cache():
+    week = parse_export(40)['period_groupings']['week']
+    restored = rg.deserialize_cache_value(rg.serialize_cache_value({'week': week}))['week']
+    assert restored.periods == week.periods
+    assert json.dumps(restored.group_rows(), cls=rg.DecimalEncoder) == json.dumps(week.group_rows(), cls=rg.DecimalEncoder)
@@ -0,0 +1,46 @@
+"""Report cache: keys carrying the parser and prompt versions, tiers and counters"""
+import os
+
+import report_generator as rg
+
+
+class BrokenStore:
+    def get(self, key):
+        raise OSError('bucket unavailable')
+
+    def put(self, key, value):
+        raise OSError('bucket unavailable')
+
+
+def test_cache_keys_carry_the_parser_and_prompt_versions(tmp_path):
+    cache = rg.ReportCache(rg.FileCacheStore(str(tmp_path), 3600))
+    cache.put_parsed('abc', {'rows': 1})
+    cache.put_insights('abc', 'Analisi')
+    files = sorted(os.path.relpath(os.path.join(directory, name), tmp_path)
+                   for directory, _, names in os.walk(tmp_path) for name in names)
+    assert files == [os.path.join('insights', f"abc-p{rg.PARSER_VERSION}-q{rg.PROMPT_VERSION}.json.gz"),
+                     os.path.join('parsed', f"abc-p{rg.PARSER_VERSION}.json.gz")]
+
+
+def test_counters_tell_memory_hits_from_persistent_hits_and_misses(tmp_path):
+    store = rg.FileCacheStore(str(tmp_path), 3600)
+    rg.ReportCache(store).put_parsed('abc', {'rows': 1})
+    cache = rg.ReportCache(store)  # A cold invocation: only the persistent tier has the entry
+    assert cache.get_parsed('abc') == {'rows': 1}
+    assert cache.get_parsed('abc') == {'rows': 1}
+    assert cache.get_parsed('def') is None
+    assert cache.get_insights('abc') is None
+    assert cache.snapshot() == {
+        'parsed': {'memory_hits': 1, 'persistent_hits': 1, 'misses': 1, 'stores': 0},
+        'insights': {'memory_hits': 0, 'persistent_hits': 0, 'misses': 1, 'stores': 0}
+    }
+    cache.reset_counters()
+    assert cache.snapshot()['parsed'] == {'memory_hits': 0, 'persistent_hits': 0, 'misses': 0, 'stores': 0}
+
+
+def test_persistent_tier_errors_are_misses():
+    cache = rg.ReportCache(BrokenStore())
+    cache.put_insights('abc', 'Analisi')
+    assert cache.get_insights('abc') == 'Analisi'  # From memory
+    assert cache.get_insights('def') is None
+    assert cache.snapshot()['insights'] == {'memory_hits': 1, 'persistent_hits': 0, 'misses': 1, 'stores': 1}
@@ -0,0 +1,75 @@
+"""Report jobs: the local queue and the dispatch of one job per export group"""
+import threading
+from decimal import Decimal
+
+import report_generator as rg
+
+
+def group(*connector_ids):
+    return [{'user_id': f"user-{connector_id}", 'tenant_id': 'tenant', 'connector_id': connector_id,
+             'schedule_slot': '2025-11-13T09:00:00Z'} for connector_id in connector_ids]
+
+
+def test_local_queue_with_one_worker_runs_each_job_when_it_is_sent():
+    ran = []
+    queue = rg.LocalReportQueue(concurrency=1, worker=lambda job: ran.append(job) or [True] * len(job['connectors']))
+    queue.send([{'job_id': 'a', 'connectors': [{'connector_id': 'c1', 'weight': Decimal('2')}]}])
+    # Sent through JSON like an SQS message body
+    assert ran == [{'job_id': 'a', 'connectors': [{'connector_id': 'c1', 'weight': 2}]}]
+    assert queue.join() == [[True]]
+    assert queue.join() == []
+
+
+def test_local_queue_results_keep_the_order_jobs_were_sent_in():
+    release = threading.Event()
+
+    def worker(job):
+        if job['job_id'] == 'slow':
+            release.wait(5)
+        return [job['job_id'] == 'slow'] * len(job['connectors'])
+
+    queue = rg.LocalReportQueue(concurrency=4, worker=worker)
+    queue.send([{'job_id': 'slow', 'connectors': [{}]}, {'job_id': 'fast', 'connectors': [{}, {}]}])
+    release.set()
+    assert queue.join() == [[True], [False, False]]
+
+
+def test_local_queue_job_that_raises_fails_its_connectors():
+    def worker(job):
+        raise RuntimeError('users table unavailable')
+
+    queue = rg.LocalReportQueue(concurrency=1, worker=worker)
+    assert queue.send([{'job_id': 'a', 'connectors': [{}, {}, {}]}]) == []
+    assert queue.join() == [[False, False, False]]
+
+
+def test_dispatch_sends_one_job_per_export_group(monkeypatch):
+    jobs = []
+
+    def worker(job):
+        jobs.append(job)
+        return [connector['connector_id'] != 'c3' for connector in job['connectors']]
+
+    monkeypatch.setattr(rg, 'report_queue', rg.LocalReportQueue(concurrency=2, worker=worker))
+    summary = rg.dispatch_report_jobs([group('c1', 'c2'), group('c3')])
+    assert summary == {'jobs': 2, 'queued': 2, 'successful': 2, 'failed': 1}
+    connectors = sorted([connector['connector_id'], connector['slot']] for job in jobs for connector in job['connectors'])
+    assert connectors == [['c1', '2025-11-13T09:00:00Z'], ['c2', '2025-11-13T09:00:00Z'], ['c3', '2025-11-13T09:00:00Z']]
+    assert all(job['job_type'] == rg.REPORT_JOB_TYPE for job in jobs)
+
+
+def test_dispatch_records_the_connectors_of_unqueued_jobs_as_failed(monkeypatch):
+    class RefusingQueue:
+        def send(self, jobs):
+            return jobs[1:]
+
+        def join(self):
+            return [[True]]
+
+    history = []
+    monkeypatch.setattr(rg, 'report_queue', RefusingQueue())
+    monkeypatch.setattr(rg, 'save_report_history',
+                        lambda user_id, user_data, insights, status='generated': history.append((user_id, status)))
+    summary = rg.dispatch_report_jobs([group('c1'), group('c2', 'c3')])
+    assert summary == {'jobs': 2, 'queued': 1, 'successful': 1, 'failed': 2}
+    assert history == [('user-c2', 'failed'), ('user-c3', 'failed')]
@@ -0,0 +1,227 @@
+"""Report runs: run records (claim, finish, release, skip) and the catch-up of missed slots"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import report_generator as rg
+from schedule_engine import compile_schedule
+
+
+class ConditionalCheckFailedException(Exception):
+    pass
+
+
+class FakeRunsTable:
+    """In-memory report runs table evaluating the condition expressions the run records use"""
+
+    def __init__(self):
+        self.items = {}
+        self.meta = type('Meta', (), {'client': type('Client', (), {
+            'exceptions': type('Exceptions', (), {'ConditionalCheckFailedException': ConditionalCheckFailedException})
+        })})
+
+    def check(self, item, condition, values):
+        if condition == 'attribute_not_exists(run_id)':
+            passed = item is None
+        elif condition == 'attribute_not_exists(run_id) OR (#status = :running AND lease_until < :now)':
+            passed = item is None or (item['status'] == values[':running'] and item['lease_until'] < values[':now'])
+        elif condition == '#status = :running':
+            passed = item is not None and item['status'] == values[':running']
+        else:
+            raise AssertionError(f"unexpected condition {condition}")
+        if not passed:
+            raise ConditionalCheckFailedException(condition)
+
+    def put_item(self, Item, ConditionExpression=None, ExpressionAttributeValues=None, **kwargs):
+        if ConditionExpression:
+            self.check(self.items.get(Item['run_id']), ConditionExpression, ExpressionAttributeValues or {})
+        self.items[Item['run_id']] = dict(Item)
+
+    def update_item(self, Key, ExpressionAttributeValues, **kwargs):
+        item = self.items.setdefault(Key['run_id'], dict(Key))
+        item.update(status=ExpressionAttributeValues[':done'], outcome=ExpressionAttributeValues[':outcome'],
+                    finished_at=ExpressionAttributeValues[':finished_at'])
+
+    def delete_item(self, Key, ConditionExpression=None, ExpressionAttributeValues=None, **kwargs):
+        if ConditionExpression:
+            self.check(self.items.get(Key['run_id']), ConditionExpression, ExpressionAttributeValues or {})
+        self.items.pop(Key['run_id'], None)
+
+
+@pytest.fixture
+def runs_table(monkeypatch):
+    table = FakeRunsTable()
+    monkeypatch.setattr(rg, 'report_runs_table', table)
+    return table
+
+
+@pytest.fixture
+def history(monkeypatch):
+    saved = []
+    monkeypatch.setattr(rg, 'save_report_history',
+                        lambda user_id, user_data, insights, status='generated': saved.append((user_id, insights, status)))
+    return saved
+
+
+def connector(slot='2025-11-13T09:00:00Z'):
+    return {'user_id': 'user-1', 'connector_id': 'connector-1', 'schedule_slot': slot}
+
+
+def test_a_slot_is_claimed_once(runs_table):
+    assert rg.claim_report_run(connector())
+    assert not rg.claim_report_run(connector())
+    assert rg.claim_report_run(connector('2025-11-14T09:00:00Z'))
+    assert runs_table.items['connector-1#2025-11-13T09:00:00Z']['status'] == rg.REPORT_RUN_RUNNING
+
+
+def test_a_finished_run_is_never_claimed_again(runs_table):
+    assert rg.claim_report_run(connector())
+    rg.finish_report_run(connector(), False)
+    item = runs_table.items['connector-1#2025-11-13T09:00:00Z']
+    assert (item['status'], item['outcome']) == (rg.REPORT_RUN_DONE, 'failed')
+    assert not rg.claim_report_run(connector())
+
+
+def test_a_run_past_its_lease_can_be_claimed_again(runs_table):
+    assert rg.claim_report_run(connector())
+    item = runs_table.items['connector-1#2025-11-13T09:00:00Z']
+    item['lease_until'] = (datetime.utcnow() - timedelta(seconds=1)).isoformat()
+    assert rg.claim_report_run(connector())
+    assert not rg.claim_report_run(connector())
+
+
+def test_release_drops_running_records_only(runs_table):
+    assert rg.claim_report_run(connector())
+    rg.release_report_run(connector())
+    assert rg.claim_report_run(connector())
+    rg.finish_report_run(connector(), True)
+    rg.release_report_run(connector())  # Logged, the done record stays
+    assert runs_table.items['connector-1#2025-11-13T09:00:00Z']['outcome'] == 'sent'
+
+
+def test_a_skipped_slot_is_recorded_once(runs_table, history):
+    rg.skip_report_run(connector(), 'too late')
+    rg.skip_report_run(connector(), 'too late')
+    item = runs_table.items['connector-1#2025-11-13T09:00:00Z']
+    assert (item['status'], item['outcome'], item['reason']) == (rg.REPORT_RUN_DONE, 'failed', 'too late')
+    assert history == [('user-1', 'Error: too late', 'failed')]
+    assert not rg.claim_report_run(connector())
+
+
+def test_a_superseded_slot_is_recorded_as_skipped(runs_table, history):
+    rg.skip_report_run(connector(), 'superseded', 'skipped_superseded')
+    assert runs_table.items['connector-1#2025-11-13T09:00:00Z']['outcome'] == 'skipped_superseded'
+    assert history == [('user-1', 'superseded', 'skipped_superseded')]
+
+
+def test_a_slot_that_ran_is_not_skipped(runs_table, history):
+    assert rg.claim_report_run(connector())
+    rg.finish_report_run(connector(), True)
+    rg.skip_report_run(connector(), 'too late')
+    assert runs_table.items['connector-1#2025-11-13T09:00:00Z']['outcome'] == 'sent'
+    assert history == []
+
+
+def test_without_a_table_or_a_slot_every_run_is_claimed(monkeypatch, runs_table):
+    assert rg.claim_report_run(connector(''))
+    assert rg.claim_report_run(connector(''))
+    assert runs_table.items == {}
+    monkeypatch.setattr(rg, 'report_runs_table', None)
+    assert rg.claim_report_run(connector())
+    assert rg.claim_report_run(connector())
+
+
+class FakeScheduleTable:
+    """In-memory schedule index: query returns every entry due, updates are conditional on next_run_at"""
+
+    def __init__(self, entries):
+        self.entries = {entry['connector_id']: dict(entry) for entry in entries}
+        self.meta = FakeRunsTable().meta
+
+    def query(self, ExpressionAttributeValues, **kwargs):
+        now = ExpressionAttributeValues[':now']
+        return {'Items': [dict(entry) for entry in self.entries.values() if entry['next_run_at'] <= now]}
+
+    def update_item(self, Key, ExpressionAttributeValues, **kwargs):
+        entry = self.entries[Key['connector_id']]
+        if entry['next_run_at'] != ExpressionAttributeValues[':current']:
+            raise ConditionalCheckFailedException()
+        entry.update(next_run_at=ExpressionAttributeValues[':next'], last_run_at=ExpressionAttributeValues[':fired'],
+                     report_schedule=ExpressionAttributeValues[':schedule'])
+
+    def delete_item(self, Key, **kwargs):
+        self.entries.pop(Key['connector_id'])
+
+
+class FakeUsersTable:
+    def __init__(self, user):
+        self.user = user
+
+    def get_item(self, Key):
+        return {'Item': self.user}
+
+
+def frozen_datetime(now):
+    class FrozenDatetime(datetime):
+        @classmethod
+        def utcnow(cls):
+            return now
+    return FrozenDatetime
+
+
+@pytest.fixture
+def schedule_index(monkeypatch, runs_table, history):
+    """A daily 09:00 connector whose watermark is the 10/11 slot: three slots were missed"""
+    report_schedule = json.dumps({'frequency': 'daily', 'time': '09:00'})
+    table = FakeScheduleTable([{'connector_id': 'connector-1', 'user_id': 'user-1', 'tenant_id': 'tenant',
+                                'next_run_at': '2025-11-10T09:00:00Z',
+                                'report_schedule': compile_schedule(report_schedule).canonical}])
+    monkeypatch.setattr(rg, 'schedule_table', table)
+    monkeypatch.setattr(rg, 'users_table', FakeUsersTable({
+        'user_id': 'user-1', 'tenant_id': 'tenant', 'role': 'User', 'email': 'user@example.com',
+        'connectors': [{'connector_id': 'connector-1', 'report_enabled': True, 'report_schedule': report_schedule,
+                        'xml_endpoint': 'https://setera.example/export.xml'}]}))
+    return table
+
+
+def tick(monkeypatch, now):
+    monkeypatch.setattr(rg, 'datetime', frozen_datetime(now))
+    return [user['schedule_slot'] for user in rg.get_due_connector_users()]
+
+
+def test_missed_slots_collapse_into_the_latest_one(monkeypatch, schedule_index, runs_table, history):
+    assert tick(monkeypatch, datetime(2025, 11, 13, 9, 10)) == ['2025-11-13T09:00:00Z']
+    assert schedule_index.entries['connector-1']['next_run_at'] == '2025-11-14T09:00:00Z'
+    assert schedule_index.entries['connector-1']['last_run_at'] == '2025-11-13T09:00:00Z'
+    assert [(run_id, item['outcome']) for run_id, item in sorted(runs_table.items.items())] == [
+        (f"connector-1#2025-11-{day}T09:00:00Z", 'skipped_superseded') for day in (10, 11, 12)]
+    assert [status for _, _, status in history] == ['skipped_superseded'] * 3
+    # The next tick has nothing left to catch up
+    assert tick(monkeypatch, datetime(2025, 11, 13, 9, 11)) == []
+
+
+def test_a_latest_slot_past_the_lateness_limit_is_not_run(monkeypatch, schedule_index, runs_table, history):
+    now = datetime(2025, 11, 13, 9, 0) + timedelta(minutes=rg.SCHEDULE_MAX_LATENESS_MINUTES + 1)
+    assert tick(monkeypatch, now) == []
+    assert schedule_index.entries['connector-1']['next_run_at'] == '2025-11-14T09:00:00Z'
+    assert [item['outcome'] for item in runs_table.items.values()] == ['failed'] * 4
+    assert [status for _, _, status in history] == ['failed'] * 4
+
+
+def test_due_slots_walk_every_missed_slot_up_to_the_limit():
+    schedule = compile_schedule('0 9 * * *')
+    watermark = datetime(2025, 11, 10, 9, 1)
+    now = datetime(2025, 11, 13, 9, 30)
+    assert rg.get_due_slots(schedule, watermark, now) == [datetime(2025, 11, day, 9, 0) for day in (11, 12, 13)]
+    assert rg.get_due_slots(schedule, watermark, now, limit=2) == [datetime(2025, 11, day, 9, 0) for day in (11, 12)]
+    assert rg.get_due_slots(schedule, now, now) == []
+
+
+def test_the_lateness_limit_does_not_grow_with_the_schedule_period():
+    slot = datetime(2025, 11, 13, 9, 0)
+    limit = timedelta(minutes=rg.SCHEDULE_MAX_LATENESS_MINUTES)
+    assert not rg.is_slot_too_late(slot, slot + limit)
+    assert rg.is_slot_too_late(slot, slot + limit + timedelta(minutes=1))
+    assert rg.is_report_run_too_late({'schedule_slot': '2025-11-13T09:00:00Z', 'report_schedule': '0 9 * * 1'},
+                                     slot + timedelta(days=1))
@@ -0,0 +1,152 @@
+"""Schedule engine (schedule_engine.py): parsing, next runs against a minute-by-minute walk, DST"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import schedule_engine
+from schedule_engine import ScheduleError, compile_schedule
+
+
+def fires_on_day(schedule, local):
+    """Cron's day rule: both day fields when one starts with '*', otherwise either"""
+    by_day_of_month = schedule.days_of_month >> local.day & 1
+    by_day_of_week = schedule.days_of_week >> (local.weekday() + 1) % 7 & 1
+    if schedule.day_of_month_star or schedule.day_of_week_star:
+        return by_day_of_month and by_day_of_week
+    return by_day_of_month or by_day_of_week
+
+
+def walk_next_run(schedule, start, days):
+    """Reference next run: the first UTC minute whose wall clock time matches the fields"""
+    moment = start.replace(second=0, microsecond=0)
+    end = moment + timedelta(days=days)
+    while moment < end:
+        local = moment
+        if schedule.tzinfo is not None:
+            local = moment.replace(tzinfo=timezone.utc).astimezone(schedule.tzinfo).replace(tzinfo=None)
+        if (schedule.months >> local.month & 1 and schedule.hours >> local.hour & 1
+                and schedule.minutes >> local.minute & 1
+                and fires_on_day(schedule, local)):
+            return moment
+        moment += timedelta(minutes=1)
+    return None
+
+
+@pytest.mark.parametrize('cron', ['0 9 * * 1-5', '*/15 8-18 * * MON-FRI', '30 1 * * *', '0 9 31 * *',
+                                  '0 12 1,15 * 5', '0 9 * * 7', '5 4 * JAN-MAR,jul-OCT sun', '0 */6 */2 * *',
+                                  '0 9 */2 * 1', '0 9 1-31 * 1', '0 9 15 * */2', '0 9 */10,4 * 1-5'])
+@pytest.mark.parametrize('timezone_name', ['UTC', 'Europe/Rome'])
+def test_next_run_matches_minute_walk(cron, timezone_name):
+    schedule = compile_schedule({'cron': cron, 'timezone': timezone_name})
+    start = datetime(2025, 1, 1, 0, 7)
+    for _ in range(8):
+        expected = walk_next_run(schedule, start, 130)
+        assert schedule.next_run_at(start) == expected
+        start += timedelta(days=43, hours=5, minutes=13)
+
+
+def test_dashboard_objects_compile_to_cron():
+    assert compile_schedule('{"frequency": "daily", "time": "09:30"}').cron == '30 9 * * *'
+    assert compile_schedule({'frequency': 'weekly', 'time': '08:00', 'day_of_week': '7'}).cron == '0 8 * * 0'
+    assert compile_schedule({'frequency': 'monthly', 'time': '07:05', 'day_of_month': '15'}).cron == '5 7 15 * *'
+    assert compile_schedule('').cron == '0 9 * * *'
+
+
+def test_equivalent_schedules_share_the_canonical_form():
+    dashboard = compile_schedule({'frequency': 'weekly', 'time': '09:00', 'day_of_week': '1'})
+    assert dashboard.canonical == compile_schedule('0 9 * * MON').canonical
+    assert dashboard.canonical == compile_schedule({'cron': '0 9 * * 1', 'timezone': 'UTC'}).canonical
+    assert dashboard.canonical != compile_schedule({'cron': '0 9 * * 1', 'timezone': 'Europe/Rome'}).canonical
+
+
+def test_day_of_month_or_day_of_week_when_both_are_restricted():
+    schedule = compile_schedule('0 12 13 * 5')
+    # 2025-06-06 is a Friday, 2025-06-13 both: each fires once
+    assert schedule.next_run_at(datetime(2025, 6, 1)) == datetime(2025, 6, 6, 12, 0)
+    assert schedule.next_run_at(datetime(2025, 6, 12, 13)) == datetime(2025, 6, 13, 12, 0)
+    assert schedule.next_run_at(datetime(2025, 6, 13, 13)) == datetime(2025, 6, 20, 12, 0)
+
+
+def test_a_stepped_star_day_field_still_restricts_the_days():
+    schedule = compile_schedule('0 9 */2 * 1')
+    # Mondays on odd days only (the 3rd, 17th...), not every Monday
+    runs = []
+    start = datetime(2025, 11, 1)
+    for _ in range(4):
+        start = schedule.next_run_at(start)
+        runs.append(start)
+        start += timedelta(minutes=1)
+    assert runs == [datetime(2025, 11, 3, 9), datetime(2025, 11, 17, 9), datetime(2025, 12, 1, 9),
+                    datetime(2025, 12, 15, 9)]
+
+
+@pytest.mark.parametrize('cron', ['0 9 */2 * 1', '0 9 1-31 * 1', '0 9 * * *', '0 9 1 * *', '0 9 15 * */2',
+                                  '0 9 */10,4 * 1-5', '0 9 */7 * *', '0 9 * * */7', '0 9 ? * 7', '0 9 13 * 5'])
+def test_the_canonical_form_compiles_back_to_the_same_schedule(cron):
+    schedule = compile_schedule({'cron': cron, 'timezone': 'Europe/Rome'})
+    recompiled = compile_schedule(schedule.canonical)
+    assert recompiled.canonical == schedule.canonical
+    start = datetime(2025, 1, 1)
+    for _ in range(60):
+        run_at = schedule.next_run_at(start)
+        assert recompiled.next_run_at(start) == run_at
+        start = run_at + timedelta(minutes=1)
+
+
+def test_schedules_firing_differently_have_different_canonical_forms():
+    assert compile_schedule('0 9 */2 * 1').canonical != compile_schedule('0 9 1-31/2 * 1').canonical
+    assert compile_schedule('0 9 */2 * 1').cron == '0 9 */2 * 1'
+    assert compile_schedule('0 9 */10,4 * 1-5').cron == '0 9 */31,4,11,21,31 * 1-5'
+
+
+def test_leap_day_waits_for_the_next_leap_year():
+    schedule = compile_schedule('0 0 29 2 *')
+    assert schedule.next_run_at(datetime(2025, 3, 1)) == datetime(2028, 2, 29, 0, 0)
+
+
+def test_daylight_saving_changes():
+    schedule = compile_schedule({'cron': '30 2 * * *', 'timezone': 'Europe/Rome'})
+    # 2025-03-30 02:30 does not exist in Rome: the run is shifted by the change, to 03:30 (01:30 UTC)
+    assert schedule.next_run_at(datetime(2025, 3, 29, 12)) == datetime(2025, 3, 30, 1, 30)
+    # 2025-10-26 02:30 happens twice: only the first one fires
+    first = schedule.next_run_at(datetime(2025, 10, 25, 12))
+    assert first == datetime(2025, 10, 26, 0, 30)
+    assert schedule.next_run_at(first + timedelta(minutes=1)) == datetime(2025, 10, 27, 1, 30)
+    assert schedule.fires_at(first) and not schedule.fires_at(first + timedelta(hours=1))
+
+
+@pytest.mark.parametrize('report_schedule, message', [
+    ('0 9 * *', '5 fields'),
+    ('61 9 * * *', 'out of range'),
+    ('0 9 * * MON/x', 'invalid cron step'),
+    ('{"frequency": "hourly"}', 'frequency'),
+    ('{"frequency": "daily", "time": "9"}', 'HH:MM'),
+    ('{"frequency": "weekly", "day_of_week": "8"}', 'day_of_week'),
+    ('{"frequency": "monthly", "day_of_month": "32"}', 'day_of_month'),
+    ('{"cron": "0 9 * * *", "timezone": "Mars/Olympus"}', 'unknown timezone'),
+    ('{"frequency": ', 'not valid JSON'),
+])
+def test_invalid_schedules(report_schedule, message):
+    with pytest.raises(ScheduleError, match=message):
+        compile_schedule(report_schedule, strict=True)
+
+
+def test_functions_share_the_engine():
+    import api
+    import report_generator
+
+    assert api.compile_schedule is schedule_engine.compile_schedule
+    assert report_generator.compile_schedule is schedule_engine.compile_schedule
+    assert report_generator.ScheduleError is api.ScheduleError is ScheduleError
+
+
+def test_stored_schedules_with_an_unreadable_time_fall_back_to_nine():
+    stored = '{"frequency": "daily", "time": "9.30"}'
+    assert compile_schedule(stored).cron == '0 9 * * *'
+    with pytest.raises(ScheduleError, match='HH:MM'):
+        compile_schedule(stored, strict=True)
+
+
+def test_dashboard_sunday_is_zero():
+    assert compile_schedule({'frequency': 'weekly', 'time': '10:00', 'day_of_week': 0}, strict=True).cron == '0 10 * * 0'
+    assert compile_schedule({'frequency': 'weekly', 'time': '10:00', 'day_of_week': '7'}).cron == '0 10 * * 0'
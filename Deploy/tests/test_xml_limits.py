@@ -0,0 +1,47 @@
+"""Caps of the streaming XML engine: truncated reports, and the error passed through unchanged"""
+import pytest
+
+import report_generator as rg
+
+TOO_DEEP = '<a>' * (rg.MAX_XML_DEPTH + 1) + '</a>' * (rg.MAX_XML_DEPTH + 1)
+
+
+def acd_export(extra=''):
+    record = ('<date__groupsobjects><period>{period}</period><type>{type}</type><name>Coda 1</name>'
+              '<incoming_total>5</incoming_total><incoming_answered>4</incoming_answered>'
+              '<incoming_service_level>80</incoming_service_level></date__groupsobjects>')
+    return ('<?xml version="1.0" encoding="UTF-8"?><report>'
+            + record.format(period='Total', type='total') + record.format(period='13/11/2025', type='group')
+            + extra + '</report>')
+
+
+@pytest.mark.parametrize('parse', [rg.parse_acd_xml, rg.parse_user_xml, rg.parse_ivr_xml, rg.parse_huntgroup_xml,
+                                   rg.parse_rulebased_xml, rg.parse_trunk_xml, rg.parse_ddi_xml, rg.parse_queue_xml])
+def test_parse_functions_let_the_limit_error_through(parse):
+    with pytest.raises(rg.XmlLimitExceeded) as error:
+        parse(acd_export(TOO_DEEP))
+    assert error.value.limit == 'depth'
+
+
+def test_a_capped_export_without_records_raises_the_limit_error():
+    with pytest.raises(rg.XmlLimitExceeded):
+        rg.parse_xml_report('<report>' + TOO_DEEP + '</report>')
+    with pytest.raises(rg.XmlLimitExceeded):
+        rg.parse_xml_summary('<report>' + TOO_DEEP + '</report>')
+
+
+def test_a_capped_export_with_records_is_reported_as_truncated():
+    parsed_data = rg.parse_xml_report(acd_export(TOO_DEEP))
+    assert parsed_data['report_type'] == 'acd'
+    assert parsed_data['truncated']['limit'] == 'depth'
+
+
+def test_the_bytes_limit_counts_utf8_bytes():
+    document = acd_export('<!-- ' + 'è' * 400 + ' -->')
+    size = len(document.encode('utf-8'))
+    assert size > len(document)
+    assert len(list(rg.iter_groupsobjects(document, max_bytes=size))) == 2
+    with pytest.raises(rg.XmlLimitExceeded) as error:
+        list(rg.iter_groupsobjects(document, max_bytes=size - 1))
+    assert error.value.limit == 'bytes'
+    assert len(list(rg.iter_groupsobjects(document.encode('utf-8'), max_bytes=size))) == 2